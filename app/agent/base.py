@@ -1,7 +1,8 @@
 import asyncio
 from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
-from typing import List, Optional
+from itertools import islice
+from typing import Deque, Iterable, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
@@ -131,6 +132,7 @@ class BaseAgent(BaseModel, ABC):
         while step < self.max_steps and self.state != AgentState.FINISHED:
             try:
                 logger.info(f"Step {step} of {self.max_steps}")
+                self.memory.step += 1
 
                 # 检查是否被取消
                 try:
@@ -208,31 +210,33 @@ class BaseAgent(BaseModel, ABC):
 
     def is_stuck(self) -> bool:
         """Check if the agent is stuck in a loop by detecting duplicate content"""
-        if len(self.memory.messages) < 2:
+        messages = self.memory.messages
+        if len(messages) < 2:
             return False
 
-        last_message = self.memory.messages[-1]
+        last_message = messages[-1]
         if not last_message.content:
             return False
 
         # Count identical content occurrences
         duplicate_count = sum(
             1
-            for msg in reversed(self.memory.messages[:-1])
+            for msg in islice(reversed(messages), 1, None)
             if msg.role == "assistant" and msg.content == last_message.content
         )
 
         return duplicate_count >= self.duplicate_threshold
 
     @property
-    def messages(self) -> List[Message]:
-        """Retrieve a list of messages from the agent's memory."""
+    def messages(self) -> Deque[Message]:
+        """The hot window of the agent's memory (a deque, not a copy)."""
         return self.memory.messages
 
     @messages.setter
-    def messages(self, value: List[Message]):
-        """Set the list of messages in the agent's memory."""
-        self.memory.messages = value
+    def messages(self, value: Iterable[Message]):
+        """Replace the hot window of the agent's memory."""
+        if value is not self.memory.messages:
+            self.memory.replace(value)
 
     def format_messages(self) -> str:
         format_str = ""
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, Optional
 from pydantic import Field, model_validator
 
 from app.agent.toolcall import ToolCallAgent
+from app.config import config
 from app.logger import logger
 from app.prompt.browser import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import Message, ToolChoice
@@ -64,6 +65,8 @@ class BrowserContextHelper:
                 )
                 self.agent.memory.add_message(image_message)
                 self._current_base64_image = None  # Consume the image after adding
+                # Older screenshots are resent on every call; keep only the latest
+                self.agent.memory.drop_old_images(config.screenshot.keep_latest)
 
         return NEXT_STEP_PROMPT.format(
             url_placeholder=url_info,
@@ -122,3 +125,4 @@ class BrowserAgent(ToolCallAgent):
     async def cleanup(self):
         """Clean up browser agent resources by calling parent cleanup."""
         await self.browser_context_helper.cleanup_browser()
+        self.memory.close()
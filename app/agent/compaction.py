@@ -0,0 +1,183 @@
+"""Background compaction of agent memory into a running summary."""
+import asyncio
+from typing import List, Optional, Tuple
+
+from app.config import config
+from app.llm import LLM
+from app.llm_router import Purpose, get_llm_router
+from app.logger import logger
+from app.prompt.compaction import (
+    COMPACTION_SYSTEM_PROMPT,
+    COMPACTION_USER_PROMPT,
+    SUMMARY_HEADER,
+)
+from app.schema import Memory, Message
+from app.truncation import group_units, suffix_start
+
+
+class MemoryCompactor:
+    """Folds older turns of an agent's memory into one running summary message.
+
+    Once the hot window is estimated above `threshold_tokens`, every turn
+    except the original request and the most recent `keep_recent_tokens`
+    is summarized by an LLM call that runs in the background while the
+    agent keeps stepping; the result is swapped in at the start of a later
+    step. Turns are folded whole, so a tool call is never separated from its
+    results. Folded messages stay in the memory archive.
+    """
+
+    def __init__(
+        self,
+        threshold_tokens: int = 60000,
+        keep_recent_tokens: int = 20000,
+        summary_max_tokens: int = 1024,
+        transcript_chars: int = 2000,
+    ):
+        self.threshold_tokens = threshold_tokens
+        self.keep_recent_tokens = keep_recent_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.transcript_chars = transcript_chars
+        self.compactions = 0
+        self._task: Optional[asyncio.Task] = None
+        self._folded: List[Message] = []
+        self._head: Optional[Message] = None
+        self._summary: Optional[Message] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def estimate_tokens(self, memory: Memory, llm: LLM) -> int:
+        return llm.count_message_tokens([m.to_dict() for m in memory.messages])
+
+    def maybe_compact(self, memory: Memory, llm: LLM) -> bool:
+        """
+        Apply a finished compaction, then start a new one if needed.
+
+        Never waits for the summarizer. Returns True if a summary was applied.
+        A failed compaction is retried at the next step at the earliest.
+        """
+        finished = self._task is not None and self._task.done()
+        applied = self._apply(memory)
+        if self._task is not None or (finished and not applied):
+            return applied
+        if self.estimate_tokens(memory, llm) <= self.threshold_tokens:
+            return applied
+
+        head, fold = self._plan(memory, llm)
+        if not fold:
+            return applied
+        self._head, self._folded = head, fold
+        previous = self._summary.content if self._summary else None
+        self._task = asyncio.create_task(self._summarize(previous, fold, llm))
+        logger.info(f"Compacting {len(fold)} earlier messages in the background")
+        return applied
+
+    def _plan(
+        self, memory: Memory, llm: LLM
+    ) -> Tuple[Optional[Message], List[Message]]:
+        """Pick the pinned request and the whole turns to fold."""
+        messages = list(memory.messages)
+        dicts = [m.to_dict() for m in messages]
+        units = group_units(dicts)
+        unit_tokens = [
+            sum(llm.token_counter.count_single_message(dicts[i]) for i in unit)
+            for unit in units
+        ]
+
+        head = None
+        first = messages[0] if messages else None
+        if first is not None and first.role == "user" and first is not self._summary:
+            head = first
+        start = max(
+            suffix_start(unit_tokens, self.keep_recent_tokens), 1 if head else 0
+        )
+        fold = [
+            messages[i]
+            for unit in units[1 if head else 0 : start]
+            for i in unit
+            if messages[i] is not self._summary
+        ]
+        return head, fold
+
+    def _transcript(self, messages: List[Message]) -> str:
+        lines = []
+        for message in messages:
+            if message.tool_calls:
+                calls = ", ".join(
+                    f"{call.function.name}({call.function.arguments})"
+                    for call in message.tool_calls
+                )
+                text = f"{message.content or ''} [called {calls}]".strip()
+            else:
+                text = message.content or ""
+            if len(text) > self.transcript_chars:
+                text = text[: self.transcript_chars] + " ...[truncated]"
+            name = f" {message.name}" if message.name else ""
+            lines.append(f"{message.role}{name}: {text}")
+        return "\n".join(lines)
+
+    async def _summarize(
+        self, previous: Optional[str], fold: List[Message], llm: LLM
+    ) -> Optional[str]:
+        prompt = COMPACTION_USER_PROMPT.format(
+            previous_summary=previous or "(none)",
+            transcript=self._transcript(fold),
+        )
+        response = await get_llm_router().ask(
+            Purpose.COMPACT,
+            messages=[Message.user_message(prompt)],
+            system_msgs=[
+                Message.system_message(
+                    COMPACTION_SYSTEM_PROMPT.format(max_tokens=self.summary_max_tokens)
+                )
+            ],
+            default=llm,
+        )
+        content = getattr(response, "content", response)
+        return content.strip() if content else None
+
+    def _apply(self, memory: Memory) -> bool:
+        if self._task is None or not self._task.done():
+            return False
+        task, self._task = self._task, None
+        folded, self._folded = {id(m) for m in self._folded}, []
+        try:
+            text = task.result()
+        except asyncio.CancelledError:
+            return False
+        except Exception as e:
+            logger.warning(f"Memory compaction failed, keeping full history: {e}")
+            return False
+        if not text:
+            return False
+
+        summary = Message.user_message(f"{SUMMARY_HEADER}\n{text}")
+        kept = [
+            m for m in memory.messages if id(m) not in folded and m is not self._summary
+        ]
+        position = 1 if kept and kept[0] is self._head else 0
+        memory.replace(kept[:position] + [summary] + kept[position:])
+        self._summary = summary
+        self.compactions += 1
+        logger.info(f"Folded {len(folded)} messages into the running summary")
+        return True
+
+    def cancel(self) -> None:
+        """Stop a running compaction (e.g. when the agent is cleaned up)."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._folded = []
+
+
+def create_compactor() -> Optional[MemoryCompactor]:
+    """A compactor configured by [compaction], or None if compaction is off."""
+    settings = config.compaction
+    if not settings.enabled:
+        return None
+    return MemoryCompactor(
+        threshold_tokens=settings.threshold_tokens,
+        keep_recent_tokens=settings.keep_recent_tokens,
+        summary_max_tokens=settings.summary_max_tokens,
+    )
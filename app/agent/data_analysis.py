@@ -1,4 +1,6 @@
-from pydantic import Field
+import uuid
+
+from pydantic import Field, model_validator
 
 from app.agent.toolcall import ToolCallAgent
 from app.config import config
@@ -7,6 +9,7 @@ from app.tool import Terminate, ToolCollection
 from app.tool.chart_visualization.chart_prepare import VisualizationPrepare
 from app.tool.chart_visualization.data_visualization import DataVisualization
 from app.tool.chart_visualization.python_execute import NormalPythonExecute
+from app.tool.python_execute import PythonExecute
 
 
 class DataAnalysis(ToolCallAgent):
@@ -35,3 +38,12 @@ class DataAnalysis(ToolCallAgent):
             Terminate(),
         )
     )
+
+    @model_validator(mode="after")
+    def bind_python_session(self) -> "DataAnalysis":
+        """Share one persistent interpreter between the agent's Python tools."""
+        session_id = f"{self.name}-{uuid.uuid4().hex[:8]}"
+        for tool in self.available_tools.tools:
+            if isinstance(tool, PythonExecute):
+                tool.session_id = session_id
+        return self
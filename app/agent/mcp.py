@@ -174,6 +174,7 @@ class MCPAgent(ToolCallAgent):
         if self.mcp_clients.sessions:
             await self.mcp_clients.disconnect()
             logger.info("MCP connection closed")
+        self.memory.close()
 
     async def run(self, request: Optional[str] = None) -> str:
         """Run the agent with cleanup when done."""
@@ -6,6 +6,7 @@ from pydantic import Field
 from app.agent.base import BaseAgent
 from app.config import config
 from app.llm import LLM
+from app.llm_router import Purpose, get_llm_router
 from app.logger import logger
 from app.prompt.react import SUMMARIZE_PROMPT
 from app.schema import AgentState, Memory, Message
@@ -47,12 +48,12 @@ class ReActAgent(BaseAgent, ABC):
             request=request, directory=config.workspace_root
         )
         user_msg = Message.user_message(summarize_prompt)
-        self.messages += [user_msg]
+        self.memory.add_message(user_msg)
 
         try:
             # Get response with tool options
-            response = await self.llm.ask(
-                messages=self.messages,
+            response = await get_llm_router().ask(
+                Purpose.SUMMARY, messages=self.messages, default=self.llm
             )
             return response
         except Exception as e:
@@ -1,13 +1,19 @@
 import asyncio
 import json
-from typing import Any, List, Optional, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 
 from pydantic import Field
 
+from app.agent.compaction import MemoryCompactor, create_compactor
 from app.agent.react import ReActAgent
+from app.config import config
+from app.events import AgentEventType, emit
 from app.exceptions import TokenLimitExceeded
+from app.llm import StreamDelta
+from app.llm_router import Purpose, get_llm_router
 from app.logger import logger
 from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
+from app.retrieval import get_retrieval_index, get_retrieval_source
 from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
 
@@ -30,20 +36,54 @@ class ToolCallAgent(ReActAgent):
     special_tool_names: List[str] = Field(default_factory=lambda: [Terminate().name])
 
     tool_calls: List[ToolCall] = Field(default_factory=list)
-    _current_base64_image: Optional[str] = None
+    _tool_call_images: Dict[str, str] = {}
 
     max_steps: int = 30
     max_observe: Optional[Union[int, bool]] = None
 
+    # Opt-in concurrent execution of independent tool calls within one step
+    parallel_tool_calls: bool = False
+    max_tool_concurrency: int = 4
+
+    # Route of think() calls; unrouted purposes use self.llm
+    llm_purpose: str = Purpose.MAIN.value
+
+    # Folds older turns into a running summary in the background (None: off)
+    compactor: Optional[MemoryCompactor] = Field(default_factory=create_compactor)
+
+    # Stream the think() completion and forward deltas as they arrive
+    stream_think: bool = False
+    on_think_delta: Optional[Callable[[StreamDelta], Awaitable[None]]] = None
+
+    async def _ask_tool(self, **kwargs):
+        """Ask the LLM for tool calls, streaming deltas to on_think_delta if enabled"""
+        router = get_llm_router()
+        if not self.stream_think:
+            return await router.ask_tool(self.llm_purpose, default=self.llm, **kwargs)
+
+        # Falls back to the route's next model only before the first delta
+        response = None
+        async for delta in router.ask_tool_stream(
+            self.llm_purpose, default=self.llm, **kwargs
+        ):
+            if delta.type == "message":
+                response = delta.message
+            elif self.on_think_delta:
+                await self.on_think_delta(delta)
+        return response
+
     async def think(self) -> (bool, str):
         """Process current state and decide next actions using tools"""
+        if self.compactor:
+            self.compactor.maybe_compact(self.memory, self.llm)
+
         if self.next_step_prompt:
             user_msg = Message.user_message(self.next_step_prompt)
-            self.messages += [user_msg]
+            self.memory.add_message(user_msg)
 
         try:
             # Get response with tool options
-            response = await self.llm.ask_tool(
+            response = await self._ask_tool(
                 messages=self.messages,
                 system_msgs=(
                     [Message.system_message(self.system_prompt)]
@@ -61,12 +101,10 @@ class ToolCallAgent(ReActAgent):
         except ValueError:
             raise
         except Exception as e:
-            # Check if this is a RetryError containing TokenLimitExceeded
-            if hasattr(e, "__cause__") and isinstance(e.__cause__, TokenLimitExceeded):
-                token_limit_error = e.__cause__
-                logger.error(
-                    f"🚨 Token limit error (from RetryError): {token_limit_error}"
-                )
+            # TokenLimitExceeded is raised as-is, or wrapped in a RetryError
+            token_limit_error = e if isinstance(e, TokenLimitExceeded) else e.__cause__
+            if isinstance(token_limit_error, TokenLimitExceeded):
+                logger.error(f"🚨 Token limit error: {token_limit_error}")
                 self.memory.add_message(
                     Message.assistant_message(
                         f"Maximum token limit reached, cannot continue execution: {str(token_limit_error)}"
@@ -82,9 +120,13 @@ class ToolCallAgent(ReActAgent):
         content = response.content
         if response and response.reasoning_content:
             logger.info(f"✨ {self.name}'s thoughts: {response.reasoning_content}")
+            await emit(
+                AgentEventType.THINK, response.reasoning_content, agent=self.name
+            )
 
         if content:
             logger.info(f"Act content: {content}")
+            await emit(AgentEventType.MESSAGE, content, agent=self.name)
         # Log response info
         logger.info(
             f"🛠️ {self.name} selected {len(tool_calls) if tool_calls else 0} tools to use"
@@ -143,35 +185,97 @@ class ToolCallAgent(ReActAgent):
             # Return last message content if no tool calls
             return self.messages[-1].content or "No content or commands to execute"
 
+        self._tool_call_images = {}
         results = []
-        for command in self.tool_calls:
-            # Reset base64_image for each tool call
-            self._current_base64_image = None
+        if self.parallel_tool_calls and len(self.tool_calls) > 1:
+            try:
+                outputs = await self.execute_tools_concurrently(self.tool_calls)
+            except asyncio.CancelledError:
+                logger.info("Tool execution was cancelled")
+                raise
+            for command, result in zip(self.tool_calls, outputs):
+                results.append(self._record_tool_result(command, result))
+            return "\n\n".join(results)
 
+        for command in self.tool_calls:
             try:
                 result = await self.execute_tool(command)
             except asyncio.CancelledError:
                 logger.info("Tool execution was cancelled")
                 raise
 
-            if self.max_observe:
-                # todo: 需要优化，压缩，网页统一格式
-                result = result[: self.max_observe]
+            results.append(self._record_tool_result(command, result))
 
-            logger.info(
-                f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
-            )
+        return "\n\n".join(results)
+
+    def _record_tool_result(self, command: ToolCall, result: str) -> str:
+        """Trim a tool result and add it to memory as a tool message"""
+        if self.max_observe:
+            # todo: 需要优化，压缩，网页统一格式
+            result = result[: self.max_observe]
+
+        logger.info(
+            f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
+        )
 
-            # Add tool response to memory
-            tool_msg = Message.tool_message(
-                content=result,
-                name=command.function.name,
-                arguments=command.function.arguments,
+        # Add tool response to memory
+        tool_msg = Message.tool_message(
+            content=result,
+            name=command.function.name,
+            tool_call_id=command.id,
+            base64_image=self._tool_call_images.pop(command.id, None),
+        )
+        self.memory.add_message(tool_msg)
+
+        # Make the output findable by later tasks
+        index = get_retrieval_index()
+        if index is not None and config.retrieval.index_tool_outputs:
+            index.add(
+                "tool",
+                f"{command.function.name}: {result}",
+                source=get_retrieval_source(),
+                ref=command.function.name,
             )
-            self.memory.add_message(tool_msg)
-            results.append(result)
+        return result
+
+    def _is_serial_call(self, command: ToolCall) -> bool:
+        """Check if a tool call must run alone rather than alongside others"""
+        name = command.function.name if command.function else ""
+        tool = self.available_tools.get_tool(name)
+        return (
+            tool is None
+            or getattr(tool, "serial_only", False)
+            or self._is_special_tool(name)
+        )
 
-        return "\n\n".join(results)
+    async def execute_tools_concurrently(self, commands: List[ToolCall]) -> List[str]:
+        """
+        Execute tool calls concurrently, returning results in call order.
+
+        Consecutive calls to concurrency-safe tools run together with
+        asyncio.gather, bounded by max_tool_concurrency. Calls to serial-only
+        or special tools run alone, after every earlier call has finished and
+        before any later one starts.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.max_tool_concurrency))
+
+        async def run(command: ToolCall) -> str:
+            async with semaphore:
+                return await self.execute_tool(command)
+
+        results: List[str] = []
+        batch: List[ToolCall] = []
+        for command in commands:
+            if not self._is_serial_call(command):
+                batch.append(command)
+                continue
+            if batch:
+                results.extend(await asyncio.gather(*(run(c) for c in batch)))
+                batch = []
+            results.append(await self.execute_tool(command))
+        if batch:
+            results.extend(await asyncio.gather(*(run(c) for c in batch)))
+        return results
 
     async def execute_tool(self, command: ToolCall) -> str:
         """Execute a single tool call with robust error handling"""
@@ -187,8 +291,24 @@ class ToolCallAgent(ReActAgent):
             args = json.loads(command.function.arguments or "{}")
 
             # Execute the tool
-            logger.info(f"🔧 Activating tool: '{name}', args: {args}")
+            activating = f"🔧 Activating tool: '{name}', args: {args}"
+            logger.info(activating)
+            await emit(
+                AgentEventType.TOOL_START,
+                activating,
+                agent=self.name,
+                tool=name,
+                args=args,
+                tool_call_id=command.id,
+            )
             result = await self.available_tools.execute(name=name, tool_input=args)
+            await emit(
+                AgentEventType.TOOL_END,
+                str(result),
+                agent=self.name,
+                tool=name,
+                tool_call_id=command.id,
+            )
 
             # 特殊处理 ask_human 工具 - 设置标志让 agent 暂停执行
             if (
@@ -213,7 +333,7 @@ class ToolCallAgent(ReActAgent):
             # Check if result is a ToolResult with base64_image
             if hasattr(result, "base64_image") and result.base64_image:
                 # Store the base64_image for later use in tool_message
-                self._current_base64_image = result.base64_image
+                self._tool_call_images[command.id] = result.base64_image
 
             # Format result for display (standard case)
             observation = (
@@ -225,13 +345,21 @@ class ToolCallAgent(ReActAgent):
             return observation
         except json.JSONDecodeError:
             error_msg = f"Error parsing arguments for {name}: Invalid JSON format"
-            logger.error(
-                f"📝 Oops! The arguments for '{name}' don't make sense - invalid JSON, arguments:{command.function.arguments}"
-            )
+            oops = f"📝 Oops! The arguments for '{name}' don't make sense - invalid JSON, arguments:{command.function.arguments}"
+            logger.error(oops)
+            await emit(AgentEventType.ERROR, oops, agent=self.name, tool=name)
             return f"Error: {error_msg}"
         except Exception as e:
             error_msg = f"⚠️ Tool '{name}' encountered a problem: {str(e)}"
             logger.exception(error_msg)
+            await emit(
+                AgentEventType.TOOL_END,
+                error_msg,
+                agent=self.name,
+                tool=name,
+                tool_call_id=command.id,
+                error=True,
+            )
             return f"Error: {error_msg}"
 
     async def _handle_special_tool(self, name: str, result: Any, **kwargs):
@@ -264,6 +392,8 @@ class ToolCallAgent(ReActAgent):
     async def cleanup(self):
         """Clean up resources used by the agent's tools."""
         logger.info(f"🧹 Cleaning up resources for agent '{self.name}'...")
+        if self.compactor:
+            self.compactor.cancel()
         for tool_name, tool_instance in self.available_tools.tool_map.items():
             if hasattr(tool_instance, "cleanup") and asyncio.iscoroutinefunction(
                 tool_instance.cleanup
@@ -275,6 +405,7 @@ class ToolCallAgent(ReActAgent):
                     logger.error(
                         f"🚨 Error cleaning up tool '{tool_name}': {e}", exc_info=True
                     )
+        self.memory.close()
         logger.info(f"✨ Cleanup complete for agent '{self.name}'.")
 
     async def run(self, request: Optional[str] = None) -> str:
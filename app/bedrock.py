@@ -1,16 +1,17 @@
+import asyncio
 import json
 import sys
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Literal, Optional
+from typing import AsyncIterator, Dict, List, Literal, Optional
 
 import boto3
 
 
-# Global variables to track the current tool use ID across function calls
-# Tmp solution
-CURRENT_TOOLUSE_ID = None
+# boto3 is blocking; requests run on this many dedicated threads
+BEDROCK_MAX_WORKERS = 16
 
 
 # Class to handle OpenAI-style response formatting
@@ -34,13 +35,138 @@ class OpenAIResponse:
         return data
 
 
+# Async iterator over a Bedrock event stream, converted to OpenAI-style chunks
+class BedrockStream:
+    def __init__(self, executor: ThreadPoolExecutor, stream):
+        self._executor = executor
+        self._stream = stream
+        self._closed = False
+
+    def __aiter__(self) -> AsyncIterator[OpenAIResponse]:
+        return self._chunks()
+
+    async def _events(self) -> AsyncIterator[dict]:
+        # The blocking EventStream is read on a worker thread and handed over
+        # through a queue, so the event loop never waits on the network
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+        def pump():
+            try:
+                for event in self._stream or []:
+                    if self._closed:
+                        break
+                    put(event)
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        loop.run_in_executor(self._executor, pump)
+        try:
+            while (item := await queue.get()) is not done:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self._closed = True
+            close = getattr(self._stream, "close", None)
+            if close:
+                close()
+
+    @staticmethod
+    def _chunk(content=None, tool_calls=None, finish_reason=None, usage=None):
+        return OpenAIResponse(
+            {
+                "id": f"chatcmpl-{uuid.uuid4()}",
+                "created": int(time.time()),
+                "object": "chat.completion.chunk",
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": content, "tool_calls": tool_calls},
+                        "finish_reason": finish_reason,
+                    }
+                ],
+                "usage": usage,
+            }
+        )
+
+    async def _chunks(self) -> AsyncIterator[OpenAIResponse]:
+        tool_indexes: Dict[int, int] = {}  # contentBlockIndex -> tool call index
+        finish_reason = None
+        async for event in self._events():
+            if "contentBlockStart" in event:
+                start = event["contentBlockStart"]
+                tool_use = start.get("start", {}).get("toolUse")
+                if tool_use:
+                    index = tool_indexes.setdefault(
+                        start.get("contentBlockIndex", 0), len(tool_indexes)
+                    )
+                    yield self._chunk(
+                        tool_calls=[
+                            {
+                                "index": index,
+                                "id": tool_use["toolUseId"],
+                                "type": "function",
+                                "function": {"name": tool_use["name"], "arguments": ""},
+                            }
+                        ]
+                    )
+            elif "contentBlockDelta" in event:
+                block = event["contentBlockDelta"]
+                delta = block.get("delta", {})
+                if delta.get("text"):
+                    yield self._chunk(content=delta["text"])
+                elif "toolUse" in delta:
+                    index = tool_indexes.setdefault(
+                        block.get("contentBlockIndex", 0), len(tool_indexes)
+                    )
+                    yield self._chunk(
+                        tool_calls=[
+                            {
+                                "index": index,
+                                "id": None,
+                                "type": "function",
+                                "function": {
+                                    "name": None,
+                                    "arguments": delta["toolUse"].get("input", ""),
+                                },
+                            }
+                        ]
+                    )
+            elif "messageStop" in event:
+                finish_reason = event["messageStop"].get("stopReason", "end_turn")
+            elif "metadata" in event:
+                usage = event["metadata"].get("usage", {})
+                # Usage rides on the last chunk, since some callers index choices[0]
+                yield self._chunk(
+                    finish_reason=finish_reason or "end_turn",
+                    usage={
+                        "prompt_tokens": usage.get("inputTokens", 0),
+                        "completion_tokens": usage.get("outputTokens", 0),
+                        "total_tokens": usage.get("totalTokens", 0),
+                    },
+                )
+                finish_reason = None
+        if finish_reason:
+            yield self._chunk(finish_reason=finish_reason)
+
+
 # Main client class for interacting with Amazon Bedrock
 class BedrockClient:
-    def __init__(self):
+    def __init__(self, max_workers: int = BEDROCK_MAX_WORKERS):
         # Initialize Bedrock client, you need to configure AWS env first
         try:
             self.client = boto3.client("bedrock-runtime")
-            self.chat = Chat(self.client)
+            self.chat = Chat(self.client, max_workers)
         except Exception as e:
             print(f"Error initializing Bedrock client: {e}")
             sys.exit(1)
@@ -48,14 +174,17 @@ class BedrockClient:
 
 # Chat interface class
 class Chat:
-    def __init__(self, client):
-        self.completions = ChatCompletions(client)
+    def __init__(self, client, max_workers: int = BEDROCK_MAX_WORKERS):
+        self.completions = ChatCompletions(client, max_workers)
 
 
 # Core class handling chat completions functionality
 class ChatCompletions:
-    def __init__(self, client):
+    def __init__(self, client, max_workers: int = BEDROCK_MAX_WORKERS):
         self.client = client
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bedrock"
+        )
 
     def _convert_openai_tools_to_bedrock_format(self, tools):
         # Convert OpenAI function calling format to Bedrock tool format
@@ -87,6 +216,8 @@ class ChatCompletions:
         # Convert OpenAI message format to Bedrock message format
         bedrock_messages = []
         system_prompt = []
+        # Ids of the last assistant tool calls, for tool messages without tool_call_id
+        pending_tool_use_ids = []
         for message in messages:
             if message.get("role") == "system":
                 system_prompt = [{"text": message.get("content")}]
@@ -101,32 +232,39 @@ class ChatCompletions:
                     "role": "assistant",
                     "content": [{"text": message.get("content")}],
                 }
-                openai_tool_calls = message.get("tool_calls", [])
-                if openai_tool_calls:
+                openai_tool_calls = message.get("tool_calls") or []
+                pending_tool_use_ids = []
+                for tool_call in openai_tool_calls:
                     bedrock_tool_use = {
-                        "toolUseId": openai_tool_calls[0]["id"],
-                        "name": openai_tool_calls[0]["function"]["name"],
-                        "input": json.loads(
-                            openai_tool_calls[0]["function"]["arguments"]
-                        ),
+                        "toolUseId": tool_call["id"],
+                        "name": tool_call["function"]["name"],
+                        "input": json.loads(tool_call["function"]["arguments"] or "{}"),
                     }
                     bedrock_message["content"].append({"toolUse": bedrock_tool_use})
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = openai_tool_calls[0]["id"]
+                    pending_tool_use_ids.append(tool_call["id"])
                 bedrock_messages.append(bedrock_message)
             elif message.get("role") == "tool":
-                bedrock_message = {
-                    "role": "user",
-                    "content": [
-                        {
-                            "toolResult": {
-                                "toolUseId": CURRENT_TOOLUSE_ID,
-                                "content": [{"text": message.get("content")}],
-                            }
-                        }
-                    ],
+                tool_use_id = message.get("tool_call_id")
+                if tool_use_id in pending_tool_use_ids:
+                    pending_tool_use_ids.remove(tool_use_id)
+                elif pending_tool_use_ids:
+                    tool_use_id = pending_tool_use_ids.pop(0)
+                tool_result = {
+                    "toolResult": {
+                        "toolUseId": tool_use_id,
+                        "content": [{"text": message.get("content")}],
+                    }
                 }
-                bedrock_messages.append(bedrock_message)
+                previous = bedrock_messages[-1] if bedrock_messages else None
+                if (
+                    previous
+                    and previous["role"] == "user"
+                    and all("toolResult" in block for block in previous["content"])
+                ):
+                    # Results of parallel tool calls go into a single user turn
+                    previous["content"].append(tool_result)
+                else:
+                    bedrock_messages.append({"role": "user", "content": [tool_result]})
             else:
                 raise ValueError(f"Invalid role: {message.get('role')}")
         return system_prompt, bedrock_messages
@@ -146,10 +284,8 @@ class ChatCompletions:
             for content_item in bedrock_response["output"]["message"]["content"]:
                 if content_item.get("toolUse"):
                     bedrock_tool_use = content_item["toolUse"]
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = bedrock_tool_use["toolUseId"]
                     openai_tool_call = {
-                        "id": CURRENT_TOOLUSE_ID,
+                        "id": bedrock_tool_use["toolUseId"],
                         "type": "function",
                         "function": {
                             "name": bedrock_tool_use["name"],
@@ -192,27 +328,43 @@ class ChatCompletions:
         }
         return OpenAIResponse(openai_format)
 
-    async def _invoke_bedrock(
+    def _converse_params(
         self,
         model: str,
         messages: List[Dict[str, str]],
         max_tokens: int,
         temperature: float,
         tools: Optional[List[dict]] = None,
-        tool_choice: Literal["none", "auto", "required"] = "auto",
-        **kwargs,
-    ) -> OpenAIResponse:
-        # Non-streaming invocation of Bedrock model
+    ) -> dict:
         (
             system_prompt,
             bedrock_messages,
         ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse(
-            modelId=model,
-            system=system_prompt,
-            messages=bedrock_messages,
-            inferenceConfig={"temperature": temperature, "maxTokens": max_tokens},
-            toolConfig={"tools": tools} if tools else None,
+        params = {
+            "modelId": model,
+            "system": system_prompt,
+            "messages": bedrock_messages,
+            "inferenceConfig": {"temperature": temperature, "maxTokens": max_tokens},
+        }
+        if tools:
+            params["toolConfig"] = {"tools": tools}
+        return params
+
+    async def _invoke_bedrock(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        tools: Optional[List[dict]] = None,
+        tool_choice: Literal["none", "auto", "required"] = "auto",
+        **kwargs,
+    ) -> OpenAIResponse:
+        # Non-streaming invocation of Bedrock model, off the event loop
+        params = self._converse_params(model, messages, max_tokens, temperature, tools)
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self.executor, lambda: self.client.converse(**params)
         )
         openai_response = self._convert_bedrock_response_to_openai_format(response)
         return openai_response
@@ -226,76 +378,14 @@ class ChatCompletions:
         tools: Optional[List[dict]] = None,
         tool_choice: Literal["none", "auto", "required"] = "auto",
         **kwargs,
-    ) -> OpenAIResponse:
-        # Streaming invocation of Bedrock model
-        (
-            system_prompt,
-            bedrock_messages,
-        ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse_stream(
-            modelId=model,
-            system=system_prompt,
-            messages=bedrock_messages,
-            inferenceConfig={"temperature": temperature, "maxTokens": max_tokens},
-            toolConfig={"tools": tools} if tools else None,
-        )
-
-        # Initialize response structure
-        bedrock_response = {
-            "output": {"message": {"role": "", "content": []}},
-            "stopReason": "",
-            "usage": {},
-            "metrics": {},
-        }
-        bedrock_response_text = ""
-        bedrock_response_tool_input = ""
-
-        # Process streaming response
-        stream = response.get("stream")
-        if stream:
-            for event in stream:
-                if event.get("messageStart", {}).get("role"):
-                    bedrock_response["output"]["message"]["role"] = event[
-                        "messageStart"
-                    ]["role"]
-                if event.get("contentBlockDelta", {}).get("delta", {}).get("text"):
-                    bedrock_response_text += event["contentBlockDelta"]["delta"]["text"]
-                    print(
-                        event["contentBlockDelta"]["delta"]["text"], end="", flush=True
-                    )
-                if event.get("contentBlockStop", {}).get("contentBlockIndex") == 0:
-                    bedrock_response["output"]["message"]["content"].append(
-                        {"text": bedrock_response_text}
-                    )
-                if event.get("contentBlockStart", {}).get("start", {}).get("toolUse"):
-                    bedrock_tool_use = event["contentBlockStart"]["start"]["toolUse"]
-                    tool_use = {
-                        "toolUseId": bedrock_tool_use["toolUseId"],
-                        "name": bedrock_tool_use["name"],
-                    }
-                    bedrock_response["output"]["message"]["content"].append(
-                        {"toolUse": tool_use}
-                    )
-                    global CURRENT_TOOLUSE_ID
-                    CURRENT_TOOLUSE_ID = bedrock_tool_use["toolUseId"]
-                if event.get("contentBlockDelta", {}).get("delta", {}).get("toolUse"):
-                    bedrock_response_tool_input += event["contentBlockDelta"]["delta"][
-                        "toolUse"
-                    ]["input"]
-                    print(
-                        event["contentBlockDelta"]["delta"]["toolUse"]["input"],
-                        end="",
-                        flush=True,
-                    )
-                if event.get("contentBlockStop", {}).get("contentBlockIndex") == 1:
-                    bedrock_response["output"]["message"]["content"][1]["toolUse"][
-                        "input"
-                    ] = json.loads(bedrock_response_tool_input)
-        print()
-        openai_response = self._convert_bedrock_response_to_openai_format(
-            bedrock_response
+    ) -> BedrockStream:
+        # Streaming invocation of Bedrock model; events are yielded as they arrive
+        params = self._converse_params(model, messages, max_tokens, temperature, tools)
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self.executor, lambda: self.client.converse_stream(**params)
         )
-        return openai_response
+        return BedrockStream(self.executor, response.get("stream"))
 
     def create(
         self,
@@ -26,8 +26,34 @@ class LLMSettings(BaseModel):
         description="Maximum input tokens to use across all requests (None for unlimited)",
     )
     temperature: float = Field(1.0, description="Sampling temperature")
+    truncation_strategy: str = Field(
+        "drop_oldest",
+        description="How to truncate history over max_input_tokens (drop_oldest, keep_pinned, summarize_middle)",
+    )
     api_type: str = Field(..., description="Azure, Openai, or Ollama")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
+    requests_per_minute: Optional[int] = Field(
+        None,
+        description="Client-side request rate limit for this model (None for unlimited)",
+    )
+    tokens_per_minute: Optional[int] = Field(
+        None,
+        description="Client-side token rate limit for this model (None for unlimited)",
+    )
+    fallback: Optional[str] = Field(
+        None,
+        description="Name of another [llm.*] config used when this endpoint's circuit is open or for hedging",
+    )
+    hedge_after: Optional[float] = Field(
+        None,
+        description="Seconds without an answer before also sending the request to the fallback (None disables hedging)",
+    )
+    input_price: Optional[float] = Field(
+        None, description="USD per million input tokens, for cost accounting"
+    )
+    output_price: Optional[float] = Field(
+        None, description="USD per million completion tokens, for cost accounting"
+    )
 
 
 class ProxySettings(BaseModel):
@@ -66,6 +92,24 @@ class RunflowSettings(BaseModel):
     )
 
 
+class ScreenshotSettings(BaseModel):
+    """How browser screenshots are captured and sized for the LLM"""
+
+    full_page: bool = Field(
+        False, description="Capture the whole page instead of the viewport"
+    )
+    quality: int = Field(75, description="Initial JPEG quality")
+    max_tokens: Optional[int] = Field(
+        1105, description="Image token budget per screenshot (None: tile grid only)"
+    )
+    max_bytes: Optional[int] = Field(
+        200_000, description="Encoded size budget per screenshot in bytes"
+    )
+    keep_latest: int = Field(
+        3, description="Screenshots kept in agent memory; older ones are dropped"
+    )
+
+
 class BrowserSettings(BaseModel):
     headless: bool = Field(False, description="Whether to run browser in headless mode")
     disable_security: bool = Field(
@@ -89,6 +133,9 @@ class BrowserSettings(BaseModel):
     max_content_length: int = Field(
         2000, description="Maximum length for content retrieval operations"
     )
+    screenshot: ScreenshotSettings = Field(
+        default_factory=ScreenshotSettings, description="Screenshot settings"
+    )
 
 
 class SandboxSettings(BaseModel):
@@ -105,6 +152,197 @@ class SandboxSettings(BaseModel):
     )
 
 
+class PythonExecuteSettings(BaseModel):
+    """Configuration for the PythonExecute worker pool"""
+
+    pool_size: int = Field(2, description="Number of pre-warmed idle workers")
+    preload_modules: List[str] = Field(
+        default_factory=list, description="Modules imported once by every worker"
+    )
+    max_calls_per_worker: int = Field(
+        100, description="Calls after which a worker is replaced"
+    )
+    max_sessions: int = Field(
+        8, description="Maximum number of persistent interpreter sessions"
+    )
+
+
+class TransportSettings(BaseModel):
+    """Configuration for the HTTP connection pool shared by LLM clients"""
+
+    max_connections: int = Field(100, description="Maximum open connections")
+    max_keepalive_connections: int = Field(
+        20, description="Idle connections kept alive for reuse"
+    )
+    keepalive_expiry: float = Field(
+        30.0, description="Seconds an idle connection is kept alive"
+    )
+    http2: bool = Field(True, description="Use HTTP/2 if the 'h2' package is installed")
+    timeout: float = Field(600.0, description="Default request timeout in seconds")
+    connect_timeout: float = Field(10.0, description="Connect timeout in seconds")
+
+
+class CompactionSettings(BaseModel):
+    """Configuration for rolling summarization of long agent runs"""
+
+    enabled: bool = Field(
+        False, description="Fold older turns into a running summary"
+    )
+    threshold_tokens: int = Field(
+        60000, description="Estimated prompt tokens that trigger a compaction"
+    )
+    keep_recent_tokens: int = Field(
+        20000, description="Most recent turns, in tokens, kept verbatim"
+    )
+    summary_max_tokens: int = Field(
+        1024, description="Length the summarizer is asked to stay within"
+    )
+
+
+class MemorySettings(BaseModel):
+    """Configuration for the archive of messages evicted from agent memory"""
+
+    archive: str = Field(
+        "none", description="Where evicted messages go: 'jsonl', 'sqlite' or 'none'"
+    )
+    path: str = Field(
+        "data/memory", description="Archive directory, relative to the project root"
+    )
+
+
+class RetrievalSettings(BaseModel):
+    """Configuration for the local retrieval index over past tasks and steps"""
+
+    enabled: bool = Field(
+        False, description="Index finished work and retrieve from it"
+    )
+    backend: str = Field(
+        "sqlite", description="Where documents are kept: 'sqlite' or 'memory'"
+    )
+    path: str = Field(
+        "data/retrieval.db", description="SQLite file, relative to the project root"
+    )
+    max_documents: int = Field(5000, description="Documents kept; oldest are evicted")
+    max_document_chars: int = Field(
+        4000, description="Characters of a task, step or tool output that are indexed"
+    )
+    top_k: int = Field(5, description="Snippets injected into a prompt")
+    max_tokens: int = Field(1500, description="Token budget of injected snippets")
+    snippet_chars: int = Field(600, description="Characters shown per snippet")
+    recent_messages: int = Field(
+        4, description="Latest chat history messages always sent verbatim"
+    )
+    index_tool_outputs: bool = Field(True, description="Also index tool results")
+    cross_session: bool = Field(
+        False, description="Also retrieve past work of other sessions"
+    )
+
+
+class EditorSettings(BaseModel):
+    """Configuration for the str_replace_editor tool"""
+
+    max_file_size: int = Field(
+        32 * 1024 * 1024,
+        description="Largest file, in bytes, that edits and undos load into memory",
+    )
+    history_max_bytes: int = Field(
+        16 * 1024 * 1024,
+        description="Memory budget of the undo history across files; oldest edits go first",
+    )
+    history_max_edits: int = Field(50, description="Undo steps kept per file")
+
+
+class LLMRouteSettings(BaseModel):
+    """Which [llm.*] configs serve one call purpose (plan, summary, insight, ...)"""
+
+    models: List[str] = Field(
+        ..., description="[llm.*] config names, tried in order until one succeeds"
+    )
+    max_concurrency: Optional[int] = Field(
+        None, description="Concurrent calls allowed on this route (None for unlimited)"
+    )
+
+
+class RetrySettings(BaseModel):
+    """Configuration for the LLM retry policy and circuit breakers"""
+
+    max_attempts: int = Field(4, description="Attempts per call, including the first")
+    base_wait: float = Field(1.0, description="Initial backoff in seconds")
+    max_wait: float = Field(
+        30.0,
+        description="Backoff cap in seconds; a longer Retry-After fails the call",
+    )
+    budget_ratio: float = Field(
+        0.2, description="Retries allowed per first attempt across all calls"
+    )
+    budget_min_retries: int = Field(
+        10, description="Retries always allowed per budget window"
+    )
+    budget_window: float = Field(60.0, description="Retry budget window in seconds")
+    breaker_failure_rate: float = Field(
+        0.5, description="Failure share that opens an endpoint's circuit"
+    )
+    breaker_min_requests: int = Field(
+        10, description="Calls in the window before the circuit may open"
+    )
+    breaker_window: float = Field(
+        60.0, description="Seconds of calls the failure rate is measured over"
+    )
+    breaker_cooldown: float = Field(
+        30.0, description="Seconds an open circuit waits before a probe call"
+    )
+
+
+class LLMCacheSettings(BaseModel):
+    """Configuration for the LLM response cache"""
+
+    mode: str = Field(
+        "off", description="'off', 'read_write', 'record' or 'replay' (recording only)"
+    )
+    backend: str = Field(
+        "sqlite", description="Durable tier: 'sqlite' or 'memory' (no persistence)"
+    )
+    path: str = Field(
+        "data/llm_cache.db",
+        description="SQLite database path, relative to the project root",
+    )
+    memory_size: int = Field(256, description="Responses kept in the in-memory LRU")
+    ttl: Optional[float] = Field(
+        None, description="Seconds a response stays valid (None for no expiry)"
+    )
+
+
+class ServerSettings(BaseModel):
+    """Configuration for the web server (server.py)"""
+
+    event_buffer_size: int = Field(
+        1000, description="Events kept per task/flow stream for subscribers"
+    )
+    slow_consumer_policy: str = Field(
+        "drop",
+        description="Slow SSE subscribers: 'drop' old events or 'block' publishers",
+    )
+    block_timeout: float = Field(
+        5.0, description="Seconds a publisher waits for a blocking subscriber"
+    )
+    event_idle_ttl: float = Field(
+        300.0, description="Seconds a finished stream with no subscribers is kept"
+    )
+    task_store: str = Field(
+        "sqlite", description="Task/flow history backend: 'sqlite' or 'memory'"
+    )
+    task_db_path: str = Field(
+        "data/server.db",
+        description="SQLite database path, relative to the project root",
+    )
+    task_cache_size: int = Field(
+        500, description="Tasks/flows kept in memory (running ones always are)"
+    )
+    task_ttl: Optional[float] = Field(
+        3600.0, description="Seconds an idle finished task stays in memory"
+    )
+
+
 class MCPServerConfig(BaseModel):
     """Configuration for a single MCP server"""
 
@@ -169,6 +407,36 @@ class AppConfig(BaseModel):
         None, description="Search configuration"
     )
     mcp_config: Optional[MCPSettings] = Field(None, description="MCP configuration")
+    python_execute_config: Optional[PythonExecuteSettings] = Field(
+        None, description="Python execution configuration"
+    )
+    server_config: Optional[ServerSettings] = Field(
+        None, description="Web server configuration"
+    )
+    llm_cache_config: Optional[LLMCacheSettings] = Field(
+        None, description="LLM response cache configuration"
+    )
+    transport_config: Optional[TransportSettings] = Field(
+        None, description="LLM HTTP transport configuration"
+    )
+    retry_config: Optional[RetrySettings] = Field(
+        None, description="LLM retry policy configuration"
+    )
+    compaction_config: Optional[CompactionSettings] = Field(
+        None, description="Agent memory compaction configuration"
+    )
+    memory_config: Optional[MemorySettings] = Field(
+        None, description="Agent memory archive configuration"
+    )
+    retrieval_config: Optional[RetrievalSettings] = Field(
+        None, description="Local retrieval index configuration"
+    )
+    editor_config: Optional[EditorSettings] = Field(
+        None, description="File editor tool configuration"
+    )
+    llm_routes: Dict[str, LLMRouteSettings] = Field(
+        default_factory=dict, description="LLM routes by call purpose"
+    )
     run_flow_config: Optional[RunflowSettings] = Field(
         None, description="Run flow configuration"
     )
@@ -227,8 +495,15 @@ class Config:
             "max_tokens": base_llm.get("max_tokens", 4096),
             "max_input_tokens": base_llm.get("max_input_tokens"),
             "temperature": base_llm.get("temperature", 1.0),
+            "truncation_strategy": base_llm.get("truncation_strategy", "drop_oldest"),
             "api_type": base_llm.get("api_type", ""),
             "api_version": base_llm.get("api_version", ""),
+            "requests_per_minute": base_llm.get("requests_per_minute"),
+            "tokens_per_minute": base_llm.get("tokens_per_minute"),
+            "fallback": base_llm.get("fallback"),
+            "hedge_after": base_llm.get("hedge_after"),
+            "input_price": base_llm.get("input_price"),
+            "output_price": base_llm.get("output_price"),
         }
 
         # handle browser config.
@@ -283,6 +558,38 @@ class Config:
         else:
             mcp_settings = MCPSettings(servers=MCPSettings.load_server_config())
 
+        python_execute_config = raw_config.get("python_execute", {})
+        python_execute_settings = PythonExecuteSettings(**python_execute_config)
+
+        server_config = raw_config.get("server", {})
+        server_settings = ServerSettings(**server_config)
+
+        llm_cache_config = raw_config.get("llm_cache", {})
+        llm_cache_settings = LLMCacheSettings(**llm_cache_config)
+
+        transport_config = raw_config.get("transport", {})
+        transport_settings = TransportSettings(**transport_config)
+
+        retry_config = raw_config.get("retry", {})
+        retry_settings = RetrySettings(**retry_config)
+
+        compaction_config = raw_config.get("compaction", {})
+        compaction_settings = CompactionSettings(**compaction_config)
+
+        memory_config = raw_config.get("memory", {})
+        memory_settings = MemorySettings(**memory_config)
+
+        retrieval_config = raw_config.get("retrieval", {})
+        retrieval_settings = RetrievalSettings(**retrieval_config)
+
+        editor_config = raw_config.get("editor", {})
+        editor_settings = EditorSettings(**editor_config)
+
+        llm_routes = {
+            purpose: LLMRouteSettings(**route)
+            for purpose, route in raw_config.get("llm_routes", {}).items()
+        }
+
         run_flow_config = raw_config.get("runflow")
         if run_flow_config:
             run_flow_settings = RunflowSettings(**run_flow_config)
@@ -300,6 +607,16 @@ class Config:
             "browser_config": browser_settings,
             "search_config": search_settings,
             "mcp_config": mcp_settings,
+            "python_execute_config": python_execute_settings,
+            "server_config": server_settings,
+            "llm_cache_config": llm_cache_settings,
+            "transport_config": transport_settings,
+            "retry_config": retry_settings,
+            "compaction_config": compaction_settings,
+            "memory_config": memory_settings,
+            "retrieval_config": retrieval_settings,
+            "editor_config": editor_settings,
+            "llm_routes": llm_routes,
             "run_flow_config": run_flow_settings,
         }
 
@@ -317,6 +634,12 @@ class Config:
     def browser_config(self) -> Optional[BrowserSettings]:
         return self._config.browser_config
 
+    @property
+    def screenshot(self) -> ScreenshotSettings:
+        """Get the browser screenshot settings (defaults without a [browser] section)"""
+        browser = self._config.browser_config
+        return browser.screenshot if browser else ScreenshotSettings()
+
     @property
     def search_config(self) -> Optional[SearchSettings]:
         return self._config.search_config
@@ -326,6 +649,56 @@ class Config:
         """Get the MCP configuration"""
         return self._config.mcp_config
 
+    @property
+    def python_execute(self) -> PythonExecuteSettings:
+        """Get the PythonExecute worker pool configuration"""
+        return self._config.python_execute_config
+
+    @property
+    def server(self) -> ServerSettings:
+        """Get the web server configuration"""
+        return self._config.server_config
+
+    @property
+    def llm_cache(self) -> LLMCacheSettings:
+        """Get the LLM response cache configuration"""
+        return self._config.llm_cache_config
+
+    @property
+    def transport(self) -> TransportSettings:
+        """Get the LLM HTTP transport configuration"""
+        return self._config.transport_config
+
+    @property
+    def retry(self) -> RetrySettings:
+        """Get the LLM retry policy configuration"""
+        return self._config.retry_config
+
+    @property
+    def compaction(self) -> CompactionSettings:
+        """Get the agent memory compaction configuration"""
+        return self._config.compaction_config
+
+    @property
+    def memory(self) -> MemorySettings:
+        """Get the agent memory archive configuration"""
+        return self._config.memory_config
+
+    @property
+    def retrieval(self) -> RetrievalSettings:
+        """Get the local retrieval index configuration"""
+        return self._config.retrieval_config
+
+    @property
+    def editor(self) -> EditorSettings:
+        """Get the file editor tool configuration"""
+        return self._config.editor_config
+
+    @property
+    def llm_routes(self) -> Dict[str, LLMRouteSettings]:
+        """Get the LLM routes by call purpose"""
+        return self._config.llm_routes
+
     @property
     def run_flow_config(self) -> RunflowSettings:
         """Get the Run Flow configuration"""
@@ -0,0 +1,228 @@
+"""Bounded fan-out event bus for task and flow event streams."""
+import asyncio
+from enum import Enum
+from typing import Dict, List, Optional, Set
+
+from app.logger import logger
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What happens when a subscriber falls a full buffer behind"""
+
+    DROP = "drop"  # Overwrite old events; the subscriber gets a `lagged` marker
+    BLOCK = "block"  # Publishers wait (up to block_timeout) for the subscriber
+
+
+class EventStream:
+    """Ring buffer holding the most recent events of one task.
+
+    Events are addressed by a monotonically increasing offset; the buffer
+    keeps offsets in [first_offset, next_offset).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.slots: List[Optional[dict]] = [None] * size
+        self.next_offset = 0
+        self.closed = False
+        self.subscribers: Set["Subscription"] = set()
+        self.changed = asyncio.Condition()
+        self.reclaim_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def first_offset(self) -> int:
+        return max(0, self.next_offset - self.size)
+
+    def get(self, offset: int) -> dict:
+        return self.slots[offset % self.size]
+
+    def append(self, event: dict) -> None:
+        self.slots[self.next_offset % self.size] = event
+        self.next_offset += 1
+
+
+class Subscription:
+    """An independent cursor over an EventStream.
+
+    Iterating yields events in publish order and stops once the stream is
+    closed and drained. If the subscriber fell behind and events were
+    overwritten, a `{"type": "lagged", "missed": n}` marker is yielded
+    before the oldest retained event.
+    """
+
+    def __init__(
+        self,
+        bus: "EventBus",
+        key: str,
+        stream: Optional[EventStream],
+        offset: int,
+        policy: SlowConsumerPolicy,
+    ):
+        self.bus = bus
+        self.key = key
+        self.stream = stream
+        self.offset = offset
+        self.policy = policy
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        stream = self.stream
+        if stream is None:
+            raise StopAsyncIteration
+        async with stream.changed:
+            while self.offset >= stream.next_offset and not stream.closed:
+                await stream.changed.wait()
+            if self.offset >= stream.next_offset:
+                self.close()
+                raise StopAsyncIteration
+            if self.offset < stream.first_offset:
+                missed = stream.first_offset - self.offset
+                self.offset = stream.first_offset
+                return {"type": "lagged", "missed": missed}
+            event = stream.get(self.offset)
+            self.offset += 1
+            if self.policy == SlowConsumerPolicy.BLOCK:
+                # A blocked publisher may be waiting for this cursor to advance
+                stream.changed.notify_all()
+            return event
+
+    def close(self) -> None:
+        """Stop following the stream."""
+        if self.stream is not None:
+            self.bus._unsubscribe(self)
+            self.stream = None
+
+
+class EventBus:
+    """Fan-out event bus with one bounded ring buffer per key.
+
+    Any number of subscribers can follow a key, each with its own cursor,
+    so opening a second SSE connection no longer steals events from the
+    first. A closed stream is reclaimed once it has had no subscribers for
+    `idle_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 1000,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP,
+        block_timeout: float = 5.0,
+        idle_ttl: float = 300.0,
+    ):
+        self.buffer_size = buffer_size
+        self.policy = SlowConsumerPolicy(policy)
+        self.block_timeout = block_timeout
+        self.idle_ttl = idle_ttl
+        self._streams: Dict[str, EventStream] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._streams
+
+    def open(self, key: str) -> EventStream:
+        """Create the stream for key if it does not exist yet."""
+        if key not in self._streams:
+            self._streams[key] = EventStream(self.buffer_size)
+        return self._streams[key]
+
+    async def publish(self, key: str, event: dict) -> None:
+        """Append an event to the stream of key and wake its subscribers.
+
+        Events for a key that was never opened, is already closed or has been
+        reclaimed are dropped rather than starting a new stream.
+        """
+        stream = self._streams.get(key)
+        if stream is None or stream.closed:
+            logger.debug(f"Event stream {key} is not open, dropping event")
+            return
+        async with stream.changed:
+            if self._blocking_lag(stream):
+                try:
+                    await asyncio.wait_for(
+                        stream.changed.wait_for(lambda: not self._blocking_lag(stream)),
+                        self.block_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"Event stream {key}: slow subscriber did not catch up "
+                        f"within {self.block_timeout}s, dropping events for it"
+                    )
+                    # Stop waiting for it on every later publish
+                    for subscriber in stream.subscribers:
+                        if stream.next_offset - subscriber.offset >= stream.size:
+                            subscriber.policy = SlowConsumerPolicy.DROP
+            if stream.closed:
+                return
+            stream.append(event)
+            stream.changed.notify_all()
+
+    @staticmethod
+    def _blocking_lag(stream: EventStream) -> bool:
+        """Whether a blocking subscriber would lose an event on the next append."""
+        return any(
+            subscriber.policy == SlowConsumerPolicy.BLOCK
+            and stream.next_offset - subscriber.offset >= stream.size
+            for subscriber in stream.subscribers
+        )
+
+    def subscribe(
+        self,
+        key: str,
+        from_start: bool = True,
+        policy: Optional[SlowConsumerPolicy] = None,
+    ) -> Subscription:
+        """
+        Follow the stream of key.
+
+        Args:
+            key: Task or flow id
+            from_start: Start at the oldest retained event instead of the next one
+            policy: Slow consumer policy for this subscriber (defaults to the bus policy)
+
+        Returns:
+            Subscription: Async iterator over the events; ends right away if
+            the stream does not exist (never opened, or already reclaimed)
+        """
+        stream = self._streams.get(key)
+        policy = SlowConsumerPolicy(policy or self.policy)
+        if stream is None:
+            return Subscription(self, key, None, 0, policy)
+        if stream.reclaim_handle:
+            stream.reclaim_handle.cancel()
+            stream.reclaim_handle = None
+        offset = stream.first_offset if from_start else stream.next_offset
+        subscription = Subscription(self, key, stream, offset, policy)
+        stream.subscribers.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        stream = subscription.stream
+        stream.subscribers.discard(subscription)
+        if stream.closed and not stream.subscribers:
+            self._schedule_reclaim(subscription.key, stream)
+
+    async def close(self, key: str) -> None:
+        """Mark the stream finished; subscribers drain it and stop."""
+        stream = self._streams.get(key)
+        if stream is None or stream.closed:
+            return
+        async with stream.changed:
+            stream.closed = True
+            stream.changed.notify_all()
+        if not stream.subscribers:
+            self._schedule_reclaim(key, stream)
+
+    def _schedule_reclaim(self, key: str, stream: EventStream) -> None:
+        if stream.reclaim_handle:
+            stream.reclaim_handle.cancel()
+        stream.reclaim_handle = asyncio.get_running_loop().call_later(
+            self.idle_ttl, self._reclaim, key, stream
+        )
+
+    def _reclaim(self, key: str, stream: EventStream) -> None:
+        stream.reclaim_handle = None
+        if stream.subscribers or self._streams.get(key) is not stream:
+            return
+        del self._streams[key]
+        logger.debug(f"Event stream {key} reclaimed")
@@ -0,0 +1,82 @@
+"""Structured agent events, scoped to the running task through a contextvar."""
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from pydantic import BaseModel, Field
+
+from app.logger import logger
+
+
+class AgentEventType(str, Enum):
+    """Kinds of events emitted by agents, flows and tools"""
+
+    THINK = "think"  # Reasoning content of an LLM response
+    MESSAGE = "message"  # Plain content of an LLM response
+    TOOL_START = "tool_start"
+    TOOL_END = "tool_end"
+    INTERACTION = "interaction"  # A tool needs an answer from the user
+    ERROR = "error"
+    PLAN = "plan"
+    STEP_START = "step_start"
+    STEP_FINISH = "step_finish"
+    STEP_RESULT = "step_result"
+
+
+class AgentEvent(BaseModel):
+    """A single event; `data` holds type-specific details such as tool args."""
+
+    type: AgentEventType
+    content: str = ""
+    agent: Optional[str] = None
+    tool: Optional[str] = None
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+EventHandler = Callable[[AgentEvent], Awaitable[None]]
+
+_handler: ContextVar[Optional[EventHandler]] = ContextVar(
+    "agent_event_handler", default=None
+)
+
+
+def set_event_handler(handler: Optional[EventHandler]) -> Token:
+    """
+    Route events emitted from the current context on to handler.
+
+    The handler lives in a contextvar, so it follows the current asyncio task
+    and every task spawned from it (e.g. tool calls run with asyncio.gather),
+    while concurrently running tasks each see only their own handler. Setting
+    it at the top of a task scopes it to that task.
+    """
+    return _handler.set(handler)
+
+
+@contextmanager
+def event_scope(handler: Optional[EventHandler]) -> Iterator[None]:
+    """Route events emitted inside this block to handler."""
+    token = set_event_handler(handler)
+    try:
+        yield
+    finally:
+        _handler.reset(token)
+
+
+async def emit(
+    type: AgentEventType,
+    content: str = "",
+    agent: Optional[str] = None,
+    tool: Optional[str] = None,
+    **data: Any,
+) -> None:
+    """Send an event to the handler of the current scope, if there is one."""
+    handler = _handler.get()
+    if handler is None:
+        return
+    event = AgentEvent(type=type, content=content, agent=agent, tool=tool, data=data)
+    try:
+        await handler(event)
+    except Exception as e:
+        # A broken subscriber must not break the agent
+        logger.warning(f"Event handler failed on {event.type.value} event: {e}")
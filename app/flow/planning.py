@@ -7,10 +7,13 @@ from pydantic import Field
 
 from app.agent.base import BaseAgent
 from app.config import config
+from app.events import AgentEventType, emit
 from app.flow.base import BaseFlow
 from app.llm import LLM
+from app.llm_router import Purpose, get_llm_router
 from app.logger import logger
 from app.prompt import planning_flow
+from app.retrieval import get_retrieval_index
 from app.schema import AgentState, Message, ToolChoice
 from app.tool import PlanningTool
 
@@ -136,6 +139,7 @@ class PlanningFlow(BaseFlow):
                 executor = self.get_executor(step_type)
                 step_result = await self._execute_step(executor, precede_step_result)
                 logger.info(f"Step result: {step_result}")
+                await emit(AgentEventType.STEP_RESULT, step_result or "")
                 await self.__update_current_step_result(step_result)
 
                 # 判断ask_human
@@ -184,7 +188,9 @@ class PlanningFlow(BaseFlow):
         )
 
         # Call LLM with PlanningTool
-        response = await self.llm.ask_tool(
+        response = await get_llm_router().ask_tool(
+            Purpose.PLAN,
+            default=self.llm,
             messages=[user_message],
             system_msgs=[system_message],
             tools=[self.planning_tool.to_param()],
@@ -218,15 +224,21 @@ class PlanningFlow(BaseFlow):
                             # Execute the tool via ToolCollection instead of directly
                             result = await self.planning_tool.execute(**args)
 
-                        logger.info(
-                            f"Plan creation result: {self._format_plan(result.output)}"
+                        plan_text = self._format_plan(result.output)
+                        logger.info(f"Plan creation result: {plan_text}")
+                        await emit(
+                            AgentEventType.PLAN,
+                            f"Plan creation result: {plan_text}",
+                            plan_id=self.active_plan_id,
                         )
                         return
             else:
                 logger.warning(
                     f"No tool calls returned, retrying... (attempt {retry_count + 1}/{max_retries})"
                 )
-                response = await self.llm.ask_tool(
+                response = await get_llm_router().ask_tool(
+                    Purpose.PLAN,
+                    default=self.llm,
                     messages=[user_message],
                     system_msgs=[system_message],
                     tools=[self.planning_tool.to_param()],
@@ -331,6 +343,11 @@ class PlanningFlow(BaseFlow):
         # Use agent.run() to execute the step
         try:
             logger.info(f"Start executing step:{plan_step}")
+            await emit(
+                AgentEventType.STEP_START,
+                plan_step,
+                step_index=self.current_step_index,
+            )
             executor.state = AgentState.IDLE
             results = await executor.run(step_prompt)
 
@@ -340,6 +357,11 @@ class PlanningFlow(BaseFlow):
                 await self._mark_step_completed()
                 await executor.cleanup()
                 logger.info(f"Finish executing step:{plan_step}")
+                await emit(
+                    AgentEventType.STEP_FINISH,
+                    plan_step,
+                    step_index=self.current_step_index,
+                )
 
             return results
         except Exception as e:
@@ -351,16 +373,60 @@ class PlanningFlow(BaseFlow):
         plan_data = self.planning_tool.plans[self.active_plan_id]
         plan_data["step_notes"][self.current_step_index] = step_result
 
+        index = get_retrieval_index()
+        if index is not None and step_result:
+            step = plan_data["steps"][self.current_step_index]
+            index.add(
+                "step",
+                f"{step}: {step_result}",
+                source=self.active_plan_id,
+                ref=str(self.current_step_index),
+            )
+
     async def __get_precede_step_result(self, step_index: int) -> str:
-        """Get the result of the previous step."""
+        """Get the result of the previous step.
+
+        Every finished step is listed with its status, but only the latest
+        step's notes are passed in full; notes of earlier steps are included
+        when relevant to the next step, within the retrieval token budget.
+        """
         logger.info(f"Get the result of the previous step: {step_index}")
         plan_data = self.planning_tool.plans[self.active_plan_id]
-        result = ""
-        for i, (step, status, notes) in enumerate(
+        steps = list(
             zip(plan_data["steps"], plan_data["step_statuses"], plan_data["step_notes"])
-        ):
-            if i <= step_index:
+        )
+        index = get_retrieval_index()
+        if index is None:
+            result = ""
+            for i, (step, status, notes) in enumerate(steps):
+                if i <= step_index:
+                    result += f"{step}: {status}: {notes}\n"
+            return result
+
+        result = ""
+        for i, (step, status, notes) in enumerate(steps[: step_index + 1]):
+            if i == step_index:
                 result += f"{step}: {status}: {notes}\n"
+            else:
+                result += f"{step}: {status}\n"
+
+        upcoming = [
+            step
+            for step, status, _ in steps[step_index + 1 :]
+            if status in PlanStepStatus.get_active_statuses()
+        ]
+        settings = config.retrieval
+        earlier = index.context(
+            upcoming[0] if upcoming else plan_data.get("title", ""),
+            k=settings.top_k,
+            max_tokens=settings.max_tokens,
+            snippet_chars=settings.snippet_chars,
+            kinds=("step",),
+            source=self.active_plan_id,
+            exclude=lambda document: document.ref == str(step_index),
+        )
+        if earlier:
+            result += f"Relevant notes from earlier steps:\n{earlier}\n"
         return result
 
     async def _mark_step_completed(self) -> None:
@@ -487,17 +553,22 @@ class PlanningFlow(BaseFlow):
         """Finalize the plan and provide a summary using the flow's LLM directly."""
         plan_text = await self._get_plan_text()
 
+        agent = self.primary_agent
+        purpose = getattr(agent, "llm_purpose", None)
         try:
-            agent = self.primary_agent
             summary_prompt = planning_flow.FINALIZE_STEP_PROMPT.format(
                 workspace=config.workspace_root, plan_text=plan_text
             )
+            if purpose is not None:
+                agent.llm_purpose = Purpose.SUMMARY.value
             summary = await agent.run(summary_prompt)
             return summary
         except Exception as e2:
             logger.error(f"Error finalizing plan with agent: {e2}")
             return "Plan completed. Error generating summary."
         finally:
+            if purpose is not None:
+                agent.llm_purpose = purpose
             await agent.cleanup()
 
     def _format_plan_step(self, plan: Dict):
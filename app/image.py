@@ -0,0 +1,139 @@
+"""Downscale and recompress images to the provider's tile grid and a token budget."""
+import base64
+import binascii
+import io
+import math
+from typing import Optional, Tuple
+
+from PIL import Image
+from pydantic import BaseModel
+
+
+# OpenAI high-detail image accounting (mirrored by TokenCounter.count_image)
+MAX_SIDE = 2048
+TARGET_SHORT_SIDE = 768
+TILE_SIZE = 512
+TILE_TOKENS = 170
+BASE_TOKENS = 85
+
+MIN_QUALITY = 30
+QUALITY_STEP = 15
+SHRINK_FACTOR = 0.8
+
+
+class ProcessedImage(BaseModel):
+    """A recompressed image and the facts needed to account for it"""
+
+    base64_image: str
+    width: int
+    height: int
+    size_bytes: int
+    quality: int
+
+    @property
+    def tokens(self) -> int:
+        return image_tokens(self.width, self.height)
+
+
+def provider_size(width: int, height: int) -> Tuple[int, int]:
+    """The size the provider downscales an image to before tiling it."""
+    scale = min(1.0, MAX_SIDE / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, TARGET_SHORT_SIDE / min(width, height))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def image_tokens(width: int, height: int) -> int:
+    """High-detail token cost of an image of the given size."""
+    width, height = provider_size(width, height)
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+    return tiles * TILE_TOKENS + BASE_TOKENS
+
+
+def fit_size(
+    width: int, height: int, max_tokens: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Size to send an image at.
+
+    Never larger than what the provider would keep anyway; with
+    `max_tokens`, further shrunk to the largest size whose tile count fits
+    the budget. Candidate sizes put an edge exactly on a tile boundary, so
+    no partially used tile is paid for.
+    """
+    width, height = provider_size(width, height)
+    if max_tokens is None or image_tokens(width, height) <= max_tokens:
+        return width, height
+
+    scales = {
+        k * TILE_SIZE / side
+        for side in (width, height)
+        for k in range(1, math.ceil(side / TILE_SIZE))
+    }
+    for scale in sorted(scales, reverse=True):
+        size = max(1, int(width * scale)), max(1, int(height * scale))
+        if image_tokens(*size) <= max_tokens:
+            return size
+    # Even a single tile is over budget: send the smallest single-tile size
+    scale = min(TILE_SIZE / width, TILE_SIZE / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _encode(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def process_image(
+    data: bytes,
+    max_tokens: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    quality: int = 75,
+) -> ProcessedImage:
+    """
+    Resize an encoded image to the tile grid and recompress it as JPEG.
+
+    Quality is lowered step by step, down to MIN_QUALITY, until the image
+    fits `max_bytes`; past that the image itself is shrunk further.
+    CPU bound: call it from a worker thread in async code.
+    """
+    image = Image.open(io.BytesIO(data))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    size = fit_size(*image.size, max_tokens=max_tokens)
+    if size != image.size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+
+    encoded = _encode(image, quality)
+    while max_bytes and len(encoded) > max_bytes:
+        if quality > MIN_QUALITY:
+            quality = max(MIN_QUALITY, quality - QUALITY_STEP)
+        elif min(image.size) > 64:
+            image = image.resize(
+                (int(image.width * SHRINK_FACTOR), int(image.height * SHRINK_FACTOR)),
+                Image.Resampling.LANCZOS,
+            )
+        else:
+            break
+        encoded = _encode(image, quality)
+
+    return ProcessedImage(
+        base64_image=base64.b64encode(encoded).decode("ascii"),
+        width=image.width,
+        height=image.height,
+        size_bytes=len(encoded),
+        quality=quality,
+    )
+
+
+def base64_image_size(data: str) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a base64 image or data URL; None if unreadable."""
+    if data.startswith("data:"):
+        data = data.partition(",")[2]
+    try:
+        # Only the header is parsed; pixels are never decoded
+        with Image.open(io.BytesIO(base64.b64decode(data))) as image:
+            return image.size
+    except (binascii.Error, ValueError, OSError):
+        return None
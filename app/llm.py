@@ -1,5 +1,18 @@
 import math
-from typing import Dict, List, Optional, Union
+from collections import OrderedDict
+from contextlib import AsyncExitStack, contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import tiktoken
 from openai import (
@@ -10,17 +23,21 @@ from openai import (
     OpenAIError,
     RateLimitError,
 )
-from openai.types.chat import ChatCompletion, ChatCompletionMessage
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_random_exponential,
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionMessage,
+    ChatCompletionMessageToolCall,
 )
+from openai.types.chat.chat_completion_message_tool_call import Function
+from pydantic import BaseModel
 
 from app.bedrock import BedrockClient
 from app.config import LLMSettings, config
 from app.exceptions import TokenLimitExceeded
+from app.image import base64_image_size
+from app.llm_cache import CacheMiss, get_response_cache, make_cache_key
+from app.llm_retry import with_retry_policy, with_retry_policy_stream
+from app.llm_transport import get_http_client, get_rate_limiter
 from app.logger import logger  # Assuming a logger is set up in your app
 from app.schema import (
     ROLE_VALUES,
@@ -29,6 +46,7 @@ from app.schema import (
     Message,
     ToolChoice,
 )
+from app.truncation import TruncationStrategy, get_truncation_strategy
 
 REASONING_MODELS = ["o1", "o3-mini"]
 MULTIMODAL_MODELS = [
@@ -53,12 +71,49 @@ class TokenCounter:
     HIGH_DETAIL_TARGET_SHORT_SIDE = 768
     TILE_SIZE = 512
 
-    def __init__(self, tokenizer):
+    # Number of distinct strings whose token counts are remembered
+    TEXT_CACHE_SIZE = 4096
+    # Number of images whose dimensions are remembered
+    IMAGE_CACHE_SIZE = 64
+
+    def __init__(self, tokenizer, cache_size: int = TEXT_CACHE_SIZE):
         self.tokenizer = tokenizer
+        self.cache_size = cache_size
+        self._text_cache: "OrderedDict[str, int]" = OrderedDict()
+        self._image_sizes: "OrderedDict[str, Optional[Tuple[int, int]]]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def count_text(self, text: str) -> int:
-        """Calculate tokens for a text string"""
-        return 0 if not text else len(self.tokenizer.encode(text))
+        """
+        Calculate tokens for a text string
+
+        Counts are cached per string in a bounded LRU table. Message contents are
+        re-sent unchanged on every step, so only newly appended text is encoded;
+        the string hash is cached by Python, making a hit an O(1) lookup.
+        """
+        if not text:
+            return 0
+
+        cached = self._text_cache.get(text)
+        if cached is not None:
+            self._text_cache.move_to_end(text)
+            self.cache_hits += 1
+            return cached
+
+        self.cache_misses += 1
+        count = len(self.tokenizer.encode(text))
+        if self.cache_size > 0:
+            self._text_cache[text] = count
+            if len(self._text_cache) > self.cache_size:
+                self._text_cache.popitem(last=False)
+        return count
+
+    def clear_cache(self) -> None:
+        """Drop all cached text token counts"""
+        self._text_cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def count_image(self, image_item: dict) -> int:
         """
@@ -67,7 +122,7 @@ class TokenCounter:
         For "low" detail: fixed 85 tokens
         For "high" detail:
         1. Scale to fit in 2048x2048 square
-        2. Scale shortest side to 768px
+        2. Scale shortest side down to 768px
         3. Count 512px tiles (170 tokens each)
         4. Add 85 tokens
         """
@@ -86,11 +141,30 @@ class TokenCounter:
             if "dimensions" in image_item:
                 width, height = image_item["dimensions"]
                 return self._calculate_high_detail_tokens(width, height)
+            # Otherwise read them from the image header
+            size = self._image_size(image_item)
+            if size is not None:
+                return self._calculate_high_detail_tokens(*size)
 
         return (
             self._calculate_high_detail_tokens(1024, 1024) if detail == "high" else 1024
         )
 
+    def _image_size(self, image_item: dict) -> Optional[Tuple[int, int]]:
+        """Dimensions of an inline (data URL) image, cached per image"""
+        image_url = image_item.get("image_url")
+        url = image_url.get("url", "") if isinstance(image_url, dict) else ""
+        if not url.startswith("data:"):
+            return None
+        if url in self._image_sizes:
+            self._image_sizes.move_to_end(url)
+            return self._image_sizes[url]
+        size = base64_image_size(url)
+        self._image_sizes[url] = size
+        if len(self._image_sizes) > self.IMAGE_CACHE_SIZE:
+            self._image_sizes.popitem(last=False)
+        return size
+
     def _calculate_high_detail_tokens(self, width: int, height: int) -> int:
         """Calculate tokens for high detail images based on dimensions"""
         # Step 1: Scale to fit in MAX_SIZE x MAX_SIZE square
@@ -99,8 +173,8 @@ class TokenCounter:
             width = int(width * scale)
             height = int(height * scale)
 
-        # Step 2: Scale so shortest side is HIGH_DETAIL_TARGET_SHORT_SIDE
-        scale = self.HIGH_DETAIL_TARGET_SHORT_SIDE / min(width, height)
+        # Step 2: Scale down so shortest side is at most HIGH_DETAIL_TARGET_SHORT_SIDE
+        scale = min(1.0, self.HIGH_DETAIL_TARGET_SHORT_SIDE / min(width, height))
         scaled_width = int(width * scale)
         scaled_height = int(height * scale)
 
@@ -143,31 +217,144 @@ class TokenCounter:
                 token_count += self.count_text(function.get("arguments", ""))
         return token_count
 
+    def count_single_message(self, message: dict) -> int:
+        """Calculate tokens for one message, excluding the list format tokens"""
+        tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+
+        # Add role tokens
+        tokens += self.count_text(message.get("role", ""))
+
+        # Add content tokens
+        if "content" in message:
+            tokens += self.count_content(message["content"])
+
+        # Add tool calls tokens
+        if "tool_calls" in message:
+            tokens += self.count_tool_calls(message["tool_calls"])
+
+        # Add name and tool_call_id tokens
+        tokens += self.count_text(message.get("name", ""))
+        tokens += self.count_text(message.get("tool_call_id", ""))
+
+        return tokens
+
     def count_message_tokens(self, messages: List[dict]) -> int:
         """Calculate the total number of tokens in a message list"""
         total_tokens = self.FORMAT_TOKENS  # Base format tokens
 
         for message in messages:
-            tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+            total_tokens += self.count_single_message(message)
 
-            # Add role tokens
-            tokens += self.count_text(message.get("role", ""))
+        return total_tokens
 
-            # Add content tokens
-            if "content" in message:
-                tokens += self.count_content(message["content"])
 
-            # Add tool calls tokens
-            if "tool_calls" in message:
-                tokens += self.count_tool_calls(message["tool_calls"])
+class TokenUsage(BaseModel):
+    """Tokens used by the LLM calls inside a track_usage() block"""
 
-            # Add name and tool_call_id tokens
-            tokens += self.count_text(message.get("name", ""))
-            tokens += self.count_text(message.get("tool_call_id", ""))
+    input_tokens: int = 0
+    completion_tokens: int = 0
 
-            total_tokens += tokens
 
-        return total_tokens
+_current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[TokenUsage]:
+    """Collect the token usage of LLM calls made in this block by the current task."""
+    usage = TokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+async def _release_when_done(stream, stack: AsyncExitStack):
+    """Yield from stream, then release whatever stack holds."""
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stack.aclose()
+
+
+class StreamDelta(BaseModel):
+    """An incremental piece of a streamed completion"""
+
+    type: Literal["content", "reasoning", "tool_call", "message"]
+    text: str = ""
+    tool_call_index: Optional[int] = None
+    tool_name: Optional[str] = None
+    message: Optional[ChatCompletionMessage] = None
+
+
+class ToolCallAssembler:
+    """Assemble a ChatCompletionMessage from streamed chat completion chunks"""
+
+    def __init__(self):
+        self.content: List[str] = []
+        self.reasoning: List[str] = []
+        self.tool_calls: Dict[int, dict] = {}
+        self.usage = None
+
+    def add_chunk(self, chunk) -> List[StreamDelta]:
+        """Merge one chunk into the partial message and return its deltas"""
+        if getattr(chunk, "usage", None):
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return []
+
+        delta = chunk.choices[0].delta
+        deltas = []
+
+        reasoning = getattr(delta, "reasoning_content", None)
+        if reasoning:
+            self.reasoning.append(reasoning)
+            deltas.append(StreamDelta(type="reasoning", text=reasoning))
+
+        if delta.content:
+            self.content.append(delta.content)
+            deltas.append(StreamDelta(type="content", text=delta.content))
+
+        for call_delta in delta.tool_calls or []:
+            call = self.tool_calls.setdefault(
+                call_delta.index, {"id": "", "name": "", "arguments": []}
+            )
+            if call_delta.id:
+                call["id"] = call_delta.id
+            function = call_delta.function
+            if function and function.name:
+                call["name"] += function.name
+            fragment = function.arguments if function and function.arguments else ""
+            call["arguments"].append(fragment)
+            deltas.append(
+                StreamDelta(
+                    type="tool_call",
+                    text=fragment,
+                    tool_call_index=call_delta.index,
+                    tool_name=call["name"] or None,
+                )
+            )
+        return deltas
+
+    def build_message(self) -> ChatCompletionMessage:
+        """Build the final message from everything received so far"""
+        tool_calls = [
+            ChatCompletionMessageToolCall(
+                id=call["id"],
+                type="function",
+                function=Function(
+                    name=call["name"], arguments="".join(call["arguments"])
+                ),
+            )
+            for _, call in sorted(self.tool_calls.items())
+        ]
+        return ChatCompletionMessage(
+            role="assistant",
+            content="".join(self.content) or None,
+            tool_calls=tool_calls or None,
+            reasoning_content="".join(self.reasoning) or None,
+        )
 
 
 class LLM:
@@ -217,19 +404,93 @@ class LLM:
                     base_url=self.base_url,
                     api_key=self.api_key,
                     api_version=self.api_version,
+                    http_client=get_http_client(),
                 )
             elif self.api_type == "aws":
                 self.client = BedrockClient()
             else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+                self.client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=get_http_client(),
+                )
+            # Shared by every config name that points at the same provider/model
+            self.endpoint = f"{self.api_type}:{self.base_url}:{self.model}"
+            self.rate_limiter = get_rate_limiter(
+                self.endpoint,
+                llm_config.requests_per_minute,
+                llm_config.tokens_per_minute,
+            )
 
             self.token_counter = TokenCounter(self.tokenizer)
+            self.truncation_strategy = get_truncation_strategy(
+                getattr(llm_config, "truncation_strategy", "drop_oldest")
+            )
+            self.response_cache = get_response_cache()
+            # Another [llm.*] config to fall back to or hedge with
+            self.fallback_config = (
+                llm_config.fallback if llm_config.fallback != config_name else None
+            )
+            self.hedge_after = llm_config.hedge_after
+            # USD per million tokens, for cost accounting
+            self.input_price = llm_config.input_price
+            self.output_price = llm_config.output_price
+
+    @property
+    def fallback(self) -> Optional["LLM"]:
+        """The fallback LLM, created on first use (None if not configured)."""
+        name = getattr(self, "fallback_config", None)
+        return LLM(config_name=name) if name else None
+
+    def _cache_lookup(self, kind: str, params: dict) -> Tuple[Optional[str], Any]:
+        """
+        Look a request up in the response cache.
+
+        Returns:
+            Tuple[Optional[str], Any]: The cache key (None if caching is off)
+            and the cached value (None on a miss)
+
+        Raises:
+            CacheMiss: In replay mode, if the request was never recorded
+        """
+        cache = getattr(self, "response_cache", None)
+        if cache is None:
+            return None, None
+        key = make_cache_key(kind, params)
+        value = cache.get(key)
+        if value is not None:
+            logger.info(f"LLM response served from cache ({kind}, {key[:12]})")
+        return key, value
+
+    def _cache_store(self, key: Optional[str], value: Any) -> None:
+        """Store a response under a key returned by _cache_lookup."""
+        if key is None or value is None:
+            return
+        if isinstance(value, BaseModel):
+            value = value.model_dump(mode="json")
+        self.response_cache.put(key, value)
+
+    async def _create(self, input_tokens: int, **params):
+        """Send a completion request once the provider's rate limiter allows it."""
+        limiter = getattr(self, "rate_limiter", None)
+        if limiter is None:
+            return await self.client.chat.completions.create(**params)
+        stack = AsyncExitStack()
+        await stack.enter_async_context(limiter.request(input_tokens))
+        try:
+            response = await self.client.chat.completions.create(**params)
+        except BaseException:
+            await stack.aclose()
+            raise
+        if not hasattr(response, "__aiter__"):
+            await stack.aclose()
+            return response
+        # A stream keeps its slot, and counts as in flight, until it is consumed
+        return _release_when_done(response, stack)
 
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
-        if not text:
-            return 0
-        return len(self.tokenizer.encode(text))
+        return self.token_counter.count_text(text)
 
     def count_message_tokens(self, messages: List[dict]) -> int:
         return self.token_counter.count_message_tokens(messages)
@@ -239,6 +500,14 @@ class LLM:
         # Only track tokens if max_input_tokens is set
         self.total_input_tokens += input_tokens
         self.total_completion_tokens += completion_tokens
+        usage = _current_usage.get()
+        if usage is not None:
+            usage.input_tokens += input_tokens
+            usage.completion_tokens += completion_tokens
+        # Input tokens were reserved from the estimate when the request was sent
+        limiter = getattr(self, "rate_limiter", None)
+        if limiter is not None:
+            limiter.record_usage(completion_tokens)
         # logger.debug(
         #     f"Token usage: Input={input_tokens}, Completion={completion_tokens}, "
         #     f"Cumulative Input={self.total_input_tokens}, Cumulative Completion={self.total_completion_tokens}, "
@@ -262,43 +531,33 @@ class LLM:
 
         return "Token limit exceeded"
 
-    def truncate_messages(self, messages: List[dict], max_tokens: int) -> List[dict]:
+    def truncate_messages(
+        self,
+        messages: List[dict],
+        max_tokens: int,
+        strategy: Optional[TruncationStrategy] = None,
+    ) -> List[dict]:
         """
         Truncate messages to fit within token limit while preserving most recent interactions.
 
+        Each message is counted once (through the token cache) and the cut point
+        is chosen over prefix sums by the configured truncation strategy. Tool
+        calls and their results are kept or dropped together.
+
         Args:
             messages: List of messages to truncate
             max_tokens: Maximum allowed tokens
+            strategy: Optional strategy overriding the configured one
 
         Returns:
             List[dict]: Truncated list of messages
         """
-        # Always keep system messages if present
-        system_messages = [m for m in messages if m["role"] == "system"]
-        non_system_messages = [m for m in messages if m["role"] != "system"]
-
-        # Calculate tokens for system messages
-        system_tokens = self.count_message_tokens(system_messages)
-        remaining_tokens = max_tokens - system_tokens
-
-        # If no space for other messages, return only system messages
-        if remaining_tokens <= 0:
-            logger.warning("Token limit only allows system messages")
-            return system_messages
-
-        # Start from most recent messages and work backwards
-        truncated_messages = []
-        current_tokens = 0
-
-        for message in reversed(non_system_messages):
-            message_tokens = self.count_message_tokens([message])
-            if current_tokens + message_tokens <= remaining_tokens:
-                truncated_messages.insert(0, message)
-                current_tokens += message_tokens
-            else:
-                break
-
-        return system_messages + truncated_messages
+        strategy = strategy or self.truncation_strategy
+        return strategy.truncate(
+            messages,
+            self.token_counter.count_single_message,
+            max_tokens - TokenCounter.FORMAT_TOKENS,
+        )
 
     @staticmethod
     def format_messages(
@@ -388,13 +647,7 @@ class LLM:
 
         return formatted_messages
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    @with_retry_policy
     async def ask(
         self,
         messages: List[Union[dict, Message]],
@@ -455,18 +708,23 @@ class LLM:
                 )
 
             logger.debug(f"*****************llm params: {params}")
+            cache_key, cached = self._cache_lookup(
+                "ask_text" if stream else "ask", params
+            )
+            if cached is not None:
+                return cached if stream else ChatCompletionMessage(**cached)
+
             if stream:
                 # logger.info(f"llm request prompt: {messages}")
                 # Streaming request
                 try:
-                    completion: ChatCompletion = (
-                        await self.client.chat.completions.create(
-                            **params,
-                            extra_body={
-                                "enable_thinking": False,
-                            },
-                            stream=True,
-                        )
+                    completion: ChatCompletion = await self._create(
+                        input_tokens,
+                        **params,
+                        extra_body={
+                            "enable_thinking": False,
+                        },
+                        stream=True,
                     )
 
                     response = []
@@ -486,6 +744,7 @@ class LLM:
 
                     final_response = "".join(response)
                     print(f"*****************llm response: {final_response}")
+                    self._cache_store(cache_key, final_response)
                     return final_response
 
                 except Exception as e:
@@ -493,25 +752,25 @@ class LLM:
                     # 如果流式处理失败，尝试非流式请求作为备选
                     logger.info("Falling back to non-streaming request")
                     try:
-                        completion: ChatCompletion = (
-                            await self.client.chat.completions.create(
-                                **params,
-                                extra_body={
-                                    "enable_thinking": False,
-                                },
-                                stream=False,
-                            )
+                        completion: ChatCompletion = await self._create(
+                            input_tokens,
+                            **params,
+                            extra_body={
+                                "enable_thinking": False,
+                            },
+                            stream=False,
                         )
                         response_content = completion.choices[0].message.content
                         print(
                             f"*****************llm response (fallback): {response_content}"
                         )
+                        self._cache_store(cache_key, response_content)
                         return response_content
                     except Exception as fallback_error:
                         logger.error(f"Fallback request also failed: {fallback_error}")
                         raise fallback_error
 
-            response = await self.client.chat.completions.create(**params, stream=False)
+            response = await self._create(input_tokens, **params, stream=False)
             print(f"*****************llm response: {response}")
 
             if not response.choices or not response.choices[0].message:
@@ -524,10 +783,11 @@ class LLM:
             )
 
             logger.debug(f"response content: {response.choices[0].message.content}")
+            self._cache_store(cache_key, response.choices[0].message)
             return response.choices[0].message
 
-        except TokenLimitExceeded:
-            # Re-raise token limit errors without logging
+        except (TokenLimitExceeded, CacheMiss):
+            # Re-raise token limit errors and replay misses without logging
             raise
         except ValueError:
             logger.exception(f"Validation error")
@@ -545,13 +805,7 @@ class LLM:
             logger.exception(f"Unexpected error in ask")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    @with_retry_policy
     async def ask_with_images(
         self,
         messages: List[Union[dict, Message]],
@@ -658,19 +912,24 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
+            cache_key, cached = self._cache_lookup("ask_with_images", params)
+            if cached is not None:
+                return cached
+
             # Handle non-streaming request
             if not stream:
-                response = await self.client.chat.completions.create(**params)
+                response = await self._create(input_tokens, **params)
 
                 if not response.choices or not response.choices[0].message.content:
                     raise ValueError("Empty or invalid response from LLM")
 
                 self.update_token_count(response.usage.prompt_tokens)
+                self._cache_store(cache_key, response.choices[0].message.content)
                 return response.choices[0].message.content
 
             # Handle streaming request
             self.update_token_count(input_tokens)
-            response = await self.client.chat.completions.create(**params)
+            response = await self._create(input_tokens, **params)
 
             collected_messages = []
             async for chunk in response:
@@ -684,9 +943,10 @@ class LLM:
             if not full_response:
                 raise ValueError("Empty response from streaming LLM")
 
+            self._cache_store(cache_key, full_response)
             return full_response
 
-        except TokenLimitExceeded:
+        except (TokenLimitExceeded, CacheMiss):
             raise
         except ValueError as ve:
             logger.error(f"Validation error in ask_with_images: {ve}")
@@ -704,13 +964,75 @@ class LLM:
             logger.error(f"Unexpected error in ask_with_images: {e}")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
-    )
+    def _prepare_tool_params(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        timeout: int = 300,
+        tools: Optional[List[dict]] = None,
+        tool_choice: str = ToolChoice.AUTO.value,  # type: ignore
+        temperature: Optional[float] = None,
+        **kwargs,
+    ) -> Tuple[dict, int]:
+        """
+        Format, count and truncate messages and build tool completion params.
+
+        Returns:
+            Tuple[dict, int]: The request params and the estimated input tokens
+        """
+        # Check if the model supports images
+        supports_images = self.model in MULTIMODAL_MODELS
+
+        # Format messages
+        if system_msgs:
+            system_msgs = self.format_messages(system_msgs, supports_images)
+            messages = system_msgs + self.format_messages(messages, supports_images)
+        else:
+            messages = self.format_messages(messages, supports_images)
+
+        # Calculate input token count
+        input_tokens = self.count_message_tokens(messages)
+        # If there are tools, calculate token count for tool descriptions
+        tools_tokens = 0
+        if hasattr(tools, "token_cost"):
+            # ToolParams from ToolCollection.to_params(): counted once per toolset
+            tools_tokens = tools.token_cost(self.token_counter)
+        elif tools:
+            for tool in tools:
+                tools_tokens += self.count_tokens(str(tool))
+        input_tokens += tools_tokens
+
+        # If token limit exceeded, truncate messages
+        if self.max_input_tokens and input_tokens > self.max_input_tokens:
+            messages = self.truncate_messages(
+                messages, self.max_input_tokens - tools_tokens
+            )
+            input_tokens = self.count_message_tokens(messages) + tools_tokens
+            logger.info(f"input tokens after truncate: {input_tokens}")
+
+        # Set up the completion request
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "timeout": timeout,
+            "presence_penalty": 2,
+            "top_p": 0.95,
+            "extra_body": {"top_k": 20},
+            **kwargs,
+        }
+        # logger.info(f"llm request prompt: {messages}")
+        if self.model in REASONING_MODELS:
+            params["max_completion_tokens"] = self.max_tokens
+        else:
+            params["max_tokens"] = self.max_tokens
+            params["temperature"] = (
+                temperature if temperature is not None else self.temperature
+            )
+        return params, input_tokens
+
+    @with_retry_policy
     async def ask_tool(
         self,
         messages: List[Union[dict, Message]],
@@ -743,57 +1065,24 @@ class LLM:
             Exception: For unexpected errors
         """
         try:
-            # Check if the model supports images
-            supports_images = self.model in MULTIMODAL_MODELS
-
-            # Format messages
-            if system_msgs:
-                system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
-            else:
-                messages = self.format_messages(messages, supports_images)
-
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
-            # If there are tools, calculate token count for tool descriptions
-            tools_tokens = 0
-            if tools:
-                for tool in tools:
-                    tools_tokens += self.count_tokens(str(tool))
-            input_tokens += tools_tokens
-
-            # If token limit exceeded, truncate messages
-            if self.max_input_tokens and input_tokens > self.max_input_tokens:
-                messages = self.truncate_messages(
-                    messages, self.max_input_tokens - tools_tokens
-                )
-                input_tokens = self.count_message_tokens(messages) + tools_tokens
-                logger.info(f"input tokens after truncate: {input_tokens}")
-
-            # Set up the completion request
-            params = {
-                "model": self.model,
-                "messages": messages,
-                "tools": tools,
-                "tool_choice": tool_choice,
-                "timeout": timeout,
-                "presence_penalty": 2,
-                "top_p": 0.95,
-                "extra_body": {"top_k": 20},
+            params, input_tokens = self._prepare_tool_params(
+                messages,
+                system_msgs=system_msgs,
+                timeout=timeout,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=temperature,
                 **kwargs,
-            }
-            # logger.info(f"llm request prompt: {messages}")
-            if self.model in REASONING_MODELS:
-                params["max_completion_tokens"] = self.max_tokens
-            else:
-                params["max_tokens"] = self.max_tokens
-                params["temperature"] = (
-                    temperature if temperature is not None else self.temperature
-                )
+            )
 
             params["stream"] = False  # Always use non-streaming for tool requests
             logger.info(f"*****************llm params: {params}")
-            response = await self.client.chat.completions.create(
+            cache_key, cached = self._cache_lookup("ask_tool", params)
+            if cached is not None:
+                return ChatCompletionMessage(**cached)
+
+            response = await self._create(
+                input_tokens,
                 **params,
             )
 
@@ -811,9 +1100,10 @@ class LLM:
             logger.info(
                 f"response content: {response.choices[0].message.content}, resoning content: {response.choices[0].message.reasoning_content}, tools: {response.choices[0].message.tool_calls}"
             )
+            self._cache_store(cache_key, response.choices[0].message)
             return response.choices[0].message
-        except TokenLimitExceeded:
-            # Re-raise token limit errors without logging
+        except (TokenLimitExceeded, CacheMiss):
+            # Re-raise token limit errors and replay misses without logging
             raise
         except ValueError as ve:
             logger.error(f"Validation error in ask_tool: {ve}")
@@ -830,3 +1120,132 @@ class LLM:
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+
+    @with_retry_policy_stream
+    async def ask_tool_stream(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        timeout: int = 300,
+        tools: Optional[List[dict]] = None,
+        tool_choice: str = ToolChoice.AUTO.value,  # type: ignore
+        temperature: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamDelta]:
+        """
+        Streaming variant of ask_tool.
+
+        Yields content and reasoning deltas as they arrive, plus a tool_call
+        delta for every argument fragment, while tool calls are assembled
+        incrementally. The last delta has type "message" and carries the
+        assembled ChatCompletionMessage (None if the response was empty).
+
+        Failures are retried (or sent to the fallback) like ask_tool's until
+        the first delta has been yielded; after that they are raised, since
+        the caller has already consumed part of the response.
+
+        Args:
+            messages: List of conversation messages
+            system_msgs: Optional system messages to prepend
+            timeout: Request timeout in seconds
+            tools: List of tools to use
+            tool_choice: Tool choice strategy
+            temperature: Sampling temperature for the response
+            **kwargs: Additional completion arguments
+
+        Yields:
+            StreamDelta: Incremental response deltas, ending with the message
+
+        Raises:
+            TokenLimitExceeded: If token limits are exceeded
+            ValueError: If tools, tool_choice, or messages are invalid
+            OpenAIError: If API call fails
+        """
+        try:
+            params, input_tokens = self._prepare_tool_params(
+                messages,
+                system_msgs=system_msgs,
+                timeout=timeout,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=temperature,
+                **kwargs,
+            )
+            params["stream"] = True
+            if self.api_type != "aws":
+                params["stream_options"] = {"include_usage": True}
+
+            # Shares entries with ask_tool: streaming does not change the response
+            cache_key, cached = self._cache_lookup("ask_tool", params)
+            if cached is not None:
+                message = ChatCompletionMessage(**cached)
+                reasoning = getattr(message, "reasoning_content", None)
+                if reasoning:
+                    yield StreamDelta(type="reasoning", text=reasoning)
+                if message.content:
+                    yield StreamDelta(type="content", text=message.content)
+                yield StreamDelta(type="message", message=message)
+                return
+
+            response = await self._create(input_tokens, **params)
+            assembler = ToolCallAssembler()
+
+            if not hasattr(response, "__aiter__"):
+                # Client returned a complete response instead of a stream
+                message = (
+                    response.choices[0].message
+                    if response.choices and response.choices[0].message
+                    else None
+                )
+                if message and message.content:
+                    yield StreamDelta(type="content", text=message.content)
+                if response.usage:
+                    self.update_token_count(
+                        response.usage.prompt_tokens, response.usage.completion_tokens
+                    )
+                self._cache_store(cache_key, message)
+                yield StreamDelta(type="message", message=message)
+                return
+
+            async for chunk in response:
+                for delta in assembler.add_chunk(chunk):
+                    yield delta
+
+            message = assembler.build_message()
+            if assembler.usage:
+                self.update_token_count(
+                    assembler.usage.prompt_tokens, assembler.usage.completion_tokens
+                )
+            else:
+                completion_tokens = self.count_tokens(message.content or "") + sum(
+                    self.count_tokens(call.function.arguments)
+                    for call in message.tool_calls or []
+                )
+                self.update_token_count(input_tokens, completion_tokens)
+
+            logger.info(
+                f"streamed response content: {message.content}, tools: {message.tool_calls}"
+            )
+            if message.content or message.tool_calls:
+                self._cache_store(cache_key, message)
+            yield StreamDelta(
+                type="message",
+                message=message if message.content or message.tool_calls else None,
+            )
+        except (TokenLimitExceeded, CacheMiss):
+            raise
+        except ValueError as ve:
+            logger.error(f"Validation error in ask_tool_stream: {ve}")
+            raise
+        except OpenAIError as oe:
+            logger.error(f"OpenAI API error: {oe}")
+            if isinstance(oe, AuthenticationError):
+                logger.error("Authentication failed. Check API key.")
+            elif isinstance(oe, RateLimitError):
+                logger.error("Rate limit exceeded.")
+            elif isinstance(oe, APIError):
+                logger.error(f"API error: {oe}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in ask_tool_stream: {e}")
+            raise
@@ -0,0 +1,225 @@
+"""Content-addressed cache of LLM responses with an optional SQLite tier."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from enum import Enum
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from app.config import config
+from app.exceptions import OpenManusError
+from app.logger import logger
+
+
+# Request params that do not change the response
+VOLATILE_PARAMS = ("timeout", "stream", "stream_options")
+
+
+class CacheMode(str, Enum):
+    """How LLM calls use the response cache"""
+
+    OFF = "off"
+    READ_WRITE = "read_write"  # Serve hits, call the provider on a miss and store
+    RECORD = "record"  # Always call the provider and overwrite the recording
+    REPLAY = "replay"  # Serve only from the recording; a miss is an error
+
+
+class CacheMiss(OpenManusError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+def make_cache_key(kind: str, params: dict) -> str:
+    """
+    Hash a request into a stable cache key.
+
+    The key covers the model, messages, tools and sampling params; params
+    that only affect transport (timeout, streaming) are left out. `kind`
+    separates calls that return different shapes for the same params.
+    """
+    payload = {k: v for k, v in params.items() if k not in VOLATILE_PARAMS}
+    canonical = json.dumps(
+        [kind, payload],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Durable tier of the response cache."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Return (stored_at, value) for key, or None."""
+
+    @abstractmethod
+    def put(self, key: str, stored_at: float, value: Any) -> None:
+        """Store a JSON-serializable value under key."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key."""
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Responses in a single SQLite table keyed by request hash."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def put(self, key: str, stored_at: float, value: Any) -> None:
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, stored_at, value) "
+                "VALUES (?, ?, ?)",
+                (key, stored_at, data),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Two-tier response cache: an in-memory LRU in front of an optional backend.
+
+    Entries older than `ttl` seconds are treated as misses and removed,
+    except in replay mode, where the recording is served regardless of age.
+    """
+
+    def __init__(
+        self,
+        mode: CacheMode = CacheMode.READ_WRITE,
+        backend: Optional[CacheBackend] = None,
+        memory_size: int = 256,
+        ttl: Optional[float] = None,
+    ):
+        self.mode = CacheMode(mode)
+        self.backend = backend
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in (CacheMode.READ_WRITE, CacheMode.REPLAY)
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in (CacheMode.READ_WRITE, CacheMode.RECORD)
+
+    def _expired(self, stored_at: float) -> bool:
+        return (
+            self.mode != CacheMode.REPLAY
+            and self.ttl is not None
+            and time.time() - stored_at > self.ttl
+        )
+
+    def _remember(self, key: str, entry: Tuple[float, Any]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a response.
+
+        Returns:
+            The stored value, or None on a miss (including when reads are off)
+
+        Raises:
+            CacheMiss: In replay mode, if nothing was recorded for key
+        """
+        if not self.reads:
+            return None
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        elif self.backend is not None:
+            entry = self.backend.get(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is not None and self._expired(entry[0]):
+            self._memory.pop(key, None)
+            if self.backend is not None:
+                self.backend.delete(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            if self.mode == CacheMode.REPLAY:
+                raise CacheMiss(f"No recorded LLM response for request {key[:12]}")
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable response (no-op unless writes are on)."""
+        if not self.writes or value is None:
+            return
+        entry = (time.time(), value)
+        self._remember(key, entry)
+        if self.backend is not None:
+            self.backend.put(key, *entry)
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache from [llm_cache], or None if off."""
+    global _cache
+    settings = config.llm_cache
+    if settings is None or CacheMode(settings.mode) == CacheMode.OFF:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = None
+                if settings.backend == "sqlite":
+                    path = config.root_path / settings.path
+                    logger.info(f"LLM response cache ({settings.mode}) at {path}")
+                    backend = SQLiteCacheBackend(str(path))
+                elif settings.backend != "memory":
+                    raise ValueError(f"Unknown LLM cache backend: {settings.backend}")
+                _cache = ResponseCache(
+                    mode=settings.mode,
+                    backend=backend,
+                    memory_size=settings.memory_size,
+                    ttl=settings.ttl,
+                )
+    return _cache
@@ -0,0 +1,535 @@
+"""Retry policy for LLM calls: error classification, retry budget, circuit breakers."""
+import asyncio
+import email.utils
+import functools
+import random
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AuthenticationError,
+    BadRequestError,
+    NotFoundError,
+    PermissionDeniedError,
+    RateLimitError,
+    UnprocessableEntityError,
+)
+
+from app.config import config
+from app.exceptions import OpenManusError
+from app.logger import logger
+
+
+T = TypeVar("T")
+
+# Bedrock (botocore ClientError) error codes
+BEDROCK_THROTTLING_CODES = {"ThrottlingException", "TooManyRequestsException"}
+BEDROCK_RETRYABLE_CODES = {
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+    "ServiceUnavailableException",
+}
+
+
+class ErrorClass(str, Enum):
+    """How the retry policy treats a failed LLM call"""
+
+    RETRYABLE = "retryable"  # Transient: connection, timeout, 5xx
+    RATE_LIMITED = "rate_limited"  # 429/throttling, possibly with a Retry-After hint
+    FATAL = "fatal"  # Retrying cannot help: auth, validation, token limits
+
+
+class CircuitOpenError(OpenManusError):
+    """Raised when calls to an endpoint are short-circuited after repeated failures"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_after:.0f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(headers: Any) -> Optional[float]:
+    """Read a Retry-After hint, in seconds, from response headers."""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def classify_error(exc: BaseException) -> Tuple[ErrorClass, Optional[float]]:
+    """
+    Classify an exception raised by an LLM call.
+
+    Returns:
+        Tuple[ErrorClass, Optional[float]]: The class and, for rate-limited
+        errors, the provider's Retry-After hint in seconds (None if absent)
+    """
+    # tenacity RetryError and other wrappers keep the real error as the cause
+    if type(exc).__name__ == "RetryError" and exc.__cause__ is not None:
+        exc = exc.__cause__
+
+    if isinstance(exc, (OpenManusError, ValueError, TypeError)):
+        # TokenLimitExceeded, CacheMiss, CircuitOpenError, invalid messages
+        return ErrorClass.FATAL, None
+    if isinstance(exc, RateLimitError):
+        return ErrorClass.RATE_LIMITED, _parse_retry_after(exc.response.headers)
+    if isinstance(
+        exc,
+        (
+            AuthenticationError,
+            PermissionDeniedError,
+            BadRequestError,
+            NotFoundError,
+            UnprocessableEntityError,
+        ),
+    ):
+        return ErrorClass.FATAL, None
+    if isinstance(exc, (APITimeoutError, APIConnectionError)):
+        return ErrorClass.RETRYABLE, None
+    if isinstance(exc, APIStatusError):
+        if exc.status_code in (408, 409) or exc.status_code >= 500:
+            return ErrorClass.RETRYABLE, None
+        return ErrorClass.FATAL, None
+
+    # botocore ClientError carries a response dict instead of an httpx response
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict) and "Error" in response:
+        code = response["Error"].get("Code", "")
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        if code in BEDROCK_THROTTLING_CODES or status == 429:
+            headers = response.get("ResponseMetadata", {}).get("HTTPHeaders")
+            return ErrorClass.RATE_LIMITED, _parse_retry_after(headers)
+        if code in BEDROCK_RETRYABLE_CODES or status >= 500:
+            return ErrorClass.RETRYABLE, None
+        return ErrorClass.FATAL, None
+
+    # Network errors and anything unrecognised: retry, within the budget
+    return ErrorClass.RETRYABLE, None
+
+
+class RetryBudget:
+    """Process-wide cap on retries relative to first attempts.
+
+    Within a sliding `window` of seconds, at most `min_retries` plus
+    `ratio` times the number of first attempts may be retried. When a
+    provider is down this stops every caller from multiplying its load.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10, window: float = 60.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self.exhausted = 0
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self) -> None:
+        """Count a first attempt."""
+        self._requests.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; False if it is used up."""
+        now = time.monotonic()
+        self._prune(now)
+        if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+            self.exhausted += 1
+            return False
+        self._retries.append(now)
+        return True
+
+    def metrics(self) -> Dict[str, float]:
+        self._prune(time.monotonic())
+        return {
+            "requests": len(self._requests),
+            "retries": len(self._retries),
+            "exhausted": self.exhausted,
+        }
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker for one endpoint.
+
+    Opens when, over the last `window` seconds and at least `min_requests`
+    calls, the share of retryable or rate-limited failures reaches
+    `failure_rate`. After `cooldown` seconds a single probe call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_requests: int = 10,
+        window: float = 60.0,
+        cooldown: float = 30.0,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.cooldown = cooldown
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self._probing = False
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self.times_opened = 0
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            _, ok = self._outcomes.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def _open(self, now: float) -> None:
+        self.state = CircuitState.OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        logger.warning(f"Circuit breaker for {self.name} opened")
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may be sent now (claims the probe when half-open)."""
+        if self.state == CircuitState.OPEN and self.retry_after() == 0:
+            self.state = CircuitState.HALF_OPEN
+        if self.state == CircuitState.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return self.state == CircuitState.CLOSED
+
+    def record(self, ok: bool) -> None:
+        """Record the outcome of an allowed call."""
+        now = time.monotonic()
+        if self.state == CircuitState.HALF_OPEN:
+            self._probing = False
+            if ok:
+                self.state = CircuitState.CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+                logger.info(f"Circuit breaker for {self.name} closed")
+            else:
+                self._open(now)
+            return
+        self._outcomes.append((now, ok))
+        if not ok:
+            self._failures += 1
+        self._prune(now)
+        total = len(self._outcomes)
+        if (
+            self.state == CircuitState.CLOSED
+            and total >= self.min_requests
+            and self._failures / total >= self.failure_rate
+        ):
+            self._open(now)
+
+    def release(self) -> None:
+        """Give back a half-open probe whose outcome says nothing about the endpoint."""
+        self._probing = False
+
+    def metrics(self) -> Dict[str, Any]:
+        self._prune(time.monotonic())
+        return {
+            "state": self.state.value,
+            "calls": len(self._outcomes),
+            "failures": self._failures,
+            "times_opened": self.times_opened,
+        }
+
+
+class RetryPolicy:
+    """Retries LLM calls according to their error class.
+
+    Fatal errors are raised at once. Rate-limited calls wait for the
+    provider's Retry-After hint when there is one; other retryable errors
+    back off exponentially with jitter. Every retry is taken from a shared
+    `RetryBudget`, and every call goes through its endpoint's
+    `CircuitBreaker`.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_wait: float = 1.0,
+        max_wait: float = 30.0,
+        budget: Optional[RetryBudget] = None,
+        breaker_factory: Optional[Callable[[str], CircuitBreaker]] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_wait = base_wait
+        self.max_wait = max_wait
+        self.budget = budget or RetryBudget()
+        self._breaker_factory = breaker_factory or CircuitBreaker
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = self._breaker_factory(endpoint)
+        return breaker
+
+    def _backoff(self, attempt: int) -> float:
+        cap = min(self.max_wait, self.base_wait * 2 ** (attempt - 1))
+        return random.uniform(min(self.base_wait, cap), cap)
+
+    async def call(self, endpoint: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn` against `endpoint`, retrying per the policy.
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+            Exception: The last error, once it is fatal, attempts or the
+                retry budget run out, or a Retry-After exceeds max_wait
+        """
+        breaker = self.breaker(endpoint)
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                raise CircuitOpenError(endpoint, breaker.retry_after())
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                error_class, retry_after = classify_error(e)
+                if error_class == ErrorClass.FATAL:
+                    breaker.release()
+                    raise
+                breaker.record(ok=False)
+
+                if error_class == ErrorClass.RATE_LIMITED and retry_after is not None:
+                    if retry_after > self.max_wait:
+                        logger.error(
+                            f"{endpoint} asked to retry after {retry_after:.0f}s, giving up"
+                        )
+                        raise
+                    delay = retry_after
+                else:
+                    delay = self._backoff(attempt)
+                if attempt >= self.max_attempts:
+                    raise
+                if not self.budget.try_spend():
+                    logger.warning(f"Retry budget exhausted, not retrying {endpoint}")
+                    raise
+                logger.warning(
+                    f"LLM call to {endpoint} failed ({error_class.value}: {e}), "
+                    f"retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+            else:
+                breaker.record(ok=True)
+                return result
+
+    async def hedged(
+        self,
+        primary: Tuple[str, Callable[[], Awaitable[T]]],
+        fallback: Tuple[str, Callable[[], Awaitable[T]]],
+        hedge_after: Optional[float] = None,
+    ) -> T:
+        """
+        Run a call with a fallback endpoint.
+
+        The fallback is used when the primary's circuit is open, and, if
+        `hedge_after` is set, is also started when the primary has not
+        answered within that many seconds; the first success wins and the
+        other call is cancelled.
+        """
+        primary_endpoint, primary_fn = primary
+        fallback_endpoint, fallback_fn = fallback
+        breaker = self.breaker(primary_endpoint)
+        if breaker.state == CircuitState.OPEN and breaker.retry_after() > 0:
+            logger.info(f"{primary_endpoint} circuit open, using {fallback_endpoint}")
+            return await self.call(fallback_endpoint, fallback_fn)
+        if hedge_after is None:
+            return await self.call(primary_endpoint, primary_fn)
+
+        first = asyncio.ensure_future(self.call(primary_endpoint, primary_fn))
+        done, _ = await asyncio.wait({first}, timeout=hedge_after)
+        if done and not first.exception():
+            return first.result()
+        if done and classify_error(first.exception())[0] == ErrorClass.FATAL:
+            if not isinstance(first.exception(), CircuitOpenError):
+                return first.result()  # Raises
+        logger.info(f"Hedging {primary_endpoint} call with {fallback_endpoint}")
+        second = asyncio.ensure_future(self.call(fallback_endpoint, fallback_fn))
+        pending = {second} if done else {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if not task.exception():
+                        return task.result()
+            # Both failed: report the primary's error
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget.metrics(),
+            "breakers": {name: b.metrics() for name, b in self.breakers.items()},
+        }
+
+
+_policy: Optional[RetryPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the process-wide retry policy configured by [retry]."""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                settings = config.retry
+                _policy = RetryPolicy(
+                    max_attempts=settings.max_attempts,
+                    base_wait=settings.base_wait,
+                    max_wait=settings.max_wait,
+                    budget=RetryBudget(
+                        settings.budget_ratio,
+                        settings.budget_min_retries,
+                        settings.budget_window,
+                    ),
+                    breaker_factory=functools.partial(
+                        CircuitBreaker,
+                        failure_rate=settings.breaker_failure_rate,
+                        min_requests=settings.breaker_min_requests,
+                        window=settings.breaker_window,
+                        cooldown=settings.breaker_cooldown,
+                    ),
+                )
+    return _policy
+
+
+def with_retry_policy(method: Callable[..., Awaitable[T]]):
+    """
+    Decorate an LLM request method with the retry policy.
+
+    Uses the instance's `endpoint` for the circuit breaker and, when the
+    instance has a `fallback` LLM, runs the same method on it as a
+    fallback/hedge (without nesting another retry loop around it).
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs) -> T:
+        policy = getattr(self, "retry_policy", None) or get_retry_policy()
+        endpoint = getattr(self, "endpoint", None) or getattr(self, "model", "llm")
+        primary = (endpoint, lambda: method(self, *args, **kwargs))
+        fallback = getattr(self, "fallback", None)
+        if fallback is None:
+            return await policy.call(*primary)
+        return await policy.hedged(
+            primary,
+            (fallback.endpoint, lambda: method(fallback, *args, **kwargs)),
+            hedge_after=getattr(self, "hedge_after", None),
+        )
+
+    return wrapper
+
+
+_EMPTY = object()  # First item of a stream that yielded nothing
+
+
+async def _open_stream(stream: AsyncIterator[T]) -> Tuple[AsyncIterator[T], Any]:
+    """Start a stream and wait for its first item, closing it on failure."""
+    try:
+        return stream, await stream.__anext__()
+    except StopAsyncIteration:
+        return stream, _EMPTY
+    except BaseException:
+        await stream.aclose()
+        raise
+
+
+def with_retry_policy_stream(method: Callable[..., AsyncIterator[T]]):
+    """
+    Streaming counterpart of `with_retry_policy`.
+
+    An attempt counts as the call until the stream produces its first item:
+    failures before that are retried, short-circuited or hedged like any
+    other call. Once an item has reached the caller, errors are raised to
+    it, since a retry would repeat what was already consumed.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs) -> AsyncIterator[T]:
+        policy = getattr(self, "retry_policy", None) or get_retry_policy()
+        endpoint = getattr(self, "endpoint", None) or getattr(self, "model", "llm")
+        primary = (endpoint, lambda: _open_stream(method(self, *args, **kwargs)))
+        fallback = getattr(self, "fallback", None)
+        if fallback is None:
+            stream, first = await policy.call(*primary)
+        else:
+            stream, first = await policy.hedged(
+                primary,
+                (
+                    fallback.endpoint,
+                    lambda: _open_stream(method(fallback, *args, **kwargs)),
+                ),
+                hedge_after=getattr(self, "hedge_after", None),
+            )
+        if first is _EMPTY:
+            return
+        try:
+            yield first
+            async for item in stream:
+                yield item
+        finally:
+            await stream.aclose()
+
+    return wrapper
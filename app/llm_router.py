@@ -0,0 +1,256 @@
+"""Route LLM calls by purpose to [llm.*] configs, with fallbacks and accounting."""
+import asyncio
+import threading
+import time
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import LLMRouteSettings, config
+from app.llm import LLM, track_usage
+from app.logger import logger
+
+
+class Purpose(str, Enum):
+    """What an LLM call is for; each purpose can be routed to its own models"""
+
+    MAIN = "main"  # Agent reasoning (think)
+    PLAN = "plan"  # PlanningFlow plan creation
+    SUMMARY = "summary"  # Final summaries of agents and flows
+    INSIGHT = "insight"  # DataVisualization insights
+    COMPACT = "compact"  # Rolling summaries of long agent runs
+
+
+class ModelStats:
+    """Latency, token and cost totals of one model on one route."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.fallbacks = 0  # Calls served after an earlier model in the chain failed
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.input_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+            "latency_avg": round(
+                self.latency_total / self.calls if self.calls else 0.0, 3
+            ),
+            "latency_max": round(self.latency_max, 3),
+            "input_tokens": self.input_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": round(self.cost, 6),
+        }
+
+
+class Route:
+    """The fallback chain and concurrency limit of one purpose."""
+
+    def __init__(self, purpose: str, models: List[str], max_concurrency: Optional[int]):
+        self.purpose = purpose
+        self.models = models
+        self.max_concurrency = max_concurrency
+        self._semaphore = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        )
+        self.stats: Dict[str, ModelStats] = {}
+
+    def stats_for(self, llm: LLM) -> ModelStats:
+        stats = self.stats.get(llm.model)
+        if stats is None:
+            stats = self.stats[llm.model] = ModelStats()
+        return stats
+
+
+class LLMRouter:
+    """Sends each call to the models configured for its purpose.
+
+    Routes come from [llm_routes.<purpose>] sections. The configs of a
+    route are tried in order until one succeeds; a purpose without a
+    route uses the caller's own LLM, so routing is opt-in per purpose.
+    Every call is accounted per route and model.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, LLMRouteSettings]] = None):
+        self.routes: Dict[str, Route] = {}
+        for purpose, settings in (routes or {}).items():
+            unknown = [name for name in settings.models if name not in config.llm]
+            if unknown:
+                logger.warning(
+                    f"LLM route '{purpose}' names unknown configs {unknown}, "
+                    "they fall back to [llm]"
+                )
+            self.routes[purpose] = Route(
+                purpose, settings.models, settings.max_concurrency
+            )
+
+    def route(self, purpose: str) -> Route:
+        purpose = getattr(purpose, "value", purpose)
+        route = self.routes.get(purpose)
+        if route is None:
+            route = self.routes[purpose] = Route(purpose, [], None)
+        return route
+
+    def chain(self, purpose: str, default: Optional[LLM] = None) -> List[LLM]:
+        """The LLMs serving a purpose, in fallback order."""
+        route = self.route(purpose)
+        if route.models:
+            return [LLM(config_name=name) for name in route.models]
+        return [default or LLM()]
+
+    def llm_for(self, purpose: str, default: Optional[LLM] = None) -> LLM:
+        """The first-choice LLM of a purpose, for callers that need a single client."""
+        return self.chain(purpose, default)[0]
+
+    async def call(
+        self,
+        purpose: str,
+        method: str,
+        *args,
+        default: Optional[LLM] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Call `LLM.<method>(*args, **kwargs)` on the purpose's models in order.
+
+        Raises:
+            Exception: The last model's error, if every model in the chain fails
+        """
+        route = self.route(purpose)
+        chain = self.chain(purpose, default)
+        if route._semaphore is None:
+            return await self._call_chain(route, chain, method, args, kwargs)
+        async with route._semaphore:
+            return await self._call_chain(route, chain, method, args, kwargs)
+
+    async def _call_chain(
+        self, route: Route, chain: List[LLM], method: str, args, kwargs
+    ) -> Any:
+        for position, llm in enumerate(chain):
+            stats = route.stats_for(llm)
+            stats.calls += 1
+            start = time.monotonic()
+            with track_usage() as usage:
+                try:
+                    result = await getattr(llm, method)(*args, **kwargs)
+                except Exception as e:
+                    stats.failures += 1
+                    if position == len(chain) - 1:
+                        raise
+                    logger.warning(
+                        f"LLM route '{route.purpose}': {llm.model} failed ({e}), "
+                        f"falling back to {chain[position + 1].model}"
+                    )
+                    continue
+                finally:
+                    self._account(stats, llm, usage, time.monotonic() - start)
+            if position:
+                stats.fallbacks += 1
+            return result
+
+    async def stream(
+        self,
+        purpose: str,
+        method: str,
+        *args,
+        default: Optional[LLM] = None,
+        **kwargs,
+    ) -> AsyncIterator[Any]:
+        """
+        Stream `LLM.<method>(*args, **kwargs)` from the purpose's models in order.
+
+        A model is replaced by the next one only if it fails before yielding
+        anything; later errors are raised, since the caller has already
+        consumed part of its response. Accounted like `call`.
+        """
+        route = self.route(purpose)
+        chain = self.chain(purpose, default)
+        if route._semaphore is None:
+            async for item in self._stream_chain(route, chain, method, args, kwargs):
+                yield item
+            return
+        async with route._semaphore:
+            async for item in self._stream_chain(route, chain, method, args, kwargs):
+                yield item
+
+    async def _stream_chain(
+        self, route: Route, chain: List[LLM], method: str, args, kwargs
+    ) -> AsyncIterator[Any]:
+        for position, llm in enumerate(chain):
+            stats = route.stats_for(llm)
+            stats.calls += 1
+            start = time.monotonic()
+            started = False
+            with track_usage() as usage:
+                try:
+                    async for item in getattr(llm, method)(*args, **kwargs):
+                        started = True
+                        yield item
+                except Exception as e:
+                    stats.failures += 1
+                    if started or position == len(chain) - 1:
+                        raise
+                    logger.warning(
+                        f"LLM route '{route.purpose}': {llm.model} failed ({e}), "
+                        f"falling back to {chain[position + 1].model}"
+                    )
+                    continue
+                finally:
+                    self._account(stats, llm, usage, time.monotonic() - start)
+            if position:
+                stats.fallbacks += 1
+            return
+
+    @staticmethod
+    def _account(stats: ModelStats, llm: LLM, usage, elapsed: float) -> None:
+        stats.latency_total += elapsed
+        stats.latency_max = max(stats.latency_max, elapsed)
+        stats.input_tokens += usage.input_tokens
+        stats.completion_tokens += usage.completion_tokens
+        input_price = getattr(llm, "input_price", None) or 0.0
+        output_price = getattr(llm, "output_price", None) or 0.0
+        stats.cost += (
+            usage.input_tokens * input_price + usage.completion_tokens * output_price
+        ) / 1_000_000
+
+    async def ask(self, purpose: str, *args, default: Optional[LLM] = None, **kwargs):
+        """Routed `LLM.ask`."""
+        return await self.call(purpose, "ask", *args, default=default, **kwargs)
+
+    async def ask_tool(
+        self, purpose: str, *args, default: Optional[LLM] = None, **kwargs
+    ):
+        """Routed `LLM.ask_tool`."""
+        return await self.call(purpose, "ask_tool", *args, default=default, **kwargs)
+
+    def ask_tool_stream(
+        self, purpose: str, *args, default: Optional[LLM] = None, **kwargs
+    ) -> AsyncIterator[Any]:
+        """Routed `LLM.ask_tool_stream`."""
+        return self.stream(purpose, "ask_tool_stream", *args, default=default, **kwargs)
+
+    def metrics(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Per-route, per-model call, latency, token and cost totals."""
+        return {
+            purpose: {model: stats.metrics() for model, stats in route.stats.items()}
+            for purpose, route in self.routes.items()
+        }
+
+
+_router: Optional[LLMRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    """Return the process-wide router built from [llm_routes]."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = LLMRouter(config.llm_routes)
+    return _router
@@ -0,0 +1,192 @@
+"""Shared HTTP transport and per-provider rate limiting for LLM clients."""
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.config import config
+from app.logger import logger
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` units per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (capped at the capacity)."""
+        self._refill()
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take units out; the level may go negative to record overuse."""
+        self._refill()
+        self.level -= amount
+
+
+class RateLimiter:
+    """Client-side limiter for one provider/model.
+
+    Requests queue locally, in FIFO order, until both the requests/min and
+    the tokens/min buckets allow them, instead of being sent and rejected
+    with a 429. A request reserves its estimated input tokens up front;
+    completion tokens are charged afterwards through `record_usage`.
+
+    Without limits it only keeps metrics.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ):
+        self.name = name
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._turn = asyncio.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.total_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_tokens = 0
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    @asynccontextmanager
+    async def request(self, tokens: int = 0) -> AsyncIterator[None]:
+        """Hold a slot for one request estimated at `tokens` input tokens."""
+        start = time.monotonic()
+        self.queued += 1
+        try:
+            if self.requests or self.tokens:
+                # Only the head of the queue sleeps; the rest wait for their turn
+                async with self._turn:
+                    while (wait := self._wait_time(tokens)) > 0:
+                        await asyncio.sleep(wait)
+                    if self.requests:
+                        self.requests.consume(1)
+                    if self.tokens:
+                        self.tokens.consume(tokens)
+        finally:
+            self.queued -= 1
+
+        waited = time.monotonic() - start
+        self.total_requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.total_tokens += tokens
+        if waited > 1:
+            logger.info(
+                f"LLM request to {self.name} queued {waited:.1f}s by rate limit"
+            )
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def record_usage(self, tokens: int) -> None:
+        """Charge tokens that were not reserved up front (e.g. completion tokens)."""
+        self.total_tokens += tokens
+        if self.tokens and tokens:
+            self.tokens.consume(tokens)
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "requests": self.total_requests,
+            "tokens": self.total_tokens,
+            "wait_seconds_total": round(self.total_wait, 3),
+            "wait_seconds_max": round(self.max_wait, 3),
+            "wait_seconds_avg": round(
+                self.total_wait / self.total_requests if self.total_requests else 0.0,
+                3,
+            ),
+        }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_http_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    name: str,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+) -> RateLimiter:
+    """Return the limiter shared by every LLM client of a provider/model."""
+    with _lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = RateLimiter(
+                name, requests_per_minute, tokens_per_minute
+            )
+    return limiter
+
+
+def get_rate_limit_metrics() -> Dict[str, Dict[str, float]]:
+    """Queue and in-flight metrics of every rate limiter, by provider/model."""
+    return {name: limiter.metrics() for name, limiter in _limiters.items()}
+
+
+def _http2_supported() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide httpx client used by the OpenAI-compatible clients."""
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                settings = config.transport
+                http2 = settings.http2 and _http2_supported()
+                if settings.http2 and not http2:
+                    logger.info(
+                        "HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1"
+                    )
+                _http_client = httpx.AsyncClient(
+                    http2=http2,
+                    limits=httpx.Limits(
+                        max_connections=settings.max_connections,
+                        max_keepalive_connections=settings.max_keepalive_connections,
+                        keepalive_expiry=settings.keepalive_expiry,
+                    ),
+                    timeout=httpx.Timeout(
+                        settings.timeout, connect=settings.connect_timeout
+                    ),
+                    follow_redirects=True,
+                )
+    return _http_client
@@ -0,0 +1,137 @@
+"""Append-only on-disk archive for messages evicted from agent memory."""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.config import config
+from app.logger import logger
+from app.schema import Message
+
+
+class MemoryArchive(ABC):
+    """Cold tier of Memory: messages that left the hot window, kept for audits."""
+
+    @abstractmethod
+    def append(self, seq: int, step: int, message: Message) -> None:
+        """Store a message under its sequence number in the conversation."""
+
+    @abstractmethod
+    def get(self, seqs: Iterable[int]) -> List[Message]:
+        """Return the stored messages with the given sequence numbers, in order."""
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Message]:
+        """Iterate over all stored messages, oldest first."""
+
+    def close(self) -> None:
+        """Release file handles."""
+
+
+class JSONLMemoryArchive(MemoryArchive):
+    """One JSON object per line; byte offsets are kept in memory for lookups."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._offsets: Dict[int, int] = {}
+
+    def append(self, seq: int, step: int, message: Message) -> None:
+        record = {
+            "seq": seq,
+            "step": step,
+            "message": message.model_dump(exclude_none=True),
+        }
+        self._offsets[seq] = self._file.tell()
+        self._file.write(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+        self._file.write(b"\n")
+        self._file.flush()
+
+    def get(self, seqs: Iterable[int]) -> List[Message]:
+        offsets = [self._offsets[seq] for seq in sorted(seqs) if seq in self._offsets]
+        if not offsets:
+            return []
+        with open(self.path, "rb") as f:
+            messages = []
+            for offset in offsets:
+                f.seek(offset)
+                messages.append(Message(**json.loads(f.readline())["message"]))
+        return messages
+
+    def __iter__(self) -> Iterator[Message]:
+        with open(self.path, "rb") as f:
+            for line in f:
+                yield Message(**json.loads(line)["message"])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SQLiteMemoryArchive(MemoryArchive):
+    """Messages in a SQLite table keyed by sequence number."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "seq INTEGER PRIMARY KEY, step INTEGER NOT NULL, data TEXT NOT NULL)"
+        )
+
+    def append(self, seq: int, step: int, message: Message) -> None:
+        data = message.model_dump_json(exclude_none=True)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO messages (seq, step, data) VALUES (?, ?, ?)",
+                (seq, step, data),
+            )
+
+    def get(self, seqs: Iterable[int]) -> List[Message]:
+        seqs = sorted(seqs)
+        if not seqs:
+            return []
+        placeholders = ",".join("?" * len(seqs))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM messages WHERE seq IN ({placeholders}) ORDER BY seq",
+                seqs,
+            ).fetchall()
+        return [Message.model_validate_json(row[0]) for row in rows]
+
+    def __iter__(self) -> Iterator[Message]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM messages ORDER BY seq"
+            ).fetchall()
+        for row in rows:
+            yield Message.model_validate_json(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_memory_archive() -> Optional[MemoryArchive]:
+    """Open a new archive as configured in [memory], or None if archiving is off."""
+    settings = config.memory
+    if settings.archive == "none":
+        return None
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    directory = config.root_path / settings.path
+    if settings.archive == "jsonl":
+        archive = JSONLMemoryArchive(str(directory / f"{name}.jsonl"))
+    elif settings.archive == "sqlite":
+        archive = SQLiteMemoryArchive(str(directory / f"{name}.db"))
+    else:
+        raise ValueError(f"Unknown memory archive: {settings.archive}")
+    logger.info(f"Archiving evicted memory to {directory / name}")
+    return archive
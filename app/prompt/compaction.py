@@ -0,0 +1,18 @@
+SUMMARY_HEADER = "[Summary of earlier steps]"
+
+COMPACTION_SYSTEM_PROMPT = """\
+You maintain the working memory of an autonomous agent. Condense the earlier \
+steps of its run into a summary the agent can rely on instead of the full \
+transcript. Keep facts, decisions, file paths, URLs, commands, results and \
+errors that later steps may need; note what has been completed and what is \
+still open. Drop pleasantries, repeated observations and raw tool output. \
+Write in the language of the transcript, in at most {max_tokens} tokens."""
+
+COMPACTION_USER_PROMPT = """\
+Summary so far:
+{previous_summary}
+
+New steps to fold into the summary, oldest first:
+{transcript}
+
+Write the updated summary."""
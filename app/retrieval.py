@@ -0,0 +1,388 @@
+"""Offline BM25 index over past tasks, plan step notes and tool outputs."""
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.config import config
+from app.logger import logger
+
+
+_CJK_CHARS = "\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af"  # Kana, CJK ideographs, Hangul
+_WORD = re.compile(rf"[a-z0-9_]+|[{_CJK_CHARS}]+")
+_CJK = re.compile(rf"[{_CJK_CHARS}]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words; runs of CJK characters become character bigrams."""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if _CJK.match(word):
+            if len(word) == 1:
+                terms.append(word)
+            else:
+                terms.extend(word[i : i + 2] for i in range(len(word) - 1))
+        elif len(word) > 1 or word.isdigit():
+            terms.append(word)
+    return terms
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: one per CJK character, one per 4 other characters."""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class Document(BaseModel):
+    """One indexed snippet: a finished task, a plan step's notes or a tool output"""
+
+    id: int
+    kind: str  # "task", "step", "tool" or "message"
+    text: str
+    source: Optional[str] = None  # Session, plan or agent the snippet belongs to
+    ref: Optional[str] = None  # Task id, step index or tool name
+    created_at: float
+
+
+class SearchHit(BaseModel):
+    document: Document
+    score: float
+
+
+class RetrievalIndex:
+    """Okapi BM25 over an in-memory inverted index, persisted to SQLite.
+
+    Documents are added incrementally as tasks, steps and tools finish and
+    scored with NumPy over the posting lists of the query terms only. At most
+    `max_documents` are kept; the oldest are evicted first. Without a path
+    the index lives in memory only.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_documents: int = 5000,
+        max_document_chars: int = 4000,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.max_documents = max_documents
+        self.max_document_chars = max_document_chars
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+
+        self._conn = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                path, check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, "
+                "source TEXT, ref TEXT, text TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            rows = self._conn.execute(
+                "SELECT id, kind, source, ref, text, created_at FROM documents "
+                "ORDER BY id DESC LIMIT ?",
+                (max_documents,),
+            ).fetchall()
+            if len(rows) == max_documents:
+                # Drop what an earlier, larger limit left behind
+                self._conn.execute("DELETE FROM documents WHERE id < ?", (rows[-1][0],))
+            for row in reversed(rows):
+                self._insert(
+                    Document(
+                        id=row[0],
+                        kind=row[1],
+                        source=row[2],
+                        ref=row[3],
+                        text=row[4],
+                        created_at=row[5],
+                    )
+                )
+
+    def _reset(self) -> None:
+        # Documents are numbered by slot; scores are computed over slot arrays
+        self._slots: Dict[int, Document] = {}
+        self._slot_by_id: Dict[int, int] = {}
+        self._lengths = np.zeros(64)
+        self._next_slot = 0
+        self._total_length = 0
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: Dict[int, Counter] = {}
+        self._seen: Dict[Tuple[str, Optional[str], str], int] = {}
+        self._next_id = 1
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(
+        self,
+        kind: str,
+        text: str,
+        source: Optional[str] = None,
+        ref: Optional[str] = None,
+    ) -> Optional[Document]:
+        """Index a snippet; returns None if it has no searchable terms."""
+        text = text.strip()[: self.max_document_chars]
+        if not tokenize(text):
+            return None
+        with self._lock:
+            key = (kind, source, text)
+            if key in self._seen:
+                return self._slots[self._seen[key]]
+            created_at = time.time()
+            if self._conn is not None:
+                doc_id = self._conn.execute(
+                    "INSERT INTO documents (kind, source, ref, text, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (kind, source, ref, text, created_at),
+                ).lastrowid
+            else:
+                doc_id = self._next_id
+            self._next_id = doc_id + 1
+            document = Document(
+                id=doc_id,
+                kind=kind,
+                text=text,
+                source=source,
+                ref=ref,
+                created_at=created_at,
+            )
+            self._insert(document)
+            while len(self._slots) > self.max_documents:
+                self.remove(next(iter(self._slots.values())).id)
+        return document
+
+    def _insert(self, document: Document) -> None:
+        terms = Counter(tokenize(document.text))
+        slot = self._next_slot
+        self._next_slot += 1
+        if slot >= len(self._lengths):
+            self._lengths = np.concatenate(
+                [self._lengths, np.zeros(len(self._lengths))]
+            )
+        length = sum(terms.values())
+        self._lengths[slot] = length
+        self._total_length += length
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[slot] = count
+        self._terms[slot] = terms
+        self._slots[slot] = document
+        self._slot_by_id[document.id] = slot
+        self._seen[(document.kind, document.source, document.text)] = slot
+        self._next_id = max(self._next_id, document.id + 1)
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            slot = self._slot_by_id.pop(doc_id, None)
+            if slot is None:
+                return
+            document = self._slots.pop(slot)
+            del self._seen[(document.kind, document.source, document.text)]
+            for term in self._terms.pop(slot):
+                posting = self._postings[term]
+                del posting[slot]
+                if not posting:
+                    del self._postings[term]
+            self._total_length -= int(self._lengths[slot])
+            self._lengths[slot] = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            # Slots are never reused; re-number once most of them are dead
+            if self._next_slot > 2 * max(len(self._slots), 64):
+                documents = list(self._slots.values())
+                next_id = self._next_id
+                self._reset()
+                for document in documents:
+                    self._insert(document)
+                self._next_id = next_id
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        kinds: Optional[Iterable[str]] = None,
+        source: Optional[str] = None,
+        exclude: Optional[Callable[[Document], bool]] = None,
+    ) -> List[SearchHit]:
+        """The `k` best matches of `query`, best first; newer documents win ties."""
+        query_terms = Counter(tokenize(query))
+        kinds = set(kinds) if kinds is not None else None
+        with self._lock:
+            count = len(self._slots)
+            if not count or not query_terms:
+                return []
+            average_length = self._total_length / count
+            scores = np.zeros(self._next_slot)
+            lengths = self._lengths[: self._next_slot]
+            for term, query_count in query_terms.items():
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                slots = np.fromiter(posting.keys(), dtype=np.int64, count=len(posting))
+                tf = np.fromiter(posting.values(), dtype=np.float64, count=len(posting))
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[slots] / average_length)
+                scores[slots] += query_count * idf * tf * (self.k1 + 1) / (tf + norm)
+
+            candidates = np.flatnonzero(scores > 0)
+            order = candidates[np.lexsort((-candidates, -scores[candidates]))]
+            hits = []
+            for slot in order:
+                document = self._slots[int(slot)]
+                if kinds is not None and document.kind not in kinds:
+                    continue
+                if source is not None and document.source != source:
+                    continue
+                if exclude is not None and exclude(document):
+                    continue
+                hits.append(SearchHit(document=document, score=float(scores[slot])))
+                if len(hits) >= k:
+                    break
+        return hits
+
+    def context(
+        self,
+        query: str,
+        k: int = 5,
+        max_tokens: int = 1500,
+        snippet_chars: int = 600,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        **filters,
+    ) -> str:
+        """The top-k matches as prompt lines, cut to fit `max_tokens`."""
+        lines = []
+        for hit in self.search(query, k=k, **filters):
+            text = " ".join(hit.document.text.split())
+            if len(text) > snippet_chars:
+                text = text[:snippet_chars] + " ..."
+            line = f"- [{hit.document.kind}] {text}"
+            tokens = count_tokens(line)
+            if tokens > max_tokens:
+                continue
+            max_tokens -= tokens
+            lines.append(line)
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+
+def _clip(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> str:
+    """The longest prefix of text that fits `max_tokens`, marked as cut."""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle] + " ...") <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + " ..."
+
+
+def select_messages(
+    query: str,
+    messages: Sequence[dict],
+    k: int = 5,
+    recent: int = 4,
+    max_tokens: int = 1500,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> List[dict]:
+    """
+    Pick the chat history worth sending with `query`.
+
+    The last `recent` messages are always kept, newest first; once they no
+    longer fit `max_tokens` their content is cut to what is left. The rest
+    of the budget goes to the `k` older messages most relevant to the
+    query. The selection is returned in its original order.
+    """
+    if not messages:
+        return []
+    older = max(len(messages) - recent, 0)
+    chosen = {}
+    for position in range(len(messages) - 1, older - 1, -1):
+        message = messages[position]
+        content = str(message.get("content", ""))
+        tokens = count_tokens(content)
+        if tokens > max_tokens:
+            message = {**message, "content": _clip(content, max_tokens, count_tokens)}
+            tokens = max_tokens
+        max_tokens -= tokens
+        chosen[position] = message
+
+    index = RetrievalIndex(max_documents=max(older, 1))
+    ids = {}
+    for position in range(older):
+        document = index.add("message", str(messages[position].get("content", "")))
+        if document is not None:
+            ids[document.id] = position
+    for hit in index.search(query, k=k):
+        position = ids[hit.document.id]
+        tokens = count_tokens(str(messages[position].get("content", "")))
+        if tokens > max_tokens:
+            continue
+        max_tokens -= tokens
+        chosen[position] = messages[position]
+    return [chosen[position] for position in sorted(chosen)]
+
+
+_source: ContextVar[Optional[str]] = ContextVar("retrieval_source", default=None)
+
+
+def set_retrieval_source(source: Optional[str]) -> Token:
+    """
+    Index documents added from the current context under source.
+
+    Like the agent event handler, the value follows the current asyncio task
+    and the tasks spawned from it, so concurrently running server tasks file
+    their tool outputs under their own session.
+    """
+    return _source.set(source)
+
+
+def get_retrieval_source() -> Optional[str]:
+    """The source documents added from the current context are indexed under."""
+    return _source.get()
+
+
+_index: Optional[RetrievalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_retrieval_index() -> Optional[RetrievalIndex]:
+    """Return the process-wide index from [retrieval], or None if it is off."""
+    global _index
+    settings = config.retrieval
+    if settings is None or not settings.enabled:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = None
+                if settings.backend == "sqlite":
+                    path = config.root_path / settings.path
+                    logger.info(f"Retrieval index at {path}")
+                elif settings.backend != "memory":
+                    raise ValueError(f"Unknown retrieval backend: {settings.backend}")
+                _index = RetrievalIndex(
+                    path=str(path) if path else None,
+                    max_documents=settings.max_documents,
+                    max_document_chars=settings.max_document_chars,
+                )
+    return _index
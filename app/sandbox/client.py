@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Protocol
+from typing import AsyncIterator, Dict, Iterable, Mapping, Optional, Protocol, Union
 
 from app.config import SandboxSettings
 from app.sandbox.core.sandbox import DockerSandbox
@@ -46,6 +46,37 @@ class SandboxFileOperations(Protocol):
         """
         ...
 
+    async def read_files(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Reads many files from container in one transfer.
+
+        Args:
+            paths: File paths in container.
+
+        Returns:
+            Dict[str, str]: File content by path.
+        """
+        ...
+
+    async def write_files(self, files: Mapping[str, Union[str, bytes]]) -> None:
+        """Writes many files to container in one transfer.
+
+        Args:
+            files: Content by file path in container.
+        """
+        ...
+
+    def stream_file(self, path: str, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+        """Reads file from container in chunks.
+
+        Args:
+            path: File path in container.
+            chunk_size: Maximum chunk size in bytes.
+
+        Yields:
+            bytes: File content chunks.
+        """
+        ...
+
 
 class BaseSandboxClient(ABC):
     """Base sandbox client interface."""
@@ -62,6 +93,12 @@ class BaseSandboxClient(ABC):
     async def run_command(self, command: str, timeout: Optional[int] = None) -> str:
         """Executes command."""
 
+    @abstractmethod
+    def stream_command(
+        self, command: str, timeout: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Executes command, yielding output as it is produced."""
+
     @abstractmethod
     async def copy_from(self, container_path: str, local_path: str) -> None:
         """Copies file from container."""
@@ -78,6 +115,18 @@ class BaseSandboxClient(ABC):
     async def write_file(self, path: str, content: str) -> None:
         """Writes file."""
 
+    @abstractmethod
+    async def read_files(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Reads many files."""
+
+    @abstractmethod
+    async def write_files(self, files: Mapping[str, Union[str, bytes]]) -> None:
+        """Writes many files."""
+
+    @abstractmethod
+    def stream_file(self, path: str, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+        """Reads file in chunks."""
+
     @abstractmethod
     async def cleanup(self) -> None:
         """Cleans up resources."""
@@ -124,6 +173,26 @@ class LocalSandboxClient(BaseSandboxClient):
             raise RuntimeError("Sandbox not initialized")
         return await self.sandbox.run_command(command, timeout)
 
+    async def stream_command(
+        self, command: str, timeout: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Runs command in sandbox, yielding output chunks as they arrive.
+
+        Args:
+            command: Command to execute.
+            timeout: Execution timeout in seconds.
+
+        Yields:
+            Output chunks, e.g. to forward to a client as they come.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        async for chunk in self.sandbox.stream_command(command, timeout):
+            yield chunk
+
     async def copy_from(self, container_path: str, local_path: str) -> None:
         """Copies file from container to local.
 
@@ -182,6 +251,55 @@ class LocalSandboxClient(BaseSandboxClient):
             raise RuntimeError("Sandbox not initialized")
         await self.sandbox.write_file(path, content)
 
+    async def read_files(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Reads many files from container in a single transfer.
+
+        Args:
+            paths: File paths in container.
+
+        Returns:
+            File content by path.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        return await self.sandbox.read_files(paths)
+
+    async def write_files(self, files: Mapping[str, Union[str, bytes]]) -> None:
+        """Writes many files to container in a single transfer.
+
+        Args:
+            files: Content by file path in container.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        await self.sandbox.write_files(files)
+
+    async def stream_file(
+        self, path: str, chunk_size: int = 65536
+    ) -> AsyncIterator[bytes]:
+        """Reads file from container in chunks, e.g. to forward a large file.
+
+        Args:
+            path: File path in container.
+            chunk_size: Maximum chunk size in bytes.
+
+        Yields:
+            File content chunks.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        async for chunk in self.sandbox.stream_file(path, chunk_size):
+            yield chunk
+
     async def cleanup(self) -> None:
         """Cleans up resources."""
         if self.sandbox:
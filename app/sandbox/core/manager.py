@@ -1,7 +1,9 @@
 import asyncio
+import time
 import uuid
+from collections import deque
 from contextlib import asynccontextmanager
-from typing import Dict, Optional, Set
+from typing import Deque, Dict, Optional, Set, Tuple
 
 import docker
 from docker.errors import APIError, ImageNotFound
@@ -18,12 +20,19 @@ class SandboxManager:
     monitoring, and cleanup. Provides concurrent access control and automatic
     cleanup mechanisms for sandbox resources.
 
+    Keeps a pool of pre-started idle sandboxes with the pool configuration,
+    so that a new task does not wait for a container to start. Released
+    sandboxes are reset and returned to the pool instead of being deleted.
+
     Attributes:
-        max_sandboxes: Maximum allowed number of sandboxes.
+        max_sandboxes: Maximum allowed number of sandboxes, idle ones included.
+        min_idle: Idle sandboxes kept warm in the pool.
         idle_timeout: Sandbox idle timeout in seconds.
         cleanup_interval: Cleanup check interval in seconds.
+        pool_config: Configuration of pooled sandboxes.
         _sandboxes: Active sandbox instance mapping.
         _last_used: Last used time record for sandboxes.
+        _idle: Pooled sandboxes with the time they became idle, oldest first.
     """
 
     def __init__(
@@ -31,24 +40,49 @@ class SandboxManager:
         max_sandboxes: int = 100,
         idle_timeout: int = 3600,
         cleanup_interval: int = 300,
+        min_idle: int = 0,
+        pool_config: Optional[SandboxSettings] = None,
+        client: Optional[docker.DockerClient] = None,
     ):
         """Initializes sandbox manager.
 
         Args:
-            max_sandboxes: Maximum sandbox count limit.
-            idle_timeout: Idle timeout in seconds.
+            max_sandboxes: Maximum sandbox count limit, idle ones included.
+            idle_timeout: Idle timeout in seconds. Also applies to pooled
+                sandboxes beyond `min_idle`.
             cleanup_interval: Cleanup check interval in seconds.
+            min_idle: Idle sandboxes to keep pre-started.
+            pool_config: Configuration of pooled sandboxes. Default if None.
+            client: Docker client. Created from the environment if None; pass
+                a fake to run without a Docker daemon.
         """
         self.max_sandboxes = max_sandboxes
+        self.min_idle = min_idle
         self.idle_timeout = idle_timeout
         self.cleanup_interval = cleanup_interval
+        self.pool_config = pool_config or SandboxSettings()
 
         # Docker client
-        self._client = docker.from_env()
+        self._client = client or docker.from_env()
 
         # Resource mappings
         self._sandboxes: Dict[str, DockerSandbox] = {}
         self._last_used: Dict[str, float] = {}
+        self._pooled: Set[str] = set()
+
+        # Warm pool
+        self._idle: Deque[Tuple[DockerSandbox, float]] = deque()
+        self._starting = 0
+        self._fill_task: Optional[asyncio.Task] = None
+        self._pool_stats = {
+            "hits": 0,
+            "misses": 0,
+            "resets": 0,
+            "reset_failures": 0,
+            "acquire_count": 0,
+            "acquire_total": 0.0,
+            "acquire_max": 0.0,
+        }
 
         # Concurrency control
         self._locks: Dict[str, asyncio.Lock] = {}
@@ -118,6 +152,9 @@ class SandboxManager:
     ) -> str:
         """Creates a new sandbox instance.
 
+        A sandbox with the pool configuration and no volume bindings is
+        taken from the warm pool when one is idle.
+
         Args:
             config: Sandbox configuration.
             volume_bindings: Volume mapping configuration.
@@ -128,33 +165,128 @@ class SandboxManager:
         Raises:
             RuntimeError: If max sandbox count reached or creation fails.
         """
+        start = time.monotonic()
+        config = config or self.pool_config
+        poolable = config == self.pool_config and not volume_bindings
+
         async with self._global_lock:
-            if len(self._sandboxes) >= self.max_sandboxes:
-                raise RuntimeError(
-                    f"Maximum number of sandboxes ({self.max_sandboxes}) reached"
-                )
+            sandbox = self._idle.popleft()[0] if poolable and self._idle else None
+            if sandbox is None:
+                if self._total() >= self.max_sandboxes:
+                    raise RuntimeError(
+                        f"Maximum number of sandboxes ({self.max_sandboxes}) reached"
+                    )
+                self._starting += 1
+
+        sandbox_id = str(uuid.uuid4())
+        if sandbox is not None:
+            self._pool_stats["hits"] += 1
+        else:
+            self._pool_stats["misses"] += 1
+            try:
+                sandbox = await self._start_sandbox(config, volume_bindings)
+            except Exception as e:
+                logger.error(f"Failed to create sandbox: {e}")
+                raise RuntimeError(f"Failed to create sandbox: {e}")
+            finally:
+                self._starting -= 1
 
-            config = config or SandboxSettings()
-            if not await self.ensure_image(config.image):
-                raise RuntimeError(f"Failed to ensure Docker image: {config.image}")
+        self._sandboxes[sandbox_id] = sandbox
+        self._last_used[sandbox_id] = asyncio.get_event_loop().time()
+        self._locks[sandbox_id] = asyncio.Lock()
+        if poolable:
+            self._pooled.add(sandbox_id)
 
-            sandbox_id = str(uuid.uuid4())
+        elapsed = time.monotonic() - start
+        self._pool_stats["acquire_count"] += 1
+        self._pool_stats["acquire_total"] += elapsed
+        self._pool_stats["acquire_max"] = max(self._pool_stats["acquire_max"], elapsed)
+        logger.info(f"Created sandbox {sandbox_id} in {elapsed:.2f}s")
+
+        self._schedule_fill()
+        return sandbox_id
+
+    async def _start_sandbox(
+        self,
+        config: SandboxSettings,
+        volume_bindings: Optional[Dict[str, str]] = None,
+    ) -> DockerSandbox:
+        """Starts a new container (the slow path the pool avoids)."""
+        if not await self.ensure_image(config.image):
+            raise RuntimeError(f"Failed to ensure Docker image: {config.image}")
+        sandbox = DockerSandbox(config, volume_bindings, client=self._client)
+        await sandbox.create()
+        return sandbox
+
+    def _total(self) -> int:
+        """Sandboxes in use, idle in the pool and starting."""
+        return len(self._sandboxes) + len(self._idle) + self._starting
+
+    def _schedule_fill(self) -> None:
+        """Starts topping the pool up to `min_idle` in the background."""
+        if self._is_shutting_down or (
+            self._fill_task is not None and not self._fill_task.done()
+        ):
+            return
+        if len(self._idle) < self.min_idle and self._total() < self.max_sandboxes:
+            self._fill_task = asyncio.create_task(self._fill_pool())
+
+    async def _fill_pool(self) -> None:
+        """Starts pool sandboxes until `min_idle` are idle or the limit is hit."""
+        while not self._is_shutting_down:
+            async with self._global_lock:
+                if (
+                    len(self._idle) >= self.min_idle
+                    or self._total() >= self.max_sandboxes
+                ):
+                    return
+                self._starting += 1
             try:
-                sandbox = DockerSandbox(config, volume_bindings)
-                await sandbox.create()
+                sandbox = await self._start_sandbox(self.pool_config)
+            except Exception as e:
+                logger.error(f"Failed to pre-start pool sandbox: {e}")
+                return
+            finally:
+                self._starting -= 1
+            if self._is_shutting_down:
+                await sandbox.cleanup()
+                return
+            self._idle.append((sandbox, asyncio.get_event_loop().time()))
 
-                self._sandboxes[sandbox_id] = sandbox
-                self._last_used[sandbox_id] = asyncio.get_event_loop().time()
-                self._locks[sandbox_id] = asyncio.Lock()
+    async def release_sandbox(self, sandbox_id: str) -> None:
+        """Returns a sandbox to the warm pool, or deletes it if it can't be pooled.
+
+        The container is reset first: stray processes are killed, the work
+        directory is wiped and the shell environment is restored.
 
-                logger.info(f"Created sandbox {sandbox_id}")
-                return sandbox_id
+        Args:
+            sandbox_id: Sandbox ID.
+        """
+        if sandbox_id not in self._pooled or self._is_shutting_down:
+            await self.delete_sandbox(sandbox_id)
+            return
 
+        async with self.sandbox_operation(sandbox_id) as sandbox:
+            try:
+                await sandbox.reset()
+                self._pool_stats["resets"] += 1
             except Exception as e:
-                logger.error(f"Failed to create sandbox: {e}")
-                if sandbox_id in self._sandboxes:
-                    await self.delete_sandbox(sandbox_id)
-                raise RuntimeError(f"Failed to create sandbox: {e}")
+                self._pool_stats["reset_failures"] += 1
+                logger.warning(f"Failed to reset sandbox {sandbox_id}: {e}")
+                sandbox = None
+
+        if sandbox is None:
+            await self.delete_sandbox(sandbox_id)
+            self._schedule_fill()
+            return
+
+        async with self._global_lock:
+            self._sandboxes.pop(sandbox_id, None)
+            self._last_used.pop(sandbox_id, None)
+            self._locks.pop(sandbox_id, None)
+            self._pooled.discard(sandbox_id)
+            self._idle.append((sandbox, asyncio.get_event_loop().time()))
+        logger.info(f"Returned sandbox {sandbox_id} to the pool")
 
     async def get_sandbox(self, sandbox_id: str) -> DockerSandbox:
         """Gets a sandbox instance.
@@ -178,6 +310,7 @@ class SandboxManager:
             while not self._is_shutting_down:
                 try:
                     await self._cleanup_idle_sandboxes()
+                    self._schedule_fill()
                 except Exception as e:
                     logger.error(f"Error in cleanup loop: {e}")
                 await asyncio.sleep(self.cleanup_interval)
@@ -197,12 +330,26 @@ class SandboxManager:
                 ):
                     to_cleanup.append(sandbox_id)
 
+            # Shrink the pool back to min_idle, oldest idle sandboxes first
+            expired = []
+            while (
+                len(self._idle) > self.min_idle
+                and current_time - self._idle[0][1] > self.idle_timeout
+            ):
+                expired.append(self._idle.popleft()[0])
+
         for sandbox_id in to_cleanup:
             try:
                 await self.delete_sandbox(sandbox_id)
             except Exception as e:
                 logger.error(f"Error cleaning up sandbox {sandbox_id}: {e}")
 
+        for sandbox in expired:
+            try:
+                await sandbox.cleanup()
+            except Exception as e:
+                logger.error(f"Error cleaning up pooled sandbox: {e}")
+
     async def cleanup(self) -> None:
         """Cleans up all resources."""
         logger.info("Starting manager cleanup...")
@@ -216,15 +363,26 @@ class SandboxManager:
             except (asyncio.CancelledError, asyncio.TimeoutError):
                 pass
 
+        if self._fill_task:
+            self._fill_task.cancel()
+            try:
+                await asyncio.wait_for(self._fill_task, timeout=1.0)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                pass
+
         # Get all sandbox IDs to clean up
         async with self._global_lock:
             sandbox_ids = list(self._sandboxes.keys())
+            idle = [sandbox for sandbox, _ in self._idle]
+            self._idle.clear()
 
         # Concurrently clean up all sandboxes
         cleanup_tasks = []
         for sandbox_id in sandbox_ids:
             task = asyncio.create_task(self._safe_delete_sandbox(sandbox_id))
             cleanup_tasks.append(task)
+        for sandbox in idle:
+            cleanup_tasks.append(asyncio.create_task(sandbox.cleanup()))
 
         if cleanup_tasks:
             # Wait for all cleanup tasks to complete, with timeout to avoid infinite waiting
@@ -237,6 +395,7 @@ class SandboxManager:
         self._sandboxes.clear()
         self._last_used.clear()
         self._locks.clear()
+        self._pooled.clear()
         self._active_operations.clear()
 
         logger.info("Manager cleanup completed")
@@ -271,6 +430,7 @@ class SandboxManager:
                     self._sandboxes.pop(sandbox_id, None)
                     self._last_used.pop(sandbox_id, None)
                     self._locks.pop(sandbox_id, None)
+                    self._pooled.discard(sandbox_id)
                     logger.info(f"Deleted sandbox {sandbox_id}")
         except Exception as e:
             logger.error(f"Error during cleanup of sandbox {sandbox_id}: {e}")
@@ -303,6 +463,8 @@ class SandboxManager:
         Returns:
             Dict: Statistics information.
         """
+        stats = self._pool_stats
+        acquired = stats["acquire_count"]
         return {
             "total_sandboxes": len(self._sandboxes),
             "active_operations": len(self._active_operations),
@@ -310,4 +472,18 @@ class SandboxManager:
             "idle_timeout": self.idle_timeout,
             "cleanup_interval": self.cleanup_interval,
             "is_shutting_down": self._is_shutting_down,
+            "pool": {
+                "idle": len(self._idle),
+                "starting": self._starting,
+                "min_idle": self.min_idle,
+                "hits": stats["hits"],
+                "misses": stats["misses"],
+                "hit_rate": round(stats["hits"] / acquired, 3) if acquired else 0.0,
+                "resets": stats["resets"],
+                "reset_failures": stats["reset_failures"],
+                "acquire_latency_avg": round(
+                    stats["acquire_total"] / acquired if acquired else 0.0, 4
+                ),
+                "acquire_latency_max": round(stats["acquire_max"], 4),
+            },
         }
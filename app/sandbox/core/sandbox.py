@@ -1,10 +1,26 @@
 import asyncio
 import io
 import os
+import shutil
 import tarfile
 import tempfile
+import time
 import uuid
-from typing import Dict, Optional
+from functools import partial
+from stat import S_IMODE
+from typing import (
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import docker
 from docker.errors import NotFound
@@ -15,6 +31,69 @@ from app.sandbox.core.exceptions import SandboxTimeoutError
 from app.sandbox.core.terminal import AsyncDockerizedTerminal
 
 
+CHUNK_SIZE = 64 * 1024
+
+# A tar member and a callable opening its content (None for directories)
+TarEntry = Tuple[tarfile.TarInfo, Optional[Callable[[], BinaryIO]]]
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read-only file over an iterator of byte chunks, e.g. a Docker archive stream."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._chunk = b""
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._chunk):
+            try:
+                self._chunk, self._offset = next(self._chunks), 0
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._chunk) - self._offset)
+        buffer[:size] = self._chunk[self._offset : self._offset + size]
+        self._offset += size
+        return size
+
+
+def _tar_chunks(entries: Iterable[TarEntry]) -> Iterator[bytes]:
+    """Generates a tar archive chunk by chunk; file contents are never buffered."""
+    for info, opener in entries:
+        yield info.tobuf(format=tarfile.GNU_FORMAT)
+        if opener is None:
+            continue
+        with opener() as f:
+            remaining = info.size
+            while remaining:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise OSError(f"{info.name} changed size during transfer")
+                remaining -= len(chunk)
+                yield chunk
+        padding = -info.size % tarfile.BLOCKSIZE
+        if padding:
+            yield bytes(padding)
+    yield bytes(2 * tarfile.BLOCKSIZE)
+
+
+def _tar_info(
+    name: str, size: int = 0, directory: bool = False, mode: Optional[int] = None
+) -> tarfile.TarInfo:
+    info = tarfile.TarInfo(name.lstrip("/"))
+    info.mtime = int(time.time())
+    if directory:
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755 if mode is None else mode
+    else:
+        info.size = size
+        info.mode = 0o644 if mode is None else mode
+    return info
+
+
 class DockerSandbox:
     """Docker sandbox environment.
 
@@ -29,22 +108,30 @@ class DockerSandbox:
         terminal: Container terminal interface.
     """
 
+    # Environment of every terminal session; restored on reset
+    ENV_VARS = {"PYTHONUNBUFFERED": "1"}  # Ensure Python output is not buffered
+
     def __init__(
         self,
         config: Optional[SandboxSettings] = None,
         volume_bindings: Optional[Dict[str, str]] = None,
+        client: Optional[docker.DockerClient] = None,
     ):
         """Initializes a sandbox instance.
 
         Args:
             config: Sandbox configuration. Default configuration used if None.
             volume_bindings: Volume mappings in {host_path: container_path} format.
+            client: Docker client. Created from the environment if None; pass a
+                fake to run without a Docker daemon.
         """
         self.config = config or SandboxSettings()
         self.volume_bindings = volume_bindings or {}
-        self.client = docker.from_env()
+        self.client = client or docker.from_env()
         self.container: Optional[Container] = None
         self.terminal: Optional[AsyncDockerizedTerminal] = None
+        # Bind mounts as {container_path: host_path}, for host-side file access
+        self.mounts: Dict[str, str] = {}
 
     async def create(self) -> "DockerSandbox":
         """Creates and starts the sandbox container.
@@ -87,21 +174,57 @@ class DockerSandbox:
             # Start container
             await asyncio.to_thread(self.container.start)
 
-            # Initialize terminal
-            self.terminal = AsyncDockerizedTerminal(
-                container["Id"],
-                self.config.work_dir,
-                env_vars={"PYTHONUNBUFFERED": "1"}
-                # Ensure Python output is not buffered
-            )
-            await self.terminal.init()
-
+            await self._open_terminal()
             return self
 
         except Exception as e:
             await self.cleanup()  # Ensure resources are cleaned up
             raise RuntimeError(f"Failed to create sandbox: {e}") from e
 
+    async def _open_terminal(self) -> None:
+        """Starts a fresh shell session in the container."""
+        self.terminal = AsyncDockerizedTerminal(
+            self.container.id,
+            self.config.work_dir,
+            env_vars=dict(self.ENV_VARS),
+            client=self.client,
+        )
+        await self.terminal.init()
+
+    async def reset(self) -> None:
+        """Returns the container to a freshly created state so it can be reused.
+
+        Closes the shell session (dropping any exported variables), kills
+        every process except the container's init process, empties the work
+        directory and /tmp, then opens a new session with the default
+        environment.
+
+        Raises:
+            RuntimeError: If sandbox not initialized or the reset fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+
+        if self.terminal:
+            await self.terminal.close()
+            self.terminal = None
+
+        script = (
+            "for p in /proc/[0-9]*; do pid=${p#/proc/}; "
+            '[ "$pid" = 1 ] || [ "$pid" = $$ ] || kill -9 "$pid" 2>/dev/null; '
+            "done; "
+            f"find {self.config.work_dir} /tmp -mindepth 1 -delete 2>/dev/null; "
+            f"mkdir -p {self.config.work_dir}"
+        )
+        result = await asyncio.to_thread(
+            self.container.exec_run, ["sh", "-c", script], user="root"
+        )
+        if result.exit_code != 0:
+            raise RuntimeError(
+                f"Failed to reset sandbox: {result.output.decode('utf-8', 'replace')}"
+            )
+        await self._open_terminal()
+
     def _prepare_volume_bindings(self) -> Dict[str, Dict[str, str]]:
         """Prepares volume binding configuration.
 
@@ -118,8 +241,34 @@ class DockerSandbox:
         for host_path, container_path in self.volume_bindings.items():
             bindings[host_path] = {"bind": container_path, "mode": "rw"}
 
+        self.mounts = {
+            os.path.normpath(binding["bind"]): os.path.abspath(host_path)
+            for host_path, binding in bindings.items()
+        }
         return bindings
 
+    def _host_path(self, container_path: str) -> Optional[str]:
+        """Host path of a bind-mounted container path, or None if not mounted.
+
+        Paths that resolve (through symlinks created in the container) to
+        outside their mount are treated as not mounted, so they go through
+        the Docker API rather than touching the host.
+        """
+        container_path = os.path.normpath(container_path)
+        for mount in sorted(self.mounts, key=len, reverse=True):
+            if container_path != mount and not container_path.startswith(
+                mount.rstrip("/") + "/"
+            ):
+                continue
+            root = os.path.realpath(self.mounts[mount])
+            host_path = os.path.realpath(
+                os.path.join(root, os.path.relpath(container_path, mount))
+            )
+            if host_path == root or host_path.startswith(root + os.sep):
+                return host_path
+            return None
+        return None
+
     @staticmethod
     def _ensure_host_dir(path: str) -> str:
         """Ensures directory exists on the host.
@@ -163,6 +312,35 @@ class DockerSandbox:
                 f"Command execution timed out after {timeout or self.config.timeout} seconds"
             )
 
+    async def stream_command(
+        self, cmd: str, timeout: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Runs a command in the sandbox, yielding output as it is produced.
+
+        Args:
+            cmd: Command to execute.
+            timeout: Timeout in seconds.
+
+        Yields:
+            Output chunks.
+
+        Raises:
+            RuntimeError: If sandbox not initialized or command execution fails.
+            SandboxTimeoutError: If command execution times out.
+        """
+        if not self.terminal:
+            raise RuntimeError("Sandbox not initialized")
+
+        try:
+            async for chunk in self.terminal.stream_command(
+                cmd, timeout=timeout or self.config.timeout
+            ):
+                yield chunk
+        except TimeoutError:
+            raise SandboxTimeoutError(
+                f"Command execution timed out after {timeout or self.config.timeout} seconds"
+            )
+
     async def read_file(self, path: str) -> str:
         """Reads a file from the container.
 
@@ -180,21 +358,145 @@ class DockerSandbox:
             raise RuntimeError("Sandbox not initialized")
 
         try:
-            # Get file archive
             resolved_path = self._safe_resolve_path(path)
+            host_path = self._host_path(resolved_path)
+            if host_path is not None:
+                with open(host_path, "rb") as f:
+                    return (await asyncio.to_thread(f.read)).decode("utf-8")
+
+            # Get file archive
             tar_stream, _ = await asyncio.to_thread(
                 self.container.get_archive, resolved_path
             )
 
             # Read file content from tar stream
-            content = await self._read_from_tar(tar_stream)
+            content = await asyncio.to_thread(self._read_from_tar, tar_stream)
             return content.decode("utf-8")
 
-        except NotFound:
+        except (NotFound, FileNotFoundError):
+            raise FileNotFoundError(f"File not found: {path}")
+        except Exception as e:
+            raise RuntimeError(f"Failed to read file: {e}")
+
+    async def read_files(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Reads many files at once.
+
+        Files under a bind mount are read on the host; the rest arrive in a
+        single tar streamed out of the container.
+
+        Args:
+            paths: File paths.
+
+        Returns:
+            File contents by path, as given.
+
+        Raises:
+            FileNotFoundError: If any of the files does not exist.
+            RuntimeError: If read operation fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+
+        try:
+            contents: Dict[str, bytes] = {}
+            remote: Dict[str, List[str]] = {}
+            for path in paths:
+                resolved_path = self._safe_resolve_path(path)
+                host_path = self._host_path(resolved_path)
+                if host_path is None:
+                    remote.setdefault(os.path.normpath(resolved_path), []).append(path)
+                    continue
+                try:
+                    contents[path] = await asyncio.to_thread(
+                        self._read_host_file, host_path
+                    )
+                except FileNotFoundError:
+                    raise FileNotFoundError(f"File not found: {path}")
+
+            if remote:
+                archived = await asyncio.to_thread(self._read_archive, list(remote))
+                missing = [path for path in remote if path not in archived]
+                if missing:
+                    raise FileNotFoundError(f"File not found: {', '.join(missing)}")
+                for resolved_path, originals in remote.items():
+                    for path in originals:
+                        contents[path] = archived[resolved_path]
+
+            return {path: data.decode("utf-8") for path, data in contents.items()}
+
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to read files: {e}")
+
+    @staticmethod
+    def _read_host_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _read_archive(self, paths: List[str]) -> Dict[str, bytes]:
+        """Fetches regular files in one tar streamed from `tar` in the container."""
+        result = self.container.exec_run(
+            ["sh", "-c", 'tar -cf - -C / -- "$@" 2>/dev/null', "sh"]
+            + [path.lstrip("/") for path in paths],
+            stream=True,
+        )
+        wanted = set(paths)
+        contents = {}
+        try:
+            with tarfile.open(fileobj=_ChunkReader(result.output), mode="r|") as tar:
+                for member in tar:
+                    name = "/" + member.name.lstrip("/")
+                    if member.isfile() and name in wanted:
+                        contents[name] = tar.extractfile(member).read()
+        except tarfile.ReadError:
+            pass  # Nothing archived: none of the paths exist
+        return contents
+
+    async def stream_file(
+        self, path: str, chunk_size: int = CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Reads a file from the container in chunks, without holding it in memory.
+
+        Args:
+            path: File path.
+            chunk_size: Maximum size of each chunk in bytes.
+
+        Yields:
+            File content chunks.
+
+        Raises:
+            FileNotFoundError: If file does not exist.
+            RuntimeError: If read operation fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+
+        resolved_path = self._safe_resolve_path(path)
+        host_path = self._host_path(resolved_path)
+        try:
+            if host_path is not None:
+                f = open(host_path, "rb")
+            else:
+                stream, _ = await asyncio.to_thread(
+                    self.container.get_archive, resolved_path, chunk_size
+                )
+                tar = tarfile.open(fileobj=_ChunkReader(stream), mode="r|")
+                member = await asyncio.to_thread(tar.next)
+                if member is None or not member.isfile():
+                    raise RuntimeError(f"Not a regular file: {path}")
+                f = tar.extractfile(member)
+        except (NotFound, FileNotFoundError):
             raise FileNotFoundError(f"File not found: {path}")
+        except RuntimeError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Failed to read file: {e}")
 
+        with f:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+
     async def write_file(self, path: str, content: str) -> None:
         """Writes content to a file in the container.
 
@@ -205,30 +507,54 @@ class DockerSandbox:
         Raises:
             RuntimeError: If write operation fails.
         """
-        if not self.container:
-            raise RuntimeError("Sandbox not initialized")
+        await self.write_files({path: content})
 
-        try:
-            resolved_path = self._safe_resolve_path(path)
-            parent_dir = os.path.dirname(resolved_path)
+    async def write_files(self, files: Mapping[str, Union[str, bytes]]) -> None:
+        """Writes many files at once; parent directories are created as needed.
 
-            # Create parent directory
-            if parent_dir:
-                await self.run_command(f"mkdir -p {parent_dir}")
+        Files under a bind mount are written on the host; the rest are sent
+        to the container as a single streamed tar.
 
-            # Prepare file data
-            tar_stream = await self._create_tar_stream(
-                os.path.basename(path), content.encode("utf-8")
-            )
+        Args:
+            files: Content by target path. Strings are written as UTF-8.
 
-            # Write file
-            await asyncio.to_thread(
-                self.container.put_archive, parent_dir or "/", tar_stream
-            )
+        Raises:
+            RuntimeError: If write operation fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+
+        try:
+            entries: List[TarEntry] = []
+            for path, content in files.items():
+                data = content.encode("utf-8") if isinstance(content, str) else content
+                resolved_path = self._safe_resolve_path(path)
+                host_path = self._host_path(resolved_path)
+                if host_path is not None:
+                    await asyncio.to_thread(self._write_host_file, host_path, data)
+                else:
+                    entries.append(
+                        (
+                            _tar_info(resolved_path, len(data)),
+                            partial(io.BytesIO, data),
+                        )
+                    )
+
+            if entries:
+                # Parent directories are created on extraction
+                await asyncio.to_thread(
+                    self.container.put_archive, "/", _tar_chunks(entries)
+                )
 
         except Exception as e:
             raise RuntimeError(f"Failed to write file: {e}")
 
+    @staticmethod
+    def _write_host_file(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
     def _safe_resolve_path(self, path: str) -> str:
         """Safely resolves container path, preventing path traversal.
 
@@ -255,6 +581,9 @@ class DockerSandbox:
     async def copy_from(self, src_path: str, dst_path: str) -> None:
         """Copies a file from the container.
 
+        The archive is extracted as it streams in, so large files are never
+        held in memory or staged in a temporary file.
+
         Args:
             src_path: Source file path (container).
             dst_path: Destination path (host).
@@ -269,52 +598,63 @@ class DockerSandbox:
             if parent_dir:
                 os.makedirs(parent_dir, exist_ok=True)
 
-            # Get file stream
             resolved_src = self._safe_resolve_path(src_path)
+            host_src = self._host_path(resolved_src)
+            if host_src is not None:
+                if not os.path.exists(host_src):
+                    raise FileNotFoundError(f"Source file not found: {src_path}")
+                await asyncio.to_thread(self._copy_host_path, host_src, dst_path)
+                return
+
+            # Get file stream
             stream, stat = await asyncio.to_thread(
                 self.container.get_archive, resolved_src
             )
+            await asyncio.to_thread(self._extract_stream, stream, src_path, dst_path)
 
-            # Create temporary directory to extract file
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                # Write stream to temporary file
-                tar_path = os.path.join(tmp_dir, "temp.tar")
-                with open(tar_path, "wb") as f:
-                    for chunk in stream:
-                        f.write(chunk)
-
-                # Extract file
-                with tarfile.open(tar_path) as tar:
-                    members = tar.getmembers()
-                    if not members:
-                        raise FileNotFoundError(f"Source file is empty: {src_path}")
-
-                    # If destination is a directory, we should preserve relative path structure
-                    if os.path.isdir(dst_path):
-                        tar.extractall(dst_path)
-                    else:
-                        # If destination is a file, we only extract the source file's content
-                        if len(members) > 1:
-                            raise RuntimeError(
-                                f"Source path is a directory but destination is a file: {src_path}"
-                            )
-
-                        with open(dst_path, "wb") as dst:
-                            src_file = tar.extractfile(members[0])
-                            if src_file is None:
-                                raise RuntimeError(
-                                    f"Failed to extract file: {src_path}"
-                                )
-                            dst.write(src_file.read())
-
-        except docker.errors.NotFound:
+        except (docker.errors.NotFound, FileNotFoundError):
             raise FileNotFoundError(f"Source file not found: {src_path}")
         except Exception as e:
             raise RuntimeError(f"Failed to copy file: {e}")
 
+    @staticmethod
+    def _copy_host_path(src: str, dst: str) -> None:
+        if os.path.isdir(src):
+            target = (
+                os.path.join(dst, os.path.basename(src)) if os.path.isdir(dst) else dst
+            )
+            shutil.copytree(src, target, dirs_exist_ok=True)
+        else:
+            shutil.copyfile(src, dst)
+
+    @staticmethod
+    def _extract_stream(stream: Iterable[bytes], src_path: str, dst_path: str) -> None:
+        with tarfile.open(fileobj=_ChunkReader(stream), mode="r|") as tar:
+            # If destination is a directory, we should preserve relative path structure
+            if os.path.isdir(dst_path):
+                tar.extractall(dst_path, filter="data")
+                return
+
+            # If destination is a file, we only extract the source file's content
+            member = tar.next()
+            if member is None:
+                raise FileNotFoundError(f"Source file is empty: {src_path}")
+            if not member.isfile():
+                raise RuntimeError(
+                    f"Source path is a directory but destination is a file: {src_path}"
+                )
+            src_file = tar.extractfile(member)
+            if src_file is None:
+                raise RuntimeError(f"Failed to extract file: {src_path}")
+            with open(dst_path, "wb") as dst:
+                shutil.copyfileobj(src_file, dst, CHUNK_SIZE)
+
     async def copy_to(self, src_path: str, dst_path: str) -> None:
         """Copies a file to the container.
 
+        The tar sent to the container is generated while it is uploaded, one
+        chunk of one file at a time.
+
         Args:
             src_path: Source file path (host).
             dst_path: Destination path (container).
@@ -327,47 +667,19 @@ class DockerSandbox:
             if not os.path.exists(src_path):
                 raise FileNotFoundError(f"Source file not found: {src_path}")
 
-            # Create destination directory in container
             resolved_dst = self._safe_resolve_path(dst_path)
-            container_dir = os.path.dirname(resolved_dst)
-            if container_dir:
-                await self.run_command(f"mkdir -p {container_dir}")
-
-            # Create tar file to upload
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                tar_path = os.path.join(tmp_dir, "temp.tar")
-                with tarfile.open(tar_path, "w") as tar:
-                    # Handle directory source path
-                    if os.path.isdir(src_path):
-                        os.path.basename(src_path.rstrip("/"))
-                        for root, _, files in os.walk(src_path):
-                            for file in files:
-                                file_path = os.path.join(root, file)
-                                arcname = os.path.join(
-                                    os.path.basename(dst_path),
-                                    os.path.relpath(file_path, src_path),
-                                )
-                                tar.add(file_path, arcname=arcname)
-                    else:
-                        # Add single file to tar
-                        tar.add(src_path, arcname=os.path.basename(dst_path))
-
-                # Read tar file content
-                with open(tar_path, "rb") as f:
-                    data = f.read()
-
-                # Upload to container
-                await asyncio.to_thread(
-                    self.container.put_archive,
-                    os.path.dirname(resolved_dst) or "/",
-                    data,
-                )
+            host_dst = self._host_path(resolved_dst)
+            if host_dst is not None:
+                os.makedirs(os.path.dirname(host_dst), exist_ok=True)
+                await asyncio.to_thread(self._copy_host_path, src_path, host_dst)
+                return
 
-                # Verify file was created successfully
-                try:
-                    await self.run_command(f"test -e {resolved_dst}")
-                except Exception:
-                    raise RuntimeError(f"Failed to verify file creation: {dst_path}")
+            # Parent directories are created on extraction
+            await asyncio.to_thread(
+                self.container.put_archive,
+                "/",
+                _tar_chunks(self._host_entries(src_path, resolved_dst)),
+            )
 
         except FileNotFoundError:
             raise
@@ -375,30 +687,38 @@ class DockerSandbox:
             raise RuntimeError(f"Failed to copy file: {e}")
 
     @staticmethod
-    async def _create_tar_stream(name: str, content: bytes) -> io.BytesIO:
-        """Creates a tar file stream.
-
-        Args:
-            name: Filename.
-            content: File content.
-
-        Returns:
-            Tar file stream.
-        """
-        tar_stream = io.BytesIO()
-        with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-            tarinfo = tarfile.TarInfo(name=name)
-            tarinfo.size = len(content)
-            tar.addfile(tarinfo, io.BytesIO(content))
-        tar_stream.seek(0)
-        return tar_stream
+    def _host_entries(src_path: str, container_path: str) -> Iterator[TarEntry]:
+        """Tar entries copying a host file or directory tree to container_path."""
+        if not os.path.isdir(src_path):
+            stat = os.stat(src_path)
+            yield (
+                _tar_info(container_path, stat.st_size, mode=S_IMODE(stat.st_mode)),
+                partial(open, src_path, "rb"),
+            )
+            return
+        for root, _, files in os.walk(src_path):
+            relative = os.path.relpath(root, src_path)
+            target = os.path.normpath(os.path.join(container_path, relative))
+            mode = S_IMODE(os.stat(root).st_mode)
+            yield _tar_info(target, directory=True, mode=mode), None
+            for file in files:
+                file_path = os.path.join(root, file)
+                stat = os.stat(file_path)
+                yield (
+                    _tar_info(
+                        os.path.join(target, file),
+                        stat.st_size,
+                        mode=S_IMODE(stat.st_mode),
+                    ),
+                    partial(open, file_path, "rb"),
+                )
 
     @staticmethod
-    async def _read_from_tar(tar_stream) -> bytes:
-        """Reads file content from a tar stream.
+    def _read_from_tar(tar_stream: Iterable[bytes]) -> bytes:
+        """Reads the first file of a streamed tar archive.
 
         Args:
-            tar_stream: Tar file stream.
+            tar_stream: Tar archive chunks.
 
         Returns:
             File content.
@@ -406,21 +726,16 @@ class DockerSandbox:
         Raises:
             RuntimeError: If read operation fails.
         """
-        with tempfile.NamedTemporaryFile() as tmp:
-            for chunk in tar_stream:
-                tmp.write(chunk)
-            tmp.seek(0)
-
-            with tarfile.open(fileobj=tmp) as tar:
-                member = tar.next()
-                if not member:
-                    raise RuntimeError("Empty tar archive")
+        with tarfile.open(fileobj=_ChunkReader(tar_stream), mode="r|") as tar:
+            member = tar.next()
+            if not member:
+                raise RuntimeError("Empty tar archive")
 
-                file_content = tar.extractfile(member)
-                if not file_content:
-                    raise RuntimeError("Failed to extract file content")
+            file_content = tar.extractfile(member)
+            if not file_content:
+                raise RuntimeError("Failed to extract file content")
 
-                return file_content.read()
+            return file_content.read()
 
     async def cleanup(self) -> None:
         """Cleans up sandbox resources."""
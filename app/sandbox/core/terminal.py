@@ -6,9 +6,10 @@ allowing interactive command execution with timeout control.
 """
 
 import asyncio
-import re
+import codecs
 import socket
-from typing import Dict, Optional, Tuple, Union
+import uuid
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
 
 import docker
 from docker import APIClient
@@ -17,16 +18,31 @@ from docker.models.containers import Container
 
 
 class DockerSession:
-    def __init__(self, container_id: str) -> None:
+    """Interactive bash session in a container over a non-blocking exec socket.
+
+    Commands are framed by a unique end marker carrying the exit code, so
+    output is known to be complete without guessing from prompts, and can be
+    consumed chunk by chunk while the command is still running.
+    """
+
+    READ_SIZE = 65536
+    MARKER = "__OPENMANUS_DONE_"
+    RECOVER_TIMEOUT = 5.0
+
+    def __init__(self, container_id: str, api: Optional[APIClient] = None) -> None:
         """Initializes a Docker session.
 
         Args:
             container_id: ID of the Docker container.
+            api: Low-level Docker API client. A new one is created if None.
         """
-        self.api = APIClient()
+        self.api = api or APIClient()
         self.container_id = container_id
         self.exec_id = None
         self.socket = None
+        self.last_exit_code: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._stale_marker: Optional[bytes] = None  # Left by a timed out command
 
     async def create(self, working_dir: str, env_vars: Dict[str, str]) -> None:
         """Creates an interactive session with the container.
@@ -38,16 +54,19 @@ class DockerSession:
         Raises:
             RuntimeError: If socket connection fails.
         """
+        # No line editing and no tty echo: the socket carries command output only
         startup_command = [
             "bash",
             "-c",
             f"cd {working_dir} && "
+            "stty -echo 2>/dev/null; "
             "PROMPT_COMMAND='' "
             "PS1='$ ' "
-            "exec bash --norc --noprofile",
+            "exec bash --norc --noprofile --noediting",
         ]
 
-        exec_data = self.api.exec_create(
+        exec_data = await asyncio.to_thread(
+            self.api.exec_create,
             self.container_id,
             startup_command,
             stdin=True,
@@ -56,12 +75,23 @@ class DockerSession:
             stderr=True,
             privileged=True,
             user="root",
-            environment={**env_vars, "TERM": "dumb", "PS1": "$ ", "PROMPT_COMMAND": ""},
+            environment={
+                **env_vars,
+                "TERM": "dumb",
+                "PS1": "$ ",
+                "PS2": "",
+                "PROMPT_COMMAND": "",
+            },
         )
         self.exec_id = exec_data["Id"]
 
-        socket_data = self.api.exec_start(
-            self.exec_id, socket=True, tty=True, stream=True, demux=True
+        socket_data = await asyncio.to_thread(
+            self.api.exec_start,
+            self.exec_id,
+            socket=True,
+            tty=True,
+            stream=True,
+            demux=True,
         )
 
         if hasattr(socket_data, "_sock"):
@@ -71,6 +101,8 @@ class DockerSession:
             raise RuntimeError("Failed to get socket connection")
 
         await self._read_until_prompt()
+        # From here on the end marker frames every command; drop the prompt
+        await asyncio.get_running_loop().sock_sendall(self.socket, b"PS1=''\n")
 
     async def close(self) -> None:
         """Cleans up session resources.
@@ -101,7 +133,9 @@ class DockerSession:
             if self.exec_id:
                 try:
                     # Check exec instance status
-                    exec_inspect = self.api.exec_inspect(self.exec_id)
+                    exec_inspect = await asyncio.to_thread(
+                        self.api.exec_inspect, self.exec_id
+                    )
                     if exec_inspect.get("Running", False):
                         # If still running, wait for it to complete
                         await asyncio.sleep(0.5)
@@ -114,6 +148,13 @@ class DockerSession:
             # Log error but don't raise, ensure cleanup continues
             print(f"Warning: Error during session cleanup: {e}")
 
+    async def _recv(self) -> bytes:
+        """Waits for the next chunk of output from the socket."""
+        chunk = await asyncio.get_running_loop().sock_recv(self.socket, self.READ_SIZE)
+        if not chunk:
+            raise RuntimeError("Session closed by the container")
+        return chunk
+
     async def _read_until_prompt(self) -> str:
         """Reads output until prompt is found.
 
@@ -123,97 +164,170 @@ class DockerSession:
         Raises:
             socket.error: If socket communication fails.
         """
-        buffer = b""
-        while b"$ " not in buffer:
-            try:
-                chunk = self.socket.recv(4096)
-                if chunk:
-                    buffer += chunk
-            except socket.error as e:
-                if e.errno == socket.EWOULDBLOCK:
-                    await asyncio.sleep(0.1)
-                    continue
-                raise
-        return buffer.decode("utf-8")
-
-    async def execute(self, command: str, timeout: Optional[int] = None) -> str:
-        """Executes a command and returns cleaned output.
+        buffer = bytearray()
+        while b"$ " not in buffer[-(self.READ_SIZE + 2) :]:
+            buffer += await self._recv()
+        return buffer.decode("utf-8", "replace")
+
+    async def _skip_stale_output(self) -> None:
+        """Discards output of a command that timed out, up to its end marker."""
+        marker, self._stale_marker = self._stale_marker, None
+        buffer = bytearray()
+        try:
+            async with asyncio.timeout(self.RECOVER_TIMEOUT):
+                while marker not in buffer:
+                    buffer += await self._recv()
+                    del buffer[: -len(marker) - self.READ_SIZE]
+        except TimeoutError:
+            pass
+
+    def _frame(self, command: str, token: str) -> bytes:
+        # printf assembles the marker, so it never appears verbatim in the input
+        return (
+            f"{command}\nprintf '\\n{self.MARKER}%s_%s__\\n' {token} \"$?\"\n"
+        ).encode()
+
+    async def stream(
+        self, command: str, timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Executes a command, yielding its output as it arrives.
+
+        The exit code is stored in `last_exit_code` once the command finishes.
 
         Args:
             command: Shell command to execute.
             timeout: Maximum execution time in seconds.
 
-        Returns:
-            Command output as string with prompt markers removed.
+        Yields:
+            Output chunks, with carriage returns of the tty removed.
 
         Raises:
             RuntimeError: If session not initialized or execution fails.
-            TimeoutError: If command execution exceeds timeout.
+            TimeoutError: If command execution exceeds timeout. The command
+                is interrupted and its remaining output discarded.
         """
         if not self.socket:
             raise RuntimeError("Session not initialized")
-
         try:
-            # Sanitize command to prevent shell injection
-            sanitized_command = self._sanitize_command(command)
-            full_command = f"{sanitized_command}\necho $?\n"
-            self.socket.sendall(full_command.encode())
-
-            async def read_output() -> str:
-                buffer = b""
-                result_lines = []
-                command_sent = False
-
-                while True:
-                    try:
-                        chunk = self.socket.recv(4096)
-                        if not chunk:
-                            break
-
-                        buffer += chunk
-                        lines = buffer.split(b"\n")
-
-                        buffer = lines[-1]
-                        lines = lines[:-1]
-
-                        for line in lines:
-                            line = line.rstrip(b"\r")
-
-                            if not command_sent:
-                                command_sent = True
-                                continue
-
-                            if line.strip() == b"echo $?" or line.strip().isdigit():
-                                continue
-
-                            if line.strip():
-                                result_lines.append(line)
+            command = self._sanitize_command(command)
+        except ValueError as e:
+            raise RuntimeError(f"Failed to execute command: {e}")
 
-                        if buffer.endswith(b"$ "):
-                            break
+        async with self._lock:
+            if self._stale_marker:
+                await self._skip_stale_output()
 
-                    except socket.error as e:
-                        if e.errno == socket.EWOULDBLOCK:
-                            await asyncio.sleep(0.1)
-                            continue
-                        raise
+            token = uuid.uuid4().hex[:12]
+            marker = f"{self.MARKER}{token}_".encode()
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout if timeout else None
+            decoder = codecs.getincrementaldecoder("utf-8")("replace")
+            self.last_exit_code = None
+            finished = False
 
-                output = b"\n".join(result_lines).decode("utf-8")
-                output = re.sub(r"\n\$ echo \$\$?.*$", "", output)
+            try:
+                await loop.sock_sendall(self.socket, self._frame(command, token))
+                pending = bytearray()
+                while True:
+                    if deadline is None:
+                        chunk = await self._recv()
+                    else:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError
+                        chunk = await asyncio.wait_for(self._recv(), remaining)
+                    # Only the new bytes (plus a marker-sized overlap) are searched
+                    search_from = max(0, len(pending) - len(marker))
+                    pending += chunk
+                    index = pending.find(marker, search_from)
+
+                    if index >= 0:
+                        end = pending.find(b"__", index + len(marker))
+                        if end < 0:
+                            continue  # Exit code not complete yet
+                        finished = True
+                        self.last_exit_code = int(pending[index + len(marker) : end])
+                        output = bytes(pending[:index])
+                        # Drop the newline printf put in front of the marker
+                        if output.endswith(b"\r\n"):
+                            output = output[:-2]
+                        elif output.endswith(b"\n"):
+                            output = output[:-1]
+                        text = decoder.decode(output, final=True).replace("\r\n", "\n")
+                        if text:
+                            yield text
+                        return
+
+                    ready = len(pending) - self._holdback(pending, marker)
+                    if ready > 0:
+                        text = decoder.decode(bytes(pending[:ready]))
+                        del pending[:ready]
+                        if text:
+                            yield text.replace("\r\n", "\n")
+
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"Command execution timed out after {timeout} seconds"
+                )
+            except RuntimeError:
+                raise
+            except Exception as e:
+                raise RuntimeError(f"Failed to execute command: {e}")
+            finally:
+                # Timed out, failed or abandoned by the consumer mid-command
+                if not finished:
+                    self._interrupt()
+
+    @staticmethod
+    def _holdback(pending: bytearray, marker: bytes) -> int:
+        """Bytes at the end of `pending` that may still turn out to be framing.
+
+        That is a partial end marker, plus the line break printf writes
+        before it, which is not part of the command's output.
+        """
+        keep = 0
+        for size in range(min(len(marker), len(pending)), 0, -1):
+            if pending.endswith(marker[:size]):
+                keep = size
+                break
+        rest = len(pending) - keep
+        if pending.endswith(b"\r\n", 0, rest):
+            keep += 2
+        elif pending.endswith(b"\n", 0, rest) or pending.endswith(b"\r", 0, rest):
+            keep += 1
+        return keep
+
+    def _interrupt(self) -> None:
+        """Interrupts the running command and frames a marker to resync on.
+
+        Ctrl-C also flushes the tty's pending input (including the command's
+        own end marker), so a fresh marker is queued after it.
+        """
+        if self.socket is None:
+            return
+        token = uuid.uuid4().hex[:12]
+        try:
+            self.socket.send(b"\x03" + self._frame("", token))
+        except OSError:
+            return
+        self._stale_marker = f"{self.MARKER}{token}_".encode()
 
-                return output
+    async def execute(self, command: str, timeout: Optional[int] = None) -> str:
+        """Executes a command and returns cleaned output.
 
-            if timeout:
-                result = await asyncio.wait_for(read_output(), timeout)
-            else:
-                result = await read_output()
+        Args:
+            command: Shell command to execute.
+            timeout: Maximum execution time in seconds.
 
-            return result.strip()
+        Returns:
+            Command output as string with prompt markers removed.
 
-        except asyncio.TimeoutError:
-            raise TimeoutError(f"Command execution timed out after {timeout} seconds")
-        except Exception as e:
-            raise RuntimeError(f"Failed to execute command: {e}")
+        Raises:
+            RuntimeError: If session not initialized or execution fails.
+            TimeoutError: If command execution exceeds timeout.
+        """
+        chunks = [chunk async for chunk in self.stream(command, timeout)]
+        return "".join(chunks).strip()
 
     def _sanitize_command(self, command: str) -> str:
         """Sanitizes the command string to prevent shell injection.
@@ -255,6 +369,7 @@ class AsyncDockerizedTerminal:
         working_dir: str = "/workspace",
         env_vars: Optional[Dict[str, str]] = None,
         default_timeout: int = 60,
+        client: Optional[docker.DockerClient] = None,
     ) -> None:
         """Initializes an asynchronous terminal for Docker containers.
 
@@ -263,8 +378,9 @@ class AsyncDockerizedTerminal:
             working_dir: Working directory inside the container.
             env_vars: Environment variables to set.
             default_timeout: Default command execution timeout in seconds.
+            client: Docker client. Created from the environment if None.
         """
-        self.client = docker.from_env()
+        self.client = client or docker.from_env()
         self.container = (
             container
             if isinstance(container, Container)
@@ -285,7 +401,7 @@ class AsyncDockerizedTerminal:
         """
         await self._ensure_workdir()
 
-        self.session = DockerSession(self.container.id)
+        self.session = DockerSession(self.container.id, api=self.client.api)
         await self.session.create(self.working_dir, self.env_vars)
 
     async def _ensure_workdir(self) -> None:
@@ -331,6 +447,29 @@ class AsyncDockerizedTerminal:
 
         return await self.session.execute(cmd, timeout=timeout or self.default_timeout)
 
+    async def stream_command(
+        self, cmd: str, timeout: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Runs a command in the container, yielding output as it is produced.
+
+        Args:
+            cmd: Shell command to execute.
+            timeout: Maximum execution time in seconds.
+
+        Yields:
+            Output chunks. The exit code is in `session.last_exit_code` after.
+
+        Raises:
+            RuntimeError: If terminal not initialized.
+        """
+        if not self.session:
+            raise RuntimeError("Terminal not initialized")
+
+        async for chunk in self.session.stream(
+            cmd, timeout=timeout or self.default_timeout
+        ):
+            yield chunk
+
     async def close(self) -> None:
         """Closes the terminal session."""
         if self.session:
@@ -1,7 +1,20 @@
+from collections import deque
 from enum import Enum
-from typing import Any, List, Literal, Optional, Union
-
-from pydantic import BaseModel, Field
+from itertools import islice
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Union,
+)
+
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
 
 class Role(str, Enum):
@@ -157,30 +170,183 @@ class Message(BaseModel):
 
 
 class Memory(BaseModel):
-    messages: List[Message] = Field(default_factory=list)
+    """Conversation memory with a bounded hot window and an optional cold archive.
+
+    The latest `max_messages` messages live in a deque; older ones are
+    evicted in O(1) to an append-only archive (see app.memory_archive) when
+    one is configured, so the full history stays available for audits
+    without being held in RAM. Every message gets a sequence number and is
+    indexed by the step it was added in and by the tools it calls or
+    answers, so `by_step` and `by_tool` do not scan the history.
+    """
+
+    messages: Deque[Message] = Field(default_factory=deque)
     max_messages: int = Field(default=100)
+    step: int = Field(default=0, description="Step recorded for new messages")
+    archive: Optional[Any] = Field(
+        default=None,
+        exclude=True,
+        description="MemoryArchive for evicted messages (default: from [memory])",
+    )
+
+    _offset: int = PrivateAttr(default=0)  # Sequence number of messages[0]
+    _steps: Deque[int] = PrivateAttr(default_factory=deque)  # Parallel to messages
+    _by_step: Dict[int, Deque[int]] = PrivateAttr(default_factory=dict)
+    _by_tool: Dict[str, Deque[int]] = PrivateAttr(default_factory=dict)
+    _archive_opened: bool = PrivateAttr(default=False)
+
+    @model_validator(mode="after")
+    def _index_initial_messages(self) -> "Memory":
+        initial, self.messages = self.messages, deque()
+        self.add_messages(initial)
+        return self
+
+    @staticmethod
+    def _tool_names(message: Message) -> Set[str]:
+        names = {call.function.name for call in message.tool_calls or ()}
+        if message.role == Role.TOOL and message.name:
+            names.add(message.name)
+        return names
+
+    def _index(self, seq: int, step: int, message: Message) -> None:
+        self._by_step.setdefault(step, deque()).append(seq)
+        for name in self._tool_names(message):
+            self._by_tool.setdefault(name, deque()).append(seq)
+
+    def _unindex_oldest(self, step: int, message: Message) -> None:
+        """Drop the index entries of the oldest indexed message."""
+        for key, index in [(step, self._by_step)] + [
+            (name, self._by_tool) for name in self._tool_names(message)
+        ]:
+            seqs = index.get(key)
+            if seqs:
+                seqs.popleft()
+                if not seqs:
+                    del index[key]
+
+    def _evict(self) -> None:
+        """Move the oldest hot message to the archive (or drop it)."""
+        message = self.messages.popleft()
+        step = self._steps.popleft()
+        seq = self._offset
+        self._offset += 1
+        if self.archive is None and not self._archive_opened:
+            from app.memory_archive import create_memory_archive
+
+            self._archive_opened = True
+            self.archive = create_memory_archive()
+        if self.archive is not None:
+            self.archive.append(seq, step, message)
+        else:
+            self._unindex_oldest(step, message)
 
     def add_message(self, message: Message) -> None:
         """Add a message to memory"""
+        self._index(self._offset + len(self.messages), self.step, message)
         self.messages.append(message)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self._steps.append(self.step)
+        while len(self.messages) > self.max_messages:
+            self._evict()
 
-    def add_messages(self, messages: List[Message]) -> None:
+    def add_messages(self, messages: Iterable[Message]) -> None:
         """Add multiple messages to memory"""
-        self.messages.extend(messages)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        for message in messages:
+            self.add_message(message)
+
+    def replace(self, messages: Iterable[Message]) -> None:
+        """Replace the hot window, e.g. with a compacted version of it
+
+        Messages that are not carried over are archived (or dropped) first;
+        carried-over messages keep the step they were added in.
+        """
+        messages = list(messages)
+        kept = {id(message) for message in messages}
+        steps = {id(m): step for m, step in zip(self.messages, self._steps)}
+        old = list(zip(self.messages, self._steps))
+
+        # Hot sequence numbers are reassigned below
+        for index in (self._by_step, self._by_tool):
+            for key in list(index):
+                seqs = index[key]
+                while seqs and seqs[-1] >= self._offset:
+                    seqs.pop()
+                if not seqs:
+                    del index[key]
+
+        self.messages.clear()
+        self._steps.clear()
+        for message, step in old:
+            if id(message) not in kept:
+                self._index(self._offset, step, message)
+                self.messages.append(message)
+                self._steps.append(step)
+                self._evict()
+        current_step = self.step
+        for message in messages:
+            self.step = steps.get(id(message), current_step)
+            self.add_message(message)
+        self.step = current_step
+
+    def by_step(self, step: int) -> List[Message]:
+        """All messages added in a step, including archived ones"""
+        return self._lookup(self._by_step.get(step, ()))
+
+    def by_tool(self, name: str) -> List[Message]:
+        """All tool calls and results of a tool, including archived ones"""
+        return self._lookup(self._by_tool.get(name, ()))
+
+    def _lookup(self, seqs: Iterable[int]) -> List[Message]:
+        archived = [seq for seq in seqs if seq < self._offset]
+        result = self.archive.get(archived) if archived and self.archive else []
+        result.extend(
+            self.messages[seq - self._offset] for seq in seqs if seq >= self._offset
+        )
+        return result
+
+    def history(self) -> Iterator[Message]:
+        """Every message, archived and hot, oldest first"""
+        if self.archive is not None:
+            yield from self.archive
+        yield from self.messages
+
+    def drop_old_images(self, keep: int) -> int:
+        """Remove the images of all but the latest `keep` messages carrying one
+
+        Returns the number of images removed. The messages themselves stay,
+        with a note in place of the image.
+        """
+        dropped = 0
+        seen = 0
+        for message in reversed(self.messages):
+            if message.base64_image is None:
+                continue
+            seen += 1
+            if seen > keep:
+                message.base64_image = None
+                message.content = f"{message.content or ''} [image omitted]".strip()
+                dropped += 1
+        return dropped
 
     def clear(self) -> None:
-        """Clear all messages"""
+        """Clear all messages (archived ones stay on disk)"""
         self.messages.clear()
+        self._steps.clear()
+        self._by_step.clear()
+        self._by_tool.clear()
+        self.close()
+
+    def close(self) -> None:
+        """Release the archive's file handle; a later eviction opens a new one"""
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+        self._archive_opened = False
 
     def get_recent_messages(self, n: int) -> List[Message]:
         """Get n most recent messages"""
-        return self.messages[-n:]
+        recent = list(islice(reversed(self.messages), max(n, 0)))
+        recent.reverse()
+        return recent
 
     def to_dict_list(self) -> List[dict]:
         """Convert messages to list of dicts"""
@@ -0,0 +1,402 @@
+"""Bounded store for task/flow state with an optional SQLite backend."""
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel
+
+from app.logger import logger
+
+
+TASK_FIELDS = ("id", "prompt", "created_at", "status", "session_id", "chat_history")
+
+
+class TaskBackend(ABC):
+    """Durable storage for task records and their steps."""
+
+    @abstractmethod
+    def insert(self, record: dict) -> None:
+        """Insert a new task record (without steps)."""
+
+    @abstractmethod
+    def update(self, task_id: str, fields: dict) -> None:
+        """Update some fields of a task record."""
+
+    @abstractmethod
+    def append_step(self, task_id: str, seq: int, step: dict) -> None:
+        """Append one step to a task."""
+
+    @abstractmethod
+    def load(self, task_id: str) -> Optional[dict]:
+        """Load a task record including its steps."""
+
+    @abstractmethod
+    def list(
+        self,
+        limit: int,
+        offset: int,
+        session_id: Optional[str] = None,
+        with_session: bool = False,
+        include_steps: bool = True,
+    ) -> Tuple[List[dict], int]:
+        """Return one page of records, newest first, and the total count."""
+
+
+class SQLiteTaskBackend(TaskBackend):
+    """SQLite backend; steps live in their own table so appends stay O(1).
+
+    Writes are queued and committed in batches by a background thread, so
+    callers on the event loop never wait for the disk. Reads wait for the
+    queued writes first and always see them.
+    """
+
+    def __init__(self, path: str, table: str = "tasks"):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id TEXT PRIMARY KEY,
+                prompt TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                status TEXT NOT NULL,
+                session_id TEXT,
+                chat_history TEXT NOT NULL DEFAULT '[]'
+            );
+            CREATE INDEX IF NOT EXISTS {table}_created_at ON {table} (created_at);
+            CREATE INDEX IF NOT EXISTS {table}_session_id
+                ON {table} (session_id, created_at);
+            CREATE TABLE IF NOT EXISTS {table}_steps (
+                task_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (task_id, seq)
+            );
+            """
+        )
+        # Tasks that were running when the previous process stopped cannot resume
+        self._conn.execute(
+            f"UPDATE {table} SET status = 'interrupted' "
+            f"WHERE status IN ('pending', 'running')"
+        )
+        self._writes: "queue.Queue[Optional[Tuple[str, list]]]" = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._write_loop, name=f"{table}-writer", daemon=True
+        )
+        self._writer.start()
+        # Commit what is still queued when the process exits
+        atexit.register(self.flush)
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            statements = [item for item in batch if item is not None]
+            try:
+                with self._lock:
+                    self._conn.execute("BEGIN")
+                    for sql, params in statements:
+                        self._conn.execute(sql, params)
+                    self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write {len(statements)} task changes: {e}")
+                try:
+                    self._conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+            if len(statements) < len(batch):
+                return
+
+    def _write(self, sql: str, params: list) -> None:
+        self._writes.put((sql, params))
+
+    def flush(self) -> None:
+        """Wait until every queued write is committed."""
+        self._writes.join()
+
+    @staticmethod
+    def _to_row(record: dict) -> dict:
+        row = {key: record.get(key) for key in TASK_FIELDS}
+        if isinstance(row["created_at"], datetime):
+            row["created_at"] = row["created_at"].timestamp()
+        row["chat_history"] = json.dumps(row["chat_history"] or [], ensure_ascii=False)
+        return row
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> dict:
+        record = dict(row)
+        record["created_at"] = datetime.fromtimestamp(record["created_at"])
+        record["chat_history"] = json.loads(record["chat_history"])
+        return record
+
+    def insert(self, record: dict) -> None:
+        row = self._to_row(record)
+        self._write(
+            f"INSERT OR REPLACE INTO {self.table} ({', '.join(TASK_FIELDS)}) "
+            f"VALUES ({', '.join('?' * len(TASK_FIELDS))})",
+            [row[key] for key in TASK_FIELDS],
+        )
+
+    def update(self, task_id: str, fields: dict) -> None:
+        row = self._to_row(fields)
+        columns = [key for key in fields if key in TASK_FIELDS and key != "id"]
+        if not columns:
+            return
+        self._write(
+            f"UPDATE {self.table} SET {', '.join(f'{c} = ?' for c in columns)} "
+            f"WHERE id = ?",
+            [row[c] for c in columns] + [task_id],
+        )
+
+    def append_step(self, task_id: str, seq: int, step: dict) -> None:
+        data = json.dumps(step, ensure_ascii=False, default=str)
+        self._write(
+            f"INSERT OR REPLACE INTO {self.table}_steps (task_id, seq, data) "
+            f"VALUES (?, ?, ?)",
+            [task_id, seq, data],
+        )
+
+    def _steps(self, task_ids: List[str]) -> Dict[str, List[dict]]:
+        """Steps of several tasks, in order, with a single query."""
+        steps = {task_id: [] for task_id in task_ids}
+        if not task_ids:
+            return steps
+        rows = self._conn.execute(
+            f"SELECT task_id, data FROM {self.table}_steps "
+            f"WHERE task_id IN ({', '.join('?' * len(task_ids))}) "
+            f"ORDER BY task_id, seq",
+            task_ids,
+        )
+        for row in rows:
+            steps[row["task_id"]].append(json.loads(row["data"]))
+        return steps
+
+    def load(self, task_id: str) -> Optional[dict]:
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT * FROM {self.table} WHERE id = ?", (task_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            record = self._from_row(row)
+            record["steps"] = self._steps([task_id])[task_id]
+        return record
+
+    def list(
+        self,
+        limit: int,
+        offset: int,
+        session_id: Optional[str] = None,
+        with_session: bool = False,
+        include_steps: bool = True,
+    ) -> Tuple[List[dict], int]:
+        where, params = "", []
+        if session_id is not None:
+            where, params = "WHERE session_id = ?", [session_id]
+        elif with_session:
+            where = "WHERE session_id IS NOT NULL"
+        self.flush()
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table} {where}", params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM {self.table} {where} "
+                f"ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+            records = [self._from_row(row) for row in rows]
+            if include_steps:
+                steps = self._steps([record["id"] for record in records])
+                for record in records:
+                    record["steps"] = steps[record["id"]]
+        return records, total
+
+    def close(self) -> None:
+        self._writes.put(None)
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+
+class TaskStore:
+    """Task/flow state with a bounded in-memory tier.
+
+    Recently used tasks are kept as live model objects in an LRU cache of
+    at most `max_items` entries; entries idle for longer than `ttl`
+    seconds are evicted as well. Running tasks are pinned and never
+    evicted, since their coroutines keep mutating them.
+
+    With a backend every change is written through, so evicted tasks are
+    reloaded on demand and history survives restarts. Without one, the
+    store is memory-only and evicted tasks are gone.
+    """
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        backend: Optional[TaskBackend] = None,
+        max_items: int = 500,
+        ttl: Optional[float] = None,
+    ):
+        self.model = model
+        self.backend = backend
+        self.max_items = max_items
+        self.ttl = ttl
+        self._cache: "OrderedDict[str, BaseModel]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._pinned: Set[str] = set()
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    def __getitem__(self, task_id: str) -> BaseModel:
+        task = self.get(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        return task
+
+    def _cache_put(self, task: BaseModel) -> None:
+        self._cache[task.id] = task
+        self._cache.move_to_end(task.id)
+        self._last_access[task.id] = time.monotonic()
+        self._evict()
+
+    def _evict(self) -> None:
+        if self.ttl is not None:
+            deadline = time.monotonic() - self.ttl
+            for task_id in [
+                task_id
+                for task_id, accessed in self._last_access.items()
+                if accessed < deadline and task_id not in self._pinned
+            ]:
+                self._drop(task_id)
+        if len(self._cache) > self.max_items:
+            for task_id in list(self._cache):
+                if len(self._cache) <= self.max_items:
+                    break
+                if task_id not in self._pinned:
+                    self._drop(task_id)
+
+    def _drop(self, task_id: str) -> None:
+        self._cache.pop(task_id, None)
+        self._last_access.pop(task_id, None)
+
+    def get(self, task_id: str) -> Optional[BaseModel]:
+        """Return the live task object, loading it from the backend if needed."""
+        task = self._cache.get(task_id)
+        if task is not None:
+            self._cache.move_to_end(task_id)
+            self._last_access[task_id] = time.monotonic()
+            return task
+        if self.backend is None:
+            return None
+        record = self.backend.load(task_id)
+        if record is None:
+            return None
+        task = self.model(**record)
+        self._cache_put(task)
+        return task
+
+    def add(self, task: BaseModel) -> None:
+        """Store a new task and pin it until `release` is called."""
+        self._pinned.add(task.id)
+        self._cache_put(task)
+        if self.backend:
+            self.backend.insert({key: getattr(task, key) for key in TASK_FIELDS})
+
+    def save(self, task: BaseModel, *fields: str) -> None:
+        """Persist changed fields of a task (status by default)."""
+        if self.backend:
+            fields = fields or ("status",)
+            self.backend.update(task.id, {key: getattr(task, key) for key in fields})
+
+    def append_step(self, task: BaseModel, step: dict) -> None:
+        """Append a step to the task and persist only that step."""
+        task.steps.append(step)
+        if self.backend:
+            self.backend.append_step(task.id, len(task.steps), step)
+
+    def release(self, task_id: str) -> None:
+        """Unpin a finished task so it can be evicted."""
+        self._pinned.discard(task_id)
+        self._evict()
+
+    def list(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        session_id: Optional[str] = None,
+        with_session: bool = False,
+        include_steps: bool = True,
+    ) -> Tuple[List[BaseModel], int]:
+        """
+        Return one page of tasks, newest first, and the total count.
+
+        Args:
+            limit: Page size
+            offset: Number of tasks to skip
+            session_id: Only tasks of this session
+            with_session: Only tasks that belong to some session
+            include_steps: Load steps of tasks that are not cached
+
+        Returns:
+            Tuple[List[BaseModel], int]: The page and the number of matching tasks
+        """
+        if self.backend is None:
+            tasks = [
+                task
+                for task in self._cache.values()
+                if (session_id is None or task.session_id == session_id)
+                and (not with_session or task.session_id)
+            ]
+            tasks.sort(key=lambda task: task.created_at, reverse=True)
+            return tasks[offset : offset + limit], len(tasks)
+
+        records, total = self.backend.list(
+            limit, offset, session_id, with_session, include_steps
+        )
+        # Prefer live objects: running tasks may be ahead of what was listed
+        return [
+            self._cache.get(record["id"]) or self.model(**record) for record in records
+        ], total
+
+
+def create_task_store(
+    model: Type[BaseModel],
+    table: str,
+    backend: str = "memory",
+    path: Optional[str] = None,
+    max_items: int = 500,
+    ttl: Optional[float] = None,
+) -> TaskStore:
+    """Create a TaskStore from the configured backend name ('memory' or 'sqlite')."""
+    if backend == "sqlite":
+        logger.info(f"Storing {table} in SQLite database {path}")
+        return TaskStore(model, SQLiteTaskBackend(path, table), max_items, ttl)
+    if backend != "memory":
+        raise ValueError(f"Unknown task store backend: {backend}")
+    return TaskStore(model, None, max_items, ttl)
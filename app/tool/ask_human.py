@@ -1,6 +1,7 @@
 import asyncio
 from typing import Optional
 
+from app.events import AgentEventType, emit
 from app.tool.base import BaseTool
 
 
@@ -36,6 +37,7 @@ class AskHuman(BaseTool):
 
         # 注意：这里我们不能直接等待，因为工具执行是在 agent 的上下文中
         # 我们需要依赖外部的交互机制来暂停执行
+        await emit(AgentEventType.INTERACTION, inquire, tool=self.name)
         return f"INTERACTION_REQUIRED: {inquire}"
 
     async def set_user_response(self, response: str):
@@ -8,6 +8,8 @@ class BaseTool(ABC, BaseModel):
     name: str
     description: str
     parameters: Optional[dict] = None
+    # Tools sharing session state (a browser, a shell) must not run concurrently
+    serial_only: bool = False
 
     class Config:
         arbitrary_types_allowed = True
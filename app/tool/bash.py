@@ -1,6 +1,10 @@
 import asyncio
+import codecs
 import os
-from typing import Optional
+import signal
+from typing import AsyncIterator, Dict, List, Optional
+
+from pydantic import PrivateAttr
 
 from app.exceptions import ToolError
 from app.tool.base import BaseTool, CLIResult
@@ -13,20 +17,78 @@ _BASH_DESCRIPTION = """Execute a bash command in the terminal.
 """
 
 
+class _Capture:
+    """Decoded output of one stream of one command, capped at `limit` bytes.
+
+    The first half of the budget is kept as it arrives, then a rolling tail
+    of the second half; what falls in between is only counted.
+    """
+
+    def __init__(self, limit: int):
+        self.head_limit = limit - limit // 2
+        self.tail_limit = limit // 2
+        self.size = 0
+        self.tail = bytearray()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, data: bytes) -> str:
+        """Take in a chunk; returns the part of it that falls in the head."""
+        room = max(self.head_limit - self.size, 0)
+        self.size += len(data)
+        head, rest = data[:room], data[room:]
+        if rest:
+            self.tail += rest
+            if len(self.tail) > 2 * max(self.tail_limit, 1):
+                del self.tail[: -self.tail_limit or len(self.tail)]
+        return self._decoder.decode(head) if head else ""
+
+    def finish(self) -> str:
+        """What is left to show after the head: an omission note and the tail."""
+        text = self._decoder.decode(b"", final=True)
+        tail = bytes(self.tail[-self.tail_limit :]) if self.tail_limit else b""
+        omitted = self.size - self.head_limit - len(tail)
+        if omitted > 0:
+            text += f"\n[... {omitted} bytes of output omitted ...]\n"
+        return text + tail.decode("utf-8", errors="replace")
+
+
+def _partial_match(buffer: bytes, sentinel: bytes) -> int:
+    """Length of the longest end of `buffer` that begins `sentinel`."""
+    for size in range(min(len(sentinel) - 1, len(buffer)), 0, -1):
+        if buffer.endswith(sentinel[:size]):
+            return size
+    return 0
+
+
 class _BashSession:
-    """A session of a bash shell."""
+    """A session of a bash shell.
+
+    A reader task per pipe forwards output as it arrives; commands end when
+    the sentinel echoed after them has been seen on both stdout and stderr,
+    which is searched for only in the newly read bytes.
+    """
 
     _started: bool
     _process: asyncio.subprocess.Process
 
     command: str = "/bin/bash"
-    _output_delay: float = 0.2  # seconds
     _timeout: float = 120.0  # seconds
     _sentinel: str = "<<exit>>"
+    _read_size: int = 65536
+    max_output_bytes: int = 256 * 1024  # Per stream and command
 
-    def __init__(self):
+    def __init__(self, name: str = "default", max_output_bytes: Optional[int] = None):
+        self.name = name
+        if max_output_bytes is not None:
+            self.max_output_bytes = max_output_bytes
         self._started = False
         self._timed_out = False
+        self.last_error = ""
+        self._lock = asyncio.Lock()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._readers: List[asyncio.Task] = []
+        # Bytes read past the previous command's sentinel, per stream
+        self._pending: Dict[str, bytes] = {"stdout": b"", "stderr": b""}
 
     async def start(self):
         if self._started:
@@ -41,26 +103,50 @@ class _BashSession:
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
+        self._readers = [
+            asyncio.create_task(self._read("stdout", self._process.stdout)),
+            asyncio.create_task(self._read("stderr", self._process.stderr)),
+        ]
 
         self._started = True
 
+    async def _read(self, stream: str, reader: asyncio.StreamReader) -> None:
+        while data := await reader.read(self._read_size):
+            self._queue.put_nowait((stream, data))
+        self._queue.put_nowait((stream, None))  # EOF: bash has exited
+
     def stop(self):
         """Terminate the bash shell."""
         if not self._started:
             raise ToolError("Session has not started.")
         if self._process.returncode is not None:
             return
-        self._process.terminate()
+        try:
+            # bash leads its own process group, so jobs it started go too
+            os.killpg(self._process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
 
-    async def run(self, command: str):
-        """Execute a command in the bash shell."""
+    async def close(self, timeout: float = 5.0):
+        """Terminate the bash shell and wait until its pipes are drained."""
+        self.stop()
+        try:
+            async with asyncio.timeout(timeout):
+                await self._process.wait()
+                await asyncio.gather(*self._readers)
+        except TimeoutError:
+            # a detached process still holds the pipes
+            for reader in self._readers:
+                reader.cancel()
+
+    async def stream(self, command: str) -> AsyncIterator[str]:
+        """Execute a command, yielding its stdout as it is produced.
+
+        Output past `max_output_bytes` is replaced by an omission note and
+        its tail. Stderr is collected into `last_error`.
+        """
         if not self._started:
             raise ToolError("Session has not started.")
-        if self._process.returncode is not None:
-            return CLIResult(
-                system="tool must be restarted",
-                error=f"bash has exited with returncode {self._process.returncode}",
-            )
         if self._timed_out:
             raise ToolError(
                 f"timed out: bash has not returned in {self._timeout} seconds and must be restarted",
@@ -68,48 +154,93 @@ class _BashSession:
 
         # we know these are not None because we created the process with PIPEs
         assert self._process.stdin
-        assert self._process.stdout
-        assert self._process.stderr
 
-        # send command to the process
-        self._process.stdin.write(
-            command.encode() + f"; echo '{self._sentinel}'\n".encode()
-        )
-        await self._process.stdin.drain()
+        async with self._lock:
+            captures = {
+                "stdout": _Capture(self.max_output_bytes),
+                "stderr": _Capture(self.max_output_bytes),
+            }
+            errors = []
 
-        # read output from the process, until the sentinel is found
-        try:
-            async with asyncio.timeout(self._timeout):
-                while True:
-                    await asyncio.sleep(self._output_delay)
-                    # if we read directly from stdout/stderr, it will wait forever for
-                    # EOF. use the StreamReader buffer directly instead.
-                    output = (
-                        self._process.stdout._buffer.decode()
-                    )  # pyright: ignore[reportAttributeAccessIssue]
-                    if self._sentinel in output:
-                        # strip the sentinel and break
-                        output = output[: output.index(self._sentinel)]
-                        break
-        except asyncio.TimeoutError:
-            self._timed_out = True
-            raise ToolError(
-                f"timed out: bash has not returned in {self._timeout} seconds and must be restarted",
-            ) from None
+            # send command to the process; a newline (not `;`) also ends
+            # commands that put themselves in the background with `&`
+            self._process.stdin.write(
+                f"{command}\necho '{self._sentinel}'; echo '{self._sentinel}' >&2\n".encode()
+            )
+            await self._process.stdin.drain()
+
+            sentinel = self._sentinel.encode()
+            buffers = dict(self._pending)
+            done = set()
+            finished = False
+            try:
+                async with asyncio.timeout(self._timeout):
+                    while len(done) < 2:
+                        for stream, buffer in buffers.items():
+                            if stream in done or not buffer:
+                                continue
+                            position = buffer.find(sentinel)
+                            if position >= 0:
+                                keep, rest = (
+                                    buffer[:position],
+                                    buffer[position + len(sentinel) :],
+                                )
+                                done.add(stream)
+                            else:
+                                # hold back what may be the start of the sentinel
+                                cut = len(buffer) - _partial_match(buffer, sentinel)
+                                keep, rest = buffer[:cut], buffer[cut:]
+                            buffers[stream] = rest
+                            text = captures[stream].feed(keep)
+                            if text and stream == "stdout":
+                                yield text
+                            elif text:
+                                errors.append(text)
+                        if len(done) == 2:
+                            break
+
+                        stream, data = await self._queue.get()
+                        if data is None:
+                            raise ToolError(
+                                f"bash has exited with returncode {await self._process.wait()}"
+                            )
+                        buffers[stream] += data
+                finished = True
+            except TimeoutError:
+                self._timed_out = True
+                raise ToolError(
+                    f"timed out: bash has not returned in {self._timeout} seconds and must be restarted",
+                ) from None
+            finally:
+                if not finished:
+                    # the shell is mid-command; its output can't be told apart
+                    self._timed_out = True
+
+            self._pending = {
+                stream: rest[1:] if rest.startswith(b"\n") else rest
+                for stream, rest in buffers.items()
+            }
+            tail = captures["stdout"].finish()
+            if tail:
+                yield tail
+            self.last_error = "".join(errors) + captures["stderr"].finish()
+
+    async def run(self, command: str):
+        """Execute a command in the bash shell."""
+        if self._started and self._process.returncode is not None:
+            return CLIResult(
+                system="tool must be restarted",
+                error=f"bash has exited with returncode {self._process.returncode}",
+            )
 
+        output = "".join([chunk async for chunk in self.stream(command)])
         if output.endswith("\n"):
             output = output[:-1]
 
-        error = (
-            self._process.stderr._buffer.decode()
-        )  # pyright: ignore[reportAttributeAccessIssue]
+        error = self.last_error
         if error.endswith("\n"):
             error = error[:-1]
 
-        # clear the buffers so that the next output can be read correctly
-        self._process.stdout._buffer.clear()  # pyright: ignore[reportAttributeAccessIssue]
-        self._process.stderr._buffer.clear()  # pyright: ignore[reportAttributeAccessIssue]
-
         return CLIResult(output=output, error=error)
 
 
@@ -125,32 +256,61 @@ class Bash(BaseTool):
                 "type": "string",
                 "description": "The bash command to execute. Can be empty to view additional logs when previous exit code is `-1`. Can be `ctrl+c` to interrupt the currently running process.",
             },
+            "session": {
+                "type": "string",
+                "description": "Name of the shell session to run the command in. Defaults to `default`. Use another name to keep working while a process runs in the foreground of a session.",
+            },
         },
         "required": ["command"],
     }
+    max_sessions: int = 8
+
+    # Commands in different sessions run concurrently; each session runs
+    # its commands one at a time
+    _sessions: Dict[str, _BashSession] = PrivateAttr(default_factory=dict)
+    # Guards creating, starting and restarting sessions
+    _sessions_lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
 
-    _session: Optional[_BashSession] = None
+    async def _get_session(self, name: str, restart: bool = False) -> _BashSession:
+        """The started session called `name`, created (or recreated) if needed."""
+        async with self._sessions_lock:
+            if restart and name in self._sessions:
+                await self._sessions.pop(name).close()
+            if name not in self._sessions:
+                if len(self._sessions) >= self.max_sessions:
+                    raise ToolError(
+                        f"too many bash sessions (max {self.max_sessions}): "
+                        f"use one of {', '.join(self._sessions)}"
+                    )
+                session = _BashSession(name)
+                await session.start()
+                self._sessions[name] = session
+            return self._sessions[name]
 
     async def execute(
-        self, command: str | None = None, restart: bool = False, **kwargs
+        self,
+        command: str | None = None,
+        restart: bool = False,
+        session: str = "default",
+        **kwargs,
     ) -> CLIResult:
         if restart:
-            if self._session:
-                self._session.stop()
-            self._session = _BashSession()
-            await self._session.start()
-
+            await self._get_session(session, restart=True)
             return CLIResult(system="tool has been restarted.")
 
-        if self._session is None:
-            self._session = _BashSession()
-            await self._session.start()
-
+        bash_session = await self._get_session(session)
         if command is not None:
-            return await self._session.run(command)
+            return await bash_session.run(command)
 
         raise ToolError("no command provided.")
 
+    async def cleanup(self):
+        """Terminate all shell sessions."""
+        async with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        await asyncio.gather(*(session.close() for session in sessions))
+
 
 if __name__ == "__main__":
     bash = Bash()
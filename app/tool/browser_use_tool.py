@@ -1,5 +1,4 @@
 import asyncio
-import base64
 import json
 from typing import Generic, Optional, TypeVar
 
@@ -11,6 +10,7 @@ from pydantic import Field, field_validator
 from pydantic_core.core_schema import ValidationInfo
 
 from app.config import config
+from app.image import process_image
 from app.llm import LLM
 from app.tool.base import BaseTool, ToolResult
 from app.tool.web_search import WebSearch
@@ -38,6 +38,7 @@ Context = TypeVar("Context")
 class BrowserUseTool(BaseTool, Generic[Context]):
     name: str = "browser_use"
     description: str = _BROWSER_DESCRIPTION
+    serial_only: bool = True
     parameters: dict = {
         "type": "object",
         "properties": {
@@ -503,11 +504,20 @@ Page content:
             await page.bring_to_front()
             await page.wait_for_load_state()
 
-            screenshot = await page.screenshot(
-                full_page=True, animations="disabled", type="jpeg", quality=100
+            settings = config.screenshot
+            raw = await page.screenshot(
+                full_page=settings.full_page,
+                animations="disabled",
+                type="png",
+            )
+            # Resize to the tile grid and recompress off the event loop
+            screenshot = await asyncio.to_thread(
+                process_image,
+                raw,
+                max_tokens=settings.max_tokens,
+                max_bytes=settings.max_bytes,
+                quality=settings.quality,
             )
-
-            screenshot = base64.b64encode(screenshot).decode("utf-8")
 
             # Build the state info with all required fields
             state_info = {
@@ -528,11 +538,12 @@ Page content:
                     + viewport_height,
                 },
                 "viewport_height": viewport_height,
+                "screenshot_size": [screenshot.width, screenshot.height],
             }
 
             return ToolResult(
                 output=json.dumps(state_info, indent=4, ensure_ascii=False),
-                base64_image=screenshot,
+                base64_image=screenshot.base64_image,
             )
         except Exception as e:
             return ToolResult(error=f"Failed to get browser state: {str(e)}")
@@ -8,6 +8,7 @@ from pydantic import Field, model_validator
 
 from app.config import config
 from app.llm import LLM
+from app.llm_router import Purpose, get_llm_router
 from app.logger import logger
 from app.tool.base import BaseTool
 
@@ -224,10 +225,14 @@ Outputs:
         chart_description: str = None,
         language: str = "en",
     ):
+        llm = self.llm
+        if task_type == "insight":
+            # VMind calls the model itself, so only the route's first model is used
+            llm = get_llm_router().llm_for(Purpose.INSIGHT, default=self.llm)
         llm_config = {
-            "base_url": self.llm.base_url,
-            "model": self.llm.model,
-            "api_key": self.llm.api_key,
+            "base_url": llm.base_url,
+            "model": llm.model,
+            "api_key": llm.api_key,
         }
         vmind_params = {
             "llm_config": llm_config,
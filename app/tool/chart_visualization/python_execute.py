@@ -24,7 +24,8 @@ class NormalPythonExecute(PythonExecute):
 2. Use print() for all outputs so the analysis (including sections like 'Dataset Overview' or 'Preprocessing Results') is clearly visible and save it also
 3. Save any report / processed files / each analysis result in worksapce directory: {directory}
 4. Data reports need to be content-rich, including your overall analysis process and corresponding data visualization.
-5. You can invode this tool step-by-step to do data analysis from summary to in-depth with data report saved also""".format(
+5. You can invode this tool step-by-step to do data analysis from summary to in-depth with data report saved also
+6. Variables, imports and loaded data persist between calls, reuse them instead of reloading files""".format(
                     directory=config.workspace_root
                 ),
             },
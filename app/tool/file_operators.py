@@ -1,8 +1,22 @@
 """File operation interfaces and implementations for local and sandbox environments."""
 
 import asyncio
+import os
+import shlex
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Protocol, Tuple, Union, runtime_checkable
+from typing import (
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+    runtime_checkable,
+)
+
+import numpy as np
 
 from app.config import SandboxSettings
 from app.exceptions import ToolError
@@ -11,6 +25,22 @@ from app.sandbox.client import SANDBOX_CLIENT
 
 PathLike = Union[str, Path]
 
+# Chunk size for scanning files for line breaks
+_SCAN_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=8)
+def _line_starts(path: str, mtime_ns: int, size: int) -> np.ndarray:
+    """Byte offsets at which the lines of a file start; cached per file version."""
+    starts = [np.zeros(1, dtype=np.int64)]
+    with open(path, "rb") as f:
+        offset = 0
+        while chunk := f.read(_SCAN_SIZE):
+            newlines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10)
+            starts.append(newlines.astype(np.int64) + offset + 1)
+            offset += len(chunk)
+    return np.concatenate(starts)
+
 
 @runtime_checkable
 class FileOperator(Protocol):
@@ -24,6 +54,32 @@ class FileOperator(Protocol):
         """Write content to a file."""
         ...
 
+    async def read_files(self, paths: Iterable[PathLike]) -> Dict[str, str]:
+        """Read several files at once, keyed by path as given."""
+        ...
+
+    async def write_files(self, files: Mapping[PathLike, str]) -> None:
+        """Write several files at once."""
+        ...
+
+    async def file_size(self, path: PathLike) -> int:
+        """Size of a file in bytes."""
+        ...
+
+    async def read_lines(
+        self,
+        path: PathLike,
+        start: int = 1,
+        end: int = -1,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[str, int]:
+        """Read lines `start` to `end` (1-based, inclusive, -1 for the last line).
+
+        Returns the text, cut after `max_bytes`, and the number of lines in
+        the file, counted like `content.split("\n")`.
+        """
+        ...
+
     async def is_directory(self, path: PathLike) -> bool:
         """Check if path points to a directory."""
         ...
@@ -58,6 +114,50 @@ class LocalFileOperator(FileOperator):
         except Exception as e:
             raise ToolError(f"Failed to write to {path}: {str(e)}") from None
 
+    async def read_files(self, paths: Iterable[PathLike]) -> Dict[str, str]:
+        """Read several local files."""
+        return {str(path): await self.read_file(path) for path in paths}
+
+    async def write_files(self, files: Mapping[PathLike, str]) -> None:
+        """Write several local files."""
+        for path, content in files.items():
+            await self.write_file(path, content)
+
+    async def file_size(self, path: PathLike) -> int:
+        """Size of a local file in bytes."""
+        return Path(path).stat().st_size
+
+    async def read_lines(
+        self,
+        path: PathLike,
+        start: int = 1,
+        end: int = -1,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[str, int]:
+        """Read a range of lines of a local file, seeking to it by line index."""
+        try:
+            path = os.path.realpath(path)
+            stat = os.stat(path)
+            starts = await asyncio.to_thread(
+                _line_starts, path, stat.st_mtime_ns, stat.st_size
+            )
+            n_lines = len(starts)
+            if not 1 <= start <= n_lines:
+                return "", n_lines
+            first = int(starts[start - 1])
+            last = stat.st_size if end == -1 or end >= n_lines else int(starts[end]) - 1
+            size = max(last - first, 0)
+            if max_bytes is not None:
+                size = min(size, max_bytes)
+            with open(path, "rb") as f:
+                f.seek(first)
+                data = f.read(size)
+        except Exception as e:
+            raise ToolError(f"Failed to read {path}: {str(e)}") from None
+        # Match read_text(), which reads "\r\n" line endings as "\n"
+        text = data.decode(self.encoding, errors="replace").replace("\r\n", "\n")
+        return text.removesuffix("\r"), n_lines
+
     async def is_directory(self, path: PathLike) -> bool:
         """Check if path points to a directory."""
         return Path(path).is_dir()
@@ -121,6 +221,63 @@ class SandboxFileOperator(FileOperator):
         except Exception as e:
             raise ToolError(f"Failed to write to {path} in sandbox: {str(e)}") from None
 
+    async def read_files(self, paths: Iterable[PathLike]) -> Dict[str, str]:
+        """Read several files from sandbox in a single transfer."""
+        await self._ensure_sandbox_initialized()
+        paths = [str(path) for path in paths]
+        try:
+            return await self.sandbox_client.read_files(paths)
+        except Exception as e:
+            raise ToolError(
+                f"Failed to read {', '.join(paths)} in sandbox: {str(e)}"
+            ) from None
+
+    async def write_files(self, files: Mapping[PathLike, str]) -> None:
+        """Write several files to sandbox in a single transfer."""
+        await self._ensure_sandbox_initialized()
+        files = {str(path): content for path, content in files.items()}
+        try:
+            await self.sandbox_client.write_files(files)
+        except Exception as e:
+            raise ToolError(
+                f"Failed to write to {', '.join(files)} in sandbox: {str(e)}"
+            ) from None
+
+    async def file_size(self, path: PathLike) -> int:
+        """Size of a file in sandbox in bytes."""
+        await self._ensure_sandbox_initialized()
+        result = await self.sandbox_client.run_command(
+            f"stat -c %s {shlex.quote(str(path))}"
+        )
+        try:
+            return int(result.strip())
+        except ValueError:
+            raise ToolError(f"Failed to stat {path} in sandbox: {result}") from None
+
+    async def read_lines(
+        self,
+        path: PathLike,
+        start: int = 1,
+        end: int = -1,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[str, int]:
+        """Read a range of lines of a file in sandbox without transferring the rest."""
+        await self._ensure_sandbox_initialized()
+        quoted = shlex.quote(str(path))
+        last = "$" if end == -1 else str(max(end, start))
+        cmd = f"wc -l < {quoted} && sed -n '{max(start, 1)},{last}p' {quoted}"
+        if max_bytes is not None:
+            cmd += f" | head -c {max_bytes}"
+        result = await self.sandbox_client.run_command(cmd)
+        count, _, text = result.partition("\n")
+        try:
+            n_lines = int(count.strip()) + 1
+        except ValueError:
+            raise ToolError(f"Failed to read {path} in sandbox: {result}") from None
+        if not 1 <= start <= n_lines:
+            return "", n_lines
+        return text.removesuffix("\n"), n_lines
+
     async def is_directory(self, path: PathLike) -> bool:
         """Check if path points to a directory in sandbox."""
         await self._ensure_sandbox_initialized()
@@ -156,4 +313,4 @@ class SandboxFileOperator(FileOperator):
                 f"Command '{cmd}' timed out after {timeout} seconds in sandbox"
             ) from exc
         except Exception as exc:
-            return 1, "", f"Error executing command in sandbox: {str(exc)}"
\ No newline at end of file
+            return 1, "", f"Error executing command in sandbox: {str(exc)}"
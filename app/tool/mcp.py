@@ -126,6 +126,7 @@ class MCPClients(ToolCollection):
 
         # Update tools tuple
         self.tools = tuple(self.tool_map.values())
+        self.invalidate()
         logger.info(
             f"Connected to server {server_id} with tools: {[tool.name for tool in response.tools]}"
         )
@@ -192,6 +193,7 @@ class MCPClients(ToolCollection):
                         if v.server_id != server_id
                     }
                     self.tools = tuple(self.tool_map.values())
+                    self.invalidate()
                     logger.info(f"Disconnected from MCP server {server_id}")
                 except Exception as e:
                     logger.error(f"Error disconnecting from server {server_id}: {e}")
@@ -205,4 +207,5 @@ class MCPClients(ToolCollection):
                     logger.warning(f"Error disconnecting from server {sid}: {e}")
             self.tool_map = {}
             self.tools = tuple()
+            self.invalidate()
             logger.info("Disconnected from all MCP servers")
@@ -1,9 +1,7 @@
-import multiprocessing
-import sys
-from io import StringIO
-from typing import Dict
+from typing import Dict, Optional
 
 from app.tool.base import BaseTool
+from app.tool.python_pool import get_python_pool
 
 
 class PythonExecute(BaseTool):
@@ -21,20 +19,8 @@ class PythonExecute(BaseTool):
         },
         "required": ["code"],
     }
-
-    def _run_code(self, code: str, result_dict: dict, safe_globals: dict) -> None:
-        original_stdout = sys.stdout
-        try:
-            output_buffer = StringIO()
-            sys.stdout = output_buffer
-            exec(code, safe_globals, safe_globals)
-            result_dict["observation"] = output_buffer.getvalue()
-            result_dict["success"] = True
-        except Exception as e:
-            result_dict["observation"] = str(e)
-            result_dict["success"] = False
-        finally:
-            sys.stdout = original_stdout
+    # When set, calls share one persistent interpreter (see PythonWorkerPool)
+    session_id: Optional[str] = None
 
     async def execute(
         self,
@@ -51,25 +37,9 @@ class PythonExecute(BaseTool):
         Returns:
             Dict: Contains 'output' with execution output or error message and 'success' status.
         """
+        return await get_python_pool().run(code, timeout, session_id=self.session_id)
 
-        with multiprocessing.Manager() as manager:
-            result = manager.dict({"observation": "", "success": False})
-            if isinstance(__builtins__, dict):
-                safe_globals = {"__builtins__": __builtins__}
-            else:
-                safe_globals = {"__builtins__": __builtins__.__dict__.copy()}
-            proc = multiprocessing.Process(
-                target=self._run_code, args=(code, result, safe_globals)
-            )
-            proc.start()
-            proc.join(timeout)
-
-            # timeout process
-            if proc.is_alive():
-                proc.terminate()
-                proc.join(1)
-                return {
-                    "observation": f"Execution timeout after {timeout} seconds",
-                    "success": False,
-                }
-            return dict(result)
+    async def cleanup(self):
+        """Release the persistent interpreter session, if any."""
+        if self.session_id:
+            get_python_pool().close_session(self.session_id)
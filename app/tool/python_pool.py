@@ -0,0 +1,306 @@
+"""Pool of pre-warmed Python worker processes used by PythonExecute."""
+import asyncio
+import atexit
+import builtins
+import importlib
+import multiprocessing
+import signal
+import sys
+import threading
+from collections import OrderedDict
+from io import StringIO
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional
+
+from app.config import config
+from app.logger import logger
+
+
+def _fresh_globals() -> dict:
+    return {"__builtins__": builtins.__dict__.copy()}
+
+
+def _run_code(code: str, safe_globals: dict) -> Dict:
+    original_stdout = sys.stdout
+    output_buffer = StringIO()
+    try:
+        sys.stdout = output_buffer
+        exec(code, safe_globals, safe_globals)
+        return {"observation": output_buffer.getvalue(), "success": True}
+    except (Exception, SystemExit) as e:
+        return {"observation": str(e), "success": False}
+    finally:
+        sys.stdout = original_stdout
+
+
+def _worker_main(conn: Connection, preload_modules: List[str]) -> None:
+    """
+    Worker process loop: import preload_modules once, then execute snippets.
+
+    A None message tells the parent the imports are done and the worker is
+    ready; snippet timeouts only start counting after it.
+
+    Each request is a (code, keep_globals) tuple. Stateless calls get fresh
+    globals; session calls share one namespace for the worker's lifetime.
+    """
+    # The parent owns shutdown; Ctrl-C must not kill workers mid-call
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for module in preload_modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass
+    try:
+        conn.send(None)
+    except (EOFError, OSError):
+        return
+
+    session_globals = _fresh_globals()
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        code, keep_globals = request
+        safe_globals = session_globals if keep_globals else _fresh_globals()
+        try:
+            conn.send(_run_code(code, safe_globals))
+        except (EOFError, OSError):
+            break
+
+
+async def _wait_readable(conn: Connection, timeout: float) -> bool:
+    """Wait until conn has data, without polling or holding a thread where possible."""
+    if conn.poll():
+        return True
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    try:
+        loop.add_reader(conn.fileno(), lambda: ready.done() or ready.set_result(True))
+    except NotImplementedError:
+        # Proactor event loops (Windows) cannot watch pipes
+        return await loop.run_in_executor(None, conn.poll, timeout)
+    try:
+        await asyncio.wait_for(ready, timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        loop.remove_reader(conn.fileno())
+
+
+class PythonWorker:
+    """A single worker process and the parent end of its pipe."""
+
+    def __init__(
+        self, context, preload_modules: List[str], startup_timeout: float = 60
+    ):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, preload_modules)
+        )
+        self.process.start()
+        child_conn.close()
+        self.calls = 0
+        self.lock = asyncio.Lock()
+        self.ready = False
+        self.startup_timeout = startup_timeout
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    async def run(self, code: str, timeout: float, keep_globals: bool) -> Dict:
+        """Run code in the worker. Raises TimeoutError or EOFError."""
+        if not self.ready:
+            # Preload imports do not count against the snippet's timeout
+            if not await _wait_readable(self.conn, self.startup_timeout):
+                raise TimeoutError
+            self.conn.recv()
+            self.ready = True
+        self.calls += 1
+        self.conn.send((code, keep_globals))
+        if not await _wait_readable(self.conn, timeout):
+            raise TimeoutError
+        return self.conn.recv()
+
+    def kill(self) -> None:
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(1)
+
+
+class PythonWorkerPool:
+    """Pool of pre-warmed Python worker processes.
+
+    Keeps `size` idle workers ready so a call only pays for sending the code
+    over a pipe. Workers import `preload_modules` once at startup. A worker
+    that times out or dies is killed and replaced; workers are also recycled
+    after `max_calls_per_worker` calls to bound leaked state.
+
+    Calls with a session_id are pinned to a dedicated worker whose globals
+    persist between calls, so variables and loaded data survive across
+    steps. At most `max_sessions` are kept; the least recently used one is
+    evicted beyond that.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        preload_modules: Optional[List[str]] = None,
+        max_calls_per_worker: int = 100,
+        max_sessions: int = 8,
+    ):
+        self.size = size
+        self.preload_modules = list(preload_modules or [])
+        self.max_calls_per_worker = max_calls_per_worker
+        self.max_sessions = max_sessions
+        self._context = multiprocessing.get_context()
+        self._idle: List[PythonWorker] = []
+        self._sessions: "OrderedDict[str, PythonWorker]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _spawn(self) -> PythonWorker:
+        return PythonWorker(self._context, self.preload_modules)
+
+    def warm_up(self) -> None:
+        """Start idle workers until `size` are ready."""
+        with self._lock:
+            while not self._closed and len(self._idle) < self.size:
+                self._idle.append(self._spawn())
+
+    def _acquire(self) -> PythonWorker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    break
+                worker.kill()
+            else:
+                worker = self._spawn()
+        return worker
+
+    def _release(self, worker: PythonWorker) -> None:
+        with self._lock:
+            if (
+                not self._closed
+                and worker.is_alive()
+                and worker.calls < self.max_calls_per_worker
+                and len(self._idle) < self.size
+            ):
+                self._idle.append(worker)
+                return
+        worker.kill()
+        # Replace a recycled worker before the next call needs it
+        self.warm_up()
+
+    def _session_worker(self, session_id: str) -> PythonWorker:
+        with self._lock:
+            worker = self._sessions.get(session_id)
+            if worker and worker.is_alive():
+                self._sessions.move_to_end(session_id)
+                return worker
+        worker = self._acquire()
+        # The worker leaves the shared pool for good, replace it
+        self.warm_up()
+        evicted = []
+        with self._lock:
+            self._sessions[session_id] = worker
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False))
+        for evicted_id, evicted_worker in evicted:
+            logger.info(f"Evicting Python session '{evicted_id}'")
+            evicted_worker.kill()
+        return worker
+
+    def _discard(self, worker: PythonWorker, session_id: Optional[str]) -> None:
+        with self._lock:
+            if session_id and self._sessions.get(session_id) is worker:
+                del self._sessions[session_id]
+        worker.kill()
+        self.warm_up()
+
+    async def run(
+        self, code: str, timeout: float = 5, session_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Execute code in a pooled worker.
+
+        Args:
+            code: The Python code to execute.
+            timeout: Execution timeout in seconds.
+            session_id: Optional key of a persistent interpreter session.
+
+        Returns:
+            Dict: Contains 'observation' with execution output or error message and 'success' status.
+        """
+        if self._closed:
+            return {"observation": "Python worker pool is closed", "success": False}
+        worker = self._session_worker(session_id) if session_id else self._acquire()
+
+        async with worker.lock:
+            try:
+                result = await worker.run(code, timeout, keep_globals=bool(session_id))
+            except TimeoutError:
+                self._discard(worker, session_id)
+                observation = f"Execution timeout after {timeout} seconds"
+                if session_id:
+                    observation += " (session state was reset)"
+                return {"observation": observation, "success": False}
+            except (EOFError, OSError):
+                self._discard(worker, session_id)
+                return {
+                    "observation": "Python worker exited unexpectedly",
+                    "success": False,
+                }
+
+        if not session_id:
+            self._release(worker)
+        return result
+
+    def close_session(self, session_id: str) -> None:
+        """Drop a session and stop its worker."""
+        with self._lock:
+            worker = self._sessions.pop(session_id, None)
+        if worker:
+            worker.kill()
+
+    def shutdown(self) -> None:
+        """Stop all workers."""
+        with self._lock:
+            self._closed = True
+            workers = self._idle + list(self._sessions.values())
+            self._idle, self._sessions = [], OrderedDict()
+        for worker in workers:
+            worker.kill()
+
+
+_pool: Optional[PythonWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_python_pool() -> PythonWorkerPool:
+    """Return the process-wide worker pool, creating it from config on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                settings = config.python_execute
+                _pool = PythonWorkerPool(
+                    size=settings.pool_size,
+                    preload_modules=settings.preload_modules,
+                    max_calls_per_worker=settings.max_calls_per_worker,
+                    max_sessions=settings.max_sessions,
+                )
+                atexit.register(_pool.shutdown)
+                _pool.warm_up()
+    return _pool
@@ -1,10 +1,21 @@
 """File and directory manipulation tool with sandbox support."""
 import asyncio
 import sys
-from collections import defaultdict
+from collections import deque
 from pathlib import Path
-from typing import Any, DefaultDict, List, Literal, Optional, get_args
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    get_args,
+)
 
+from pydantic import PrivateAttr
 from sympy.codegen.ast import stdout
 
 from app.config import config
@@ -51,6 +62,99 @@ Notes for using the `str_replace` command:
 """
 
 
+class _Patch(NamedTuple):
+    """A reverse diff: replacing `inserted` at `offset` with `removed` undoes an edit."""
+
+    offset: int
+    inserted: str
+    removed: str
+
+    @property
+    def size(self) -> int:
+        return len(self.inserted) + len(self.removed)
+
+
+class _EditHistory:
+    """Undo stacks of reverse diffs per file, within a memory budget.
+
+    Past `max_bytes` (counted in characters) across all files, the oldest
+    edits are forgotten first; each file keeps at most `max_edits`.
+    """
+
+    def __init__(self, max_bytes: int, max_edits: int):
+        self.max_bytes = max_bytes
+        self.max_edits = max_edits
+        self.size = 0
+        self._stacks: Dict[str, Deque[_Patch]] = {}
+        self._order: Deque[Tuple[str, _Patch]] = deque()  # Oldest first
+
+    def __len__(self) -> int:
+        return sum(len(stack) for stack in self._stacks.values())
+
+    def push(self, path: str, patch: _Patch) -> None:
+        if patch.size > self.max_bytes:
+            # Earlier edits can't be undone without this one
+            self.clear(path)
+            return
+        stack = self._stacks.setdefault(path, deque())
+        stack.append(patch)
+        self._order.append((path, patch))
+        self.size += patch.size
+        if len(stack) > self.max_edits:
+            self.size -= stack.popleft().size
+        while self.size > self.max_bytes:
+            self._evict_oldest()
+        if len(self._order) > 2 * max(len(self), 16):
+            # Drop entries of edits that were undone or evicted
+            live = {id(patch) for stack in self._stacks.values() for patch in stack}
+            self._order = deque(e for e in self._order if id(e[1]) in live)
+
+    def _evict_oldest(self) -> None:
+        path, patch = self._order.popleft()
+        stack = self._stacks.get(path)
+        if stack and stack[0] is patch:
+            stack.popleft()
+            self.size -= patch.size
+            if not stack:
+                del self._stacks[path]
+
+    def pop(self, path: str) -> Optional[_Patch]:
+        stack = self._stacks.get(path)
+        if not stack:
+            return None
+        patch = stack.pop()
+        self.size -= patch.size
+        if not stack:
+            del self._stacks[path]
+        return patch
+
+    def clear(self, path: str) -> None:
+        for patch in self._stacks.pop(path, ()):
+            self.size -= patch.size
+
+
+def _create_history() -> _EditHistory:
+    return _EditHistory(
+        config.editor.history_max_bytes, config.editor.history_max_edits
+    )
+
+
+def _line_span(text: str, start: int, end: int, before: int, after: int) -> str:
+    """The whole lines of text[start:end] plus `before` and `after` lines around."""
+    low = start
+    for _ in range(before + 1):
+        low = text.rfind("\n", 0, low)
+        if low < 0:
+            break
+    high = end
+    for _ in range(after + 1):
+        high = text.find("\n", high)
+        if high < 0:
+            return text[low + 1 :]
+        high += 1
+    return text[low + 1 : high - 1]
+
+
 def maybe_truncate(
     content: str, truncate_after: Optional[int] = MAX_RESPONSE_LEN
 ) -> str:
@@ -65,6 +169,7 @@ class StrReplaceEditor(BaseTool):
 
     name: str = "str_replace_editor"
     description: str = _STR_REPLACE_EDITOR_DESCRIPTION
+    serial_only: bool = True
     parameters: dict = {
         "type": "object",
         "properties": {
@@ -101,7 +206,7 @@ class StrReplaceEditor(BaseTool):
         },
         "required": ["command", "path"],
     }
-    _file_history: DefaultDict[PathLike, List[str]] = defaultdict(list)
+    _file_history: _EditHistory = PrivateAttr(default_factory=_create_history)
     _local_operator: LocalFileOperator = LocalFileOperator()
     _sandbox_operator: SandboxFileOperator = SandboxFileOperator()
 
@@ -140,7 +245,8 @@ class StrReplaceEditor(BaseTool):
             if file_text is None:
                 raise ToolError("Parameter `file_text` is required for command: create")
             await operator.write_file(path, file_text)
-            self._file_history[path].append(file_text)
+            # Undoing a creation leaves the file as created
+            self._file_history.push(str(path), _Patch(0, "", ""))
             result = ToolResult(output=f"File created successfully at: {path}")
         elif command == "str_replace":
             if old_str is None:
@@ -251,9 +357,13 @@ class StrReplaceEditor(BaseTool):
         operator: FileOperator,
         view_range: Optional[List[int]] = None,
     ) -> CLIResult:
-        """Display file content, optionally within a specified line range."""
-        # Read file content
-        file_content = await operator.read_file(path)
+        """Display file content, optionally within a specified line range.
+
+        Only the requested lines are read, and no more of them than can be
+        shown, so large files are cheap to page through.
+        """
+        # Enough bytes for MAX_RESPONSE_LEN characters of any encoding width
+        max_bytes = 4 * MAX_RESPONSE_LEN + 4
         init_line = 1
 
         # Apply view range if specified
@@ -263,9 +373,10 @@ class StrReplaceEditor(BaseTool):
                     "Invalid `view_range`. It should be a list of two integers."
                 )
 
-            file_lines = file_content.split("\n")
-            n_lines_file = len(file_lines)
             init_line, final_line = view_range
+            file_content, n_lines_file = await operator.read_lines(
+                path, init_line, final_line, max_bytes=max_bytes
+            )
 
             # Validate view range
             if init_line < 1 or init_line > n_lines_file:
@@ -283,18 +394,30 @@ class StrReplaceEditor(BaseTool):
                     f"Invalid `view_range`: {view_range}. Its second element `{final_line}` should be "
                     f"larger or equal than its first `{init_line}`"
                 )
-
-            # Apply range
-            if final_line == -1:
-                file_content = "\n".join(file_lines[init_line - 1 :])
-            else:
-                file_content = "\n".join(file_lines[init_line - 1 : final_line])
+        else:
+            file_content, _ = await operator.read_lines(path, max_bytes=max_bytes)
 
         # Format and return result
         return CLIResult(
             output=self._make_output(file_content, str(path), init_line=init_line)
         )
 
+    async def _read_for_edit(self, path: PathLike, operator: FileOperator) -> str:
+        """Read a whole file to edit it, if it is within the configured size limit."""
+        max_size = config.editor.max_file_size
+        size = await operator.file_size(path)
+        if size > max_size:
+            raise ToolError(
+                f"{path} is {size} bytes, over the {max_size} byte limit for editing "
+                f"with this tool. Use `view` with `view_range` to read it and a shell "
+                f"command (e.g. `sed -i`) to change it."
+            )
+        return await operator.read_file(path)
+
+    @staticmethod
+    def _expand_tabs(content: str) -> str:
+        return content.expandtabs() if "\t" in content else content
+
     async def str_replace(
         self,
         path: PathLike,
@@ -304,43 +427,50 @@ class StrReplaceEditor(BaseTool):
     ) -> CLIResult:
         """Replace a unique string in a file with a new string."""
         # Read file content and expand tabs
-        file_content = (await operator.read_file(path)).expandtabs()
+        file_content = self._expand_tabs(await self._read_for_edit(path, operator))
         old_str = old_str.expandtabs()
         new_str = new_str.expandtabs() if new_str is not None else ""
 
-        # Check if old_str is unique in the file
-        occurrences = file_content.count(old_str)
-        if occurrences == 0:
+        # Check if old_str is unique in the file, stopping at the second match
+        position = file_content.find(old_str)
+        if position < 0:
             raise ToolError(
                 f"No replacement was performed, old_str `{old_str}` did not appear verbatim in {path}."
             )
-        elif occurrences > 1:
+        if file_content.find(old_str, position + max(len(old_str), 1)) >= 0:
             # Find line numbers of occurrences
-            file_content_lines = file_content.split("\n")
-            lines = [
-                idx + 1
-                for idx, line in enumerate(file_content_lines)
-                if old_str in line
-            ]
+            lines = []
+            line, counted = 1, 0
+            while position >= 0:
+                line += file_content.count("\n", counted, position)
+                counted = position
+                lines.append(line)
+                position = file_content.find(old_str, position + max(len(old_str), 1))
             raise ToolError(
                 f"No replacement was performed. Multiple occurrences of old_str `{old_str}` "
                 f"in lines {lines}. Please ensure it is unique"
             )
 
         # Replace old_str with new_str
-        new_file_content = file_content.replace(old_str, new_str)
+        new_file_content = (
+            file_content[:position] + new_str + file_content[position + len(old_str) :]
+        )
 
         # Write the new content to the file
         await operator.write_file(path, new_file_content)
 
-        # Save the original content to history
-        self._file_history[path].append(file_content)
+        # Save how to restore the original content, as a reverse diff
+        self._file_history.push(str(path), _Patch(position, new_str, old_str))
 
         # Create a snippet of the edited section
-        replacement_line = file_content.split(old_str)[0].count("\n")
-        start_line = max(0, replacement_line - SNIPPET_LINES)
-        end_line = replacement_line + SNIPPET_LINES + new_str.count("\n")
-        snippet = "\n".join(new_file_content.split("\n")[start_line : end_line + 1])
+        start_line = max(0, file_content.count("\n", 0, position) - SNIPPET_LINES)
+        snippet = _line_span(
+            new_file_content,
+            position,
+            position + len(new_str),
+            SNIPPET_LINES,
+            SNIPPET_LINES,
+        )
 
         # Prepare the success message
         success_msg = f"The file {path} has been edited. "
@@ -360,10 +490,9 @@ class StrReplaceEditor(BaseTool):
     ) -> CLIResult:
         """Insert text at a specific line in a file."""
         # Read and prepare content
-        file_text = (await operator.read_file(path)).expandtabs()
+        file_text = self._expand_tabs(await self._read_for_edit(path, operator))
         new_str = new_str.expandtabs()
-        file_text_lines = file_text.split("\n")
-        n_lines_file = len(file_text_lines)
+        n_lines_file = file_text.count("\n") + 1
 
         # Validate insert_line
         if insert_line < 0 or insert_line > n_lines_file:
@@ -372,27 +501,24 @@ class StrReplaceEditor(BaseTool):
                 f"the range of lines of the file: {[0, n_lines_file]}"
             )
 
-        # Perform insertion
-        new_str_lines = new_str.split("\n")
-        new_file_text_lines = (
-            file_text_lines[:insert_line]
-            + new_str_lines
-            + file_text_lines[insert_line:]
-        )
+        # Perform insertion, before line `insert_line` + 1 or after the last one
+        if insert_line < n_lines_file:
+            offset = 0
+            for _ in range(insert_line):
+                offset = file_text.index("\n", offset) + 1
+            inserted, start = new_str + "\n", offset
+        else:
+            offset = len(file_text)
+            inserted, start = "\n" + new_str, offset + 1
+        new_file_text = file_text[:offset] + inserted + file_text[offset:]
 
         # Create a snippet for preview
-        snippet_lines = (
-            file_text_lines[max(0, insert_line - SNIPPET_LINES) : insert_line]
-            + new_str_lines
-            + file_text_lines[insert_line : insert_line + SNIPPET_LINES]
+        snippet = _line_span(
+            new_file_text, start, start + len(new_str), SNIPPET_LINES, SNIPPET_LINES
         )
 
-        # Join lines and write to file
-        new_file_text = "\n".join(new_file_text_lines)
-        snippet = "\n".join(snippet_lines)
-
         await operator.write_file(path, new_file_text)
-        self._file_history[path].append(file_text)
+        self._file_history.push(str(path), _Patch(offset, inserted, ""))
 
         # Prepare success message
         success_msg = f"The file {path} has been edited. "
@@ -409,10 +535,19 @@ class StrReplaceEditor(BaseTool):
         self, path: PathLike, operator: FileOperator = None
     ) -> CLIResult:
         """Revert the last edit made to a file."""
-        if not self._file_history[path]:
+        patch = self._file_history.pop(str(path))
+        if patch is None:
             raise ToolError(f"No edit history found for {path}.")
 
-        old_text = self._file_history[path].pop()
+        current = await self._read_for_edit(path, operator)
+        end = patch.offset + len(patch.inserted)
+        if current[patch.offset : end] != patch.inserted:
+            self._file_history.clear(str(path))
+            raise ToolError(
+                f"{path} was changed outside of this tool since the last edit; "
+                f"its edit history has been discarded."
+            )
+        old_text = current[: patch.offset] + patch.removed + current[end:]
         await operator.write_file(path, old_text)
 
         return CLIResult(
@@ -1,11 +1,38 @@
 """Collection classes for managing multiple tools."""
-from typing import Any, Dict, List
+import json
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from app.exceptions import ToolError
 from app.logger import logger
 from app.tool.base import BaseTool, ToolFailure, ToolResult
 
 
+if TYPE_CHECKING:
+    from app.llm import TokenCounter
+
+
+class ToolParams(list):
+    """Function-call params of one ToolCollection version.
+
+    The serialized JSON and its token cost are computed once per version.
+    The list is shared between calls; treat it as read-only.
+    """
+
+    def __init__(self, params: List[Dict[str, Any]], version: int):
+        super().__init__(params)
+        self.version = version
+        self.json = json.dumps(params, ensure_ascii=False, separators=(",", ":"))
+        self._token_costs = weakref.WeakKeyDictionary()
+
+    def token_cost(self, counter: "TokenCounter") -> int:
+        """Token cost of the serialized schema, cached per TokenCounter."""
+        cost = self._token_costs.get(counter)
+        if cost is None:
+            cost = self._token_costs[counter] = counter.count_text(self.json)
+        return cost
+
+
 class ToolCollection:
     """A collection of defined tools."""
 
@@ -15,12 +42,30 @@ class ToolCollection:
     def __init__(self, *tools: BaseTool):
         self.tools = tools
         self.tool_map = {tool.name: tool for tool in tools}
+        self.version = 0
+        self._params: Optional[ToolParams] = None
 
     def __iter__(self):
         return iter(self.tools)
 
-    def to_params(self) -> List[Dict[str, Any]]:
-        return [tool.to_param() for tool in self.tools]
+    def invalidate(self) -> None:
+        """Drop the cached params; call after changing tools in place."""
+        self.version += 1
+        self._params = None
+
+    def to_params(self) -> ToolParams:
+        """
+        Return the function-call params of all tools.
+
+        The list is built once per version of the collection, so repeated
+        calls return the same object and the same serialized bytes, which
+        keeps the tools prefix of requests stable for provider prompt caching.
+        """
+        if self._params is None:
+            self._params = ToolParams(
+                [tool.to_param() for tool in self.tools], self.version
+            )
+        return self._params
 
     async def execute(
         self, *, name: str, tool_input: Dict[str, Any] = None
@@ -59,6 +104,7 @@ class ToolCollection:
 
         self.tools += (tool,)
         self.tool_map[tool.name] = tool
+        self.invalidate()
         return self
 
     def add_tools(self, *tools: BaseTool):
@@ -0,0 +1,240 @@
+"""Token-budget truncation strategies for LLM message histories."""
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional, Type
+
+from pydantic import BaseModel, Field
+
+from app.logger import logger
+
+
+MessageCounter = Callable[[dict], int]
+
+
+def group_units(messages: List[dict]) -> List[List[int]]:
+    """
+    Group message indices into units that must be kept or dropped together.
+
+    An assistant message carrying tool_calls forms a unit with the tool results
+    that immediately follow it, so a truncated history never contains a tool
+    result without its call (or a call without its results).
+    """
+    units: List[List[int]] = []
+    for index, message in enumerate(messages):
+        if (
+            message.get("role") == "tool"
+            and units
+            and messages[units[-1][0]].get("tool_calls")
+        ):
+            units[-1].append(index)
+        else:
+            units.append([index])
+    return units
+
+
+def suffix_start(unit_tokens: List[int], budget: int) -> int:
+    """
+    Return the first unit index of the longest suffix that fits in budget.
+
+    Uses prefix sums and a binary search, so the cut point is found in
+    O(log n) after a single O(n) pass over the counts.
+    """
+    prefix = [0, *accumulate(unit_tokens)]
+    return bisect_left(prefix, prefix[-1] - budget)
+
+
+class TruncationStrategy(BaseModel, ABC):
+    """Base class for strategies that fit a message list into a token budget."""
+
+    name: str = ""
+
+    def truncate(
+        self, messages: List[dict], count_message: MessageCounter, max_tokens: int
+    ) -> List[dict]:
+        """
+        Truncate messages to fit within max_tokens.
+
+        System messages are always kept and placed first. Every message is
+        counted exactly once; the remaining budget is then handed to
+        `select` together with the atomic units of the non-system messages.
+
+        Args:
+            messages: Formatted messages to truncate
+            count_message: Callable returning the token cost of one message
+            max_tokens: Maximum allowed tokens for the returned messages
+
+        Returns:
+            List[dict]: Truncated list of messages
+        """
+        system_messages = [m for m in messages if m["role"] == "system"]
+        non_system_messages = [m for m in messages if m["role"] != "system"]
+
+        remaining_tokens = max_tokens - sum(count_message(m) for m in system_messages)
+        if remaining_tokens <= 0:
+            logger.warning("Token limit only allows system messages")
+            return system_messages
+
+        token_counts = [count_message(m) for m in non_system_messages]
+        units = group_units(non_system_messages)
+        unit_tokens = [sum(token_counts[i] for i in unit) for unit in units]
+
+        kept = self.select(
+            non_system_messages, units, unit_tokens, remaining_tokens, count_message
+        )
+        return system_messages + kept
+
+    @abstractmethod
+    def select(
+        self,
+        messages: List[dict],
+        units: List[List[int]],
+        unit_tokens: List[int],
+        budget: int,
+        count_message: MessageCounter,
+    ) -> List[dict]:
+        """Choose which non-system messages to keep, preserving their order."""
+
+
+class DropOldestStrategy(TruncationStrategy):
+    """Keep the most recent units that fit, dropping the oldest first."""
+
+    name: str = "drop_oldest"
+
+    def select(self, messages, units, unit_tokens, budget, count_message):
+        start = suffix_start(unit_tokens, budget)
+        return [messages[i] for unit in units[start:] for i in unit]
+
+
+class KeepPinnedStrategy(TruncationStrategy):
+    """
+    Always keep pinned units, then fill the rest of the budget with the most
+    recent unpinned units.
+
+    By default the first unit (the original request) is pinned; `is_pinned`
+    can mark any other message as pinned.
+    """
+
+    name: str = "keep_pinned"
+    pin_first: int = Field(1, description="Number of leading units to pin")
+    is_pinned: Optional[Callable[[dict], bool]] = Field(
+        None, description="Predicate marking additional messages as pinned"
+    )
+
+    def pinned_units(self, messages: List[dict], units: List[List[int]]) -> set:
+        pinned = set(range(min(self.pin_first, len(units))))
+        if self.is_pinned:
+            pinned.update(
+                u
+                for u, unit in enumerate(units)
+                if any(self.is_pinned(messages[i]) for i in unit)
+            )
+        return pinned
+
+    def split(self, messages, units, unit_tokens, budget):
+        """Return (pinned unit ids, kept unpinned unit ids, dropped unit ids)."""
+        pinned = self.pinned_units(messages, units)
+        pinned_tokens = sum(unit_tokens[u] for u in pinned)
+        if pinned_tokens > budget:
+            logger.warning("Pinned messages exceed the token limit, ignoring pins")
+            pinned, pinned_tokens = set(), 0
+
+        unpinned = [u for u in range(len(units)) if u not in pinned]
+        start = suffix_start([unit_tokens[u] for u in unpinned], budget - pinned_tokens)
+        return pinned, unpinned[start:], unpinned[:start]
+
+    def select(self, messages, units, unit_tokens, budget, count_message):
+        pinned, kept, _ = self.split(messages, units, unit_tokens, budget)
+        keep = pinned.union(kept)
+        return [messages[i] for u, unit in enumerate(units) if u in keep for i in unit]
+
+
+class SummarizeMiddleStrategy(KeepPinnedStrategy):
+    """
+    Keep the pinned head and the recent tail, and replace the dropped middle
+    with a compact digest message listing what was omitted.
+
+    The digest is extractive (no extra LLM call), so truncation stays
+    synchronous; it is trimmed to fit `summary_tokens`.
+    """
+
+    name: str = "summarize_middle"
+    summary_tokens: int = Field(512, description="Token budget for the digest")
+    summary_line_chars: int = Field(
+        160, description="Maximum characters per omitted-turn line"
+    )
+
+    def describe(self, message: dict) -> str:
+        """One-line description of an omitted message."""
+        role = message.get("role", "")
+        if message.get("tool_calls"):
+            calls = ", ".join(
+                call.get("function", {}).get("name", "")
+                for call in message["tool_calls"]
+            )
+            line = f"{role} called {calls}"
+        else:
+            content = message.get("content") or ""
+            if isinstance(content, list):
+                content = " ".join(
+                    item.get("text", "") if isinstance(item, dict) else str(item)
+                    for item in content
+                )
+            name = f" {message['name']}" if message.get("name") else ""
+            line = f"{role}{name}: {' '.join(content.split())}"
+        if len(line) > self.summary_line_chars:
+            line = line[: self.summary_line_chars - 3] + "..."
+        return f"- {line}"
+
+    def select(self, messages, units, unit_tokens, budget, count_message):
+        pinned, kept, dropped = self.split(messages, units, unit_tokens, budget)
+        if dropped:
+            # Make room for the digest before choosing the tail
+            reserve = min(self.summary_tokens, budget // 4)
+            pinned, kept, dropped = self.split(
+                messages, units, unit_tokens, budget - reserve
+            )
+        keep = pinned.union(kept)
+        result = [
+            messages[i] for u, unit in enumerate(units) if u in keep for i in unit
+        ]
+        if not dropped:
+            return result
+
+        omitted = [messages[i] for u in dropped for i in units[u]]
+        lines = [self.describe(m) for m in omitted]
+        header = (
+            f"[Context summary] {len(omitted)} earlier messages were omitted to "
+            f"fit the context window. Omitted turns, oldest first:"
+        )
+        digest = {"role": "user", "content": "\n".join([header, *lines])}
+        # Drop the oldest lines until the digest fits its reserve
+        while lines and count_message(digest) > reserve:
+            lines = lines[max(1, len(lines) // 4) :]
+            digest = {"role": "user", "content": "\n".join([header, *lines])}
+        if count_message(digest) > reserve:
+            return result
+
+        # Insert the digest where the first dropped unit used to be
+        first_dropped = min(dropped)
+        position = sum(len(units[u]) for u in range(first_dropped) if u in keep)
+        result.insert(position, digest)
+        return result
+
+
+TRUNCATION_STRATEGIES: Dict[str, Type[TruncationStrategy]] = {
+    "drop_oldest": DropOldestStrategy,
+    "keep_pinned": KeepPinnedStrategy,
+    "summarize_middle": SummarizeMiddleStrategy,
+}
+
+
+def get_truncation_strategy(name: str, **kwargs) -> TruncationStrategy:
+    """Create a truncation strategy by its configured name."""
+    strategy_class = TRUNCATION_STRATEGIES.get(name.lower())
+    if not strategy_class:
+        raise ValueError(
+            f"Unknown truncation strategy: {name}. "
+            f"Available: {', '.join(TRUNCATION_STRATEGIES)}"
+        )
+    return strategy_class(**kwargs)
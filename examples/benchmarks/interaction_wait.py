@@ -0,0 +1,96 @@
+"""
+Benchmark idle event-loop load of N tasks paused on ask_human.
+
+Compares the old wait_for_response() loop, which polled the interactions
+state every 0.1 s, with InteractionChannel, where each waiter sleeps on a
+Future until the user answers or the task is terminated. For each variant
+N waiters are parked for a fixed window and the CPU time spent by the
+process and the number of event-loop iterations are reported; then all
+waiters are released and the wake-up latency is measured.
+
+Usage:
+    python -m examples.benchmarks.interaction_wait [--tasks 100 500] [--seconds 2]
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from server import InteractionChannel
+
+
+async def poll_waiter(interactions: Dict[int, dict], task_id: int):
+    """The pre-InteractionChannel waiting loop from run_task."""
+    while True:
+        if task_id in interactions and interactions[task_id].get("responded"):
+            return
+        await asyncio.sleep(0.1)
+
+
+def count_loop_iterations(loop: asyncio.AbstractEventLoop) -> List[int]:
+    """Patch loop._run_once to count iterations; returns the live counter."""
+    counter = [0]
+    run_once = loop._run_once
+
+    def counting_run_once():
+        counter[0] += 1
+        run_once()
+
+    loop._run_once = counting_run_once
+    return counter
+
+
+async def measure(variant: str, tasks: int, seconds: float) -> dict:
+    loop = asyncio.get_running_loop()
+    interactions: Dict[int, dict] = {}
+    channels = {i: InteractionChannel() for i in range(tasks)}
+    if variant == "polling":
+        waiters = [
+            asyncio.create_task(poll_waiter(interactions, i)) for i in range(tasks)
+        ]
+    else:
+        waiters = [asyncio.create_task(channels[i].wait()) for i in range(tasks)]
+    await asyncio.sleep(0.2)  # let every waiter park
+
+    iterations = count_loop_iterations(loop)
+    cpu_start = time.process_time()
+    await asyncio.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    idle_iterations = iterations[0]
+    del loop._run_once
+
+    release_start = time.perf_counter()
+    for i in range(tasks):
+        interactions[i] = {"responded": True}
+        channels[i].respond("ok")
+    await asyncio.gather(*waiters)
+    release = time.perf_counter() - release_start
+
+    return {
+        "cpu_ms_per_s": cpu * 1000 / seconds,
+        "loop_iterations_per_s": idle_iterations / seconds,
+        "release_ms": release * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'tasks':>6} {'variant':>8} {'cpu ms/s':>10} "
+        f"{'loop iters/s':>13} {'release ms':>11}"
+    )
+    for tasks in args.tasks:
+        for variant in ("polling", "future"):
+            stats = asyncio.run(measure(variant, tasks, args.seconds))
+            print(
+                f"{tasks:>6} {variant:>8} {stats['cpu_ms_per_s']:>10.2f} "
+                f"{stats['loop_iterations_per_s']:>13.1f} {stats['release_ms']:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
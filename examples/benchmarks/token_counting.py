@@ -0,0 +1,109 @@
+"""
+Benchmark TokenCounter.count_message_tokens over a growing Manus-style history.
+
+Every ToolCallAgent.think() re-counts the whole memory, so the history below is
+grown one step at a time and re-counted after each step, the way a 60-step
+Manus run does. With the text cache disabled the per-call time grows with the
+conversation; with it enabled only the newly appended messages are encoded.
+
+Usage:
+    python -m examples.benchmarks.token_counting [--steps 60] [--repeat 3]
+"""
+import argparse
+import json
+import random
+import string
+import time
+from typing import List
+
+import tiktoken
+
+from app.llm import TokenCounter
+from app.prompt.manus import NEXT_STEP_PROMPT, SYSTEM_PROMPT
+
+
+TOOLS = ["web_search", "crawl4ai", "python_execute", "str_replace_editor"]
+
+
+def _random_text(rng: random.Random, words: int) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        for _ in range(words)
+    )
+
+
+def build_step(rng: random.Random, step: int) -> List[dict]:
+    """Build the messages a single think/act step appends to memory."""
+    tool = TOOLS[step % len(TOOLS)]
+    call_id = f"call_{step}"
+    return [
+        {"role": "user", "content": NEXT_STEP_PROMPT},
+        {
+            "role": "assistant",
+            "content": _random_text(rng, 40),
+            "tool_calls": [
+                {
+                    "id": call_id,
+                    "type": "function",
+                    "function": {
+                        "name": tool,
+                        "arguments": json.dumps({"query": _random_text(rng, 12)}),
+                    },
+                }
+            ],
+        },
+        {
+            "role": "tool",
+            # max_observe keeps tool output up to 10,000 chars
+            "content": _random_text(rng, 1500)[:10000],
+            "name": tool,
+            "tool_call_id": call_id,
+        },
+    ]
+
+
+def run(counter: TokenCounter, steps: int, seed: int = 0) -> List[float]:
+    """Return the per-call counting time (seconds) after each step."""
+    rng = random.Random(seed)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _random_text(rng, 60)},
+    ]
+    timings = []
+    for step in range(steps):
+        messages.extend(build_step(rng, step))
+        start = time.perf_counter()
+        counter.count_message_tokens(messages)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tokenizer = tiktoken.get_encoding("cl100k_base")
+
+    def best_of(cache_size: int) -> List[float]:
+        runs = [
+            run(TokenCounter(tokenizer, cache_size=cache_size), args.steps)
+            for _ in range(args.repeat)
+        ]
+        return [min(samples) for samples in zip(*runs)]
+
+    uncached = best_of(0)
+    cached = best_of(TokenCounter.TEXT_CACHE_SIZE)
+
+    print(f"{'step':>6} {'uncached (ms)':>15} {'cached (ms)':>13}")
+    for step in range(args.steps):
+        if step == 0 or (step + 1) % 10 == 0:
+            print(
+                f"{step + 1:>6} {uncached[step] * 1000:>15.3f} {cached[step] * 1000:>13.3f}"
+            )
+    print(f"{'total':>6} {sum(uncached) * 1000:>15.3f} {sum(cached) * 1000:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
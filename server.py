@@ -12,7 +12,7 @@ from json import dumps
 from pathlib import Path
 from typing import Optional
 
-from fastapi import Body, FastAPI, HTTPException, Request
+from fastapi import Body, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import (
     FileResponse,
@@ -28,14 +28,39 @@ from app.agent.data_analysis import DataAnalysis
 from app.agent.flow_agent import FlowAgent
 from app.agent.manus import Manus
 from app.config import config
+from app.event_bus import EventBus, Subscription
+from app.events import AgentEvent, AgentEventType, set_event_handler
 from app.flow.flow_factory import FlowFactory, FlowType
+from app.llm_retry import get_retry_policy
+from app.llm_router import get_llm_router
+from app.llm_transport import get_rate_limit_metrics
 from app.logger import logger
+from app.retrieval import get_retrieval_index, select_messages, set_retrieval_source
 from app.schema import AgentState
+from app.task_store import TaskStore, create_task_store
 
 # 导入 AskHuman 工具
 from app.tool.ask_human import AskHuman
 
 
+# 结构化事件到 SSE 步骤类型的映射，未列出的事件记为 log
+TASK_EVENT_STEP_TYPES = {
+    AgentEventType.THINK: "think",
+    AgentEventType.INTERACTION: "interaction",
+    AgentEventType.ERROR: "error",
+}
+FLOW_EVENT_STEP_TYPES = {
+    AgentEventType.PLAN: "plan",
+    AgentEventType.STEP_START: "step_start",
+    AgentEventType.STEP_FINISH: "step_finish",
+    AgentEventType.STEP_RESULT: "step",
+    AgentEventType.MESSAGE: "step",
+    AgentEventType.TOOL_START: "step",
+    AgentEventType.INTERACTION: "interaction",
+    AgentEventType.ERROR: "error",
+}
+
+
 def get_timestamp_ms() -> int:
     """获取毫秒级时间戳"""
     return int(time.time() * 1000)
@@ -61,6 +86,34 @@ def safe_json_dumps(obj):
         )
 
 
+def clean_steps(steps: list) -> list:
+    """将 steps 转为可安全序列化的结构，非基本类型的值转为字符串"""
+    safe_steps = []
+    for step in steps:
+        if isinstance(step, dict):
+            clean_step = {}
+            for key, value in step.items():
+                if (
+                    isinstance(value, (str, int, float, bool, list, dict))
+                    or value is None
+                ):
+                    clean_step[key] = value
+                else:
+                    clean_step[key] = str(value)
+            safe_steps.append(clean_step)
+        else:
+            safe_steps.append(str(step))
+    return safe_steps
+
+
+def format_sse(event: dict) -> str:
+    """格式化 SSE 事件；带 seq 的状态事件同时写入 id，供断线重连时回传 Last-Event-ID"""
+    event_id = ""
+    if event.get("type") == "status" and "seq" in event:
+        event_id = f"id: {event['seq']}\n"
+    return f"{event_id}event: {event['type']}\ndata: {safe_json_dumps(event)}\n\n"
+
+
 app = FastAPI()
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -121,11 +174,146 @@ class Task(BaseModel):
             }
 
 
-class TaskManager:
+def create_event_bus() -> EventBus:
+    """按 [server] 配置创建任务/流程事件总线"""
+    settings = config.server
+    return EventBus(
+        buffer_size=settings.event_buffer_size,
+        policy=settings.slow_consumer_policy,
+        block_timeout=settings.block_timeout,
+        idle_ttl=settings.event_idle_ttl,
+    )
+
+
+def create_server_task_store(table: str) -> TaskStore:
+    """按 [server] 配置创建任务/流程存储（内存 LRU/TTL + 可选 SQLite）"""
+    settings = config.server
+    return create_task_store(
+        Task,
+        table,
+        backend=settings.task_store,
+        path=str(config.root_path / settings.task_db_path),
+        max_items=settings.task_cache_size,
+        ttl=settings.task_ttl,
+    )
+
+
+def build_full_prompt(
+    prompt: str, chat_history: list = None, session_id: str = None
+) -> str:
+    """
+    拼接聊天历史与检索到的相关历史任务，总长度受 [retrieval] 的 token 预算约束
+
+    只检索同一会话（session_id）下的历史任务和工具输出，除非开启了
+    [retrieval] cross_session。
+    """
+    index = get_retrieval_index()
+    if index is None:
+        # 未启用检索：沿用最近 10 条消息
+        history = (chat_history or [])[-10:]
+        related = ""
+    else:
+        settings = config.retrieval
+        # 最近几条消息原样保留，更早的只挑与当前问题相关的
+        history = select_messages(
+            prompt,
+            chat_history or [],
+            k=settings.top_k,
+            recent=settings.recent_messages,
+            max_tokens=settings.max_tokens,
+        )
+        related = ""
+        if settings.cross_session or session_id:
+            related = index.context(
+                prompt,
+                k=settings.top_k,
+                max_tokens=settings.max_tokens,
+                snippet_chars=settings.snippet_chars,
+                kinds=("task", "tool"),
+                source=None if settings.cross_session else session_id,
+            )
+
+    sections = []
+    if history:
+        context = "\n".join(
+            f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
+            for msg in history
+        )
+        sections.append(f"Previous conversation:\n{context}")
+    if related:
+        sections.append(f"Relevant past work:\n{related}")
+    if not sections:
+        return prompt
+    sections.append(f"Current question: {prompt}")
+    return "\n\n".join(sections)
+
+
+def index_finished_task(record: Task, result: str) -> None:
+    """把完成的任务/流程写入检索索引，供之后的任务引用"""
+    index = get_retrieval_index()
+    if index is not None and result:
+        index.add(
+            "task",
+            f"{record.prompt}\n{result}",
+            source=record.session_id or record.id,
+            ref=record.id,
+        )
+
+
+class InteractionChannel:
+    """单个任务/流程的交互通道
+
+    等待者挂起在一个 Future 上，用户回答或任务终止时只被唤醒一次，
+    取代每 0.1 秒轮询 interactions 状态的做法。
+    """
+
     def __init__(self):
-        self.tasks = {}
-        self.queues = {}
-        self.sessions = {}  # 添加会话管理
+        self.user_response: Optional[str] = None
+        self.responded = False
+        self.closed = False
+        self._waiter: Optional[asyncio.Future] = None
+
+    def _wake(self, value: Optional[str]):
+        if self._waiter and not self._waiter.done():
+            self._waiter.set_result(value)
+
+    def respond(self, user_response: str):
+        """记录用户回答并唤醒等待者"""
+        self.user_response = user_response
+        self.responded = True
+        self._wake(user_response)
+
+    def close(self):
+        """终止交互：唤醒等待者并返回 None"""
+        self.closed = True
+        self._wake(None)
+
+    async def wait(self) -> Optional[str]:
+        """等待下一次用户回答；通道关闭时返回 None"""
+        if not self.responded and not self.closed:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        if self.closed:
+            return None
+        # 消费本次回答，下一次等待需要新的回答
+        self.responded = False
+        return self.user_response
+
+    def __repr__(self):
+        return (
+            f"InteractionChannel(responded={self.responded}, closed={self.closed}, "
+            f"user_response={self.user_response!r})"
+        )
+
+
+class TaskManager:
+    def __init__(self, store: Optional[TaskStore] = None):
+        # 任务存储：有界内存缓存，按配置写入 SQLite（created_at/session_id 有索引）
+        self.tasks = store or create_server_task_store("tasks")
+        self.events = create_event_bus()
         self.interactions = {}  # 新增：存储交互状态
         self.ask_human_tools = {}  # 新增：存储 ask_human 工具实例
         self.running_tasks = {}  # 新增：存储正在运行的任务
@@ -142,15 +330,8 @@ class TaskManager:
             session_id=session_id,
             chat_history=chat_history or [],
         )
-        self.tasks[task_id] = task
-        self.queues[task_id] = asyncio.Queue()
-
-        # 更新会话历史
-        if session_id:
-            if session_id not in self.sessions:
-                self.sessions[session_id] = []
-            self.sessions[session_id].append(task_id)
-
+        self.tasks.add(task)
+        self.events.open(task_id)
         return task
 
     async def update_task_step(
@@ -158,60 +339,91 @@ class TaskManager:
     ):
         if task_id in self.tasks:
             task = self.tasks[task_id]
-            task.steps.append({"step": step, "result": result, "type": step_type})
+            # seq 为步骤序号（从 1 开始），状态事件只携带新增步骤
+            seq = len(task.steps) + 1
+            self.tasks.append_step(
+                task, {"step": step, "result": result, "type": step_type, "seq": seq}
+            )
             # 添加时间戳到事件数据
             timestamp = get_timestamp_ms()
-            await self.queues[task_id].put(
+            await self.events.publish(
+                task_id,
                 {
                     "type": step_type,
                     "step": step,
                     "result": result,
+                    "seq": seq,
                     "timestamp": timestamp,
-                }
+                },
             )
-            await self.queues[task_id].put(
+            await self.events.publish(
+                task_id,
                 {
                     "type": "status",
                     "status": task.status,
-                    "steps": task.steps,
+                    "steps": task.steps[-1:],
+                    "seq": seq,
                     "timestamp": timestamp,
-                }
+                },
+            )
+
+    # 新增：推送流式思考增量，仅转发给 SSE，不记录到 steps
+    async def push_task_delta(self, task_id: str, delta):
+        if task_id in self.tasks:
+            # seq 为增量所属的下一个步骤，重连时与已发送的步骤一起被跳过
+            seq = len(self.tasks[task_id].steps) + 1
+            await self.events.publish(
+                task_id,
+                {
+                    "type": "think_delta",
+                    "kind": delta.type,
+                    "delta": delta.text,
+                    "tool": delta.tool_name,
+                    "seq": seq,
+                    "timestamp": get_timestamp_ms(),
+                },
             )
 
     async def complete_task(self, task_id: str, result: str):
         if task_id in self.tasks:
             task = self.tasks[task_id]
             task.status = "completed"
+            self.tasks.save(task)
+            index_finished_task(task, result)
             timestamp = get_timestamp_ms()
-            await self.queues[task_id].put(
+            await self.events.publish(
+                task_id,
                 {
                     "type": "status",
                     "status": task.status,
-                    "steps": task.steps,
+                    "steps": [],
                     "timestamp": timestamp,
-                }
+                },
             )
-            await self.queues[task_id].put(
-                {"type": "complete", "result": result, "timestamp": timestamp}
+            await self.events.publish(
+                task_id, {"type": "complete", "result": result, "timestamp": timestamp}
             )
+            # 任务结束：订阅者读完剩余事件后退出，空闲后回收缓冲区
+            await self.events.close(task_id)
+            self.release_task(task_id)
 
     async def fail_task(self, task_id: str, error: str):
         if task_id in self.tasks:
             task = self.tasks[task_id]
             task.status = f"failed: {error}"
+            self.tasks.save(task)
             timestamp = get_timestamp_ms()
-            await self.queues[task_id].put(
-                {"type": "error", "message": error, "timestamp": timestamp}
+            await self.events.publish(
+                task_id, {"type": "error", "message": error, "timestamp": timestamp}
             )
+            await self.events.close(task_id)
+            self.release_task(task_id)
 
     # 新增：处理交互回答
     async def handle_interaction(self, task_id: str, user_response: str):
         if task_id in self.tasks:
-            # 存储用户回答
-            if task_id not in self.interactions:
-                self.interactions[task_id] = {}
-            self.interactions[task_id]["user_response"] = user_response
-            self.interactions[task_id]["responded"] = True
+            # 存储用户回答并唤醒等待中的任务
+            self.get_interaction(task_id).respond(user_response)
 
             # 如果有 ask_human 工具在等待，设置响应并继续执行
             if task_id in self.ask_human_tools:
@@ -222,16 +434,33 @@ class TaskManager:
 
             # 通知任务继续执行
             timestamp = get_timestamp_ms()
-            await self.queues[task_id].put(
+            await self.events.publish(
+                task_id,
                 {
                     "type": "interaction_response",
                     "response": user_response,
                     "timestamp": timestamp,
-                }
+                },
             )
             return True
         return False
 
+    # 获取（必要时创建）任务的交互通道
+    def get_interaction(self, task_id: str) -> InteractionChannel:
+        if task_id not in self.interactions:
+            self.interactions[task_id] = InteractionChannel()
+        return self.interactions[task_id]
+
+    # 等待用户回答；任务被终止时返回 None
+    async def wait_for_interaction(self, task_id: str) -> Optional[str]:
+        return await self.get_interaction(task_id).wait()
+
+    # 任务结束：清理交互状态，允许任务从内存中淘汰（历史仍保存在存储中）
+    def release_task(self, task_id: str):
+        self.interactions.pop(task_id, None)
+        self.ask_human_tools.pop(task_id, None)
+        self.tasks.release(task_id)
+
     # 新增：注册 ask_human 工具
     def register_ask_human_tool(self, task_id: str, tool):
         self.ask_human_tools[task_id] = tool
@@ -250,49 +479,51 @@ class TaskManager:
         if task_id in self.tasks:
             task = self.tasks[task_id]
             task.status = "terminated"
+            self.tasks.save(task)
             timestamp = get_timestamp_ms()
-            await self.queues[task_id].put(
+            await self.events.publish(
+                task_id,
                 {
                     "type": "status",
                     "status": task.status,
-                    "steps": task.steps,
+                    "steps": [],
                     "timestamp": timestamp,
-                }
+                },
             )
-            await self.queues[task_id].put(
+            await self.events.publish(
+                task_id,
                 {
                     "type": "terminated",
                     "message": "Task terminated by user",
                     "timestamp": timestamp,
-                }
+                },
             )
 
-        # 清理相关资源
-        if task_id in self.interactions:
-            del self.interactions[task_id]
-        if task_id in self.ask_human_tools:
-            del self.ask_human_tools[task_id]
+        # 清理相关资源；关闭交互通道，唤醒仍在等待用户回答的协程
+        channel = self.interactions.pop(task_id, None)
+        if channel:
+            channel.close()
+        # 与完成/失败相同：订阅者读完剩余事件后退出，任务不再固定在内存中
+        await self.events.close(task_id)
+        self.release_task(task_id)
 
         return True
 
-    def get_session_history(self) -> list:
-        """获取指定会话的历史记录"""
-        session_tasks = []
-        for session_id in self.sessions:
-            for task_id in self.sessions[session_id]:
-                if task_id in self.tasks:
-                    task = self.tasks[task_id]
-                    session_tasks.append(
-                        {
-                            "task_id": task_id,
-                            "prompt": task.prompt,
-                            "status": task.status,
-                            "created_at": task.created_at.isoformat(),
-                            "chat_history": task.chat_history,
-                        }
-                    )
-
-        return session_tasks
+    def get_session_history(self, limit: int = 100, offset: int = 0) -> list:
+        """获取会话历史记录（按创建时间倒序分页）"""
+        tasks, _ = self.tasks.list(
+            limit, offset, with_session=True, include_steps=False
+        )
+        return [
+            {
+                "task_id": task.id,
+                "prompt": task.prompt,
+                "status": task.status,
+                "created_at": task.created_at.isoformat(),
+                "chat_history": task.chat_history,
+            }
+            for task in tasks
+        ]
 
 
 task_manager = TaskManager()
@@ -300,10 +531,9 @@ task_manager = TaskManager()
 
 # 新增：FlowManager（与 TaskManager 相同接口，用于 flow 流程）
 class FlowManager:
-    def __init__(self):
-        self.flows = {}
-        self.queues = {}
-        self.sessions = {}
+    def __init__(self, store: Optional[TaskStore] = None):
+        self.flows = store or create_server_task_store("flows")
+        self.events = create_event_bus()
         self.interactions = {}  # 新增：存储交互状态
         self.ask_human_tools = {}  # 新增：存储 ask_human 工具实例
         self.running_flows = {}  # 新增：存储正在运行的流程
@@ -320,12 +550,8 @@ class FlowManager:
             session_id=session_id,
             chat_history=chat_history or [],
         )
-        self.flows[flow_id] = flow_task
-        self.queues[flow_id] = asyncio.Queue()
-        if session_id:
-            if session_id not in self.sessions:
-                self.sessions[session_id] = []
-            self.sessions[session_id].append(flow_id)
+        self.flows.add(flow_task)
+        self.events.open(flow_id)
         return flow_task
 
     async def update_flow_step(
@@ -333,36 +559,69 @@ class FlowManager:
     ):
         if flow_id in self.flows:
             task = self.flows[flow_id]
-            task.steps.append({"step": step, "result": result, "type": step_type})
-            await self.queues[flow_id].put(
-                {"type": step_type, "step": step, "result": result}
+            # seq 为步骤序号（从 1 开始），状态事件只携带新增步骤
+            seq = len(task.steps) + 1
+            self.flows.append_step(
+                task, {"step": step, "result": result, "type": step_type, "seq": seq}
+            )
+            await self.events.publish(
+                flow_id, {"type": step_type, "step": step, "result": result, "seq": seq}
+            )
+            await self.events.publish(
+                flow_id,
+                {
+                    "type": "status",
+                    "status": task.status,
+                    "steps": task.steps[-1:],
+                    "seq": seq,
+                },
             )
-            await self.queues[flow_id].put(
-                {"type": "status", "status": task.status, "steps": task.steps}
+
+    # 新增：推送流式思考增量，仅转发给 SSE，不记录到 steps
+    async def push_flow_delta(self, flow_id: str, delta):
+        if flow_id in self.flows:
+            # seq 为增量所属的下一个步骤，重连时与已发送的步骤一起被跳过
+            seq = len(self.flows[flow_id].steps) + 1
+            await self.events.publish(
+                flow_id,
+                {
+                    "type": "think_delta",
+                    "kind": delta.type,
+                    "delta": delta.text,
+                    "tool": delta.tool_name,
+                    "seq": seq,
+                    "timestamp": get_timestamp_ms(),
+                },
             )
 
     async def complete_flow(self, flow_id: str, result: str):
         if flow_id in self.flows:
             task = self.flows[flow_id]
             task.status = "completed"
-            await self.queues[flow_id].put(
-                {"type": "status", "status": task.status, "steps": task.steps}
+            self.flows.save(task)
+            index_finished_task(task, result)
+            await self.events.publish(
+                flow_id, {"type": "status", "status": task.status, "steps": []}
             )
-            await self.queues[flow_id].put({"type": "complete", "result": result})
+            await self.events.publish(flow_id, {"type": "complete", "result": result})
+            # 流程结束：订阅者读完剩余事件后退出，空闲后回收缓冲区
+            await self.events.close(flow_id)
+            self.release_flow(flow_id)
 
     async def fail_flow(self, flow_id: str, error: str):
         if flow_id in self.flows:
-            self.flows[flow_id].status = f"failed: {error}"
-            await self.queues[flow_id].put({"type": "error", "message": error})
+            flow = self.flows[flow_id]
+            flow.status = f"failed: {error}"
+            self.flows.save(flow)
+            await self.events.publish(flow_id, {"type": "error", "message": error})
+            await self.events.close(flow_id)
+            self.release_flow(flow_id)
 
     # 新增：处理交互回答
     async def handle_interaction(self, flow_id: str, user_response: str):
         if flow_id in self.flows:
-            # 存储用户回答
-            if flow_id not in self.interactions:
-                self.interactions[flow_id] = {}
-            self.interactions[flow_id]["user_response"] = user_response
-            self.interactions[flow_id]["responded"] = True
+            # 存储用户回答并唤醒等待中的任务
+            self.get_interaction(flow_id).respond(user_response)
 
             # 新增：调试日志
             logger.info(f"Flow {flow_id}: User response received: {user_response}")
@@ -386,12 +645,13 @@ class FlowManager:
 
             # 通知流程继续执行
             timestamp = get_timestamp_ms()
-            await self.queues[flow_id].put(
+            await self.events.publish(
+                flow_id,
                 {
                     "type": "interaction_response",
                     "response": user_response,
                     "timestamp": timestamp,
-                }
+                },
             )
             logger.info(f"Flow {flow_id}: Interaction response event queued")
             return True
@@ -399,6 +659,22 @@ class FlowManager:
             logger.error(f"Flow {flow_id}: Flow not found in handle_interaction")
             return False
 
+    # 获取（必要时创建）流程的交互通道
+    def get_interaction(self, flow_id: str) -> InteractionChannel:
+        if flow_id not in self.interactions:
+            self.interactions[flow_id] = InteractionChannel()
+        return self.interactions[flow_id]
+
+    # 等待用户回答；流程被终止时返回 None
+    async def wait_for_interaction(self, flow_id: str) -> Optional[str]:
+        return await self.get_interaction(flow_id).wait()
+
+    # 流程结束：清理交互状态，允许流程从内存中淘汰（历史仍保存在存储中）
+    def release_flow(self, flow_id: str):
+        self.interactions.pop(flow_id, None)
+        self.ask_human_tools.pop(flow_id, None)
+        self.flows.release(flow_id)
+
     # 新增：注册 ask_human 工具
     def register_ask_human_tool(self, flow_id: str, tool):
         self.ask_human_tools[flow_id] = tool
@@ -417,48 +693,50 @@ class FlowManager:
         if flow_id in self.flows:
             flow = self.flows[flow_id]
             flow.status = "terminated"
+            self.flows.save(flow)
             timestamp = get_timestamp_ms()
-            await self.queues[flow_id].put(
+            await self.events.publish(
+                flow_id,
                 {
                     "type": "status",
                     "status": flow.status,
-                    "steps": flow.steps,
+                    "steps": [],
                     "timestamp": timestamp,
-                }
+                },
             )
-            await self.queues[flow_id].put(
+            await self.events.publish(
+                flow_id,
                 {
                     "type": "terminated",
                     "message": "Flow terminated by user",
                     "timestamp": timestamp,
-                }
+                },
             )
 
-        # 清理相关资源
-        if flow_id in self.interactions:
-            del self.interactions[flow_id]
-        if flow_id in self.ask_human_tools:
-            del self.ask_human_tools[flow_id]
+        # 清理相关资源；关闭交互通道，唤醒仍在等待用户回答的协程
+        channel = self.interactions.pop(flow_id, None)
+        if channel:
+            channel.close()
+        # 与完成/失败相同：订阅者读完剩余事件后退出，任务不再固定在内存中
+        await self.events.close(flow_id)
+        self.release_flow(flow_id)
 
         return True
 
-    def get_session_history(self) -> list:
-        session_flows = []
-
-        for session_id in self.sessions:
-            for fid in self.sessions[session_id]:
-                if fid in self.flows:
-                    t = self.flows[fid]
-                    session_flows.append(
-                        {
-                            "flow_id": fid,
-                            "prompt": t.prompt,
-                            "status": t.status,
-                            "created_at": t.created_at.isoformat(),
-                            "chat_history": t.chat_history,
-                        }
-                    )
-        return session_flows
+    def get_session_history(self, limit: int = 100, offset: int = 0) -> list:
+        flows, _ = self.flows.list(
+            limit, offset, with_session=True, include_steps=False
+        )
+        return [
+            {
+                "flow_id": flow.id,
+                "prompt": flow.prompt,
+                "status": flow.status,
+                "created_at": flow.created_at.isoformat(),
+                "chat_history": flow.chat_history,
+            }
+            for flow in flows
+        ]
 
 
 flow_manager = FlowManager()
@@ -512,6 +790,16 @@ async def health_check():
     }
 
 
+@app.get("/metrics/llm")
+async def llm_metrics():
+    """各 provider/model 的限流指标（排队数、在途请求数、排队等待时间），重试预算和熔断器状态，以及各路由的延迟/成本统计"""
+    return {
+        **get_rate_limit_metrics(),
+        "retry": get_retry_policy().metrics(),
+        "routes": get_llm_router().metrics(),
+    }
+
+
 @app.get("/download")
 async def download_file(file_path: str):
     if not os.path.exists(file_path):
@@ -557,7 +845,9 @@ async def run_task(
     task_id: str, prompt: str, session_id: str = None, chat_history: list = None
 ):
     try:
-        task_manager.tasks[task_id].status = "running"
+        task_record = task_manager.tasks[task_id]
+        task_record.status = "running"
+        task_manager.tasks.save(task_record)
 
         # 创建任务协程并注册到TaskManager
         task = asyncio.current_task()
@@ -578,6 +868,13 @@ async def run_task(
         async def on_think(thought):
             await task_manager.update_task_step(task_id, 0, thought, "think")
 
+        # 流式推送思考过程，首个 token 到达即可在前端展示
+        async def on_think_delta(delta):
+            await task_manager.push_task_delta(task_id, delta)
+
+        agent.stream_think = True
+        agent.on_think_delta = on_think_delta
+
         async def on_tool_execute(tool, input):
             await task_manager.update_task_step(
                 task_id, 0, f"Executing tool: {tool}\nInput: {input}", "tool"
@@ -591,21 +888,7 @@ async def run_task(
                 # )
 
                 # 等待用户响应
-                response_event = asyncio.Event()
-
-                async def wait_for_response():
-                    while True:
-                        if (
-                            task_id in task_manager.interactions
-                            and task_manager.interactions[task_id].get("responded")
-                        ):
-                            response_event.set()
-                            break
-                        await asyncio.sleep(0.1)
-
-                wait_task = asyncio.create_task(wait_for_response())
-                await response_event.wait()
-                wait_task.cancel()
+                await task_manager.wait_for_interaction(task_id)
 
                 await task_manager.update_task_step(
                     task_id, 0, f"User responded, continuing execution...", "log"
@@ -622,56 +905,18 @@ async def run_task(
         async def on_run(step, result):
             await task_manager.update_task_step(task_id, step, result, "run")
 
-        from app.logger import logger
-
-        class SSELogHandler:
-            def __init__(self, task_id):
-                self.task_id = task_id
-
-            async def __call__(self, message):
-                import re
-
-                # Extract - Subsequent Content
-                cleaned_message = re.sub(r"^.*? - ", "", message)
-
-                event_type = "log"
-                if "✨ Manus's thoughts:" in cleaned_message:
-                    event_type = "think"
-                # elif "🛠 Manus selected" in cleaned_message:
-                #     event_type = "tool"
-                # elif "🎯 Tool" in cleaned_message:
-                #     event_type = "act"
-                elif "📝 Oops!" in cleaned_message:
-                    event_type = "error"
-                # elif "🏁 Summarization completed" in cleaned_message:
-                #     event_type = "complete"
-                # 新增：检测ask_human工具的执行结果
-                elif "Tool 'ask_human' completed its mission!" in cleaned_message:
-                    event_type = "interaction"
-                    cleaned_message = cleaned_message.split(
-                        "Tool 'ask_human' completed its mission! Result: INTERACTION_REQUIRED:"
-                    )[1].strip()
+        # 结构化事件 → SSE：run_task 运行在独立的 asyncio task 中，
+        # 处理器经 contextvar 只对本任务（及其子任务）可见，并发任务之间互不串扰
+        async def on_event(event: AgentEvent):
+            step_type = TASK_EVENT_STEP_TYPES.get(event.type, "log")
+            await task_manager.update_task_step(task_id, 0, event.content, step_type)
 
-                await task_manager.update_task_step(
-                    self.task_id, 0, cleaned_message, event_type
-                )
+        set_event_handler(on_event)
+        # 工具输出按会话写入检索索引，不同会话之间互不可见
+        set_retrieval_source(session_id or task_id)
 
-        sse_handler = SSELogHandler(task_id)
-        hwnd = logger.add(sse_handler)
-
-        # 构建包含聊天历史的完整提示
-        full_prompt = prompt
-        if chat_history and len(chat_history) > 0:
-            # 将聊天历史格式化为上下文
-            context = "\n".join(
-                [
-                    f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
-                    for msg in chat_history[-10:]  # 只保留最近10条消息作为上下文
-                ]
-            )
-            full_prompt = (
-                f"Previous conversation:\n{context}\n\nCurrent question: {prompt}"
-            )
+        # 构建包含聊天历史与相关历史任务的完整提示
+        full_prompt = build_full_prompt(prompt, chat_history, session_id or task_id)
 
         # 注册 ask_human 工具到 TaskManager
         ask_human_tool = AskHuman()
@@ -694,30 +939,13 @@ async def run_task(
                 #     task_id, 0, f"Human interaction required: {inquire}", "interaction"
                 # )
 
-                # 等待用户响应
-                response_event = asyncio.Event()
-
-                async def wait_for_response():
-                    while True:
-                        # 检查任务是否被取消
-                        if task_id not in task_manager.running_tasks:
-                            response_event.set()
-                            break
-                        if (
-                            task_id in task_manager.interactions
-                            and task_manager.interactions[task_id].get("responded")
-                        ):
-                            response_event.set()
-                            break
-                        await asyncio.sleep(0.1)
-
-                wait_task = asyncio.create_task(wait_for_response())
-                await response_event.wait()
-                wait_task.cancel()
+                # 等待用户响应（回答或终止时被唤醒一次）
+                user_response = await task_manager.wait_for_interaction(task_id)
 
                 # 检查任务是否被取消
-                if task_id not in task_manager.running_tasks:
+                if user_response is None:
                     logger.info("Task was terminated during interaction wait")
+                    await agent.cleanup()
                     return
 
                 # 继续执行
@@ -725,12 +953,6 @@ async def run_task(
                     task_id, 0, f"User responded, continuing execution...", "log"
                 )
 
-                # 获取用户响应并添加到 agent 的记忆中
-                user_response = task_manager.interactions[task_id]["user_response"]
-
-                # 重置交互状态
-                task_manager.interactions[task_id]["responded"] = False
-
                 # 重置 agent 状态并继续执行
                 agent.state = AgentState.IDLE
 
@@ -749,7 +971,6 @@ async def run_task(
                 break
 
         await agent.cleanup()
-        logger.remove(hwnd)
         # await task_manager.update_task_step(task_id, 1, result, "result")
         await asyncio.sleep(3)
         await task_manager.complete_task(task_id, result)
@@ -762,9 +983,11 @@ async def run_task(
     except Exception as e:
         await task_manager.fail_task(task_id, str(e))
     finally:
-        # 清理任务注册
+        # 清理任务注册；任何结束路径都关闭事件流并解除固定（重复调用无副作用）
         if task_id in task_manager.running_tasks:
             del task_manager.running_tasks[task_id]
+        await task_manager.events.close(task_id)
+        task_manager.release_task(task_id)
 
 
 # 客户端flow交互：
@@ -805,7 +1028,9 @@ async def run_flow_task(
     flow_id: str, prompt: str, session_id: str = None, chat_history: list = None
 ):
     try:
-        flow_manager.flows[flow_id].status = "running"
+        flow_record = flow_manager.flows[flow_id]
+        flow_record.status = "running"
+        flow_manager.flows.save(flow_record)
 
         # 创建流程协程并注册到FlowManager
         current_task = asyncio.current_task()
@@ -814,79 +1039,31 @@ async def run_flow_task(
         # 组装 agents 与 flow
         agents = {"Flow": await FlowAgent().create()}
 
+        # 流式推送各步骤 agent 的思考过程
+        async def on_think_delta(delta):
+            await flow_manager.push_flow_delta(flow_id, delta)
+
+        for agent in agents.values():
+            agent.stream_think = True
+            agent.on_think_delta = on_think_delta
+
         flow = FlowFactory.create_flow(flow_type=FlowType.PLANNING, agents=agents)
 
         # 注册 ask_human 工具到 FlowManager
         ask_human_tool = AskHuman()
         flow_manager.register_ask_human_tool(flow_id, ask_human_tool)
 
-        # 日志转发：loguru → SSE
-        from app.logger import logger as _loguru
-
-        class FlowSSELoguruHandler:
-            def __init__(self, fid):
-                self.flow_id = fid
-
-            async def __call__(self, message):
-                import re
-
-                cleaned_message = re.sub(r"^.*? - ", "", message)
-                event_type = "log"
-
-                if "Plan creation result:" in cleaned_message:
-                    event_type = "plan"
-                elif "Start executing step:" in cleaned_message:
-                    cleaned_message = cleaned_message.split("Start executing step:")[
-                        1
-                    ].strip()
-                    event_type = "step_start"
-                elif "Finish executing step:" in cleaned_message:
-                    event_type = "step_finish"
-                    cleaned_message = cleaned_message.split("Finish executing step:")[
-                        1
-                    ].strip()
-                elif "Act content:" in cleaned_message:
-                    event_type = "step"
-                elif "Step result:" in cleaned_message:
-                    cleaned_message = cleaned_message.split("Step result:")[1].strip()
-                    event_type = "step"
-                elif "🔧 Activating tool:" in cleaned_message:
-                    event_type = "step"
-                elif "📝 Oops!" in cleaned_message:
-                    event_type = "error"
-                # elif "Flow summary result:" in cleaned_message:
-                #     event_type = "summary"
-                # 检测ask_human工具的执行结果
-                elif (
-                    "Tool 'ask_human' completed its mission! Result: INTERACTION_REQUIRED:"
-                    in cleaned_message
-                ):
-                    cleaned_message = cleaned_message.split(
-                        "Tool 'ask_human' completed its mission! Result: INTERACTION_REQUIRED:"
-                    )[1].strip()
-                    event_type = "interaction"
-
-                print(f"🔍 最终事件类型: {event_type}, 内容: {cleaned_message}")
-
-                await flow_manager.update_flow_step(
-                    self.flow_id, 0, cleaned_message, event_type
-                )
+        # 结构化事件 → SSE：处理器经 contextvar 只对本流程可见
+        async def on_event(event: AgentEvent):
+            step_type = FLOW_EVENT_STEP_TYPES.get(event.type, "log")
+            await flow_manager.update_flow_step(flow_id, 0, event.content, step_type)
 
-        loguru_handler = FlowSSELoguruHandler(flow_id)
-        loguru_hwnd = _loguru.add(loguru_handler)
+        set_event_handler(on_event)
+        # 工具输出按会话写入检索索引，不同会话之间互不可见
+        set_retrieval_source(session_id or flow_id)
 
         # 构建提示
-        full_prompt = prompt
-        if chat_history and len(chat_history) > 0:
-            context = "\n".join(
-                [
-                    f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
-                    for msg in chat_history[-10:]
-                ]
-            )
-            full_prompt = (
-                f"Previous conversation:\n{context}\n\nCurrent question: {prompt}"
-            )
+        full_prompt = build_full_prompt(prompt, chat_history, session_id or flow_id)
 
         # 执行
         # start_time = datetime.now()
@@ -914,30 +1091,14 @@ async def run_flow_task(
                 #     flow_id, 0, f"Human interaction required: {inquire}", "interaction"
                 # )
 
-                # 等待用户响应
-                response_event = asyncio.Event()
-
-                async def wait_for_response():
-                    while True:
-                        # 检查流程是否被取消
-                        if flow_id not in flow_manager.running_flows:
-                            response_event.set()
-                            break
-                        if (
-                            flow_id in flow_manager.interactions
-                            and flow_manager.interactions[flow_id].get("responded")
-                        ):
-                            response_event.set()
-                            break
-                        await asyncio.sleep(0.1)
-
-                wait_task = asyncio.create_task(wait_for_response())
-                await response_event.wait()
-                wait_task.cancel()
+                # 等待用户响应（回答或终止时被唤醒一次）
+                user_response = await flow_manager.wait_for_interaction(flow_id)
 
                 # 检查流程是否被取消
-                if flow_id not in flow_manager.running_flows:
-                    _loguru.info("Flow was terminated during interaction wait")
+                if user_response is None:
+                    logger.info("Flow was terminated during interaction wait")
+                    for agent in agents.values():
+                        await agent.cleanup()
                     return
 
                 # 继续执行
@@ -945,12 +1106,6 @@ async def run_flow_task(
                     flow_id, 0, f"User responded, continuing execution...", "log"
                 )
 
-                # 获取用户响应
-                user_response = flow_manager.interactions[flow_id]["user_response"]
-
-                # 重置交互状态
-                flow_manager.interactions[flow_id]["responded"] = False
-
                 # 修复：创建更智能的继续提示，避免重新执行整个流程
                 # 分析当前结果，提取需要继续的部分
                 if "INTERACTION_REQUIRED:" in result:
@@ -963,7 +1118,7 @@ async def run_flow_task(
                     # 如果没有INTERACTION_REQUIRED标记，使用默认提示
                     continue_prompt = f"User response: {user_response}\nPlease continue with the task."
 
-                _loguru.info(
+                logger.info(
                     f"Continuing flow execution with user response: {user_response}"
                 )
 
@@ -974,24 +1129,21 @@ async def run_flow_task(
                 # 重要：检查是否还有INTERACTION_REQUIRED，如果有则继续循环
                 # 这样可以处理多个连续的ask_human交互
                 if result and "INTERACTION_REQUIRED:" in result:
-                    _loguru.info(
-                        "Flow still requires interaction, continuing wait loop"
-                    )
+                    logger.info("Flow still requires interaction, continuing wait loop")
                     continue
                 else:
-                    _loguru.info(
+                    logger.info(
                         "Flow execution completed or no more interactions required"
                     )
                     break
             else:
                 # 如果无法提取询问内容，退出循环
-                _loguru.warning("Could not extract interaction content, breaking loop")
+                logger.warning("Could not extract interaction content, breaking loop")
                 break
 
         # 清理
         for agent in agents.values():
             await agent.cleanup()
-        _loguru.remove(loguru_hwnd)
 
         await asyncio.sleep(1)
         await flow_manager.complete_flow(flow_id, result)
@@ -1009,88 +1161,132 @@ async def run_flow_task(
         logger.error(f"Error in run_flow_task: {str(e)}")
         await flow_manager.fail_flow(flow_id, str(e))
     finally:
-        # 清理流程注册
+        # 清理流程注册；任何结束路径都关闭事件流并解除固定（重复调用无副作用）
         if flow_id in flow_manager.running_flows:
             del flow_manager.running_flows[flow_id]
+        await flow_manager.events.close(flow_id)
+        flow_manager.release_flow(flow_id)
 
 
-@app.get("/flows/{flow_id}/events")
-async def flow_events(flow_id: str):
-    async def event_generator():
-        if flow_id not in flow_manager.queues:
-            yield f"event: error\ndata: {safe_json_dumps({'message': 'Flow not found'})}\n\n"
-            return
-        queue = flow_manager.queues[flow_id]
-        task = flow_manager.flows.get(flow_id)
-        if task:
-            # 使用安全的序列化函数
-            safe_steps = []
-            for step in task.steps:
-                if isinstance(step, dict):
-                    clean_step = {}
-                    for key, value in step.items():
-                        if (
-                            isinstance(value, (str, int, float, bool, list, dict))
-                            or value is None
-                        ):
-                            clean_step[key] = value
-                        else:
-                            clean_step[key] = str(value)
-                    safe_steps.append(clean_step)
-                else:
-                    safe_steps.append(str(step))
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+def resume_cursor(request: Request, last_event_id: Optional[int]) -> Optional[int]:
+    """读取断点续传位置：优先使用 Last-Event-ID 请求头，其次是 last_event_id 参数"""
+    header = request.headers.get("last-event-id")
+    if header and header.isdigit():
+        return int(header)
+    return last_event_id
+
+
+async def not_found_events(message: str):
+    yield f"event: error\ndata: {safe_json_dumps({'message': message})}\n\n"
 
-            yield f"event: status\ndata: {safe_json_dumps({'type': 'status', 'status': task.status, 'steps': safe_steps})}\n\n"
-        while True:
-            try:
-                event = await queue.get()
-                formatted_event = safe_json_dumps(event)
-                yield ": heartbeat\n\n"
-                if event["type"] == "complete":
-                    yield f"event: complete\ndata: {formatted_event}\n\n"
-                    break
-                elif event["type"] == "error":
-                    yield f"event: error\ndata: {formatted_event}\n\n"
-                    break
-                elif event["type"] in [
-                    "think",
-                    "tool",
-                    "act",
-                    "run",
-                    "step",
-                    "log",
-                    "message",
-                ]:
-                    yield f"event: {event['type']}\ndata: {formatted_event}\n\n"
-                else:
-                    yield f"event: {event['type']}\ndata: {formatted_event}\n\n"
-            except asyncio.CancelledError:
-                print(f"Client disconnected for flow {flow_id}")
-                break
-            except Exception as e:
-                print(f"Error in flow event stream: {str(e)}")
-                yield f"event: error\ndata: {safe_json_dumps({'message': str(e)})}\n\n"
-                break
 
+async def stream_events(
+    subscription: Subscription,
+    task: Task,
+    cursor: Optional[int],
+    snapshot: bool,
+    label: str,
+):
+    """
+    SSE 增量事件流
+
+    连接时先发送一次状态事件：断线重连（cursor 不为空）时只补发 cursor 之后的
+    步骤；否则按 snapshot 决定发送完整步骤列表还是空列表。之后只转发新事件，
+    序号不大于 cursor 的步骤事件和思考增量已经包含在快照中，直接跳过。订阅者落后过多、事件被
+    覆盖时，用 task.steps 补发缺失的步骤。
+    """
+    steps = task.steps
+    if cursor is None or cursor > len(steps):
+        start = 0 if snapshot or cursor is not None else len(steps)
+    else:
+        start = cursor
+    cursor = len(steps)
+    yield format_sse(
+        {
+            "type": "status",
+            "status": task.status,
+            "steps": clean_steps(steps[start:]),
+            "seq": cursor,
+            "snapshot": start == 0,
+        }
+    )
+
+    try:
+        async for event in subscription:
+            if event["type"] == "lagged":
+                event = {
+                    "type": "status",
+                    "status": task.status,
+                    "steps": task.steps[cursor:],
+                    "seq": len(task.steps),
+                }
+            if event.get("seq", cursor + 1) <= cursor:
+                continue
+            if event["type"] == "status" and "seq" in event:
+                cursor = event["seq"]
+                event = {**event, "steps": clean_steps(event["steps"])}
+            yield ": heartbeat\n\n"
+            yield format_sse(event)
+            if event["type"] in ("complete", "error", "terminated"):
+                return
+
+        # 事件缓冲区已被回收：根据任务状态补发结束事件
+        if task.status == "completed":
+            yield format_sse({"type": "complete", "result": None})
+        elif task.status.startswith("failed"):
+            message = task.status.split(": ", 1)[-1]
+            yield format_sse({"type": "error", "message": message})
+        elif task.status == "terminated":
+            yield format_sse({"type": "terminated", "message": None})
+    except asyncio.CancelledError:
+        print(f"Client disconnected for {label}")
+    except Exception as e:
+        print(f"Error in event stream for {label}: {str(e)}")
+        yield f"event: error\ndata: {safe_json_dumps({'message': str(e)})}\n\n"
+    finally:
+        subscription.close()
+
+
+@app.get("/flows/{flow_id}/events")
+async def flow_events(
+    flow_id: str,
+    request: Request,
+    snapshot: bool = True,
+    last_event_id: Optional[int] = None,
+):
+    if flow_id not in flow_manager.flows:
+        return StreamingResponse(
+            not_found_events("Flow not found"),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
     return StreamingResponse(
-        event_generator(),
+        stream_events(
+            flow_manager.events.subscribe(flow_id),
+            flow_manager.flows[flow_id],
+            resume_cursor(request, last_event_id),
+            snapshot,
+            f"flow {flow_id}",
+        ),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
+        headers=SSE_HEADERS,
     )
 
 
 @app.get("/flows")
-async def get_flows():
-    sorted_flows = sorted(
-        flow_manager.flows.values(), key=lambda t: t.created_at, reverse=True
-    )
+async def get_flows(limit: int = Query(50, ge=1, le=500), offset: int = Query(0, ge=0)):
+    # 按创建时间倒序分页，总数通过 X-Total-Count 返回
+    flows, total = flow_manager.flows.list(limit, offset)
     return JSONResponse(
-        content=[t.model_dump() for t in sorted_flows],
-        headers={"Content-Type": "application/json"},
+        content=[t.model_dump() for t in flows],
+        headers={"Content-Type": "application/json", "X-Total-Count": str(total)},
     )
 
 
@@ -1102,104 +1298,38 @@ async def get_flow(flow_id: str):
 
 
 @app.get("/tasks/{task_id}/events")
-async def task_events(task_id: str):
-    async def event_generator():
-        if task_id not in task_manager.queues:
-            yield f"event: error\ndata: {safe_json_dumps({'message': 'Task not found'})}\n\n"
-            return
-
-        queue = task_manager.queues[task_id]
-
-        task = task_manager.tasks.get(task_id)
-        if task:
-            # 使用安全的序列化函数
-            safe_steps = []
-            for step in task.steps:
-                if isinstance(step, dict):
-                    clean_step = {}
-                    for key, value in step.items():
-                        if (
-                            isinstance(value, (str, int, float, bool, list, dict))
-                            or value is None
-                        ):
-                            clean_step[key] = value
-                        else:
-                            clean_step[key] = str(value)
-                    safe_steps.append(clean_step)
-                else:
-                    safe_steps.append(str(step))
-
-            yield f"event: status\ndata: {safe_json_dumps({'type': 'status', 'status': task.status, 'steps': safe_steps})}\n\n"
-
-        while True:
-            try:
-                event = await queue.get()
-                formatted_event = safe_json_dumps(event)
-                # print(f"*********event:{event}")
-                yield ": heartbeat\n\n"
-
-                if event["type"] == "complete":
-                    yield f"event: complete\ndata: {formatted_event}\n\n"
-                    break
-                elif event["type"] == "error":
-                    yield f"event: error\ndata: {formatted_event}\n\n"
-                    break
-                    # elif event["type"] == "step":
-                    task = task_manager.tasks.get(task_id)
-                    if task:
-                        # 使用安全的序列化函数处理steps
-                        safe_steps = []
-                        for step in task.steps:
-                            if isinstance(step, dict):
-                                clean_step = {}
-                                for key, value in step.items():
-                                    if (
-                                        isinstance(
-                                            value, (str, int, float, bool, list, dict)
-                                        )
-                                        or value is None
-                                    ):
-                                        clean_step[key] = value
-                                    else:
-                                        clean_step[key] = str(value)
-                                safe_steps.append(clean_step)
-                            else:
-                                safe_steps.append(str(step))
-
-                        yield f"event: status\ndata: {safe_json_dumps({'type': 'status', 'status': task.status, 'steps': safe_steps})}\n\n"
-                    yield f"event: {event['type']}\ndata: {formatted_event}\n\n"
-                elif event["type"] in ["think", "tool", "act", "run"]:
-                    yield f"event: {event['type']}\ndata: {formatted_event}\n\n"
-                else:
-                    yield f"event: {event['type']}\ndata: {formatted_event}\n\n"
-
-            except asyncio.CancelledError:
-                print(f"Client disconnected for task {task_id}")
-                break
-            except Exception as e:
-                print(f"Error in event stream: {str(e)}")
-                yield f"event: error\ndata: {safe_json_dumps({'message': str(e)})}\n\n"
-                break
-
+async def task_events(
+    task_id: str,
+    request: Request,
+    snapshot: bool = True,
+    last_event_id: Optional[int] = None,
+):
+    if task_id not in task_manager.tasks:
+        return StreamingResponse(
+            not_found_events("Task not found"),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
     return StreamingResponse(
-        event_generator(),
+        stream_events(
+            task_manager.events.subscribe(task_id),
+            task_manager.tasks[task_id],
+            resume_cursor(request, last_event_id),
+            snapshot,
+            f"task {task_id}",
+        ),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
+        headers=SSE_HEADERS,
     )
 
 
 @app.get("/tasks")
-async def get_tasks():
-    sorted_tasks = sorted(
-        task_manager.tasks.values(), key=lambda task: task.created_at, reverse=True
-    )
+async def get_tasks(limit: int = Query(50, ge=1, le=500), offset: int = Query(0, ge=0)):
+    # 按创建时间倒序分页，总数通过 X-Total-Count 返回
+    tasks, total = task_manager.tasks.list(limit, offset)
     return JSONResponse(
-        content=[task.model_dump() for task in sorted_tasks],
-        headers={"Content-Type": "application/json"},
+        content=[task.model_dump() for task in tasks],
+        headers={"Content-Type": "application/json", "X-Total-Count": str(total)},
     )
 
 
@@ -1215,10 +1345,12 @@ async def get_task(task_id: str):
 #  1. chat_history: 聊天历史
 #  2. flow_history: 流程历史
 @app.get("/sessions/history")
-async def get_session_history():
-    """获取历史记录"""
-    chat_history = task_manager.get_session_history()
-    flow_history = flow_manager.get_session_history()
+async def get_session_history(
+    limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0)
+):
+    """获取历史记录（任务与流程各自分页）"""
+    chat_history = task_manager.get_session_history(limit, offset)
+    flow_history = flow_manager.get_session_history(limit, offset)
 
     return JSONResponse(
         content={"chat_history": chat_history, "flow_history": flow_history},
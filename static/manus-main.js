@@ -303,6 +303,15 @@ class ManusAPIClient {
             }
         });
 
+        eventSource.addEventListener('think_delta', (event) => {
+            try {
+                const data = JSON.parse(event.data);
+                onMessage(data);
+            } catch (error) {
+                console.error('解析思考增量事件失败:', error);
+            }
+        });
+
         eventSource.addEventListener('log', (event) => {
             console.log('📝 日志事件:', event.data);
             try {
@@ -1771,6 +1780,12 @@ function handleTaskEvent(event) {
                 handleThinkEvent(event);
             }
             break;
+        case 'think_delta':
+            // 只在chat模式下流式展示思考过程
+            if (currentMode !== 'agent') {
+                handleThinkDeltaEvent(event);
+            }
+            break;
         case 'act':
             console.log('🔧 处理act事件');
             // 只在chat模式下处理act事件，agent模式下已归为step事件
@@ -1843,6 +1858,9 @@ function handleThinkEvent(event) {
             return;
         }
 
+        // 完整的思考结果替换流式展示的临时气泡
+        removeLiveThinkingStep();
+
         // 添加思考步骤到当前openmanus消息
         addThinkingStepToCurrentMessage(event.result);
 
@@ -1853,6 +1871,58 @@ function handleThinkEvent(event) {
     }
 }
 
+/**
+ * 处理think_delta事件（仅在chat模式下）：将增量追加到当前思考气泡
+ */
+function handleThinkDeltaEvent(event) {
+    if (!event.delta || (event.kind !== 'content' && event.kind !== 'reasoning')) {
+        return;
+    }
+
+    const message = getCurrentManusMessage();
+    if (!message) return;
+
+    const thinkingContainer = message.querySelector('.thinking-process-container');
+    const thinkingSteps = message.querySelector('.thinking-process-steps');
+    if (!thinkingContainer || !thinkingSteps) return;
+
+    let stepElement = thinkingSteps.querySelector('.thinking-step.live');
+    if (!stepElement) {
+        thinkingContainer.style.display = 'block';
+
+        stepElement = document.createElement('div');
+        stepElement.className = 'thinking-step live';
+        stepElement.innerHTML = `
+            <div class="thinking-step-header">
+                <div class="thinking-step-dot"></div>
+                <strong class="thinking-step-title">思考中...</strong>
+            </div>
+            <div class="thinking-step-content-wrapper">
+                <div class="thinking-step-connector"></div>
+                <div class="thinking-step-content"></div>
+            </div>
+        `;
+        thinkingSteps.appendChild(stepElement);
+    }
+
+    // 以文本方式追加，避免增量中的片段被当作HTML解析
+    stepElement.querySelector('.thinking-step-content').textContent += event.delta;
+    scrollChatToBottom();
+}
+
+/**
+ * 移除流式展示的临时思考气泡
+ */
+function removeLiveThinkingStep() {
+    const message = getCurrentManusMessage();
+    if (!message) return;
+
+    const stepElement = message.querySelector('.thinking-process-steps .thinking-step.live');
+    if (stepElement) {
+        stepElement.remove();
+    }
+}
+
 /**
  * 处理act事件（仅在chat模式下）
  */
@@ -0,0 +1,28 @@
+import pytest
+
+from app.agent.toolcall import ToolCallAgent
+from app.tool import Terminate, ToolCollection
+
+
+class StubAgent(ToolCallAgent):
+    def set_prompt(self, render: dict):
+        pass
+
+
+@pytest.fixture
+def tool_classes():
+    """Tools given to agents built by make_agent; override per test module."""
+    return [Terminate]
+
+
+@pytest.fixture
+def make_agent(tool_classes, bare_llm):
+    def make(**kwargs) -> ToolCallAgent:
+        # These tests never call the model
+        return StubAgent(
+            llm=bare_llm(),
+            available_tools=ToolCollection(*(tool() for tool in tool_classes)),
+            **kwargs,
+        )
+
+    return make
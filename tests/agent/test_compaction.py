@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from app.agent.compaction import MemoryCompactor
+from app.llm import LLM
+from app.prompt.compaction import SUMMARY_HEADER
+from app.schema import Memory, Message, ToolCall
+
+
+@pytest.fixture
+def make_llm(bare_llm):
+    def make(release: asyncio.Event) -> LLM:
+        llm = bare_llm("summarizer", prompts=[])
+
+        async def ask(messages, system_msgs=None, **kwargs):
+            llm.prompts.append(messages[0].content)
+            await release.wait()
+            return Message.assistant_message("searched twice, found the answer")
+
+        llm.ask = ask
+        return llm
+
+    return make
+
+
+def add_turn(memory: Memory, i: int) -> None:
+    memory.add_message(
+        Message.from_tool_calls(
+            [ToolCall(id=f"call_{i}", function={"name": "search", "arguments": "{}"})],
+            content="thinking " * 20,
+        )
+    )
+    memory.add_message(
+        Message.tool_message("result " * 40, name="search", tool_call_id=f"call_{i}")
+    )
+
+
+def assert_tool_pairs_intact(memory: Memory) -> None:
+    called = set()
+    for message in memory.messages:
+        for call in message.tool_calls or ():
+            called.add(call.id)
+        if message.role == "tool":
+            assert message.tool_call_id in called
+
+
+@pytest.mark.asyncio
+async def test_compaction_runs_in_background_and_keeps_pairs(make_llm):
+    release = asyncio.Event()
+    llm = make_llm(release)
+    memory = Memory()
+    request = Message.user_message("find the answer")
+    memory.add_message(request)
+    for i in range(10):
+        add_turn(memory, i)
+
+    compactor = MemoryCompactor(threshold_tokens=500, keep_recent_tokens=200)
+    before = compactor.estimate_tokens(memory, llm)
+
+    assert compactor.maybe_compact(memory, llm) is False
+    assert compactor.running
+    assert len(memory.messages) == 21  # Nothing changes until the summary is ready
+
+    # The agent keeps stepping while the summarizer works
+    add_turn(memory, 10)
+    assert compactor.maybe_compact(memory, llm) is False
+
+    release.set()
+    while compactor.running:
+        await asyncio.sleep(0)
+    assert compactor.maybe_compact(memory, llm) is True
+
+    messages = list(memory.messages)
+    assert messages[0] is request
+    assert messages[1].content.startswith(SUMMARY_HEADER)
+    assert messages[-1].tool_call_id == "call_10"
+    assert_tool_pairs_intact(memory)
+    assert compactor.estimate_tokens(memory, llm) < before
+    assert "search({})" in llm.prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_next_compaction_folds_previous_summary(make_llm):
+    release = asyncio.Event()
+    release.set()
+    llm = make_llm(release)
+    memory = Memory()
+    memory.add_message(Message.user_message("find the answer"))
+    compactor = MemoryCompactor(threshold_tokens=500, keep_recent_tokens=200)
+
+    for round_ in range(2):
+        for i in range(10):
+            add_turn(memory, round_ * 10 + i)
+        compactor.maybe_compact(memory, llm)
+        while compactor.running:
+            await asyncio.sleep(0)
+        assert compactor.maybe_compact(memory, llm) is True
+
+    summaries = [
+        m for m in memory.messages if m.content and SUMMARY_HEADER in m.content
+    ]
+    assert len(summaries) == 1
+    assert "searched twice" in llm.prompts[1]  # Previous summary is carried forward
+    assert_tool_pairs_intact(memory)
+
+
+@pytest.mark.asyncio
+async def test_failed_summary_keeps_history(make_llm):
+    llm = make_llm(asyncio.Event())
+
+    async def broken(*args, **kwargs):
+        raise ConnectionError("down")
+
+    llm.ask = broken
+    memory = Memory()
+    for i in range(10):
+        add_turn(memory, i)
+    compactor = MemoryCompactor(threshold_tokens=500, keep_recent_tokens=200)
+    compactor.maybe_compact(memory, llm)
+    while compactor.running:
+        await asyncio.sleep(0)
+
+    assert compactor.maybe_compact(memory, llm) is False
+    assert len(memory.messages) == 20
+    assert not compactor.running
@@ -0,0 +1,96 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+
+from app.events import AgentEvent, AgentEventType, emit, event_scope
+from app.schema import Function, ToolCall
+from app.tool import Terminate
+from app.tool.ask_human import AskHuman
+from app.tool.base import BaseTool, ToolResult
+
+
+class EchoTool(BaseTool):
+    name: str = "echo"
+    description: str = "Echo the label after a short sleep"
+    parameters: dict = {"type": "object", "properties": {"label": {"type": "string"}}}
+
+    async def execute(self, label: str) -> ToolResult:
+        await asyncio.sleep(0.01)
+        return ToolResult(output=label)
+
+
+@pytest.fixture
+def tool_classes():
+    return [EchoTool, AskHuman, Terminate]
+
+
+def call(index: int, name: str, **args) -> ToolCall:
+    return ToolCall(
+        id=f"call_{index}",
+        function=Function(name=name, arguments=json.dumps(args)),
+    )
+
+
+def collector(events: List[AgentEvent]):
+    async def handler(event: AgentEvent):
+        events.append(event)
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_emit_without_scope_is_noop():
+    await emit(AgentEventType.THINK, "nobody listens")
+
+
+@pytest.mark.asyncio
+async def test_tool_events_stay_in_their_task(make_agent):
+    async def run(label: str, events: List[AgentEvent]):
+        with event_scope(collector(events)):
+            agent = make_agent(parallel_tool_calls=True)
+            await agent.execute_tools_concurrently(
+                [call(i, "echo", label=f"{label}{i}") for i in range(3)]
+            )
+
+    a_events, b_events = [], []
+    await asyncio.gather(run("a", a_events), run("b", b_events))
+
+    for label, events in (("a", a_events), ("b", b_events)):
+        ends = [e for e in events if e.type == AgentEventType.TOOL_END]
+        starts = [e for e in events if e.type == AgentEventType.TOOL_START]
+        assert len(starts) == 3 and len(ends) == 3
+        assert sorted(e.content for e in ends) == [f"{label}{i}" for i in range(3)]
+        assert all(e.tool == "echo" for e in events)
+
+
+@pytest.mark.asyncio
+async def test_ask_human_emits_interaction(make_agent):
+    events = []
+    with event_scope(collector(events)):
+        await make_agent().execute_tool(call(0, "ask_human", inquire="Which file?"))
+
+    interactions = [e for e in events if e.type == AgentEventType.INTERACTION]
+    assert [e.content for e in interactions] == ["Which file?"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_arguments_emit_error(make_agent):
+    events = []
+    broken = ToolCall(id="call_0", function=Function(name="echo", arguments="{"))
+    with event_scope(collector(events)):
+        await make_agent().execute_tool(broken)
+
+    assert [e.type for e in events] == [AgentEventType.ERROR]
+
+
+@pytest.mark.asyncio
+async def test_failing_handler_does_not_break_agent(make_agent):
+    async def handler(event: AgentEvent):
+        raise RuntimeError("subscriber gone")
+
+    with event_scope(handler):
+        result = await make_agent().execute_tool(call(0, "echo", label="ok"))
+
+    assert "ok" in result
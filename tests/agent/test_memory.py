@@ -0,0 +1,104 @@
+import pytest
+
+from app.memory_archive import JSONLMemoryArchive, SQLiteMemoryArchive
+from app.schema import Memory, Message, ToolCall
+
+
+def tool_call_message(call_id: str, tool: str) -> Message:
+    return Message.from_tool_calls(
+        [ToolCall(id=call_id, function={"name": tool, "arguments": "{}"})]
+    )
+
+
+def fill(memory: Memory, steps: int) -> None:
+    for step in range(steps):
+        memory.step = step
+        memory.add_message(tool_call_message(f"call_{step}", f"tool_{step % 2}"))
+        memory.add_message(
+            Message.tool_message(
+                f"result {step}", name=f"tool_{step % 2}", tool_call_id=f"call_{step}"
+            )
+        )
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def archive(request, tmp_path):
+    if request.param == "jsonl":
+        archive = JSONLMemoryArchive(str(tmp_path / "memory.jsonl"))
+    else:
+        archive = SQLiteMemoryArchive(str(tmp_path / "memory.db"))
+    yield archive
+    archive.close()
+
+
+def test_hot_window_is_bounded_and_evicts_to_archive(archive):
+    memory = Memory(max_messages=4, archive=archive)
+    messages = memory.messages
+    fill(memory, 5)
+
+    assert memory.messages is messages  # Same deque, never copied or replaced
+    assert [m.content for m in memory.messages] == ["", "result 3", "", "result 4"]
+    history = list(memory.history())
+    assert len(history) == 10
+    assert [m.content for m in history[1::2]] == [f"result {i}" for i in range(5)]
+
+
+def test_lookups_by_step_and_tool_span_archive_and_hot_window(archive):
+    memory = Memory(max_messages=4, archive=archive)
+    fill(memory, 5)
+
+    assert [m.content for m in memory.by_step(0)] == ["", "result 0"]
+    assert [m.content for m in memory.by_step(4)] == ["", "result 4"]
+    results = [m.content for m in memory.by_tool("tool_0") if m.role == "tool"]
+    assert results == ["result 0", "result 2", "result 4"]
+    assert memory.by_tool("missing") == []
+
+
+def test_without_archive_evicted_messages_leave_the_index():
+    memory = Memory(max_messages=4)
+    memory._archive_opened = True  # Archiving off
+    fill(memory, 5)
+
+    assert memory.by_step(0) == []
+    assert [m.content for m in memory.by_tool("tool_1")] == ["", "result 3"]
+    assert len(list(memory.history())) == 4
+
+
+def test_replace_archives_dropped_messages_and_keeps_steps(archive):
+    memory = Memory(max_messages=10, archive=archive)
+    fill(memory, 3)
+    kept = list(memory.messages)[-2:]
+
+    memory.step = 9
+    summary = Message.user_message("summary of steps 0-1")
+    memory.replace([summary] + kept)
+
+    assert [m.content for m in memory.messages] == [
+        "summary of steps 0-1",
+        "",
+        "result 2",
+    ]
+    assert memory.by_step(2) == kept
+    assert memory.by_step(9) == [summary]
+    assert [m.content for m in memory.by_step(0)] == ["", "result 0"]
+    assert len(list(memory.history())) == 7
+
+
+def test_recent_messages_and_initial_messages():
+    memory = Memory(messages=[Message.user_message(str(i)) for i in range(5)])
+    assert [m.content for m in memory.get_recent_messages(2)] == ["3", "4"]
+    assert memory.get_recent_messages(0) == []
+    assert len(memory.by_step(0)) == 5
+
+
+@pytest.mark.asyncio
+async def test_agent_cleanup_closes_the_archive(make_agent, tmp_path):
+    archive = JSONLMemoryArchive(str(tmp_path / "memory.jsonl"))
+    agent = make_agent()
+    agent.memory = Memory(max_messages=2, archive=archive)
+    fill(agent.memory, 2)
+
+    await agent.cleanup()
+    assert archive._file.closed
+    assert agent.memory.archive is None
+    assert len(agent.memory.messages) == 2
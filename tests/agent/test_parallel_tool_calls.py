@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+from app.schema import Function, ToolCall
+from app.tool import Terminate
+from app.tool.base import BaseTool, ToolResult
+
+
+class SleepTool(BaseTool):
+    name: str = "sleep"
+    description: str = "Sleep for a while and echo the label"
+    parameters: dict = {
+        "type": "object",
+        "properties": {"seconds": {"type": "number"}, "label": {"type": "string"}},
+    }
+    running: int = 0
+    peak: int = 0
+
+    async def execute(self, seconds: float, label: str) -> ToolResult:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.running -= 1
+        return ToolResult(output=label)
+
+
+class SerialSleepTool(SleepTool):
+    name: str = "serial_sleep"
+    serial_only: bool = True
+
+
+@pytest.fixture
+def tool_classes():
+    return [SleepTool, SerialSleepTool, Terminate]
+
+
+def call(index: int, name: str, seconds: float) -> ToolCall:
+    return ToolCall(
+        id=f"call_{index}",
+        function=Function(
+            name=name, arguments=f'{{"seconds": {seconds}, "label": "r{index}"}}'
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_parallel_act_takes_max_latency_and_keeps_order(make_agent):
+    agent = make_agent(parallel_tool_calls=True)
+    # Later calls finish first, results must still follow call order
+    agent.tool_calls = [call(i, "sleep", 0.3 - i * 0.1) for i in range(3)]
+
+    start = time.perf_counter()
+    await agent.act()
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    tool_messages = [m for m in agent.memory.messages if m.role == "tool"]
+    assert [m.tool_call_id for m in tool_messages] == ["call_0", "call_1", "call_2"]
+    assert [m.content.splitlines()[-1] for m in tool_messages] == ["r0", "r1", "r2"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_is_respected(make_agent):
+    agent = make_agent(parallel_tool_calls=True, max_tool_concurrency=2)
+    agent.tool_calls = [call(i, "sleep", 0.05) for i in range(5)]
+
+    await agent.act()
+
+    assert agent.available_tools.get_tool("sleep").peak == 2
+
+
+@pytest.mark.asyncio
+async def test_serial_only_tools_never_overlap(make_agent):
+    agent = make_agent(parallel_tool_calls=True)
+    agent.tool_calls = [
+        call(0, "sleep", 0.05),
+        call(1, "serial_sleep", 0.05),
+        call(2, "serial_sleep", 0.05),
+        call(3, "sleep", 0.05),
+    ]
+
+    await agent.act()
+
+    assert agent.available_tools.get_tool("serial_sleep").peak == 1
+    tool_messages = [m for m in agent.memory.messages if m.role == "tool"]
+    assert [m.tool_call_id for m in tool_messages] == [f"call_{i}" for i in range(4)]
+
+
+@pytest.mark.asyncio
+async def test_sequential_by_default(make_agent):
+    agent = make_agent()
+    agent.tool_calls = [call(i, "sleep", 0.05) for i in range(3)]
+
+    await agent.act()
+
+    assert agent.available_tools.get_tool("sleep").peak == 1
@@ -0,0 +1,114 @@
+from app.retrieval import RetrievalIndex, estimate_tokens, select_messages, tokenize
+
+
+def test_tokenize_words_and_cjk_bigrams():
+    assert tokenize("Plot SALES_2024 by region!") == [
+        "plot",
+        "sales_2024",
+        "by",
+        "region",
+    ]
+    assert tokenize("销售数据") == ["销售", "售数", "数据"]
+
+
+def test_bm25_ranks_relevant_documents_first():
+    index = RetrievalIndex()
+    index.add("task", "Download the quarterly sales report and plot revenue by region")
+    index.add("tool", "python_execute: installed pandas and matplotlib")
+    index.add("task", "Write a poem about the sea")
+    index.add("step", "汇总销售数据并生成图表", source="plan_1")
+
+    hits = index.search("plot the sales revenue")
+    assert hits[0].document.text.startswith("Download the quarterly sales report")
+    assert all(
+        hit.document.kind == "task" for hit in index.search("sea", kinds=["task"])
+    )
+    assert index.search("销售图表", source="plan_1")[0].document.kind == "step"
+    assert index.search("销售图表", source="plan_2") == []
+    assert index.search("nothing matches this") == []
+
+
+def test_duplicates_are_indexed_once():
+    index = RetrievalIndex()
+    first = index.add("tool", "browser: page loaded")
+    assert index.add("tool", "browser: page loaded").id == first.id
+    assert len(index) == 1
+    assert index.add("tool", "   ") is None
+
+
+def test_oldest_documents_are_evicted_and_slots_reused(tmp_path):
+    index = RetrievalIndex(max_documents=10)
+    for i in range(300):
+        index.add("tool", f"result number {i} of the crawl")
+    assert len(index) == 10
+    assert index._next_slot <= 2 * 64 + 1
+    hits = index.search("crawl", k=3)
+    # Equal scores: newest first
+    assert [hit.document.text for hit in hits] == [
+        f"result number {i} of the crawl" for i in (299, 298, 297)
+    ]
+
+
+def test_index_persists_to_sqlite(tmp_path):
+    path = str(tmp_path / "retrieval.db")
+    index = RetrievalIndex(path=path, max_documents=2)
+    index.add("task", "first task about invoices")
+    index.add("task", "second task about invoices")
+    index.add("task", "third task about travel")
+    index.close()
+
+    reopened = RetrievalIndex(path=path, max_documents=2)
+    assert len(reopened) == 2
+    assert [hit.document.text for hit in reopened.search("invoices")] == [
+        "second task about invoices"
+    ]
+    document = reopened.add("task", "fourth task about invoices")
+    assert document.id == 4
+
+
+def test_context_fits_token_budget():
+    index = RetrievalIndex()
+    for i in range(5):
+        index.add("tool", f"weather report {i} " + "sunny and warm " * 30)
+    context = index.context("weather report", k=5, max_tokens=80, snippet_chars=100)
+    lines = context.splitlines()
+    assert 1 <= len(lines) < 5
+    assert estimate_tokens(context) <= 80
+    assert all(line.startswith("- [tool] weather report") for line in lines)
+
+
+def test_select_messages_keeps_recent_and_relevant_history():
+    history = [
+        {
+            "role": "user",
+            "content": "My database password rotation schedule is monthly",
+        },
+        {"role": "assistant", "content": "Noted."},
+        {"role": "user", "content": "What is the capital of France?"},
+        {"role": "assistant", "content": "Paris."},
+        {"role": "user", "content": "Tell me a joke"},
+        {"role": "assistant", "content": "Why did the chicken cross the road?"},
+    ]
+    selected = select_messages(
+        "how often do we rotate the database password", history, k=1, recent=2
+    )
+    assert selected == [history[0], history[4], history[5]]
+    assert select_messages("anything", [], k=3) == []
+
+
+def test_select_messages_never_drops_recent_messages():
+    history = [
+        {"role": "user", "content": "database password rotation " * 10},
+        {"role": "user", "content": "a long recent message " * 50},
+        {"role": "assistant", "content": "short reply"},
+    ]
+    selected = select_messages(
+        "database password", history, k=1, recent=2, max_tokens=40
+    )
+
+    assert [message["role"] for message in selected] == ["user", "assistant"]
+    assert selected[1] == history[2]
+    assert selected[0]["content"].startswith("a long recent message")
+    assert selected[0]["content"].endswith(" ...")
+    assert sum(estimate_tokens(m["content"]) for m in selected) <= 40
+    assert history[1]["content"] == "a long recent message " * 50
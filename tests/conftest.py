@@ -0,0 +1,44 @@
+import pytest
+
+from app.config import config
+from app.llm import LLM, TokenCounter
+
+
+# server.py builds its task stores on import; keep them off data/server.db
+config.server.task_store = "memory"
+
+
+class WhitespaceTokenizer:
+    """One token per word, so token budgets in tests are easy to count."""
+
+    def encode(self, text: str):
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def isolated_retrieval(monkeypatch):
+    """Keep tests out of the configured retrieval index; tests that need one inject it."""
+    if config.retrieval is not None:
+        monkeypatch.setattr(config.retrieval, "enabled", False)
+
+
+@pytest.fixture
+def token_counter() -> TokenCounter:
+    return TokenCounter(WhitespaceTokenizer())
+
+
+@pytest.fixture
+def bare_llm():
+    """Build LLM objects without LLM.__init__: no config or network needed."""
+
+    def make(model: str = "test-model", **attributes) -> LLM:
+        llm = object.__new__(LLM)
+        llm.client = None
+        llm.model = model
+        llm.total_input_tokens = llm.total_completion_tokens = 0
+        llm.token_counter = TokenCounter(WhitespaceTokenizer())
+        for name, value in attributes.items():
+            setattr(llm, name, value)
+        return llm
+
+    return make
@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+import pytest
+
+from app.bedrock import ChatCompletions
+from app.llm import ToolCallAssembler
+
+
+STREAM_EVENTS = [
+    {"messageStart": {"role": "assistant"}},
+    {"contentBlockDelta": {"delta": {"text": "Let me "}, "contentBlockIndex": 0}},
+    {"contentBlockDelta": {"delta": {"text": "check."}, "contentBlockIndex": 0}},
+    {"contentBlockStop": {"contentBlockIndex": 0}},
+    {
+        "contentBlockStart": {
+            "start": {"toolUse": {"toolUseId": "tu_1", "name": "web_search"}},
+            "contentBlockIndex": 1,
+        }
+    },
+    {
+        "contentBlockDelta": {
+            "delta": {"toolUse": {"input": '{"query": '}},
+            "contentBlockIndex": 1,
+        }
+    },
+    {
+        "contentBlockDelta": {
+            "delta": {"toolUse": {"input": '"weather"}'}},
+            "contentBlockIndex": 1,
+        }
+    },
+    {"contentBlockStop": {"contentBlockIndex": 1}},
+    {"messageStop": {"stopReason": "tool_use"}},
+    {"metadata": {"usage": {"inputTokens": 12, "outputTokens": 7, "totalTokens": 19}}},
+]
+
+
+class SlowBedrock:
+    """boto3 bedrock-runtime stand-in whose calls block like network I/O"""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.requests = []
+
+    def converse(self, **params):
+        self.requests.append(params)
+        time.sleep(self.delay)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "hi"}]}},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 3, "outputTokens": 1, "totalTokens": 4},
+        }
+
+    def converse_stream(self, **params):
+        self.requests.append(params)
+
+        def events():
+            for event in STREAM_EVENTS:
+                time.sleep(self.delay / len(STREAM_EVENTS))
+                yield event
+
+        return {"stream": events()}
+
+
+async def ticks_during(coro) -> int:
+    """Run coro while counting how often a 10 ms ticker gets to run."""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        await coro
+    finally:
+        task.cancel()
+    return ticks
+
+
+@pytest.mark.asyncio
+async def test_converse_does_not_block_event_loop():
+    completions = ChatCompletions(SlowBedrock())
+
+    async def call():
+        response = await completions.create(
+            model="m",
+            messages=[{"role": "user", "content": "hello"}],
+            max_tokens=10,
+            temperature=0,
+            stream=False,
+        )
+        assert response.choices[0].message.content == "hi"
+
+    assert await ticks_during(call()) >= 10
+    assert "toolConfig" not in completions.client.requests[0]
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_chunks_as_they_arrive():
+    completions = ChatCompletions(SlowBedrock())
+    assembler = ToolCallAssembler()
+    deltas = []
+
+    async def consume():
+        stream = await completions.create(
+            model="m",
+            messages=[{"role": "user", "content": "weather?"}],
+            max_tokens=10,
+            temperature=0,
+            stream=True,
+        )
+        async for chunk in stream:
+            deltas.extend(assembler.add_chunk(chunk))
+
+    assert await ticks_during(consume()) >= 10
+
+    message = assembler.build_message()
+    assert message.content == "Let me check."
+    assert message.tool_calls[0].id == "tu_1"
+    assert message.tool_calls[0].function.name == "web_search"
+    assert message.tool_calls[0].function.arguments == '{"query": "weather"}'
+    assert assembler.usage.prompt_tokens == 12
+    assert [d.type for d in deltas[:2]] == ["content", "content"]
+
+
+def test_tool_results_are_matched_by_tool_call_id():
+    completions = ChatCompletions(SlowBedrock())
+    calls = [
+        {"id": f"tu_{i}", "function": {"name": "echo", "arguments": "{}"}}
+        for i in range(2)
+    ]
+    _, messages = completions._convert_openai_messages_to_bedrock_format(
+        [
+            {"role": "user", "content": "go"},
+            {"role": "assistant", "content": "calling", "tool_calls": calls},
+            {"role": "tool", "content": "second", "tool_call_id": "tu_1"},
+            {"role": "tool", "content": "first", "tool_call_id": "tu_0"},
+        ]
+    )
+
+    assert [block["toolUse"]["toolUseId"] for block in messages[1]["content"][1:]] == [
+        "tu_0",
+        "tu_1",
+    ]
+    results = [block["toolResult"] for block in messages[2]["content"]]
+    assert [(r["toolUseId"], r["content"][0]["text"]) for r in results] == [
+        ("tu_1", "second"),
+        ("tu_0", "first"),
+    ]
+    assert len(messages) == 3
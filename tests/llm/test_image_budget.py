@@ -0,0 +1,65 @@
+import base64
+import io
+
+from PIL import Image
+
+from app.image import base64_image_size, fit_size, image_tokens, process_image
+from app.schema import Memory, Message
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    # Noise makes the image hard to compress, like a busy web page
+    Image.effect_noise((width, height), 64).convert("RGB").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_fit_size_follows_provider_resize_and_tile_grid():
+    # Full-page captures are shrunk to what the provider would keep anyway
+    assert fit_size(1280, 8000) == (327, 2048)
+    assert fit_size(1280, 720) == (1280, 720)
+    assert image_tokens(1280, 720) == 6 * 170 + 85
+
+    width, height = fit_size(1280, 720, max_tokens=4 * 170 + 85)
+    assert (width, height) == (1024, 576)
+    assert image_tokens(width, height) == 4 * 170 + 85
+
+    assert image_tokens(*fit_size(1280, 720, max_tokens=100)) == 170 + 85
+
+
+def test_process_image_meets_token_and_byte_budgets():
+    result = process_image(png(1280, 720), max_tokens=765, max_bytes=60_000)
+
+    assert result.width <= 1024 and result.height <= 576
+    assert result.size_bytes <= 60_000
+    assert result.tokens <= 765
+    assert base64_image_size(result.base64_image) == (result.width, result.height)
+
+
+def test_count_image_reads_dimensions_from_data_url(token_counter):
+    result = process_image(png(600, 400))
+    item = {
+        "type": "image_url",
+        "image_url": {"url": f"data:image/jpeg;base64,{result.base64_image}"},
+    }
+    # 600x400 fits in two tiles and is not upscaled
+    assert token_counter.count_image(item) == 2 * 170 + 85
+    assert token_counter.count_image({"image_url": {"url": "https://x/y.png"}}) == 1024
+
+
+def test_memory_keeps_only_latest_images():
+    image = base64.b64encode(b"fake").decode()
+    memory = Memory()
+    for i in range(5):
+        memory.add_message(Message.user_message(f"shot {i}", base64_image=image))
+
+    assert memory.drop_old_images(keep=2) == 3
+    assert [m.base64_image is not None for m in memory.messages] == [
+        False,
+        False,
+        False,
+        True,
+        True,
+    ]
+    assert memory.messages[0].content == "shot 0 [image omitted]"
+    assert memory.drop_old_images(keep=2) == 0
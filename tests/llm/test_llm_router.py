@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.config import LLMRouteSettings
+from app.llm import LLM
+from app.llm_router import LLMRouter, Purpose
+
+
+def make_llm(llm: LLM, fail: bool = False, delay: float = 0.0) -> LLM:
+    model = llm.model
+    llm.input_price, llm.output_price = 2.0, 10.0
+    llm.active = llm.peak = 0
+
+    async def ask_tool(**kwargs):
+        llm.active += 1
+        llm.peak = max(llm.peak, llm.active)
+        try:
+            await asyncio.sleep(delay)
+            if fail:
+                raise ConnectionError(f"{model} is down")
+            llm.update_token_count(1000, 100)
+            return f"{model}: {kwargs['messages'][0]}"
+        finally:
+            llm.active -= 1
+
+    async def ask_tool_stream(**kwargs):
+        if fail:
+            raise ConnectionError(f"{model} is down")
+        for word in ("streamed", "by", model):
+            await asyncio.sleep(delay)
+            yield word
+        llm.update_token_count(1000, 100)
+
+    llm.ask_tool = ask_tool
+    llm.ask_tool_stream = ask_tool_stream
+    return llm
+
+
+@pytest.fixture
+def llms(monkeypatch, bare_llm):
+    instances = {
+        "big": make_llm(bare_llm("big-model")),
+        "small": make_llm(bare_llm("small-model"), delay=0.02),
+        "broken": make_llm(bare_llm("broken-model"), fail=True),
+    }
+    for name, llm in instances.items():
+        monkeypatch.setitem(LLM._instances, name, llm)
+    return instances
+
+
+def router(**routes) -> LLMRouter:
+    return LLMRouter({k: LLMRouteSettings(**v) for k, v in routes.items()})
+
+
+@pytest.mark.asyncio
+async def test_unrouted_purpose_uses_callers_llm(llms):
+    r = router(plan={"models": ["small"]})
+    assert await r.ask_tool(Purpose.MAIN, default=llms["big"], messages=["hi"]) == (
+        "big-model: hi"
+    )
+    assert await r.ask_tool(Purpose.PLAN, default=llms["big"], messages=["hi"]) == (
+        "small-model: hi"
+    )
+
+
+@pytest.mark.asyncio
+async def test_fallback_chain_and_accounting(llms):
+    r = router(summary={"models": ["broken", "small"]})
+    assert await r.ask_tool(Purpose.SUMMARY, messages=["sum"]) == "small-model: sum"
+
+    metrics = r.metrics()["summary"]
+    assert metrics["broken-model"]["failures"] == 1
+    small = metrics["small-model"]
+    assert small["calls"] == 1 and small["fallbacks"] == 1
+    assert small["input_tokens"] == 1000 and small["completion_tokens"] == 100
+    assert small["cost"] == pytest.approx(0.003)
+    assert small["latency_max"] >= 0.02
+
+
+@pytest.mark.asyncio
+async def test_last_error_is_raised_when_chain_fails(llms):
+    r = router(plan={"models": ["broken"]})
+    with pytest.raises(ConnectionError):
+        await r.ask_tool(Purpose.PLAN, messages=["x"])
+
+
+@pytest.mark.asyncio
+async def test_route_concurrency_limit(llms):
+    r = router(plan={"models": ["small"], "max_concurrency": 2})
+    await asyncio.gather(
+        *(r.ask_tool(Purpose.PLAN, messages=[str(i)]) for i in range(6))
+    )
+    assert llms["small"].peak == 2
+    assert r.metrics()["plan"]["small-model"]["calls"] == 6
+
+
+@pytest.mark.asyncio
+async def test_streams_fall_back_and_are_accounted(llms):
+    r = router(main={"models": ["broken", "small"]})
+    items = [item async for item in r.ask_tool_stream(Purpose.MAIN, messages=["x"])]
+    assert items == ["streamed", "by", "small-model"]
+
+    metrics = r.metrics()["main"]
+    assert metrics["broken-model"]["failures"] == 1
+    small = metrics["small-model"]
+    assert small["calls"] == 1 and small["fallbacks"] == 1
+    assert small["input_tokens"] == 1000 and small["cost"] == pytest.approx(0.003)
+    assert small["latency_max"] >= 0.06
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import config
+from app.llm_transport import RateLimiter, TokenBucket
+
+
+def load_config(monkeypatch, raw: dict):
+    """Parse a raw config table the way config.toml is, without touching the global config."""
+    saved = config._config
+    monkeypatch.setattr(config, "_load_config", lambda: raw)
+    try:
+        config._load_initial_config()
+        return config._config
+    finally:
+        config._config = saved
+
+
+def test_bucket_wait_time_and_overuse():
+    bucket = TokenBucket(per_minute=60)  # one unit per second
+    assert bucket.wait_time(60) == 0
+    bucket.consume(70)
+    # Overuse is carried as debt; waiting covers it
+    assert bucket.wait_time(1) == pytest.approx(11, abs=0.1)
+    # Requests larger than the capacity only wait for a full bucket
+    assert bucket.wait_time(1000) == pytest.approx(70, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_requests_queue_instead_of_bursting():
+    limiter = RateLimiter("test", requests_per_minute=600)  # 10 per second
+    limiter.requests.level = 2
+
+    start = time.monotonic()
+    async with limiter.request():
+        pass
+    async with limiter.request():
+        pass
+    async with limiter.request():
+        pass
+    elapsed = time.monotonic() - start
+
+    assert 0.05 < elapsed < 0.5
+    metrics = limiter.metrics()
+    assert metrics["requests"] == 3
+    assert metrics["wait_seconds_max"] > 0.05
+    assert metrics["queued"] == 0 and metrics["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_token_budget_includes_recorded_usage():
+    limiter = RateLimiter("test", tokens_per_minute=6000)  # 100 per second
+    async with limiter.request(tokens=1000):
+        pass
+    limiter.record_usage(5000)  # completion tokens charged afterwards
+
+    assert limiter.tokens.wait_time(10) > 0
+    assert limiter.metrics()["tokens"] == 6000
+
+
+@pytest.mark.asyncio
+async def test_metrics_track_queue_and_in_flight():
+    limiter = RateLimiter("test", requests_per_minute=60)
+    limiter.requests.level = 1
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.request():
+            await release.wait()
+
+    first = asyncio.create_task(hold())
+    second = asyncio.create_task(hold())
+    await asyncio.sleep(0.05)
+    assert limiter.metrics()["in_flight"] == 1
+    assert limiter.metrics()["queued"] == 1
+
+    second.cancel()
+    release.set()
+    await first
+    with pytest.raises(asyncio.CancelledError):
+        await second
+    assert limiter.metrics()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unlimited_limiter_only_counts():
+    limiter = RateLimiter("test")
+    async with limiter.request(tokens=50):
+        assert limiter.in_flight == 1
+    assert limiter.metrics()["requests"] == 1
+    assert limiter.metrics()["wait_seconds_total"] < 0.05
+
+
+def test_rate_limits_are_read_from_the_llm_table(monkeypatch):
+    loaded = load_config(
+        monkeypatch,
+        {
+            "llm": {
+                "model": "m",
+                "base_url": "https://api.example.com",
+                "api_key": "k",
+                "requests_per_minute": 50,
+                "tokens_per_minute": 40000,
+                "fallback": "vision",
+                "hedge_after": 20.0,
+                "input_price": 3.0,
+                "output_price": 15.0,
+                "vision": {"model": "v"},
+            }
+        },
+    )
+    for name in ("default", "vision"):
+        assert loaded.llm[name].requests_per_minute == 50
+        assert loaded.llm[name].tokens_per_minute == 40000
+    assert loaded.llm["default"].fallback == "vision"
+    assert loaded.llm["default"].hedge_after == 20.0
+    assert loaded.llm["vision"].input_price == 3.0
+    assert loaded.llm["vision"].output_price == 15.0
+
+
+@pytest.mark.asyncio
+async def test_streamed_requests_stay_in_flight_until_consumed(bare_llm):
+    limiter = RateLimiter("test")
+
+    async def chunks():
+        yield "a"
+        yield "b"
+
+    async def create(**params):
+        return chunks() if params.get("stream") else "response"
+
+    llm = bare_llm(
+        rate_limiter=limiter,
+        client=SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        ),
+    )
+
+    assert await llm._create(10, stream=False) == "response"
+    assert limiter.in_flight == 0
+
+    stream = await llm._create(10, stream=True)
+    assert limiter.in_flight == 1
+    assert [chunk async for chunk in stream] == ["a", "b"]
+    assert limiter.in_flight == 0
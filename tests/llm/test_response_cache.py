@@ -0,0 +1,150 @@
+import time
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from app.llm import LLM
+from app.llm_cache import (
+    CacheMiss,
+    CacheMode,
+    ResponseCache,
+    SQLiteCacheBackend,
+    make_cache_key,
+)
+from app.truncation import get_truncation_strategy
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        return ChatCompletion(
+            id="resp",
+            created=0,
+            model=params["model"],
+            object="chat.completion",
+            choices=[
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": f"answer {self.calls}",
+                        "reasoning_content": "thinking",
+                        "tool_calls": [
+                            {
+                                "id": "call_0",
+                                "type": "function",
+                                "function": {"name": "terminate", "arguments": "{}"},
+                            }
+                        ],
+                    },
+                }
+            ],
+            usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        )
+
+
+class FakeClient:
+    def __init__(self):
+        self.completions = FakeCompletions()
+        self.chat = self
+
+
+@pytest.fixture
+def make_llm(bare_llm):
+    def make(cache: ResponseCache) -> LLM:
+        return bare_llm(
+            max_tokens=100,
+            temperature=0.0,
+            max_input_tokens=None,
+            api_type="openai",
+            truncation_strategy=get_truncation_strategy("drop_oldest"),
+            client=FakeClient(),
+            response_cache=cache,
+        )
+
+    return make
+
+
+MESSAGES = [{"role": "user", "content": "plan the task"}]
+
+
+def test_key_ignores_dict_order_and_transport_params():
+    a = make_cache_key("ask_tool", {"model": "m", "messages": MESSAGES, "timeout": 1})
+    b = make_cache_key("ask_tool", {"messages": MESSAGES, "model": "m", "stream": True})
+    assert a == b
+    assert a != make_cache_key("ask", {"model": "m", "messages": MESSAGES})
+    assert a != make_cache_key("ask_tool", {"model": "m2", "messages": MESSAGES})
+
+
+def test_memory_tier_is_lru():
+    cache = ResponseCache(memory_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(backend=SQLiteCacheBackend(path)).put("k", {"content": "hi"})
+
+    assert ResponseCache(backend=SQLiteCacheBackend(path)).get("k") == {"content": "hi"}
+
+    expired = ResponseCache(backend=SQLiteCacheBackend(path), ttl=10)
+    expired.backend.put("k", time.time() - 60, {"content": "hi"})
+    assert expired.get("k") is None
+    assert expired.backend.get("k") is None
+
+
+def test_replay_serves_old_recordings_and_fails_on_miss():
+    cache = ResponseCache(mode=CacheMode.RECORD, ttl=10)
+    cache.put("k", "recorded")
+    assert cache.get("k") is None  # record mode never reads
+
+    cache.mode = CacheMode.REPLAY
+    cache._memory["k"] = (time.time() - 60, "recorded")
+    assert cache.get("k") == "recorded"
+    with pytest.raises(CacheMiss):
+        cache.get("other")
+
+
+@pytest.mark.asyncio
+async def test_ask_tool_hits_cache_on_identical_request(make_llm):
+    llm = make_llm(ResponseCache())
+
+    first = await llm.ask_tool(MESSAGES, tools=[], timeout=5)
+    second = await llm.ask_tool(MESSAGES, tools=[], timeout=60)
+
+    assert llm.client.completions.calls == 1
+    assert second.content == first.content == "answer 1"
+    assert second.reasoning_content == "thinking"
+    assert second.tool_calls[0].function.name == "terminate"
+    assert llm.total_input_tokens == 10  # hits cost no tokens
+
+    await llm.ask_tool(MESSAGES + [{"role": "user", "content": "more"}], tools=[])
+    assert llm.client.completions.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_recorded_tool_response(make_llm):
+    recorder = make_llm(ResponseCache(mode=CacheMode.RECORD))
+    await recorder.ask_tool(MESSAGES, tools=[])
+
+    replayer = make_llm(recorder.response_cache)
+    replayer.response_cache.mode = CacheMode.REPLAY
+    deltas = [d async for d in replayer.ask_tool_stream(MESSAGES, tools=[])]
+
+    assert replayer.client.completions.calls == 0
+    assert [d.type for d in deltas] == ["reasoning", "content", "message"]
+    assert deltas[-1].message.content == "answer 1"
+
+    with pytest.raises(CacheMiss):
+        await replayer.ask_tool([{"role": "user", "content": "new"}], tools=[])
+    assert replayer.client.completions.calls == 0
@@ -0,0 +1,220 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from openai import APIConnectionError, AuthenticationError, RateLimitError
+
+from app.exceptions import TokenLimitExceeded
+from app.llm_retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    ErrorClass,
+    RetryBudget,
+    RetryPolicy,
+    classify_error,
+    with_retry_policy_stream,
+)
+
+
+REQUEST = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+
+
+def status_error(cls, status: int, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=REQUEST)
+    return cls("error", response=response, body=None)
+
+
+def connection_error():
+    return APIConnectionError(request=REQUEST)
+
+
+class Flaky:
+    """Async callable failing with the given errors before succeeding."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def fast_policy(**kwargs) -> RetryPolicy:
+    kwargs.setdefault("base_wait", 0.001)
+    kwargs.setdefault("max_wait", 0.01)
+    return RetryPolicy(**kwargs)
+
+
+def test_classify_errors():
+    assert classify_error(status_error(AuthenticationError, 401))[0] == ErrorClass.FATAL
+    assert classify_error(TokenLimitExceeded("too long"))[0] == ErrorClass.FATAL
+    assert classify_error(ValueError("bad role"))[0] == ErrorClass.FATAL
+    assert classify_error(connection_error())[0] == ErrorClass.RETRYABLE
+    assert classify_error(status_error(RateLimitError, 429, {"retry-after": "7"})) == (
+        ErrorClass.RATE_LIMITED,
+        7.0,
+    )
+    assert classify_error(
+        status_error(RateLimitError, 429, {"retry-after-ms": "250"})
+    ) == (ErrorClass.RATE_LIMITED, 0.25)
+
+    class ClientError(Exception):
+        def __init__(self, code):
+            self.response = {"Error": {"Code": code}, "ResponseMetadata": {}}
+
+    assert (
+        classify_error(ClientError("ThrottlingException"))[0] == ErrorClass.RATE_LIMITED
+    )
+    assert classify_error(ClientError("AccessDeniedException"))[0] == ErrorClass.FATAL
+
+
+@pytest.mark.asyncio
+async def test_fatal_errors_are_not_retried():
+    policy = fast_policy()
+    call = Flaky(status_error(AuthenticationError, 401))
+    with pytest.raises(AuthenticationError):
+        await policy.call("openai:test", call)
+    assert call.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_up_to_max_attempts():
+    policy = fast_policy(max_attempts=3)
+    assert await policy.call("e", Flaky(connection_error(), connection_error())) == "ok"
+
+    call = Flaky(*[connection_error()] * 5)
+    with pytest.raises(APIConnectionError):
+        await policy.call("e", call)
+    assert call.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_waits_for_retry_after():
+    policy = fast_policy(max_wait=1)
+    call = Flaky(status_error(RateLimitError, 429, {"retry-after": "0.2"}))
+    start = time.monotonic()
+    assert await policy.call("e", call) == "ok"
+    assert time.monotonic() - start >= 0.2
+
+    # A hint beyond max_wait fails the call instead of holding it
+    call = Flaky(status_error(RateLimitError, 429, {"retry-after": "120"}))
+    with pytest.raises(RateLimitError):
+        await policy.call("e", call)
+    assert call.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_limits_retries_across_calls():
+    budget = RetryBudget(ratio=0.0, min_retries=2)
+    policy = fast_policy(max_attempts=5, budget=budget)
+
+    call = Flaky(*[connection_error()] * 5)
+    with pytest.raises(APIConnectionError):
+        await policy.call("e", call)
+    assert call.calls == 3
+    assert budget.metrics()["exhausted"] == 1
+
+    call = Flaky(connection_error())
+    with pytest.raises(APIConnectionError):
+        await policy.call("e", call)
+    assert call.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_on_error_rate_and_probes_after_cooldown():
+    policy = fast_policy(
+        max_attempts=1,
+        breaker_factory=lambda name: CircuitBreaker(
+            name, failure_rate=0.5, min_requests=4, cooldown=0.1
+        ),
+    )
+    for _ in range(4):
+        with pytest.raises(APIConnectionError):
+            await policy.call("e", Flaky(connection_error()))
+    assert policy.breaker("e").state == CircuitState.OPEN
+
+    call = Flaky()
+    with pytest.raises(CircuitOpenError):
+        await policy.call("e", call)
+    assert call.calls == 0
+
+    await asyncio.sleep(0.1)
+    assert await policy.call("e", call) == "ok"
+    assert policy.breaker("e").state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_hedge_returns_the_faster_answer():
+    policy = fast_policy()
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "primary"
+
+    async def fast():
+        return "fallback"
+
+    result = await policy.hedged(
+        ("primary", slow), ("fallback", fast), hedge_after=0.05
+    )
+    assert result == "fallback"
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_routes_to_fallback():
+    policy = fast_policy()
+    policy.breaker("primary")._open(time.monotonic())
+
+    primary, fallback = Flaky(), Flaky()
+    assert await policy.hedged(("primary", primary), ("fallback", fallback)) == "ok"
+    assert primary.calls == 0 and fallback.calls == 1
+
+
+class FlakyStreamer:
+    """LLM stand-in whose stream fails with the given errors before or after its first item."""
+
+    def __init__(self, before=(), after=None):
+        self.retry_policy = fast_policy()
+        self.endpoint = "stream"
+        self.before = list(before)
+        self.after = after
+        self.calls = 0
+
+    @with_retry_policy_stream
+    async def stream(self):
+        self.calls += 1
+        if self.before:
+            raise self.before.pop(0)
+        yield "a"
+        if self.after is not None:
+            raise self.after
+        yield "b"
+
+
+@pytest.mark.asyncio
+async def test_stream_is_retried_until_the_first_item():
+    streamer = FlakyStreamer(before=[connection_error(), connection_error()])
+    assert [item async for item in streamer.stream()] == ["a", "b"]
+    assert streamer.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_is_not_retried_after_the_first_item():
+    streamer = FlakyStreamer(after=connection_error())
+    items = []
+    with pytest.raises(APIConnectionError):
+        async for item in streamer.stream():
+            items.append(item)
+    assert items == ["a"] and streamer.calls == 1
@@ -0,0 +1,85 @@
+import pytest
+
+from app.llm import TokenCounter
+
+
+class CountingTokenizer:
+    """Whitespace tokenizer that records every string it encodes."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, text: str):
+        self.encoded.append(text)
+        return text.split()
+
+
+@pytest.fixture
+def tokenizer() -> CountingTokenizer:
+    return CountingTokenizer()
+
+
+def build_history(steps: int):
+    messages = [{"role": "system", "content": "you are a helpful agent"}]
+    for i in range(steps):
+        messages.append({"role": "user", "content": f"next step {i}"})
+        messages.append(
+            {
+                "role": "assistant",
+                "content": f"calling tool {i}",
+                "tool_calls": [
+                    {
+                        "id": f"call_{i}",
+                        "type": "function",
+                        "function": {"name": "web_search", "arguments": f"q {i}"},
+                    }
+                ],
+            }
+        )
+        messages.append(
+            {
+                "role": "tool",
+                "content": f"result of step {i} " * 5,
+                "name": "web_search",
+                "tool_call_id": f"call_{i}",
+            }
+        )
+    return messages
+
+
+def test_cached_counts_match_uncached(tokenizer):
+    """Cached counting returns the same totals as encoding every time."""
+    messages = build_history(5)
+    cached = TokenCounter(tokenizer)
+    uncached = TokenCounter(CountingTokenizer(), cache_size=0)
+
+    assert cached.count_message_tokens(messages) == uncached.count_message_tokens(
+        messages
+    )
+    assert cached.count_message_tokens(messages) == uncached.count_message_tokens(
+        messages
+    )
+
+
+def test_only_new_messages_are_encoded(tokenizer):
+    """Re-counting a grown history only encodes the appended text."""
+    counter = TokenCounter(tokenizer)
+    messages = build_history(3)
+    counter.count_message_tokens(messages)
+    encoded_before = len(tokenizer.encoded)
+
+    messages.append({"role": "user", "content": "a brand new question"})
+    counter.count_message_tokens(messages)
+
+    assert tokenizer.encoded[encoded_before:] == ["a brand new question"]
+
+
+def test_cache_is_bounded(tokenizer):
+    """The text cache evicts least recently used entries past its size."""
+    counter = TokenCounter(tokenizer, cache_size=2)
+    for text in ("one", "two", "three"):
+        counter.count_text(text)
+
+    assert list(counter._text_cache) == ["two", "three"]
+    counter.count_text("one")
+    assert tokenizer.encoded.count("one") == 2
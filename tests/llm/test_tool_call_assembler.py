@@ -0,0 +1,86 @@
+from openai.types.chat import ChatCompletionChunk
+from openai.types.completion_usage import CompletionUsage
+
+from app.llm import ToolCallAssembler
+
+
+def make_chunk(content=None, tool_calls=None, usage=None, choices=True):
+    return ChatCompletionChunk(
+        id="chunk",
+        created=0,
+        model="test",
+        object="chat.completion.chunk",
+        choices=(
+            [
+                {
+                    "index": 0,
+                    "delta": {"content": content, "tool_calls": tool_calls},
+                    "finish_reason": None,
+                }
+            ]
+            if choices
+            else []
+        ),
+        usage=usage,
+    )
+
+
+def test_assembles_content_and_fragmented_tool_calls():
+    chunks = [
+        make_chunk(content="Let me "),
+        make_chunk(content="search."),
+        make_chunk(
+            tool_calls=[
+                {
+                    "index": 0,
+                    "id": "call_0",
+                    "type": "function",
+                    "function": {"name": "web_search", "arguments": '{"que'},
+                }
+            ]
+        ),
+        make_chunk(tool_calls=[{"index": 0, "function": {"arguments": 'ry": "a"}'}}]),
+        make_chunk(
+            tool_calls=[
+                {
+                    "index": 1,
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "crawl4ai", "arguments": "{}"},
+                }
+            ]
+        ),
+        make_chunk(
+            choices=False,
+            usage=CompletionUsage(
+                prompt_tokens=10, completion_tokens=5, total_tokens=15
+            ),
+        ),
+    ]
+    assembler = ToolCallAssembler()
+    deltas = [delta for chunk in chunks for delta in assembler.add_chunk(chunk)]
+
+    assert [d.type for d in deltas] == [
+        "content",
+        "content",
+        "tool_call",
+        "tool_call",
+        "tool_call",
+    ]
+    assert deltas[3].tool_name == "web_search"
+
+    message = assembler.build_message()
+    assert message.content == "Let me search."
+    assert [
+        (c.id, c.function.name, c.function.arguments) for c in message.tool_calls
+    ] == [
+        ("call_0", "web_search", '{"query": "a"}'),
+        ("call_1", "crawl4ai", "{}"),
+    ]
+    assert assembler.usage.prompt_tokens == 10
+
+
+def test_empty_stream_builds_empty_message():
+    message = ToolCallAssembler().build_message()
+    assert message.content is None
+    assert message.tool_calls is None
@@ -0,0 +1,93 @@
+import pytest
+
+from app.truncation import (
+    DropOldestStrategy,
+    KeepPinnedStrategy,
+    SummarizeMiddleStrategy,
+    get_truncation_strategy,
+    group_units,
+)
+
+
+def count_message(message: dict) -> int:
+    """Count one token per whitespace-separated word, plus a fixed overhead."""
+    return 4 + len((message.get("content") or "").split())
+
+
+def build_history(steps: int):
+    messages = [
+        {"role": "system", "content": "system prompt"},
+        {"role": "user", "content": "original request"},
+    ]
+    for i in range(steps):
+        messages.append(
+            {
+                "role": "assistant",
+                "content": f"step {i}",
+                "tool_calls": [
+                    {"id": f"a{i}", "function": {"name": "search", "arguments": ""}},
+                    {"id": f"b{i}", "function": {"name": "fetch", "arguments": ""}},
+                ],
+            }
+        )
+        messages.append(
+            {"role": "tool", "content": f"result a{i}", "tool_call_id": f"a{i}"}
+        )
+        messages.append(
+            {"role": "tool", "content": f"result b{i}", "tool_call_id": f"b{i}"}
+        )
+    return messages
+
+
+def total(messages) -> int:
+    return sum(count_message(m) for m in messages)
+
+
+def assert_pairs_intact(messages):
+    for index, message in enumerate(messages):
+        if message["role"] == "tool":
+            previous = messages[index - 1]
+            assert previous["role"] == "tool" or previous.get("tool_calls")
+
+
+def test_group_units_keeps_tool_results_with_their_call():
+    units = group_units(build_history(2)[1:])
+    assert units == [[0], [1, 2, 3], [4, 5, 6]]
+
+
+@pytest.mark.parametrize("budget", range(20, 120, 7))
+def test_drop_oldest_fits_budget_and_keeps_pairs(budget):
+    messages = build_history(6)
+    truncated = DropOldestStrategy().truncate(messages, count_message, budget)
+
+    assert truncated[0]["role"] == "system"
+    assert total(truncated) <= budget
+    assert_pairs_intact(truncated)
+    # The kept messages are the most recent suffix of the history
+    assert truncated[1:] == messages[len(messages) - len(truncated) + 1 :]
+
+
+def test_keep_pinned_keeps_original_request():
+    messages = build_history(6)
+    truncated = KeepPinnedStrategy().truncate(messages, count_message, 60)
+
+    assert truncated[1] == {"role": "user", "content": "original request"}
+    assert truncated[-1] == messages[-1]
+    assert total(truncated) <= 60
+    assert_pairs_intact(truncated)
+
+
+def test_summarize_middle_inserts_digest():
+    messages = build_history(6)
+    truncated = SummarizeMiddleStrategy().truncate(messages, count_message, 90)
+
+    assert truncated[1] == {"role": "user", "content": "original request"}
+    assert truncated[2]["content"].startswith("[Context summary]")
+    assert truncated[-1] == messages[-1]
+    assert total(truncated) <= 90
+    assert_pairs_intact(truncated)
+
+
+def test_unknown_strategy_raises():
+    with pytest.raises(ValueError, match="Unknown truncation strategy"):
+        get_truncation_strategy("nope")
@@ -0,0 +1,158 @@
+import io
+import os
+import socket
+import tarfile
+import time
+import uuid
+from typing import Optional
+
+import pytest
+from docker.errors import NotFound
+
+
+def make_tar(files, chunk_size=100):
+    """A tar of {archive name: content} split into small chunks, like a Docker stream."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    data = buffer.getvalue()
+    return [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+class FakeExecResult:
+    def __init__(self, exit_code: Optional[int] = 0, output=b""):
+        self.exit_code = exit_code
+        self.output = output
+
+
+class FakeContainer:
+    """A container whose filesystem is a dict of {absolute path: bytes}."""
+
+    def __init__(self, client: "FakeDockerClient", container_id: str):
+        self.client = client
+        self.id = container_id
+        self.status = "created"
+        self.exec_commands = []
+        self.sessions = 0
+        self.files = {}
+        self.modes = {}
+        self.calls = []  # File transfer calls, in order
+
+    def start(self):
+        time.sleep(self.client.start_delay)  # Simulated cold start
+        self.status = "running"
+
+    def stop(self, timeout=None):
+        self.status = "exited"
+
+    def remove(self, force=False):
+        self.status = "removed"
+        self.client.removed.append(self.id)
+
+    def exec_run(self, cmd, stream=False, **kwargs):
+        self.exec_commands.append(cmd)
+        if stream and cmd[:2] == ["sh", "-c"] and "tar -cf -" in cmd[2]:
+            # DockerSandbox.read_files: the requested files as one streamed tar
+            self.calls.append("exec_run")
+            names = [name for name in cmd[4:] if "/" + name in self.files]
+            files = {name: self.files["/" + name] for name in names}
+            return FakeExecResult(None, iter(make_tar(files) if files else []))
+        return FakeExecResult(self.client.exec_exit_code)
+
+    def put_archive(self, path, data):
+        self.calls.append("put_archive")
+        with tarfile.open(fileobj=io.BytesIO(b"".join(data)), mode="r") as tar:
+            for member in tar:
+                name = os.path.join(path, member.name)
+                self.modes[name] = member.mode
+                if member.isfile():
+                    self.files[name] = tar.extractfile(member).read()
+        return True
+
+    def get_archive(self, path, chunk_size=None):
+        self.calls.append("get_archive")
+        if path not in self.files:
+            raise NotFound(path)
+        return make_tar({os.path.basename(path): self.files[path]}), {}
+
+
+class FakeSocketResponse:
+    """What APIClient.exec_start(socket=True) returns: a wrapper with `_sock`."""
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+
+
+class FakeAPI:
+    def __init__(self, client: "FakeDockerClient"):
+        self.client = client
+        self.peers = []
+
+    def create_host_config(self, **kwargs):
+        return kwargs
+
+    def create_container(self, **kwargs):
+        container_id = uuid.uuid4().hex
+        self.client.containers.items[container_id] = FakeContainer(
+            self.client, container_id
+        )
+        return {"Id": container_id}
+
+    def exec_create(self, container_id, cmd, **kwargs):
+        self.client.containers.get(container_id).sessions += 1
+        return {"Id": uuid.uuid4().hex}
+
+    def exec_start(self, exec_id, **kwargs):
+        ours, theirs = socket.socketpair()
+        theirs.sendall(b"$ ")  # The shell prompt DockerSession waits for
+        self.peers.append(theirs)
+        return FakeSocketResponse(ours)
+
+    def exec_inspect(self, exec_id):
+        return {"Running": False}
+
+
+class FakeContainers:
+    def __init__(self, client: "FakeDockerClient"):
+        self.client = client
+        self.items = {}
+
+    def get(self, container_id):
+        return self.items[container_id]
+
+    def create(self) -> FakeContainer:
+        container_id = self.client.api.create_container()["Id"]
+        return self.items[container_id]
+
+
+class FakeImages:
+    def get(self, image):
+        return image
+
+
+class FakeDockerClient:
+    """Stand-in for docker.DockerClient: no daemon, configurable start latency."""
+
+    def __init__(self, start_delay: float = 0.05):
+        self.start_delay = start_delay
+        self.exec_exit_code = 0
+        self.removed = []
+        self.api = FakeAPI(self)
+        self.containers = FakeContainers(self)
+        self.images = FakeImages()
+
+    def close(self):
+        for peer in self.api.peers:
+            peer.close()
+
+
+@pytest.fixture
+def docker_client():
+    client = FakeDockerClient()
+    try:
+        yield client
+    finally:
+        client.close()
@@ -0,0 +1,95 @@
+"""DockerSession framing and streaming, against a local bash instead of a container."""
+import asyncio
+import os
+import socket
+import subprocess
+
+import pytest
+import pytest_asyncio
+
+from app.sandbox.core.terminal import DockerSession
+
+
+class LocalShellAPI:
+    """Serves exec_start with a socket wired to a local interactive bash."""
+
+    def __init__(self):
+        self.processes = []
+
+    def exec_create(self, container_id, cmd, environment=None, **kwargs):
+        self.environment = environment
+        return {"Id": "exec"}
+
+    def exec_start(self, exec_id, **kwargs):
+        ours, theirs = socket.socketpair()
+        process = subprocess.Popen(
+            ["bash", "--norc", "--noprofile", "--noediting", "-i"],
+            stdin=theirs,
+            stdout=theirs,
+            stderr=theirs,
+            env={"PATH": os.environ["PATH"], **self.environment},
+        )
+        theirs.close()
+        self.processes.append(process)
+        return type("SocketResponse", (), {"_sock": ours})()
+
+    def exec_inspect(self, exec_id):
+        return {"Running": False}
+
+
+@pytest_asyncio.fixture
+async def session():
+    api = LocalShellAPI()
+    session = DockerSession("local", api=api)
+    await session.create("/tmp", {"TEST_VAR": "test_value"})
+    try:
+        yield session
+    finally:
+        await session.close()
+        for process in api.processes:
+            process.kill()
+            process.wait()
+
+
+@pytest.mark.asyncio
+async def test_output_and_exit_code(session):
+    assert await session.execute("echo 'Hello World'") == "Hello World"
+    assert session.last_exit_code == 0
+    assert await session.execute("echo $TEST_VAR") == "test_value"
+
+    assert await session.execute("false") == ""
+    assert session.last_exit_code == 1
+    assert await session.execute("echo partial; (exit 3)") == "partial"
+    assert session.last_exit_code == 3
+
+
+@pytest.mark.asyncio
+async def test_output_is_streamed_while_running(session):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    arrivals = []
+    async for chunk in session.stream(
+        "for i in 1 2 3; do echo line$i; sleep 0.2; done", timeout=10
+    ):
+        arrivals.append((loop.time() - start, chunk))
+
+    assert "".join(chunk for _, chunk in arrivals) == "line1\nline2\nline3\n"
+    assert arrivals[0][0] < 0.3  # First line long before the command ends
+
+
+@pytest.mark.asyncio
+async def test_large_output_is_read_in_full(session):
+    output = await session.execute("head -c 300000 /dev/zero | tr '\\0' a")
+    assert output == "a" * 300000
+    text = await session.execute("printf '中文输出\\n第二行'")
+    assert text == "中文输出\n第二行"
+
+
+@pytest.mark.asyncio
+async def test_session_recovers_after_timeout(session):
+    session.RECOVER_TIMEOUT = 5
+    with pytest.raises(TimeoutError):
+        await session.execute("sleep 0.5; echo late", timeout=0.1)
+    # Output of the interrupted command never leaks into the next one
+    assert await session.execute("echo next") == "next"
+    assert session.last_exit_code == 0
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.config import SandboxSettings
+from app.sandbox.core.manager import SandboxManager
+
+
+async def make_manager(client, **kwargs) -> SandboxManager:
+    kwargs.setdefault("max_sandboxes", 4)
+    kwargs.setdefault("cleanup_interval", 60)
+    manager = SandboxManager(client=client, **kwargs)
+    await wait_for_pool(manager)
+    return manager
+
+
+async def wait_for_pool(manager: SandboxManager) -> None:
+    await asyncio.sleep(0)  # Let the cleanup loop schedule the first fill
+    if manager._fill_task is not None:
+        await manager._fill_task
+
+
+@pytest_asyncio.fixture
+async def manager(docker_client):
+    manager = await make_manager(docker_client, min_idle=2)
+    try:
+        yield manager
+    finally:
+        await manager.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_pool_is_warmed_and_serves_hits(manager, docker_client):
+    assert manager.get_stats()["pool"]["idle"] == 2
+
+    start = time.monotonic()
+    sandbox_id = await manager.create_sandbox()
+    assert time.monotonic() - start < docker_client.start_delay
+
+    sandbox = await manager.get_sandbox(sandbox_id)
+    assert sandbox.client is docker_client
+    stats = manager.get_stats()["pool"]
+    assert stats["hits"] == 1 and stats["misses"] == 0
+
+    # The pool is topped back up in the background
+    await wait_for_pool(manager)
+    assert manager.get_stats()["pool"]["idle"] == 2
+
+
+@pytest.mark.asyncio
+async def test_release_resets_and_reuses_container(manager, docker_client):
+    sandbox_id = await manager.create_sandbox()
+    sandbox = await manager.get_sandbox(sandbox_id)
+    container = sandbox.container
+
+    await manager.release_sandbox(sandbox_id)
+
+    assert sandbox_id not in manager._sandboxes
+    assert container.id not in docker_client.removed
+    reset_script = next(c for c in container.exec_commands if isinstance(c, list))[-1]
+    assert "kill -9" in reset_script
+    assert "find /workspace /tmp -mindepth 1 -delete" in reset_script
+    assert container.sessions == 2  # Fresh shell environment
+    assert manager.get_stats()["pool"]["resets"] == 1
+
+    # Reset containers go to the back of the pool and are handed out again
+    reused = []
+    for _ in range(3):
+        reused.append(
+            (await manager.get_sandbox(await manager.create_sandbox())).container
+        )
+    assert container in reused
+
+
+@pytest.mark.asyncio
+async def test_custom_sandboxes_bypass_pool(manager, docker_client):
+    custom = SandboxSettings(memory_limit="1g")
+    sandbox_id = await manager.create_sandbox(config=custom)
+    container = (await manager.get_sandbox(sandbox_id)).container
+    assert manager.get_stats()["pool"]["misses"] == 1
+
+    await manager.release_sandbox(sandbox_id)
+    assert container.id in docker_client.removed
+    assert manager.get_stats()["pool"]["idle"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_reset_discards_container(manager, docker_client):
+    sandbox_id = await manager.create_sandbox()
+    container = (await manager.get_sandbox(sandbox_id)).container
+    docker_client.exec_exit_code = 1
+
+    await manager.release_sandbox(sandbox_id)
+
+    assert container.id in docker_client.removed
+    assert manager.get_stats()["pool"]["reset_failures"] == 1
+    assert all(s.container is not container for s, _ in manager._idle)
+
+
+@pytest.mark.asyncio
+async def test_idle_sandboxes_count_towards_max(docker_client):
+    manager = await make_manager(docker_client, min_idle=2, max_sandboxes=2)
+    try:
+        await manager.create_sandbox()
+        await manager.create_sandbox()
+        with pytest.raises(RuntimeError, match=r"Maximum number of sandboxes \(2\)"):
+            await manager.create_sandbox()
+        assert manager.get_stats()["pool"]["hits"] == 2
+    finally:
+        await manager.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_pool_shrinks_to_min_idle(docker_client):
+    manager = await make_manager(docker_client, min_idle=1, idle_timeout=0.05)
+    try:
+        ids = [await manager.create_sandbox() for _ in range(3)]
+        for sandbox_id in ids:
+            await manager.release_sandbox(sandbox_id)
+        await wait_for_pool(manager)
+        idle = manager.get_stats()["pool"]["idle"]
+        assert idle >= 3
+
+        await asyncio.sleep(0.1)
+        await manager._cleanup_idle_sandboxes()
+        assert manager.get_stats()["pool"]["idle"] == 1
+        assert len(docker_client.removed) == idle - 1
+    finally:
+        await manager.cleanup()
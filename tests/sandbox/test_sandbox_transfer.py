@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from app.config import SandboxSettings
+from app.sandbox.core.sandbox import DockerSandbox
+
+
+@pytest.fixture
+def sandbox(docker_client):
+    sandbox = DockerSandbox(SandboxSettings(), client=docker_client)
+    sandbox.container = docker_client.containers.create()
+    return sandbox
+
+
+@pytest.mark.asyncio
+async def test_write_files_sends_one_archive(sandbox):
+    await sandbox.write_files(
+        {"a.txt": "alpha", "nested/dir/b.bin": b"\x00\x01", "/tmp/c.txt": "γ"}
+    )
+
+    assert sandbox.container.calls == ["put_archive"]
+    assert sandbox.container.files == {
+        "/workspace/a.txt": b"alpha",
+        "/workspace/nested/dir/b.bin": b"\x00\x01",
+        "/tmp/c.txt": "γ".encode(),
+    }
+
+
+@pytest.mark.asyncio
+async def test_read_files_uses_one_streamed_archive(sandbox):
+    large = "x" * 200_000
+    sandbox.container.files = {
+        "/workspace/a.txt": b"alpha",
+        "/workspace/large.txt": large.encode(),
+    }
+
+    contents = await sandbox.read_files(["a.txt", "/workspace/large.txt", "a.txt"])
+
+    assert sandbox.container.calls == ["exec_run"]
+    assert contents == {"a.txt": "alpha", "/workspace/large.txt": large}
+
+    with pytest.raises(FileNotFoundError, match="missing.txt"):
+        await sandbox.read_files(["a.txt", "missing.txt"])
+    with pytest.raises(FileNotFoundError):
+        await sandbox.read_files(["missing.txt"])
+
+
+@pytest.mark.asyncio
+async def test_stream_file_yields_chunks(sandbox):
+    data = os.urandom(10_000)
+    sandbox.container.files = {"/workspace/blob": data}
+
+    chunks = [chunk async for chunk in sandbox.stream_file("blob", chunk_size=4096)]
+
+    assert b"".join(chunks) == data
+    assert max(len(chunk) for chunk in chunks) <= 4096
+    with pytest.raises(FileNotFoundError):
+        async for _ in sandbox.stream_file("missing"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_copy_round_trip_streams(sandbox, tmp_path):
+    source = tmp_path / "src"
+    (source / "sub").mkdir(parents=True)
+    (source / "one.txt").write_text("one")
+    (source / "sub" / "two.txt").write_text("two")
+
+    await sandbox.copy_to(str(source), "project")
+    assert sandbox.container.files == {
+        "/workspace/project/one.txt": b"one",
+        "/workspace/project/sub/two.txt": b"two",
+    }
+
+    await sandbox.copy_from("project/sub/two.txt", str(tmp_path / "out" / "two.txt"))
+    assert (tmp_path / "out" / "two.txt").read_text() == "two"
+
+
+@pytest.mark.asyncio
+async def test_copy_to_keeps_file_modes(sandbox, tmp_path):
+    source = tmp_path / "src"
+    (source / "bin").mkdir(parents=True)
+    (source / "bin").chmod(0o700)
+    (source / "bin" / "run.sh").write_text("#!/bin/sh\n")
+    (source / "bin" / "run.sh").chmod(0o755)
+    (source / "notes.txt").write_text("notes")
+    (source / "notes.txt").chmod(0o600)
+
+    await sandbox.copy_to(str(source), "project")
+    await sandbox.copy_to(str(source / "bin" / "run.sh"), "run.sh")
+
+    modes = sandbox.container.modes
+    assert modes["/workspace/project/bin"] == 0o700
+    assert modes["/workspace/project/bin/run.sh"] == 0o755
+    assert modes["/workspace/project/notes.txt"] == 0o600
+    assert modes["/workspace/run.sh"] == 0o755
+
+
+@pytest.mark.asyncio
+async def test_bind_mounted_paths_skip_docker(sandbox, tmp_path):
+    host_dir = tmp_path / "work"
+    host_dir.mkdir()
+    sandbox.mounts = {"/workspace": str(host_dir)}
+
+    await sandbox.write_files({"notes/a.txt": "alpha", "/tmp/b.txt": "beta"})
+    assert (host_dir / "notes" / "a.txt").read_text() == "alpha"
+    assert sandbox.container.files == {"/tmp/b.txt": b"beta"}
+
+    assert await sandbox.read_file("notes/a.txt") == "alpha"
+    assert await sandbox.read_files(["notes/a.txt", "/tmp/b.txt"]) == {
+        "notes/a.txt": "alpha",
+        "/tmp/b.txt": "beta",
+    }
+    assert sandbox.container.calls == ["put_archive", "exec_run"]
+
+    # A symlink out of the mount is not followed on the host
+    (host_dir / "escape").symlink_to(tmp_path)
+    assert sandbox._host_path("/workspace/escape/secret") is None
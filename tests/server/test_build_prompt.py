@@ -0,0 +1,33 @@
+import pytest
+
+import server
+from app.config import config
+from app.retrieval import RetrievalIndex
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = RetrievalIndex()
+    monkeypatch.setattr(server, "get_retrieval_index", lambda: index)
+    monkeypatch.setattr(config.retrieval, "cross_session", False)
+    index.add("task", "deploy the billing service to staging", source="alice")
+    index.add("tool", "bash: billing service deployed to staging", source="bob")
+    return index
+
+
+def test_past_work_is_scoped_to_the_session(index):
+    prompt = server.build_full_prompt("billing staging", [], "alice")
+    assert "deploy the billing service" in prompt
+    assert "bash: billing" not in prompt
+
+    assert server.build_full_prompt("billing staging", [], "carol") == (
+        "billing staging"
+    )
+    assert server.build_full_prompt("billing staging") == "billing staging"
+
+
+def test_cross_session_recall_is_opt_in(index, monkeypatch):
+    monkeypatch.setattr(config.retrieval, "cross_session", True)
+    prompt = server.build_full_prompt("billing staging", [], "carol")
+    assert "deploy the billing service" in prompt
+    assert "bash: billing" in prompt
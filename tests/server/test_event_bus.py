@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from app.event_bus import EventBus, SlowConsumerPolicy
+
+
+async def drain(subscription):
+    return [event async for event in subscription]
+
+
+@pytest.mark.asyncio
+async def test_subscribers_have_independent_cursors():
+    bus = EventBus(buffer_size=10)
+    bus.open("t")
+    await bus.publish("t", {"n": 0})
+    early = bus.subscribe("t")
+    late = bus.subscribe("t", from_start=False)
+    await bus.publish("t", {"n": 1})
+    await bus.close("t")
+
+    assert await drain(early) == [{"n": 0}, {"n": 1}]
+    assert await drain(late) == [{"n": 1}]
+
+
+@pytest.mark.asyncio
+async def test_drop_policy_reports_missed_events():
+    bus = EventBus(buffer_size=3)
+    bus.open("t")
+    subscription = bus.subscribe("t")
+    for n in range(5):
+        await bus.publish("t", {"n": n})
+    await bus.close("t")
+
+    assert await drain(subscription) == [
+        {"type": "lagged", "missed": 2},
+        {"n": 2},
+        {"n": 3},
+        {"n": 4},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_block_policy_applies_backpressure():
+    bus = EventBus(buffer_size=2, policy=SlowConsumerPolicy.BLOCK, block_timeout=5)
+    bus.open("t")
+    subscription = bus.subscribe("t")
+    await bus.publish("t", {"n": 0})
+    await bus.publish("t", {"n": 1})
+
+    publisher = asyncio.create_task(bus.publish("t", {"n": 2}))
+    await asyncio.sleep(0.05)
+    assert not publisher.done()
+
+    assert await subscription.__anext__() == {"n": 0}
+    await asyncio.wait_for(publisher, 1)
+    await bus.close("t")
+    assert await drain(subscription) == [{"n": 1}, {"n": 2}]
+
+
+@pytest.mark.asyncio
+async def test_block_policy_gives_up_after_timeout():
+    bus = EventBus(buffer_size=1, policy=SlowConsumerPolicy.BLOCK, block_timeout=0.05)
+    bus.open("t")
+    subscription = bus.subscribe("t")
+    for n in range(3):
+        await asyncio.wait_for(bus.publish("t", {"n": n}), 1)
+    assert subscription.policy == SlowConsumerPolicy.DROP
+
+
+@pytest.mark.asyncio
+async def test_closed_stream_is_reclaimed_after_last_subscriber_leaves():
+    bus = EventBus(buffer_size=4, idle_ttl=0.01)
+    bus.open("t")
+    subscription = bus.subscribe("t")
+    await bus.publish("t", {"n": 0})
+    await bus.close("t")
+    await asyncio.sleep(0.05)
+    assert "t" in bus
+
+    assert await drain(subscription) == [{"n": 0}]
+    subscription.close()
+    await asyncio.sleep(0.05)
+    assert "t" not in bus
+    assert await drain(bus.subscribe("t")) == []
+
+
+@pytest.mark.asyncio
+async def test_late_publishes_do_not_recreate_streams():
+    bus = EventBus(buffer_size=4, idle_ttl=0.01)
+    await bus.publish("t", {"n": 0})
+    assert "t" not in bus
+
+    bus.open("t")
+    subscription = bus.subscribe("t")
+    await bus.publish("t", {"n": 1})
+    await bus.close("t")
+    await bus.publish("t", {"type": "status"})
+    assert await drain(subscription) == [{"n": 1}]
+
+    await asyncio.sleep(0.05)
+    await bus.publish("t", {"type": "status"})
+    assert "t" not in bus
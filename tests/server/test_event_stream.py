@@ -0,0 +1,152 @@
+import asyncio
+import json
+
+import pytest
+
+from app.llm import StreamDelta
+from app.task_store import TaskStore
+from server import Task, TaskManager, stream_events
+
+
+def parse(chunks):
+    """Turn SSE chunks into (id, event, data) tuples, skipping heartbeats."""
+    events = []
+    for chunk in chunks:
+        if chunk.startswith(":"):
+            continue
+        fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+        events.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def collect(manager, task_id, cursor=None, snapshot=True):
+    stream = stream_events(
+        manager.events.subscribe(task_id),
+        manager.tasks[task_id],
+        cursor,
+        snapshot,
+        "test",
+    )
+    return parse([chunk async for chunk in stream])
+
+
+async def make_task(steps):
+    manager = TaskManager(TaskStore(Task))
+    task = manager.create_task("prompt")
+    for i in range(steps):
+        await manager.update_task_step(task.id, i, f"step {i}", "log")
+    return manager, task.id
+
+
+@pytest.mark.asyncio
+async def test_status_events_carry_only_new_steps():
+    manager, task_id = await make_task(0)
+    # Connect first so every step arrives as a live event
+    collector = asyncio.create_task(collect(manager, task_id))
+    await asyncio.sleep(0)
+    for i in range(3):
+        await manager.update_task_step(task_id, i, f"step {i}", "log")
+    await manager.complete_task(task_id, "done")
+
+    events = await collector
+    statuses = [(eid, data) for eid, name, data in events if name == "status"]
+    assert [eid for eid, _ in statuses] == ["0", "1", "2", "3", None]
+    for seq, (_, data) in enumerate(statuses[1:4], start=1):
+        assert data["seq"] == seq
+        assert [step["result"] for step in data["steps"]] == [f"step {seq - 1}"]
+    assert statuses[-1][1]["steps"] == []
+    assert events[-1][1] == "complete"
+
+
+@pytest.mark.asyncio
+async def test_snapshot_on_connect_skips_already_included_steps():
+    manager, task_id = await make_task(3)
+    await manager.complete_task(task_id, "done")
+
+    events = await collect(manager, task_id)
+    snapshot = events[0][2]
+    assert snapshot["snapshot"] is True
+    assert len(snapshot["steps"]) == 3
+    # Queued events for steps already in the snapshot are not sent again
+    assert [name for _, name, _ in events[1:]] == ["status", "complete"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_can_be_skipped():
+    manager, task_id = await make_task(3)
+    await manager.complete_task(task_id, "done")
+
+    events = await collect(manager, task_id, snapshot=False)
+    assert events[0][2]["steps"] == []
+    assert events[0][2]["seq"] == 3
+
+
+@pytest.mark.asyncio
+async def test_resume_from_last_event_id():
+    manager, task_id = await make_task(5)
+    await manager.complete_task(task_id, "done")
+
+    events = await collect(manager, task_id, cursor=3)
+    resume = events[0][2]
+    assert resume["snapshot"] is False
+    assert [step["seq"] for step in resume["steps"]] == [4, 5]
+    assert events[0][0] == "5"
+
+
+@pytest.mark.asyncio
+async def test_every_subscriber_receives_all_events():
+    manager, task_id = await make_task(0)
+    collectors = [asyncio.create_task(collect(manager, task_id)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for i in range(3):
+        await manager.update_task_step(task_id, i, f"step {i}", "log")
+    await manager.complete_task(task_id, "done")
+
+    first, second = await asyncio.gather(*collectors)
+    assert first == second
+    assert [name for _, name, _ in first].count("log") == 3
+
+
+@pytest.mark.asyncio
+async def test_reclaimed_stream_still_ends_with_terminal_event():
+    manager, task_id = await make_task(2)
+    manager.events.idle_ttl = 0
+    await manager.complete_task(task_id, "done")
+    await asyncio.sleep(0.01)
+    assert task_id not in manager.events
+
+    events = await collect(manager, task_id)
+    assert len(events[0][2]["steps"]) == 2
+    assert events[-1][1] == "complete"
+
+
+@pytest.mark.asyncio
+async def test_terminate_ends_subscribers_and_releases_the_task():
+    manager, task_id = await make_task(1)
+    collector = asyncio.create_task(collect(manager, task_id))
+    await asyncio.sleep(0)
+    await manager.terminate_task(task_id)
+
+    events = await asyncio.wait_for(collector, 1)
+    assert events[-1][1] == "terminated"
+    assert task_id not in manager.tasks._pinned
+    assert manager.tasks[task_id].status == "terminated"
+
+
+@pytest.mark.asyncio
+async def test_reconnect_skips_think_deltas_of_sent_steps():
+    manager, task_id = await make_task(0)
+    delta = StreamDelta(type="content", text="thinking")
+    await manager.push_task_delta(task_id, delta)
+    await manager.update_task_step(task_id, 0, "thought", "think")
+    await manager.push_task_delta(task_id, delta)
+
+    collector = asyncio.create_task(collect(manager, task_id, cursor=1))
+    await asyncio.sleep(0)
+    await manager.push_task_delta(task_id, StreamDelta(type="content", text="live"))
+    await manager.complete_task(task_id, "done")
+
+    events = await collector
+    deltas = [data["delta"] for _, name, data in events if name == "think_delta"]
+    # Only the in-progress step's deltas are replayed, each once
+    assert deltas == ["thinking", "live"]
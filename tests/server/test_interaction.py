@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from app.task_store import TaskStore
+from server import FlowManager, InteractionChannel, Task, TaskManager
+
+
+@pytest.mark.asyncio
+async def test_waiter_wakes_once_on_response():
+    channel = InteractionChannel()
+    waiter = asyncio.create_task(channel.wait())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    channel.respond("yes")
+    assert await waiter == "yes"
+    # The answer is consumed; the next wait needs a new one
+    assert channel.responded is False
+
+
+@pytest.mark.asyncio
+async def test_response_before_wait_is_not_lost():
+    channel = InteractionChannel()
+    channel.respond("early")
+    assert await asyncio.wait_for(channel.wait(), 1) == "early"
+
+
+@pytest.mark.asyncio
+async def test_close_releases_waiter_with_none():
+    channel = InteractionChannel()
+    waiter = asyncio.create_task(channel.wait())
+    await asyncio.sleep(0)
+    channel.close()
+    assert await waiter is None
+    assert await channel.wait() is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("manager_class", [TaskManager, FlowManager])
+async def test_manager_interaction_and_termination(manager_class):
+    manager = manager_class(TaskStore(Task))
+    create = getattr(manager, "create_task", None) or manager.create_flow
+    task_id = create("prompt").id
+
+    waiter = asyncio.create_task(manager.wait_for_interaction(task_id))
+    await asyncio.sleep(0)
+    assert await manager.handle_interaction(task_id, "answer")
+    assert await waiter == "answer"
+
+    waiter = asyncio.create_task(manager.wait_for_interaction(task_id))
+    await asyncio.sleep(0)
+    terminate = getattr(manager, "terminate_task", None) or manager.terminate_flow
+    await terminate(task_id)
+    assert await waiter is None
+    assert task_id not in manager.interactions
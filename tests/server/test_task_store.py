@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.task_store import SQLiteTaskBackend, TaskStore
+from server import Task
+
+
+def make_task(n: int, session_id=None) -> Task:
+    return Task(
+        id=f"task-{n}",
+        prompt=f"prompt {n}",
+        created_at=datetime(2025, 1, 1) + timedelta(minutes=n),
+        status="pending",
+        session_id=session_id,
+    )
+
+
+def finish(store: TaskStore, task: Task):
+    task.status = "completed"
+    store.save(task)
+    store.release(task.id)
+
+
+def test_memory_store_evicts_least_recently_used_finished_tasks():
+    store = TaskStore(Task, max_items=2)
+    tasks = [make_task(n) for n in range(3)]
+    for task in tasks:
+        store.add(task)
+    # Running tasks are pinned, even beyond max_items
+    assert all(task.id in store for task in tasks)
+
+    for task in tasks:
+        finish(store, task)
+    assert "task-0" not in store
+    assert "task-2" in store
+
+
+def test_ttl_evicts_idle_tasks():
+    store = TaskStore(Task, ttl=0)
+    store.add(make_task(0))
+    assert "task-0" in store
+    finish(store, store["task-0"])
+    assert store.get("task-0") is None
+
+
+def test_list_is_paginated_newest_first():
+    store = TaskStore(Task)
+    for n in range(5):
+        store.add(make_task(n, session_id="s" if n % 2 else None))
+
+    page, total = store.list(limit=2, offset=1)
+    assert total == 5
+    assert [task.id for task in page] == ["task-3", "task-2"]
+
+    page, total = store.list(with_session=True)
+    assert total == 2
+    assert [task.id for task in page] == ["task-3", "task-1"]
+
+
+def test_sqlite_store_survives_restart_and_reloads_evicted_tasks(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = TaskStore(Task, SQLiteTaskBackend(path), max_items=1)
+    for n in range(3):
+        task = make_task(n, session_id="s")
+        store.add(task)
+        store.append_step(task, {"step": 0, "result": f"r{n}", "seq": 1})
+    for n in range(2):
+        finish(store, store[f"task-{n}"])
+
+    reloaded = store["task-0"]
+    assert reloaded.status == "completed"
+    assert reloaded.steps == [{"step": 0, "result": "r0", "seq": 1}]
+
+    restarted = TaskStore(Task, SQLiteTaskBackend(path))
+    page, total = restarted.list(limit=2, session_id="s")
+    assert total == 3
+    assert [task.id for task in page] == ["task-2", "task-1"]
+    # task-2 was still running when the first store went away
+    assert restarted["task-2"].status == "interrupted"
+    assert restarted["task-1"].created_at == make_task(1).created_at
+
+
+def test_sqlite_list_loads_steps_with_one_query(tmp_path):
+    backend = SQLiteTaskBackend(str(tmp_path / "tasks.db"))
+    store = TaskStore(Task, backend)
+    for n in range(5):
+        task = make_task(n)
+        store.add(task)
+        for seq in range(3):
+            store.append_step(task, {"step": seq, "result": f"r{n}.{seq}"})
+
+    queries = []
+    backend.flush()
+    backend._conn.set_trace_callback(queries.append)
+    records, total = backend.list(limit=10, offset=0)
+    backend._conn.set_trace_callback(None)
+
+    assert total == 5
+    assert [step["result"] for step in records[0]["steps"]] == [
+        "r4.0",
+        "r4.1",
+        "r4.2",
+    ]
+    assert sum("_steps" in query for query in queries) == 1
+    backend.close()
+
+
+def test_unknown_backend_is_rejected():
+    from app.task_store import create_task_store
+
+    with pytest.raises(ValueError):
+        create_task_store(Task, "tasks", backend="redis")
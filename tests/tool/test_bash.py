@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.exceptions import ToolError
+from app.tool.bash import Bash, _BashSession
+
+
+@pytest_asyncio.fixture
+async def session():
+    session = _BashSession()
+    await session.start()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+@pytest.mark.asyncio
+async def test_commands_return_as_soon_as_they_finish(session):
+    start = time.monotonic()
+    for i in range(10):
+        result = await session.run(f"echo {i}")
+        assert result.output == str(i)
+    assert time.monotonic() - start < 1.0
+
+
+@pytest.mark.asyncio
+async def test_stdout_and_stderr_are_separated(session):
+    result = await session.run("echo out; echo err >&2; printf partial")
+    assert result.output == "out\npartial"
+    assert result.error == "err"
+
+    # Nothing leaks into the next command
+    result = await session.run("true")
+    assert result.output == "" and result.error == ""
+
+
+@pytest.mark.asyncio
+async def test_output_is_streamed(session):
+    chunks = []
+    async for chunk in session.stream("echo first; sleep 0.3; echo second"):
+        chunks.append((time.monotonic(), chunk))
+    assert "".join(c for _, c in chunks) == "first\nsecond\n"
+    assert len(chunks) == 2 and chunks[1][0] - chunks[0][0] > 0.2
+
+
+@pytest.mark.asyncio
+async def test_output_is_capped_to_head_and_tail():
+    session = _BashSession(max_output_bytes=1000)
+    await session.start()
+    try:
+        result = await session.run("seq 1 100000")
+    finally:
+        await session.close()
+    assert result.output.startswith("1\n2\n3\n")
+    assert result.output.endswith("99999\n100000")
+    assert "bytes of output omitted" in result.output
+    assert len(result.output) < 1100
+
+
+@pytest.mark.asyncio
+async def test_timeout_requires_restart(session):
+    session._timeout = 0.2
+    with pytest.raises(ToolError, match="timed out"):
+        await session.run("sleep 5")
+    with pytest.raises(ToolError, match="must be restarted"):
+        await session.run("echo again")
+
+
+@pytest.mark.asyncio
+async def test_named_sessions_are_independent():
+    bash = Bash()
+    try:
+        await bash.execute("cd /tmp && export MARK=a", session="a")
+        assert (await bash.execute("pwd", session="a")).output == "/tmp"
+        assert (await bash.execute("echo $MARK", session="b")).output == ""
+
+        # A busy session does not block another one
+        slow = asyncio.create_task(bash.execute("sleep 0.5; echo slow", session="a"))
+        await asyncio.sleep(0.05)
+        assert (await bash.execute("echo fast", session="b")).output == "fast"
+        assert not slow.done()
+        assert (await slow).output == "slow"
+
+        # Background jobs can be started with a trailing `&`
+        result = await bash.execute("sleep 10 &", session="b")
+        assert result.error == ""
+    finally:
+        await bash.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_calls_share_one_session():
+    bash = Bash()
+    try:
+        results = await asyncio.gather(
+            bash.execute(command="echo one"), bash.execute(command="echo two")
+        )
+        assert [r.output for r in results] == ["one", "two"]
+        assert len(bash._sessions) == 1
+    finally:
+        await bash.cleanup()
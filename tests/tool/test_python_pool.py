@@ -0,0 +1,95 @@
+import pytest
+
+from app.tool.python_pool import PythonWorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = PythonWorkerPool(size=1, preload_modules=["wave"])
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_captures_stdout_and_errors(pool):
+    assert await pool.run("print(1 + 1)") == {"observation": "2\n", "success": True}
+
+    result = await pool.run("raise ValueError('boom')")
+    assert result == {"observation": "boom", "success": False}
+
+
+@pytest.mark.asyncio
+async def test_workers_are_reused_and_preloaded(pool):
+    code = "import os, sys; print(os.getpid(), 'wave' in sys.modules)"
+    first = await pool.run(code)
+    second = await pool.run(code)
+    assert first == second
+    assert first["observation"].split()[1] == "True"
+
+
+@pytest.mark.asyncio
+async def test_stateless_calls_do_not_share_globals(pool):
+    await pool.run("x = 1")
+    result = await pool.run("print(x)")
+    assert result["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_timeout_recycles_worker(pool):
+    pid = (await pool.run("import os; print(os.getpid())"))["observation"]
+
+    result = await pool.run("while True: pass", timeout=0.5)
+    assert result == {
+        "observation": "Execution timeout after 0.5 seconds",
+        "success": False,
+    }
+
+    after = await pool.run("import os; print(os.getpid())")
+    assert after["success"] is True
+    assert after["observation"] != pid
+
+
+@pytest.mark.asyncio
+async def test_sessions_keep_state_until_closed(pool):
+    await pool.run("data = [1, 2, 3]", session_id="a")
+    assert (await pool.run("print(sum(data))", session_id="a"))["observation"] == "6\n"
+    assert (await pool.run("print(data)", session_id="b"))["success"] is False
+
+    pool.close_session("a")
+    assert (await pool.run("print(data)", session_id="a"))["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_session_is_evicted():
+    pool = PythonWorkerPool(size=0, max_sessions=1)
+    try:
+        await pool.run("x = 1", session_id="a")
+        await pool.run("x = 2", session_id="b")
+        assert (await pool.run("print(x)", session_id="b"))["observation"] == "2\n"
+        assert (await pool.run("print(x)", session_id="a"))["success"] is False
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_preload_time_does_not_count_against_timeout(tmp_path, monkeypatch):
+    (tmp_path / "slow_preload.py").write_text("import time\ntime.sleep(1)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    pool = PythonWorkerPool(size=1, preload_modules=["slow_preload"])
+    try:
+        pool.warm_up()
+        code = "import sys; print('slow_preload' in sys.modules)"
+        result = await pool.run(code, timeout=0.5)
+        assert result == {"observation": "True\n", "success": True}
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_recycled_worker_is_replaced():
+    pool = PythonWorkerPool(size=1, max_calls_per_worker=1)
+    try:
+        await pool.run("pass")
+        assert len(pool._idle) == 1 and pool._idle[0].calls == 0
+    finally:
+        pool.shutdown()
@@ -0,0 +1,166 @@
+import pytest
+
+from app.config import config
+from app.exceptions import ToolError
+from app.tool.file_operators import LocalFileOperator
+from app.tool.str_replace_editor import StrReplaceEditor, _EditHistory, _Patch
+
+
+@pytest.fixture
+def editor():
+    return StrReplaceEditor()
+
+
+@pytest.fixture
+def numbered(tmp_path):
+    path = tmp_path / "numbered.txt"
+    path.write_text("\n".join(f"line {i}" for i in range(1, 21)) + "\n")
+    return path
+
+
+@pytest.mark.asyncio
+async def test_str_replace_shows_snippet_and_undoes(editor, numbered):
+    original = numbered.read_text()
+    result = await editor.execute(
+        command="str_replace",
+        path=str(numbered),
+        old_str="line 10\n",
+        new_str="line ten\nline ten and a half\n",
+    )
+
+    assert "line ten\nline ten and a half\nline 11" in numbered.read_text()
+    snippet = result.split("cat -n` on a snippet of")[1]
+    shown = [line.split("\t")[1] for line in snippet.splitlines()[1:] if "\t" in line]
+    assert shown == [
+        *[f"line {i}" for i in range(6, 10)],
+        "line ten",
+        "line ten and a half",
+        *[f"line {i}" for i in range(11, 16)],
+    ]
+    assert "     6\tline 6" in snippet
+
+    await editor.execute(command="undo_edit", path=str(numbered))
+    assert numbered.read_text() == original
+    with pytest.raises(ToolError, match="No edit history"):
+        await editor.execute(command="undo_edit", path=str(numbered))
+
+
+@pytest.mark.asyncio
+async def test_str_replace_requires_unique_match(editor, tmp_path):
+    path = tmp_path / "dup.txt"
+    path.write_text("a = 1\nb = 2\na = 1\n")
+
+    with pytest.raises(ToolError, match=r"in lines \[1, 3\]"):
+        await editor.execute(
+            command="str_replace", path=str(path), old_str="a = 1", new_str="a = 3"
+        )
+    with pytest.raises(ToolError, match="did not appear verbatim"):
+        await editor.execute(
+            command="str_replace", path=str(path), old_str="c = 3", new_str=""
+        )
+    assert path.read_text() == "a = 1\nb = 2\na = 1\n"
+
+
+@pytest.mark.asyncio
+async def test_inserts_and_undo_chain(editor, tmp_path):
+    path = tmp_path / "insert.txt"
+    path.write_text("one\ntwo\nthree")
+
+    await editor.execute(
+        command="insert", path=str(path), insert_line=0, new_str="zero"
+    )
+    await editor.execute(
+        command="insert", path=str(path), insert_line=2, new_str="one and a half"
+    )
+    await editor.execute(
+        command="insert", path=str(path), insert_line=5, new_str="four"
+    )
+    assert path.read_text() == "zero\none\none and a half\ntwo\nthree\nfour"
+
+    with pytest.raises(ToolError, match=r"range of lines of the file: \[0, 6\]"):
+        await editor.execute(
+            command="insert", path=str(path), insert_line=7, new_str="x"
+        )
+
+    for expected in [
+        "zero\none\none and a half\ntwo\nthree",
+        "zero\none\ntwo\nthree",
+        "one\ntwo\nthree",
+    ]:
+        await editor.execute(command="undo_edit", path=str(path))
+        assert path.read_text() == expected
+
+
+@pytest.mark.asyncio
+async def test_undo_refuses_externally_changed_file(editor, numbered):
+    await editor.execute(
+        command="str_replace", path=str(numbered), old_str="line 3\n", new_str="three\n"
+    )
+    numbered.write_text("rewritten\n")
+
+    with pytest.raises(ToolError, match="changed outside of this tool"):
+        await editor.execute(command="undo_edit", path=str(numbered))
+    assert numbered.read_text() == "rewritten\n"
+
+
+def test_history_is_bounded():
+    history = _EditHistory(max_bytes=10, max_edits=2)
+    history.push("a", _Patch(0, "aaaa", ""))
+    history.push("b", _Patch(0, "bbbb", ""))
+    history.push("a", _Patch(4, "cccc", ""))
+    # Over budget: the oldest edit overall goes first
+    assert history.size == 8 and len(history) == 2
+    assert history.pop("a").inserted == "cccc"
+    assert history.pop("a") is None
+
+    history.push("b", _Patch(0, "1", ""))
+    history.push("b", _Patch(0, "2", ""))
+    assert len(history) == 2  # max_edits per file
+    assert history.pop("b").inserted == "2"
+
+    # An edit too large to keep also drops the ones before it
+    history.push("b", _Patch(0, "x" * 11, ""))
+    assert history.pop("b") is None and history.size == 0
+
+
+@pytest.mark.asyncio
+async def test_files_over_size_limit_are_not_edited(editor, numbered, monkeypatch):
+    monkeypatch.setattr(config.editor, "max_file_size", 100)
+    with pytest.raises(ToolError, match="over the 100 byte limit"):
+        await editor.execute(
+            command="str_replace", path=str(numbered), old_str="line 1\n", new_str=""
+        )
+
+    # Viewing still works
+    result = await editor.execute(command="view", path=str(numbered), view_range=[2, 3])
+    assert "     2\tline 2\n     3\tline 3\n" in result
+
+
+@pytest.mark.asyncio
+async def test_ranged_view(editor, numbered):
+    result = await editor.execute(
+        command="view", path=str(numbered), view_range=[19, -1]
+    )
+    assert result.endswith("    19\tline 19\n    20\tline 20\n    21\t\n")
+
+    with pytest.raises(ToolError, match=r"lines of the file: \[1, 21\]"):
+        await editor.execute(command="view", path=str(numbered), view_range=[22, 23])
+    with pytest.raises(ToolError, match="number of lines in the file: `21`"):
+        await editor.execute(command="view", path=str(numbered), view_range=[1, 30])
+
+
+@pytest.mark.asyncio
+async def test_read_lines_follows_file_changes(tmp_path):
+    operator = LocalFileOperator()
+    path = tmp_path / "big.csv"
+    path.write_text("".join(f"{i},{i * i}\n" for i in range(100000)))
+
+    assert await operator.read_lines(path, 50001, 50002) == (
+        "50000,2500000000\n50001,2500100001",
+        100001,
+    )
+    text, _ = await operator.read_lines(path, max_bytes=10)
+    assert text == "0,0\n1,1\n2,"
+
+    path.write_text("a\r\nb\r\n")
+    assert await operator.read_lines(path, 1, 1) == ("a", 3)
@@ -0,0 +1,58 @@
+from app.llm import TokenCounter
+from app.tool import Terminate, ToolCollection
+from app.tool.base import BaseTool
+
+
+class EchoTool(BaseTool):
+    name: str = "echo"
+    description: str = "Echo the input"
+    parameters: dict = {"type": "object", "properties": {"text": {"type": "string"}}}
+
+    async def execute(self, text: str) -> str:
+        return text
+
+
+class CountingTokenizer:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text: str):
+        self.calls += 1
+        return text.split(",")
+
+
+def test_params_are_cached_until_tools_change():
+    tools = ToolCollection(Terminate())
+    first = tools.to_params()
+    assert tools.to_params() is first
+    assert tools.to_params().json == first.json
+
+    tools.add_tool(EchoTool())
+    second = tools.to_params()
+    assert second is not first
+    assert second.version > first.version
+    assert [p["function"]["name"] for p in second] == ["terminate", "echo"]
+
+    # A duplicate is skipped and keeps the cached params
+    tools.add_tool(EchoTool())
+    assert tools.to_params() is second
+
+
+def test_serialization_is_stable_across_collections():
+    a = ToolCollection(Terminate(), EchoTool()).to_params()
+    b = ToolCollection(Terminate(), EchoTool()).to_params()
+    assert a.json.encode() == b.json.encode()
+
+
+def test_token_cost_is_counted_once_per_version():
+    tokenizer = CountingTokenizer()
+    counter = TokenCounter(tokenizer, cache_size=0)
+    tools = ToolCollection(Terminate())
+
+    cost = tools.to_params().token_cost(counter)
+    assert tools.to_params().token_cost(counter) == cost
+    assert tokenizer.calls == 1
+
+    tools.add_tool(EchoTool())
+    assert tools.to_params().token_cost(counter) > cost
+    assert tokenizer.calls == 2